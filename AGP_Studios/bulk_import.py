@@ -0,0 +1,69 @@
+"""
+Bulk content import for RaOS.
+
+Imports an NDJSON file (one asset object per line) or a directory tree of text
+files into RaOS using batched requests over parallel connections.
+
+Usage:
+    python bulk_import.py posts.ndjson --username admin
+    python bulk_import.py ./blog --type blog --parallel 8 --chunk-size 500
+"""
+import argparse
+import getpass
+import os
+import sys
+import time
+
+from services.rapi_client import RaCoreClient, RaCoreClientPool
+from services.auth_service import AuthService
+from services.content_manager import ContentManager
+from services.bulk_content import BulkContentOperations
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk import content into RaOS")
+    parser.add_argument("source", help="NDJSON file or directory tree to import")
+    parser.add_argument("--server", default="ws://localhost:7077/ws", help="RaOS server WebSocket URL")
+    parser.add_argument("--username", required=True, help="RaOS username")
+    parser.add_argument("--type", default="post", help="Asset type for records/files without one")
+    parser.add_argument("--chunk-size", type=int, default=200, help="Assets per batched request")
+    parser.add_argument("--parallel", type=int, default=4, help="Batches in flight / connections")
+    args = parser.parse_args()
+
+    password = os.environ.get("RASTUDIO_PASSWORD") or getpass.getpass("Password: ")
+
+    rcore = RaCoreClient(args.server)
+    auth = AuthService(rcore)
+    if not auth.authenticate(args.username, password):
+        print("✗ Authentication failed")
+        return 1
+
+    content_mgr = ContentManager(rcore, auth)
+    pool = RaCoreClientPool.from_client(rcore, args.parallel)
+    bulk = BulkContentOperations(content_mgr, args.chunk_size, args.parallel, pool)
+
+    if os.path.isdir(args.source):
+        results = bulk.import_directory(args.source, args.type)
+    else:
+        results = bulk.import_ndjson(args.source, args.type)
+
+    start = time.monotonic()
+    succeeded = failed = 0
+    for result in results:
+        if result.success:
+            succeeded += 1
+        else:
+            failed += 1
+            print(f"✗ #{result.index} {result.title or ''}: {result.error}")
+
+        total = succeeded + failed
+        if total % 1000 == 0:
+            rate = total / max(time.monotonic() - start, 1e-6)
+            print(f"  {total} processed ({rate:.0f}/s)")
+
+    elapsed = time.monotonic() - start
+    print(f"✓ Imported {succeeded} assets, {failed} failed in {elapsed:.1f}s")
+    pool.close()
+    return 0 if failed == 0 else 2
+
+if __name__ == "__main__":
+    sys.exit(main())
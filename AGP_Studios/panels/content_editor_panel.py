@@ -4,9 +4,15 @@ Provides UI for fetching, editing, and uploading RaOS content assets.
 """
 from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QPushButton, 
                               QLabel, QLineEdit, QTextEdit, QListWidget, QGroupBox,
-                              QMessageBox, QFileDialog, QComboBox, QCheckBox, QSplitter)
-from PyQt6.QtCore import Qt
-from services.content_manager import ContentManager
+                              QMessageBox, QFileDialog, QComboBox, QCheckBox, QSplitter,
+                              QSpinBox, QListWidgetItem)
+from PyQt6.QtCore import Qt, QTimer, pyqtSignal
+from PyQt6.QtGui import QPixmap
+from services.content_manager import ContentManager, SAVE_OK, SAVE_CONFLICT
+from services.autosave import AutosaveWorker
+
+# Milliseconds without typing before the search runs
+SEARCH_DELAY_MS = 200
 
 class ContentEditorPanel(QWidget):
     """
@@ -14,9 +20,25 @@ class ContentEditorPanel(QWidget):
     Provides interface for content management and asset pipeline.
     """
     
+    # Emitted from the conversion pool's callback thread: (file path, error message or "")
+    conversion_finished = pyqtSignal(str, str)
+    # Emitted from the autosave worker thread: (asset ID, save status)
+    autosave_finished = pyqtSignal(str, str)
+    # Emitted from the analysis pool's callback thread: (file path, result dict or error message)
+    analysis_finished = pyqtSignal(str, object)
+    
     def __init__(self, content_manager: ContentManager):
         super().__init__()
         self.content_manager = content_manager
+        self._pending_uploads = {}  # file path -> (conversion future, upload options)
+        self.conversion_finished.connect(self._on_conversion_finished)
+        self.autosave = AutosaveWorker(content_manager, on_result=self.autosave_finished.emit)
+        self.autosave_finished.connect(self._on_autosave_finished)
+        self.analysis_finished.connect(self._on_analysis_finished)
+        self._analysis_results = []
+        self._analysis_remaining = 0
+        self._editing_asset = None  # ContentAsset currently open in the editor
+        self._loading = False  # Suppresses autosave while the editor is populated programmatically
         self._init_ui()
         
     def _init_ui(self):
@@ -63,6 +85,11 @@ class ContentEditorPanel(QWidget):
         self.upload_binary_btn.clicked.connect(self._on_upload_binary)
         action_layout.addWidget(self.upload_binary_btn)
         
+        self.analyze_files_btn = QPushButton("Analyze Files")
+        self.analyze_files_btn.setToolTip("Thumbnails, dimensions and near-duplicate detection, computed locally")
+        self.analyze_files_btn.clicked.connect(self._on_analyze_files)
+        action_layout.addWidget(self.analyze_files_btn)
+        
         controls_layout.addLayout(action_layout)
         controls_group.setLayout(controls_layout)
         layout.addWidget(controls_group)
@@ -74,10 +101,27 @@ class ContentEditorPanel(QWidget):
         list_group = QGroupBox("Content List")
         list_layout = QVBoxLayout()
         
+        self.search_input = QLineEdit()
+        self.search_input.setPlaceholderText("Search titles, bodies and metadata...")
+        self.search_input.setClearButtonEnabled(True)
+        # Search once typing pauses rather than on every keystroke
+        self._search_timer = QTimer(self)
+        self._search_timer.setSingleShot(True)
+        self._search_timer.setInterval(SEARCH_DELAY_MS)
+        self._search_timer.timeout.connect(lambda: self._on_search_changed(self.search_input.text()))
+        self.search_input.textChanged.connect(lambda _: self._search_timer.start())
+        list_layout.addWidget(self.search_input)
+        
         self.content_list = QListWidget()
         self.content_list.itemClicked.connect(self._on_content_selected)
         list_layout.addWidget(self.content_list)
         
+        # Ranked search results replace the content list while a query is active
+        self.search_results_list = QListWidget()
+        self.search_results_list.itemClicked.connect(self._on_content_selected)
+        self.search_results_list.setVisible(False)
+        list_layout.addWidget(self.search_results_list)
+        
         list_group.setLayout(list_layout)
         splitter.addWidget(list_group)
         
@@ -90,18 +134,23 @@ class ContentEditorPanel(QWidget):
         title_layout.addWidget(QLabel("Title:"))
         self.title_input = QLineEdit()
         self.title_input.setPlaceholderText("Enter content title...")
+        self.title_input.textChanged.connect(self._on_edited)
         title_layout.addWidget(self.title_input)
         editor_layout.addLayout(title_layout)
         
         # Content editor
         self.content_editor = QTextEdit()
         self.content_editor.setPlaceholderText("Enter or edit content here...")
+        self.content_editor.textChanged.connect(self._on_edited)
         editor_layout.addWidget(self.content_editor)
         
         # Asset pipeline options
         pipeline_layout = QHBoxLayout()
         self.compress_checkbox = QCheckBox("Compress on upload")
         self.compress_checkbox.setChecked(True)
+        self.compress_checkbox.setToolTip(
+            "Compress when beneficial - already-compressed formats (PNG, JPEG, MP4, MP3...) are skipped"
+        )
         pipeline_layout.addWidget(self.compress_checkbox)
         
         pipeline_layout.addWidget(QLabel("Convert to:"))
@@ -109,8 +158,32 @@ class ContentEditorPanel(QWidget):
         self.convert_format_combo.addItems(["None", "PNG", "JPEG", "WebP", "MP4", "WebM"])
         pipeline_layout.addWidget(self.convert_format_combo)
         
+        pipeline_layout.addWidget(QLabel("Quality:"))
+        self.quality_spin = QSpinBox()
+        self.quality_spin.setRange(1, 100)
+        self.quality_spin.setValue(85)
+        pipeline_layout.addWidget(self.quality_spin)
+        
+        pipeline_layout.addWidget(QLabel("Max size:"))
+        self.max_size_spin = QSpinBox()
+        self.max_size_spin.setRange(0, 16384)
+        self.max_size_spin.setSingleStep(256)
+        self.max_size_spin.setSpecialValueText("Original")
+        pipeline_layout.addWidget(self.max_size_spin)
+        
         editor_layout.addLayout(pipeline_layout)
         
+        # Local analysis preview
+        preview_layout = QHBoxLayout()
+        self.preview_label = QLabel()
+        self.preview_label.setFixedSize(128, 128)
+        self.preview_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        preview_layout.addWidget(self.preview_label)
+        self.analysis_label = QLabel()
+        self.analysis_label.setWordWrap(True)
+        preview_layout.addWidget(self.analysis_label, 1)
+        editor_layout.addLayout(preview_layout)
+        
         editor_group.setLayout(editor_layout)
         splitter.addWidget(editor_group)
         
@@ -124,57 +197,188 @@ class ContentEditorPanel(QWidget):
         
         # Store content data
         self.current_content_id = None
-        self.content_data = []
+        self._content_items = {}  # asset_id -> QListWidgetItem, mirrors the local content index
         
     def _on_type_changed(self, content_type: str):
-        """Handle content type filter change."""
-        self._on_refresh_content()
+        """Handle content type filter change (filters the local replica, no server round trip)."""
+        self._apply_type_filter()
+        self._on_search_changed(self.search_input.text())
     
-    def _on_refresh_content(self):
-        """Refresh content list."""
+    def _on_search_changed(self, query: str):
+        """Run a local full-text search and show ranked results."""
+        query = query.strip()
+        searching = bool(query)
+        self.content_list.setVisible(not searching)
+        self.search_results_list.setVisible(searching)
+        if not searching:
+            return
+        
         content_type = self.content_type_combo.currentText()
         filter_type = None if content_type == "All" else content_type.lower()
+        results = self.content_manager.search_content(query, filter_type)
         
-        content_list = self.content_manager.list_content(filter_type)
+        self.search_results_list.clear()
+        for content in results:
+            item = QListWidgetItem(self._format_content_item(content))
+            item.setData(Qt.ItemDataRole.UserRole, content.get('asset_id'))
+            self.search_results_list.addItem(item)
         
-        self.content_data = content_list
-        self.content_list.clear()
+        self.status_label.setText(f"{len(results)} result(s) for '{query}'")
+    
+    def _on_refresh_content(self):
+        """Refresh content list by applying only the changes since the last sync."""
+        changes = self.content_manager.sync_content_index()
+        if changes is None:
+            self.status_label.setText("Failed to refresh content list")
+            return
         
-        for content in content_list:
-            title = content.get('title', 'Untitled')
-            ctype = content.get('asset_type', 'unknown')
-            self.content_list.addItem(f"{title} [{ctype}]")
+        index = self.content_manager.content_index
+        for asset_id in changes.removed:
+            item = self._content_items.pop(asset_id, None)
+            if item is not None:
+                self.content_list.takeItem(self.content_list.row(item))
+        
+        for asset_id in changes.updated:
+            item = self._content_items.get(asset_id)
+            if item is not None:
+                item.setText(self._format_content_item(index.get(asset_id)))
+        
+        for asset_id in changes.added:
+            item = QListWidgetItem(self._format_content_item(index.get(asset_id)))
+            item.setData(Qt.ItemDataRole.UserRole, asset_id)
+            self.content_list.addItem(item)
+            self._content_items[asset_id] = item
+        
+        # First refresh of a persisted replica: populate rows not covered by the delta
+        if len(self._content_items) < len(index):
+            for asset_id, content in index.items.items():
+                if asset_id not in self._content_items:
+                    item = QListWidgetItem(self._format_content_item(content))
+                    item.setData(Qt.ItemDataRole.UserRole, asset_id)
+                    self.content_list.addItem(item)
+                    self._content_items[asset_id] = item
+        
+        self._apply_type_filter()
+        self.status_label.setText(
+            f"Loaded {len(index)} content items "
+            f"(+{len(changes.added)} ~{len(changes.updated)} -{len(changes.removed)})"
+        )
+    
+    def _apply_type_filter(self):
+        """Show only list rows matching the selected content type."""
+        content_type = self.content_type_combo.currentText()
+        filter_type = None if content_type == "All" else content_type.lower()
         
-        self.status_label.setText(f"Loaded {len(content_list)} content items")
+        index = self.content_manager.content_index
+        for asset_id, item in self._content_items.items():
+            content = index.get(asset_id) or {}
+            item.setHidden(filter_type is not None and content.get('asset_type') != filter_type)
     
-    def _on_content_selected(self):
+    def _format_content_item(self, content) -> str:
+        """Format a content list row."""
+        content = content or {}
+        title = content.get('title', 'Untitled')
+        ctype = content.get('asset_type', 'unknown')
+        return f"{title} [{ctype}]"
+    
+    def _on_content_selected(self, current_item=None):
         """Handle content selection."""
-        current_row = self.content_list.currentRow()
+        if current_item is None:
+            current_item = self.content_list.currentItem()
         
-        if current_row >= 0 and current_row < len(self.content_data):
-            content_meta = self.content_data[current_row]
-            content_id = content_meta.get('asset_id')
+        if current_item is not None:
+            content_id = current_item.data(Qt.ItemDataRole.UserRole)
+            if content_id == self.current_content_id and self._editing_asset is not None:
+                return
+            
+            # Save edits of the previous asset right away instead of after the debounce
+            self.autosave.flush()
             
             # Fetch full content
             content = self.content_manager.fetch_content(content_id)
             
             if content:
-                self.current_content_id = content_id
-                self.title_input.setText(content.title)
-                self.content_editor.setPlainText(content.content)
+                self._load_into_editor(content)
                 self.status_label.setText(f"Loaded: {content.title}")
             else:
                 QMessageBox.warning(self, "Error", "Failed to load content")
     
+    def _load_into_editor(self, content):
+        """Show an asset in the editor without triggering autosave."""
+        self._loading = True
+        try:
+            self.current_content_id = content.asset_id if content else None
+            self._editing_asset = content
+            self.title_input.setText(content.title if content else "")
+            self.content_editor.setPlainText(content.content if content else "")
+        finally:
+            self._loading = False
+    
+    def _on_edited(self):
+        """Queue a debounced background save of the edited content."""
+        if self._loading or self._editing_asset is None:
+            return
+        
+        title = self.title_input.text().strip()
+        if not title:
+            return
+        
+        if self.autosave.is_conflicted(self._editing_asset.asset_id):
+            self.status_label.setText("Conflict - changes not saved until resolved")
+            return
+        
+        self.autosave.schedule(self._editing_asset, title, self.content_editor.toPlainText())
+        self.status_label.setText("Unsaved changes...")
+    
+    def _on_autosave_finished(self, asset_id: str, status: str):
+        """Report the outcome of a background save."""
+        if status == SAVE_OK:
+            if not self.autosave.has_pending(asset_id):
+                self.status_label.setText("All changes saved")
+            item = self._content_items.get(asset_id)
+            if item is not None and self._editing_asset is not None and self._editing_asset.asset_id == asset_id:
+                item.setText(self._format_content_item(self._editing_asset.to_dict()))
+        elif status == SAVE_CONFLICT:
+            self._on_save_conflict(asset_id)
+        else:
+            self.status_label.setText("Autosave failed - will retry")
+    
+    def _on_save_conflict(self, asset_id: str):
+        """Let the user choose between keeping their version and reloading the server's."""
+        if self._editing_asset is None or self._editing_asset.asset_id != asset_id:
+            self.status_label.setText("Conflict on a previously edited item - reload it to continue")
+            return
+        
+        reply = QMessageBox.question(
+            self,
+            "Edit Conflict",
+            "This content was changed by someone else since you opened it.\n\n"
+            "Overwrite it with your version? Choose No to reload the latest version.",
+            QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No
+        )
+        
+        if reply == QMessageBox.StandardButton.Yes:
+            # Save what is in the editor now, including text typed after the conflict
+            if self.autosave.resolve_conflict(self._editing_asset, self.title_input.text().strip() or None,
+                                              self.content_editor.toPlainText()):
+                self.status_label.setText("Your version was saved")
+            else:
+                self.status_label.setText("Failed to save your version")
+        else:
+            self.autosave.discard(asset_id)
+            self.content_manager.cache.invalidate("content", asset_id)
+            content = self.content_manager.fetch_content(asset_id)
+            self._load_into_editor(content)
+            self.status_label.setText("Reloaded latest version")
+    
     def _on_new_content(self):
         """Create new content."""
-        self.current_content_id = None
-        self.title_input.clear()
-        self.content_editor.clear()
+        self.autosave.flush()
+        self._load_into_editor(None)
         self.status_label.setText("New content - enter title and content")
     
     def _on_save_content(self):
-        """Save current content."""
+        """Save current content (existing content is saved in the background)."""
         title = self.title_input.text().strip()
         content = self.content_editor.toPlainText()
         
@@ -182,19 +386,14 @@ class ContentEditorPanel(QWidget):
             QMessageBox.warning(self, "Error", "Please enter a title")
             return
         
-        if self.current_content_id:
-            # Update existing content
-            current_content = self.content_manager.current_asset
-            if current_content:
-                current_content.title = title
-                current_content.content = content
-                
-                if self.content_manager.update_content(current_content):
-                    self.status_label.setText("Content updated successfully")
-                    QMessageBox.information(self, "Success", "Content updated!")
-                    self._on_refresh_content()
-                else:
-                    QMessageBox.critical(self, "Error", "Failed to update content")
+        if self.current_content_id and self._editing_asset is not None:
+            # Update existing content: save now instead of waiting for the debounce
+            if self.autosave.is_conflicted(self.current_content_id):
+                self._on_save_conflict(self.current_content_id)
+                return
+            self.autosave.schedule(self._editing_asset, title, content)
+            self.autosave.flush()
+            self.status_label.setText("Saving...")
         else:
             # Create new content
             content_type = self.content_type_combo.currentText().lower()
@@ -205,8 +404,8 @@ class ContentEditorPanel(QWidget):
             
             if new_content:
                 self.current_content_id = new_content.asset_id
+                self._editing_asset = new_content
                 self.status_label.setText("Content created successfully")
-                QMessageBox.information(self, "Success", "Content created!")
                 self._on_refresh_content()
             else:
                 QMessageBox.critical(self, "Error", "Failed to create content")
@@ -225,6 +424,7 @@ class ContentEditorPanel(QWidget):
         )
         
         if reply == QMessageBox.StandardButton.Yes:
+            self.autosave.discard(self.current_content_id)
             if self.content_manager.delete_content(self.current_content_id):
                 self.status_label.setText("Content deleted")
                 self._on_new_content()
@@ -234,53 +434,182 @@ class ContentEditorPanel(QWidget):
                 QMessageBox.critical(self, "Error", "Failed to delete content")
     
     def _on_upload_binary(self):
-        """Upload binary asset with asset pipeline."""
-        file_path, _ = QFileDialog.getOpenFileName(
+        """Upload binary assets with asset pipeline."""
+        file_paths, _ = QFileDialog.getOpenFileNames(
             self,
-            "Select Binary Asset",
+            "Select Binary Assets",
             "",
             "All Files (*);;Images (*.png *.jpg *.jpeg);;Videos (*.mp4 *.avi);;Audio (*.mp3 *.wav)"
         )
         
-        if not file_path:
+        if not file_paths:
             return
         
-        try:
-            with open(file_path, 'rb') as f:
-                file_data = f.read()
-            
-            import os
-            filename = os.path.basename(file_path)
-            asset_type = self._detect_asset_type(filename)
+        # Get pipeline options
+        compress = self.compress_checkbox.isChecked()
+        convert_format = self.convert_format_combo.currentText()
+        if convert_format == "None":
+            convert_format = None
+        else:
+            convert_format = convert_format.lower()
+        convert_options = {
+            "quality": self.quality_spin.value(),
+            "max_size": self.max_size_spin.value() or None
+        }
+        
+        options = (compress, convert_format, convert_options)
+        to_convert = []
+        for file_path in file_paths:
+            try:
+                with open(file_path, 'rb') as f:
+                    file_data = f.read()
+            except Exception as e:
+                QMessageBox.critical(self, "Error", f"Failed to read file: {e}")
+                continue
             
-            # Get pipeline options
-            compress = self.compress_checkbox.isChecked()
-            convert_format = self.convert_format_combo.currentText()
-            if convert_format == "None":
-                convert_format = None
+            if (convert_format and self._detect_asset_type(file_path) == 'image'
+                    and self.content_manager.image_converter.supports(convert_format)):
+                to_convert.append((file_path, file_data))
             else:
-                convert_format = convert_format.lower()
-            
-            asset_id = self.content_manager.upload_binary_asset(
-                asset_type,
-                filename,
-                file_data,
-                compress=compress,
-                convert_format=convert_format
-            )
+                self._upload_file(file_path, file_data, options, notify=len(file_paths) == 1)
+        
+        if to_convert:
+            # Convert in the background process pool; uploads resume in _on_conversion_finished
+            self.status_label.setText(f"Converting {len(to_convert)} image(s) to {convert_format}...")
+            futures = self.content_manager.convert_batch(to_convert, convert_format, **convert_options)
+            for file_path, future in futures.items():
+                # Registered first: a future that is already done runs the callback right away
+                self._pending_uploads[file_path] = (future, options)
+                future.add_done_callback(
+                    lambda f, path=file_path: self.conversion_finished.emit(
+                        path, "" if f.exception() is None else str(f.exception()))
+                )
+    
+    def _on_conversion_finished(self, file_path: str, error: str):
+        """Upload an image once its background conversion is done."""
+        pending = self._pending_uploads.pop(file_path, None)
+        if pending is None:
+            return
+        
+        if error:
+            QMessageBox.critical(self, "Error", f"Failed to convert {file_path}: {error}")
+            return
+        
+        future, options = pending
+        self._upload_file(file_path, future.result(), options, converted=True,
+                          notify=not self._pending_uploads)
+    
+    def _upload_file(self, file_path: str, file_data: bytes, options, converted: bool = False,
+                     notify: bool = True):
+        """Upload one binary asset and report the outcome."""
+        import os
+        compress, convert_format, convert_options = options
+        filename = os.path.basename(file_path)
+        asset_type = self._detect_asset_type(filename)
+        
+        asset_id = self.content_manager.upload_binary_asset(
+            asset_type,
+            filename,
+            file_data,
+            compress=compress,
+            convert_format=convert_format,
+            convert_options=convert_options,
+            converted=converted
+        )
+        
+        if asset_id:
+            stats = self.content_manager.compression_stats.get(asset_id, {})
+            if stats.get("codec"):
+                compression_info = (f"{stats['codec']}-{stats['level']}, "
+                                    f"saved {stats['bytes_saved']} bytes")
+            else:
+                compression_info = f"not compressed ({stats.get('reason', 'disabled')})"
             
-            if asset_id:
-                self.status_label.setText(f"Binary asset uploaded: {filename}")
+            self.status_label.setText(f"Binary asset uploaded: {filename} - {compression_info}")
+            if notify:
                 QMessageBox.information(
                     self,
                     "Success",
-                    f"Asset '{filename}' uploaded successfully!\nAsset ID: {asset_id}"
+                    f"Asset '{filename}' uploaded successfully!\nAsset ID: {asset_id}\n"
+                    f"Compression: {compression_info}"
                 )
-            else:
-                QMessageBox.critical(self, "Error", "Failed to upload binary asset")
-                
-        except Exception as e:
-            QMessageBox.critical(self, "Error", f"Failed to read file: {e}")
+        else:
+            QMessageBox.critical(self, "Error", f"Failed to upload binary asset '{filename}'")
+    
+    def _on_analyze_files(self):
+        """Analyze local files in the background and report near-duplicate images."""
+        file_paths, _ = QFileDialog.getOpenFileNames(
+            self,
+            "Select Files to Analyze",
+            "",
+            "All Files (*);;Images (*.png *.jpg *.jpeg *.gif *.bmp *.webp);;Audio (*.wav)"
+        )
+        
+        if not file_paths:
+            return
+        
+        self._analysis_results = []
+        self._analysis_remaining = len(file_paths)
+        self.status_label.setText(f"Analyzing {len(file_paths)} file(s)...")
+        
+        futures = self.content_manager.analyze_local(file_paths)
+        for file_path, future in futures.items():
+            future.add_done_callback(lambda f, path=file_path: self._emit_analysis(path, f))
+    
+    def _emit_analysis(self, file_path: str, future):
+        """Forward a finished analysis future to the UI thread."""
+        if future.cancelled():
+            return
+        error = future.exception()
+        self.analysis_finished.emit(file_path, str(error) if error else future.result())
+    
+    def _on_analysis_finished(self, file_path: str, result):
+        """Show a finished analysis result; summarize once all files are done."""
+        import os
+        self._analysis_remaining -= 1
+        
+        if isinstance(result, dict):
+            self._analysis_results.append(result)
+            self._show_analysis(result)
+        else:
+            self.analysis_label.setText(f"{os.path.basename(file_path)}: analysis failed ({result})")
+        
+        if self._analysis_remaining > 0:
+            self.status_label.setText(f"Analyzing... {self._analysis_remaining} file(s) remaining")
+            return
+        
+        duplicates = self.content_manager.find_duplicate_images(self._analysis_results)
+        self.status_label.setText(
+            f"Analyzed {len(self._analysis_results)} file(s) - "
+            f"{len(duplicates)} near-duplicate group(s)"
+        )
+        if duplicates:
+            groups = "\n\n".join("\n".join(os.path.basename(path) for path in group)
+                                 for group in duplicates[:10])
+            QMessageBox.information(self, "Near-Duplicates", f"Similar images found:\n\n{groups}")
+    
+    def _show_analysis(self, result: dict):
+        """Show the thumbnail and summary of one analysis result."""
+        import os
+        details = [os.path.basename(result["path"]), f"{result['size']} bytes"]
+        if result.get("unsupported"):
+            details.append(f"not analyzed: {result['unsupported']}")
+        elif result.get("kind") == "image":
+            details.append(f"{result.get('width')}x{result.get('height')} {result.get('mode', '')}")
+            if result.get("mean_color"):
+                details.append("mean color " + ", ".join(str(int(c)) for c in result["mean_color"]))
+        elif result.get("kind") == "audio":
+            details.append(f"{result.get('duration', 0):.2f}s, {result.get('sample_rate')} Hz, "
+                           f"{result.get('channels')} channel(s)")
+        if result.get("error"):
+            details.append(f"error: {result['error']}")
+        self.analysis_label.setText("\n".join(details))
+        
+        thumbnail = result.get("thumbnail")
+        if thumbnail and os.path.exists(thumbnail):
+            self.preview_label.setPixmap(QPixmap(thumbnail))
+        else:
+            self.preview_label.clear()
     
     def _detect_asset_type(self, filename: str) -> str:
         """Detect asset type from filename."""
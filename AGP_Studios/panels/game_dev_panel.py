@@ -2,11 +2,23 @@
 Game Development Panel for RaOS IDE functionality.
 Provides UI for game project management, scene editing, and asset management.
 """
+import threading
 from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QPushButton, 
                               QLabel, QLineEdit, QTextEdit, QListWidget, QSplitter,
-                              QMessageBox, QFileDialog, QGroupBox)
-from PyQt6.QtCore import Qt
-from services.game_project_manager import GameProjectManager
+                              QMessageBox, QFileDialog, QGroupBox, QComboBox, QListWidgetItem)
+from PyQt6.QtCore import Qt, pyqtSignal
+from PyQt6.QtGui import QKeySequence, QShortcut
+from services.game_project_manager import GameProjectManager, PROJECT_CHANGES_MERGED, CONFLICT_TAKE_REMOTE
+from services.project_workspace import entity_key
+from services.project_history import changed_kinds
+from services.compression_policy import CompressionPolicy
+from services.import_pipeline import ImportPipeline
+from services.module_bus import ModuleBus
+from services.upload_queue import (UploadQueue, UPLOAD_QUEUED, UPLOAD_STARTED, UPLOAD_RETRYING,
+                                   UPLOAD_COMPLETED, UPLOAD_FAILED, UPLOAD_CANCELLED, UPLOAD_QUEUE_IDLE)
+
+# Upper bound on rows in the asset list; narrow the filter to see the rest
+MAX_LISTED_ASSETS = 5000
 
 class GameDevPanel(QWidget):
     """
@@ -14,9 +26,35 @@ class GameDevPanel(QWidget):
     Provides interface for creating/loading games, managing assets, and editing content.
     """
     
+    # Emitted from import pipeline threads: ImportProgress snapshot
+    import_progress = pyqtSignal(object)
+    # Emitted from the import thread when done: list of ImportItem
+    import_finished = pyqtSignal(object)
+    # Re-emits upload queue ModuleBus events on the UI thread: (event name, payload)
+    upload_event = pyqtSignal(str, object)
+    # Re-emits merged upstream project changes on the UI thread: PROJECT_CHANGES_MERGED payload
+    project_changes = pyqtSignal(object)
+    # Carries server event handlers of the project manager to the UI thread: callable()
+    project_event = pyqtSignal(object)
+    
     def __init__(self, game_project_manager: GameProjectManager):
         super().__init__()
         self.game_project_manager = game_project_manager
+        self._import_pipeline = None  # ImportPipeline while a folder import runs
+        self._asset_items = {}  # Asset key -> QListWidgetItem of listed assets
+        self.import_progress.connect(self._on_import_progress)
+        self.import_finished.connect(self._on_import_finished)
+        self.upload_queue = UploadQueue(game_project_manager, detect_type=self._detect_asset_type)
+        self.upload_event.connect(self._on_upload_event)
+        for event_name in (UPLOAD_QUEUED, UPLOAD_STARTED, UPLOAD_RETRYING, UPLOAD_COMPLETED,
+                           UPLOAD_FAILED, UPLOAD_CANCELLED, UPLOAD_QUEUE_IDLE):
+            ModuleBus.subscribe(event_name, self._forward_upload_event)
+        self.project_changes.connect(self._on_project_changes)
+        # Upstream changes are merged here, where the project is edited, so a merge cannot
+        # interleave with an edit (events arrive on whichever thread called send())
+        self.project_event.connect(self._run_project_event)
+        game_project_manager.event_dispatcher = self.project_event.emit
+        ModuleBus.subscribe(PROJECT_CHANGES_MERGED, self._forward_project_changes)
         self._init_ui()
         
     def _init_ui(self):
@@ -60,6 +98,22 @@ class GameDevPanel(QWidget):
         self.sync_assets_btn.clicked.connect(self._on_sync_assets)
         btn_layout.addWidget(self.sync_assets_btn)
         
+        self.validate_btn = QPushButton("Validate")
+        self.validate_btn.setToolTip("Check changed scenes/scripts for missing assets and find unused assets")
+        self.validate_btn.clicked.connect(self._on_validate_project)
+        btn_layout.addWidget(self.validate_btn)
+        
+        self.undo_btn = QPushButton("Undo")
+        self.undo_btn.clicked.connect(self._on_undo)
+        btn_layout.addWidget(self.undo_btn)
+        
+        self.redo_btn = QPushButton("Redo")
+        self.redo_btn.clicked.connect(self._on_redo)
+        btn_layout.addWidget(self.redo_btn)
+        
+        QShortcut(QKeySequence.StandardKey.Undo, self, activated=self._on_undo)
+        QShortcut(QKeySequence.StandardKey.Redo, self, activated=self._on_redo)
+        
         project_layout.addLayout(btn_layout)
         project_group.setLayout(project_layout)
         layout.addWidget(project_group)
@@ -71,6 +125,17 @@ class GameDevPanel(QWidget):
         assets_group = QGroupBox("Assets")
         assets_layout = QVBoxLayout()
         
+        filter_layout = QHBoxLayout()
+        self.asset_filter_input = QLineEdit()
+        self.asset_filter_input.setPlaceholderText("Filter assets...")
+        self.asset_filter_input.textChanged.connect(self._refresh_assets_list)
+        filter_layout.addWidget(self.asset_filter_input)
+        self.asset_type_combo = QComboBox()
+        self.asset_type_combo.addItem("All Types")
+        self.asset_type_combo.currentTextChanged.connect(self._refresh_assets_list)
+        filter_layout.addWidget(self.asset_type_combo)
+        assets_layout.addLayout(filter_layout)
+        
         self.assets_list = QListWidget()
         assets_layout.addWidget(self.assets_list)
         
@@ -79,6 +144,14 @@ class GameDevPanel(QWidget):
         self.add_asset_btn.clicked.connect(self._on_add_asset)
         asset_btn_layout.addWidget(self.add_asset_btn)
         
+        self.pause_uploads_btn = QPushButton("Pause Uploads")
+        self.pause_uploads_btn.clicked.connect(self._on_pause_uploads)
+        asset_btn_layout.addWidget(self.pause_uploads_btn)
+        
+        self.import_folder_btn = QPushButton("Import Folder")
+        self.import_folder_btn.clicked.connect(self._on_import_folder)
+        asset_btn_layout.addWidget(self.import_folder_btn)
+        
         self.remove_asset_btn = QPushButton("Remove Asset")
         self.remove_asset_btn.clicked.connect(self._on_remove_asset)
         asset_btn_layout.addWidget(self.remove_asset_btn)
@@ -105,6 +178,7 @@ class GameDevPanel(QWidget):
         layout.addWidget(self.status_label)
         
         self.setLayout(layout)
+        self._update_history_buttons()
         
     def _on_new_project(self):
         """Handle new project creation."""
@@ -158,67 +232,322 @@ class GameDevPanel(QWidget):
         """Handle asset synchronization."""
         if self.game_project_manager.sync_assets():
             self._refresh_assets_list()
+            self._update_history_buttons()
             self.status_label.setText("Assets synchronized")
             QMessageBox.information(self, "Success", "Assets synchronized!")
         else:
             QMessageBox.critical(self, "Error", "Failed to sync assets.")
     
+    def _on_validate_project(self):
+        """Report missing references and possibly unreferenced assets."""
+        result = self.game_project_manager.validate_project()
+        if result is None:
+            QMessageBox.warning(self, "Error", "Please create or load a project first")
+            return
+        
+        unresolved = result["unresolved"]
+        unused = result["unreferenced_assets"]
+        self.status_label.setText(
+            f"Validated {result['checked']} changed entities - {len(unresolved)} with missing references, "
+            f"{len(unused)} possibly unreferenced asset(s)"
+        )
+        
+        if unresolved:
+            details = "\n".join(f"{node}: {', '.join(refs[:5])}" for node, refs in list(unresolved.items())[:20])
+            QMessageBox.warning(self, "Missing References", f"Referenced files not in the project:\n\n{details}")
+        
+        if unused:
+            names = "\n".join(node.split(":", 1)[1] for node in unused[:20])
+            more = f"\n... and {len(unused) - 20} more" if len(unused) > 20 else ""
+            QMessageBox.information(
+                self,
+                "Possibly Unreferenced Assets",
+                f"{len(unused)} asset(s) were not found by name in any scene or script:\n\n{names}{more}\n\n"
+                "This is a heuristic: assets referenced by computed names are listed as well. "
+                "Check before removing them."
+            )
+    
     def _on_add_asset(self):
-        """Handle adding an asset."""
-        file_path, _ = QFileDialog.getOpenFileName(
+        """Queue selected asset files for background upload."""
+        if not self.game_project_manager.current_project:
+            QMessageBox.warning(self, "Error", "Please create or load a project first")
+            return
+        
+        file_paths, _ = QFileDialog.getOpenFileNames(
             self,
-            "Select Asset File",
+            "Select Asset Files",
             "",
             "All Files (*);;Images (*.png *.jpg *.jpeg);;Audio (*.wav *.mp3);;Models (*.obj *.fbx)"
         )
         
-        if file_path:
-            try:
-                with open(file_path, 'rb') as f:
-                    asset_data = f.read()
-                
-                import os
-                asset_name = os.path.basename(file_path)
-                asset_type = self._detect_asset_type(asset_name)
-                
-                if self.game_project_manager.add_asset(asset_name, asset_type, asset_data):
-                    self._refresh_assets_list()
-                    self.status_label.setText(f"Asset added: {asset_name}")
-                    QMessageBox.information(self, "Success", f"Asset '{asset_name}' added!")
-                else:
-                    QMessageBox.critical(self, "Error", "Failed to add asset.")
-                    
-            except Exception as e:
-                QMessageBox.critical(self, "Error", f"Failed to read asset file: {e}")
+        if file_paths:
+            self.upload_queue.enqueue_files(file_paths)
+    
+    def _on_pause_uploads(self):
+        """Toggle pausing of the upload queue."""
+        if self.upload_queue.paused:
+            self.upload_queue.resume()
+            self.pause_uploads_btn.setText("Pause Uploads")
+        else:
+            self.upload_queue.pause()
+            self.pause_uploads_btn.setText("Resume Uploads")
+        self._show_upload_stats(self.upload_queue.stats())
+    
+    def _forward_upload_event(self, event):
+        """ModuleBus handler; runs on upload worker threads."""
+        if event.sender is self.upload_queue:
+            self.upload_event.emit(event.name, event.payload)
+    
+    def _on_upload_event(self, event_name: str, payload):
+        """Show upload progress and add completed assets to the list."""
+        job = payload.get("job", {})
+        project = self.game_project_manager.current_project
+        if event_name == UPLOAD_COMPLETED:
+            info = job.get("asset_info") or {}
+            if project and job.get("project_id") == project.project_id and self._matches_filter(info):
+                self._add_asset_item(info)
+        elif event_name == UPLOAD_FAILED:
+            self.status_label.setText(f"Upload failed: {job.get('name')} - {job.get('error')}")
+            return
+        elif event_name == UPLOAD_QUEUE_IDLE:
+            stats = payload["stats"]
+            self.upload_queue.clear_finished()
+            self.game_project_manager.checkpoint("Upload Assets", changed_kinds(["assets"]))
+            self._update_history_buttons()
+            self.status_label.setText(
+                f"Uploads finished: {stats['completed']} uploaded, {stats['failed']} failed"
+            )
+            return
+        self._show_upload_stats(payload["stats"])
+    
+    def _show_upload_stats(self, stats):
+        """Show upload queue counts and progress."""
+        finished = stats["completed"] + stats["failed"] + stats["cancelled"]
+        total = finished + stats["queued"] + stats["uploading"] + stats["retrying"]
+        state = "Paused" if stats["paused"] else "Uploading"
+        percent = 100 * stats["bytes_done"] // stats["bytes_total"] if stats["bytes_total"] else 0
+        self.status_label.setText(
+            f"{state} {finished}/{total} assets ({percent}%) - "
+            f"{stats['uploading']} active, {stats['retrying']} retrying"
+        )
+    
+    def _on_import_folder(self):
+        """Import a folder tree in the background, or cancel a running import."""
+        if self._import_pipeline is not None:
+            self._import_pipeline.cancel()
+            self.status_label.setText("Cancelling import...")
+            return
+        
+        if not self.game_project_manager.current_project:
+            QMessageBox.warning(self, "Error", "Please create or load a project first")
+            return
+        
+        folder = QFileDialog.getExistingDirectory(self, "Select Asset Folder")
+        if not folder:
+            return
+        
+        pipeline = ImportPipeline(
+            self.game_project_manager,
+            self._detect_asset_type,
+            compression_policy=CompressionPolicy(),
+            on_progress=self.import_progress.emit
+        )
+        self._import_pipeline = pipeline
+        self.import_folder_btn.setText("Cancel Import")
+        self.status_label.setText(f"Importing {folder}...")
+        
+        threading.Thread(
+            target=lambda: self.import_finished.emit(pipeline.import_directory(folder)),
+            name="GameDevPanel-import",
+            daemon=True
+        ).start()
+    
+    def _on_import_progress(self, progress):
+        """Show import throughput and ETA."""
+        files = f"{progress.files_done}/{progress.files_total}"
+        if progress.scanning:
+            files += "+"
+        eta = "estimating" if progress.eta is None else f"{progress.eta:.0f}s"
+        self.status_label.setText(
+            f"Importing {files} files - {progress.throughput / (1024 * 1024):.1f} MB/s, "
+            f"{progress.files_per_second:.1f} files/s - ETA {eta}"
+        )
+    
+    def _on_import_finished(self, items):
+        """Summarize a finished folder import."""
+        self._import_pipeline = None
+        self.import_folder_btn.setText("Import Folder")
+        self.game_project_manager.checkpoint("Import Folder", changed_kinds(["assets"]))
+        self._refresh_assets_list()
+        self._update_history_buttons()
+        
+        uploaded = sum(1 for item in items if item.asset_info is not None)
+        skipped = sum(1 for item in items if item.skipped)
+        failed = [item for item in items if item.error is not None]
+        self.status_label.setText(
+            f"Import finished: {uploaded} uploaded, {skipped} duplicate(s) skipped, {len(failed)} failed"
+        )
+        if failed:
+            details = "\n".join(f"{item.name}: {item.error}" for item in failed[:20])
+            QMessageBox.warning(self, "Import Finished", f"{len(failed)} file(s) failed:\n\n{details}")
     
     def _on_remove_asset(self):
         """Handle removing an asset."""
         current_item = self.assets_list.currentItem()
-        if current_item:
+        project = self.game_project_manager.current_project
+        if current_item and project:
+            asset_id, name = current_item.data(Qt.ItemDataRole.UserRole) or (None, None)
             asset_name = current_item.text()
-            # Remove from current project
-            if self.game_project_manager.current_project:
-                self.game_project_manager.current_project.assets = [
-                    a for a in self.game_project_manager.current_project.assets 
-                    if a.get('name') != asset_name
-                ]
-                self._refresh_assets_list()
-                self.status_label.setText(f"Asset removed: {asset_name}")
+            assets = project.assets.copy()
+            if asset_id and assets.discard(asset_id):
+                project.assets = assets
+            else:
+                project.assets = [a for a in project.assets if a.get('name') != name]
+            self.game_project_manager.checkpoint(f"Remove {asset_name}", {"assets": set()})
+            self._refresh_assets_list()
+            self._update_history_buttons()
+            self.status_label.setText(f"Asset removed: {asset_name}")
+    
+    def _on_undo(self):
+        """Revert the last project edit."""
+        label = self.game_project_manager.history.undo_label()
+        changes = self.game_project_manager.undo()
+        if changes is not None:
+            self._after_history_change(changes)
+            self.status_label.setText(f"Undone: {label} ({changes.count()} entities changed)")
+    
+    def _on_redo(self):
+        """Re-apply the last undone project edit."""
+        label = self.game_project_manager.history.redo_label()
+        changes = self.game_project_manager.redo()
+        if changes is not None:
+            self._after_history_change(changes)
+            self.status_label.setText(f"Redone: {label} ({changes.count()} entities changed)")
+    
+    def _after_history_change(self, changes):
+        """Update views after an undo or redo."""
+        project = self.game_project_manager.current_project
+        if changes.project:
+            self.project_name_input.setText(project.name)
+            self.project_desc_input.setText(project.description)
+        self._update_asset_rows(changes)
+        self._update_history_buttons()
+    
+    def _run_project_event(self, handler):
+        """Run a project manager event handler on the UI thread."""
+        handler()
+    
+    def _forward_project_changes(self, event):
+        """ModuleBus handler; runs on whichever thread received the server event."""
+        if event.sender is self.game_project_manager:
+            self.project_changes.emit(event.payload)
+    
+    def _on_project_changes(self, payload):
+        """Show upstream changes merged into the open project."""
+        project = self.game_project_manager.current_project
+        if not project or payload["project_id"] != project.project_id:
+            return
+        changes, conflicts = payload["changes"], payload["conflicts"]
+        if changes.project:
+            self.project_name_input.setText(project.name)
+            self.project_desc_input.setText(project.description)
+        self._update_asset_rows(changes)
+        self._update_history_buttons()
+        
+        message = f"Project updated by collaborator: {changes.count()} entities changed"
+        if conflicts:
+            kept = "upstream" if self.game_project_manager.conflict_policy == CONFLICT_TAKE_REMOTE else "local"
+            message += f", {len(conflicts)} conflict(s) resolved in favour of {kept} edits"
+        self.status_label.setText(message)
+    
+    def _update_history_buttons(self):
+        """Enable Undo/Redo and show what they would do."""
+        history = self.game_project_manager.history
+        undo_label, redo_label = history.undo_label(), history.redo_label()
+        self.undo_btn.setEnabled(undo_label is not None)
+        self.undo_btn.setToolTip(f"Undo {undo_label} (Ctrl+Z)" if undo_label else "Nothing to undo")
+        self.redo_btn.setEnabled(redo_label is not None)
+        self.redo_btn.setToolTip(f"Redo {redo_label} (Ctrl+Y)" if redo_label else "Nothing to redo")
     
     def _update_ui_for_project(self, project):
         """Update UI to reflect loaded project."""
         self.project_name_input.setText(project.name)
         self.project_desc_input.setText(project.description)
         self._refresh_assets_list()
+        self._update_history_buttons()
     
     def _refresh_assets_list(self):
-        """Refresh the assets list display."""
+        """Refresh the assets list display from the project's asset table."""
         self.assets_list.clear()
-        if self.game_project_manager.current_project:
-            for asset in self.game_project_manager.current_project.assets:
-                asset_name = asset.get('name', 'Unknown')
-                asset_type = asset.get('type', 'unknown')
-                self.assets_list.addItem(f"{asset_name} ({asset_type})")
+        self._asset_items = {}
+        project = self.game_project_manager.current_project
+        if not project:
+            return
+        
+        # Keep the type filter choices in line with the asset types present
+        selected = self.asset_type_combo.currentText()
+        types = sorted(t for t in project.assets.types() if t)
+        if [self.asset_type_combo.itemText(i) for i in range(1, self.asset_type_combo.count())] != types:
+            self.asset_type_combo.blockSignals(True)
+            self.asset_type_combo.clear()
+            self.asset_type_combo.addItem("All Types")
+            self.asset_type_combo.addItems(types)
+            self.asset_type_combo.setCurrentText(selected if selected in types else "All Types")
+            self.asset_type_combo.blockSignals(False)
+        
+        asset_type = self.asset_type_combo.currentText()
+        assets = project.assets.filter(
+            asset_type=None if asset_type == "All Types" else asset_type,
+            text=self.asset_filter_input.text().strip() or None
+        )
+        self.assets_list.setUpdatesEnabled(False)
+        for asset in assets[:MAX_LISTED_ASSETS]:
+            self._add_asset_item(asset)
+        if len(assets) > MAX_LISTED_ASSETS:
+            self.assets_list.addItem(f"... {len(assets) - MAX_LISTED_ASSETS} more - refine the filter")
+        self.assets_list.setUpdatesEnabled(True)
+    
+    def _add_asset_item(self, asset):
+        """Append one asset row, or update the row of an already listed asset."""
+        key = entity_key("assets", asset)
+        item = self._asset_items.get(key)
+        if item is None:
+            item = QListWidgetItem()
+            self._asset_items[key] = item
+            self.assets_list.addItem(item)
+        # The asset ID and name are kept on the item
+        item.setText(f"{asset.get('name', 'Unknown')} ({asset.get('type', 'unknown')})")
+        item.setData(Qt.ItemDataRole.UserRole, (asset.get('asset_id'), asset.get('name')))
+    
+    def _update_asset_rows(self, changes):
+        """Update only the asset rows touched by a change-set."""
+        upserts, deletes = changes.upserts["assets"], changes.deletes["assets"]
+        if not upserts and not deletes:
+            return
+        known_types = {self.asset_type_combo.itemText(i) for i in range(1, self.asset_type_combo.count())}
+        if any(asset.get('type') and asset.get('type') not in known_types for asset in upserts):
+            # New asset types change the type filter choices
+            self._refresh_assets_list()
+            return
+        
+        for key in deletes:
+            item = self._asset_items.pop(key, None)
+            if item is not None:
+                self.assets_list.takeItem(self.assets_list.row(item))
+        for asset in upserts:
+            key = entity_key("assets", asset)
+            if self._matches_filter(asset):
+                if key in self._asset_items or len(self._asset_items) < MAX_LISTED_ASSETS:
+                    self._add_asset_item(asset)
+            elif key in self._asset_items:
+                self.assets_list.takeItem(self.assets_list.row(self._asset_items.pop(key)))
+    
+    def _matches_filter(self, asset) -> bool:
+        """Check an asset against the current list filter."""
+        asset_type = self.asset_type_combo.currentText()
+        text = self.asset_filter_input.text().strip().lower()
+        return ((asset_type == "All Types" or asset.get('type') == asset_type)
+                and (not text or text in (asset.get('name') or '').lower()))
     
     def _detect_asset_type(self, filename: str) -> str:
         """Detect asset type from filename extension."""
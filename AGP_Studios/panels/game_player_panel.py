@@ -2,11 +2,74 @@
 Game Player Panel for RaOS game playing functionality.
 Provides UI for browsing games, launching, and viewing player profile/achievements.
 """
+import os
+from typing import Optional
 from PyQt6.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QPushButton, 
                               QLabel, QListWidget, QGroupBox, QMessageBox,
-                              QTextEdit, QSplitter, QComboBox)
-from PyQt6.QtCore import Qt
+                              QTextEdit, QSplitter, QComboBox, QFileDialog, QListWidgetItem,
+                              QListView, QAbstractItemView, QCheckBox)
+from PyQt6.QtCore import Qt, QPoint, QAbstractListModel, QModelIndex, pyqtSignal
 from services.game_launcher import GameLauncher
+from services.module_bus import ModuleBus
+from services.game_prefetcher import GamePrefetcher, GAME_PREFETCHED, PROFILE, ACHIEVEMENTS
+from services.leaderboard import LeaderboardBoard, LEADERBOARD_CHANGED
+from services.session_warmer import SessionWarmer
+from services.event_journal import PlayerEventJournal
+from services.server_events import ACHIEVEMENT_UNLOCKED
+from services.download_scheduler import (DownloadScheduler, DOWNLOAD_QUEUED, DOWNLOAD_STARTED,
+                                         DOWNLOAD_PROGRESS, DOWNLOAD_PAUSED, DOWNLOAD_COMPLETED,
+                                         DOWNLOAD_FAILED, DOWNLOAD_CANCELLED)
+
+# Where games are downloaded for offline play
+DEFAULT_INSTALL_DIR = os.path.join(os.path.expanduser("~"), "RaStudioGames")
+
+# Bandwidth limit choices for background downloads (bytes/s, None for unlimited)
+BANDWIDTH_LIMITS = {"Unlimited": None, "1 MB/s": 1024 ** 2, "5 MB/s": 5 * 1024 ** 2, "20 MB/s": 20 * 1024 ** 2}
+
+class LeaderboardModel(QAbstractListModel):
+    """
+    List model over a LeaderboardBoard with one row per rank.
+    The view only asks for rows on screen; rows not loaded yet show a placeholder
+    and request their page from the board.
+    """
+    
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.board: Optional[LeaderboardBoard] = None
+        self._rows = 0
+    
+    def set_board(self, board: Optional[LeaderboardBoard]):
+        self.beginResetModel()
+        self.board = board
+        self._rows = board.total if board else 0
+        self.endResetModel()
+    
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else self._rows
+    
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if role != Qt.ItemDataRole.DisplayRole or self.board is None or not index.isValid():
+            return None
+        rank = index.row() + 1
+        entry = self.board.entry(rank)
+        if entry is None:
+            self.board.request(rank)
+            return f"{rank}. ..."
+        return f"{rank}. {entry.get('player_name', 'Unknown')} - {entry.get('score', 0)}"
+    
+    def refresh(self, first: int, last: int, total: int):
+        """Apply a LEADERBOARD_CHANGED notification: resize, then repaint the affected ranks."""
+        if total > self._rows:
+            self.beginInsertRows(QModelIndex(), self._rows, total - 1)
+            self._rows = total
+            self.endInsertRows()
+        elif total < self._rows:
+            self.beginRemoveRows(QModelIndex(), total, self._rows - 1)
+            self._rows = total
+            self.endRemoveRows()
+        first, last = max(first, 1), min(last, self._rows)
+        if first <= last:
+            self.dataChanged.emit(self.index(first - 1), self.index(last - 1))
 
 class GamePlayerPanel(QWidget):
     """
@@ -14,9 +77,39 @@ class GamePlayerPanel(QWidget):
     Provides interface for discovering, launching, and playing RaOS games.
     """
     
-    def __init__(self, game_launcher: GameLauncher):
+    # Re-emits download scheduler ModuleBus events on the UI thread: (event name, payload)
+    download_event = pyqtSignal(str, object)
+    # Re-emits GamePrefetcher results on the UI thread: payload {"game_id", "kind", "ok"}
+    prefetched = pyqtSignal(object)
+    # Re-emits LeaderboardBoard changes on the UI thread: payload {"game_id", "category", "first", "last", "total"}
+    leaderboard_changed = pyqtSignal(object)
+    # Re-emits achievement_unlocked (local optimistic or pushed by the server) on the UI thread
+    achievement_unlocked = pyqtSignal(object)
+    # Result of a launch started with SessionWarmer.launch_when_ready: (game_id, mode, launched, problems)
+    launch_finished = pyqtSignal(str, str, bool, object)
+    
+    def __init__(self, game_launcher: GameLauncher, download_scheduler: Optional[DownloadScheduler] = None,
+                 game_prefetcher: Optional[GamePrefetcher] = None, session_warmer: Optional[SessionWarmer] = None,
+                 event_journal: Optional[PlayerEventJournal] = None):
         super().__init__()
         self.game_launcher = game_launcher
+        self.download_scheduler = download_scheduler or DownloadScheduler(game_launcher)
+        self.prefetcher = game_prefetcher or GamePrefetcher(game_launcher)
+        self.session_warmer = session_warmer or SessionWarmer(game_launcher, install_dir=DEFAULT_INSTALL_DIR)
+        self.event_journal = event_journal  # Optional; records launch/stop telemetry
+        self._download_items = {}  # job_id -> QListWidgetItem
+        self.download_event.connect(self._on_download_event)
+        for event_name in (DOWNLOAD_QUEUED, DOWNLOAD_STARTED, DOWNLOAD_PROGRESS, DOWNLOAD_PAUSED,
+                           DOWNLOAD_COMPLETED, DOWNLOAD_FAILED, DOWNLOAD_CANCELLED):
+            ModuleBus.subscribe(event_name, self._forward_download_event)
+        self.prefetched.connect(self._on_prefetched)
+        ModuleBus.subscribe(GAME_PREFETCHED, self._forward_prefetched)
+        self.leaderboard_board: Optional[LeaderboardBoard] = None
+        self.leaderboard_changed.connect(self._on_leaderboard_changed)
+        ModuleBus.subscribe(LEADERBOARD_CHANGED, self._forward_leaderboard_changed)
+        self.achievement_unlocked.connect(self._on_achievement_unlocked)
+        self.launch_finished.connect(self._on_launch_finished)
+        ModuleBus.subscribe(ACHIEVEMENT_UNLOCKED, lambda event: self.achievement_unlocked.emit(event.payload))
         self._init_ui()
         
     def _init_ui(self):
@@ -46,6 +139,7 @@ class GamePlayerPanel(QWidget):
         
         self.games_list = QListWidget()
         self.games_list.itemSelectionChanged.connect(self._on_game_selected)
+        self.games_list.verticalScrollBar().valueChanged.connect(self._prefetch_visible)
         games_layout.addWidget(self.games_list)
         
         game_btn_layout = QHBoxLayout()
@@ -63,6 +157,25 @@ class GamePlayerPanel(QWidget):
         
         games_layout.addLayout(game_btn_layout)
         
+        install_btn_layout = QHBoxLayout()
+        self.download_game_btn = QPushButton("Download")
+        self.download_game_btn.setToolTip(f"Download the selected game to {DEFAULT_INSTALL_DIR} in the background")
+        self.download_game_btn.clicked.connect(self._on_download_game)
+        install_btn_layout.addWidget(self.download_game_btn)
+        
+        self.update_game_btn = QPushButton("Update")
+        self.update_game_btn.setToolTip("Patch an installed copy of the selected game to the latest version")
+        self.update_game_btn.clicked.connect(self._on_update_game)
+        install_btn_layout.addWidget(self.update_game_btn)
+        games_layout.addLayout(install_btn_layout)
+        
+        self.prewarm_checkbox = QCheckBox("Pre-warm sessions")
+        self.prewarm_checkbox.setToolTip("Stage a streaming session on the server when a game is selected, "
+                                      "so launching it starts faster")
+        self.prewarm_checkbox.setChecked(self.session_warmer.enabled)
+        self.prewarm_checkbox.toggled.connect(self._on_prewarm_toggled)
+        games_layout.addWidget(self.prewarm_checkbox)
+        
         self.stop_game_btn = QPushButton("Stop Game")
         self.stop_game_btn.clicked.connect(self._on_stop_game)
         self.stop_game_btn.setEnabled(False)
@@ -92,18 +205,72 @@ class GamePlayerPanel(QWidget):
         self.leaderboard_category = QComboBox()
         self.leaderboard_category.addItems(["Global", "Friends", "Regional"])
         self.leaderboard_category.setVisible(False)
+        self.leaderboard_category.currentTextChanged.connect(lambda _: self._load_leaderboard())
         achievements_layout.addWidget(self.leaderboard_category)
         
+        self.my_rank_btn = QPushButton("My Rank")
+        self.my_rank_btn.clicked.connect(self._on_my_rank)
+        self.my_rank_btn.setVisible(False)
+        achievements_layout.addWidget(self.my_rank_btn)
+        
         details_layout.addLayout(achievements_layout)
         
         self.achievements_list = QListWidget()
         details_layout.addWidget(self.achievements_list)
         
+        # Leaderboard rows are rendered on demand, so boards of any size scroll smoothly
+        self.leaderboard_model = LeaderboardModel(self)
+        self.leaderboard_view = QListView()
+        self.leaderboard_view.setModel(self.leaderboard_model)
+        self.leaderboard_view.setUniformItemSizes(True)
+        self.leaderboard_view.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.leaderboard_view.setVisible(False)
+        details_layout.addWidget(self.leaderboard_view)
+        
         details_group.setLayout(details_layout)
         splitter.addWidget(details_group)
         
         layout.addWidget(splitter)
         
+        # Downloads section
+        downloads_group = QGroupBox("Downloads")
+        downloads_layout = QVBoxLayout()
+        
+        self.downloads_list = QListWidget()
+        self.downloads_list.setMaximumHeight(140)
+        downloads_layout.addWidget(self.downloads_list)
+        
+        download_btn_layout = QHBoxLayout()
+        self.pause_download_btn = QPushButton("Pause")
+        self.pause_download_btn.clicked.connect(lambda: self._on_download_action("pause"))
+        download_btn_layout.addWidget(self.pause_download_btn)
+        
+        self.resume_download_btn = QPushButton("Resume")
+        self.resume_download_btn.clicked.connect(lambda: self._on_download_action("resume"))
+        download_btn_layout.addWidget(self.resume_download_btn)
+        
+        self.cancel_download_btn = QPushButton("Cancel")
+        self.cancel_download_btn.clicked.connect(lambda: self._on_download_action("cancel"))
+        download_btn_layout.addWidget(self.cancel_download_btn)
+        
+        self.pause_all_btn = QPushButton("Resume All" if self.download_scheduler.paused else "Pause All")
+        self.pause_all_btn.clicked.connect(self._on_pause_all_downloads)
+        download_btn_layout.addWidget(self.pause_all_btn)
+        
+        download_btn_layout.addWidget(QLabel("Limit:"))
+        self.bandwidth_combo = QComboBox()
+        self.bandwidth_combo.addItems(list(BANDWIDTH_LIMITS))
+        for label, limit in BANDWIDTH_LIMITS.items():
+            if limit == self.download_scheduler.rate_limit:
+                self.bandwidth_combo.setCurrentText(label)
+        self.bandwidth_combo.currentTextChanged.connect(
+            lambda label: self.download_scheduler.set_rate_limit(BANDWIDTH_LIMITS[label]))
+        download_btn_layout.addWidget(self.bandwidth_combo)
+        
+        downloads_layout.addLayout(download_btn_layout)
+        downloads_group.setLayout(downloads_layout)
+        layout.addWidget(downloads_group)
+        
         # Status bar
         self.status_label = QLabel("Ready - Select a game to play")
         layout.addWidget(self.status_label)
@@ -114,6 +281,13 @@ class GamePlayerPanel(QWidget):
         self.current_game_id = None
         self.games_data = []
         
+        # Jobs restored from the previous session
+        for job in self.download_scheduler.jobs.values():
+            self._show_download(job.to_dict())
+        
+        # Last known catalog, shown until the next refresh
+        self._show_games(self.game_launcher.cached_games())
+        
     def _on_refresh_profile(self):
         """Refresh player profile."""
         profile = self.game_launcher.get_player_profile()
@@ -131,17 +305,44 @@ class GamePlayerPanel(QWidget):
         games = self.game_launcher.get_available_games()
         
         if games:
+            self._show_games(games)
+            self.status_label.setText(f"Found {len(games)} games")
+        else:
+            self.status_label.setText("No games available")
+    
+    def _show_games(self, games):
+        """Fill the games list (keeping the selection) and prefetch what is on screen."""
+        if games != self.games_data:
+            selected_id = self.current_game_id
             self.games_data = games
+            self.games_list.blockSignals(True)
             self.games_list.clear()
-            
-            for game in games:
+            for row, game in enumerate(games):
                 game_name = game.get('name', 'Unknown Game')
                 self.games_list.addItem(game_name)
-            
-            self.status_label.setText(f"Found {len(games)} games")
-        else:
-            QMessageBox.information(self, "No Games", "No games available")
-            self.status_label.setText("No games found")
+                if selected_id and game.get('game_id') == selected_id:
+                    self.games_list.setCurrentRow(row)
+            self.games_list.blockSignals(False)
+        self._prefetch_visible()
+    
+    def _prefetch_visible(self):
+        """Warm the cache for the games on screen, then the ones around them and the selection."""
+        count = len(self.games_data)
+        if not count:
+            return
+        first = self.games_list.indexAt(QPoint(0, 0)).row()
+        last = self.games_list.indexAt(self.games_list.viewport().rect().bottomLeft()).row()
+        first = max(first, 0)
+        last = count - 1 if last < 0 else last
+        page = last - first + 1
+        adjacent_rows = list(range(max(first - page, 0), first)) + list(range(last + 1, min(last + 1 + page, count)))
+        current = self.games_list.currentRow()
+        if current >= 0:
+            adjacent_rows = [row for row in (current - 1, current + 1) if 0 <= row < count] + adjacent_rows
+        
+        def ids(rows):
+            return [self.games_data[row].get('game_id') for row in rows if self.games_data[row].get('game_id')]
+        self.prefetcher.focus(ids(range(first, last + 1)), ids(adjacent_rows))
     
     def _on_game_selected(self):
         """Handle game selection."""
@@ -160,8 +361,13 @@ class GamePlayerPanel(QWidget):
             
             self.game_details_text.setPlainText(details)
             
-            # Load achievements for this game
-            self._load_achievements()
+            # Stage a session and run launch preflight while the player looks at the game
+            self.session_warmer.warm(self.current_game_id, "stream", game.get('size'))
+            
+            # Show cached data now; the prefetcher loads or revalidates it in the background
+            self.prefetcher.request(self.current_game_id)
+            self._on_view_changed(self.view_selector.currentText())
+            self._prefetch_visible()
     
     def _on_launch_game(self, mode: str):
         """Launch selected game."""
@@ -169,18 +375,39 @@ class GamePlayerPanel(QWidget):
             QMessageBox.warning(self, "Error", "Please select a game first")
             return
         
-        if self.game_launcher.launch_game(self.current_game_id, mode):
+        # Preflight (for this mode) and launch run in the background
+        game_id = self.current_game_id
+        self.launch_stream_btn.setEnabled(False)
+        self.launch_download_btn.setEnabled(False)
+        self.status_label.setText(f"Preparing {mode} launch...")
+        self.session_warmer.launch_when_ready(
+            game_id, mode, self._game_size(game_id),
+            lambda launched, problems: self.launch_finished.emit(game_id, mode, launched, problems))
+    
+    def _on_launch_finished(self, game_id: str, mode: str, launched: bool, problems):
+        """Report the outcome of a background launch."""
+        if launched:
+            if self.event_journal:
+                self.event_journal.track(game_id, "game_launched", {"mode": mode})
             self.status_label.setText(f"Game launched in {mode} mode")
             self.stop_game_btn.setEnabled(True)
-            self.launch_stream_btn.setEnabled(False)
-            self.launch_download_btn.setEnabled(False)
             QMessageBox.information(self, "Success", f"Game launched in {mode} mode!")
+            return
+        
+        self.launch_stream_btn.setEnabled(True)
+        self.launch_download_btn.setEnabled(True)
+        self.status_label.setText("Launch cancelled")
+        if problems:
+            QMessageBox.warning(self, "Cannot Launch", "\n".join(problems))
         else:
             QMessageBox.critical(self, "Error", "Failed to launch game")
     
     def _on_stop_game(self):
         """Stop currently running game."""
+        game_id = (self.game_launcher.current_game or {}).get("game_id")
         if self.game_launcher.stop_game():
+            if self.event_journal:
+                self.event_journal.track(game_id, "game_stopped")
             self.status_label.setText("Game stopped")
             self.stop_game_btn.setEnabled(False)
             self.launch_stream_btn.setEnabled(True)
@@ -189,21 +416,153 @@ class GamePlayerPanel(QWidget):
         else:
             QMessageBox.critical(self, "Error", "Failed to stop game")
     
+    def _on_prewarm_toggled(self, enabled: bool):
+        """Turn session pre-warming on or off."""
+        self.session_warmer.enabled = enabled
+        if not enabled:
+            self.session_warmer.release()
+        elif self.current_game_id:
+            self.session_warmer.warm(self.current_game_id, "stream")
+    
+    def _on_download_game(self):
+        """Queue a background download of the selected game."""
+        if not self.current_game_id:
+            QMessageBox.warning(self, "Error", "Please select a game first")
+            return
+        destination = os.path.join(DEFAULT_INSTALL_DIR, self.current_game_id)
+        os.makedirs(destination, exist_ok=True)
+        label = self._game_name(self.current_game_id)
+        self.download_scheduler.enqueue_game(self.current_game_id, destination, label=label)
+        self.status_label.setText(f"Queued download: {label}")
+    
+    def _on_update_game(self):
+        """Queue a delta update of an installed copy of the selected game."""
+        if not self.current_game_id:
+            QMessageBox.warning(self, "Error", "Please select a game first")
+            return
+        installed_path, _ = QFileDialog.getOpenFileName(
+            self,
+            "Select Installed Game",
+            os.path.join(DEFAULT_INSTALL_DIR, self.current_game_id)
+        )
+        if installed_path:
+            label = f"{self._game_name(self.current_game_id)} (update)"
+            self.download_scheduler.enqueue_update(self.current_game_id, installed_path, label=label)
+            self.status_label.setText(f"Queued update: {label}")
+    
+    def _on_download_action(self, action: str):
+        """Pause, resume or cancel the selected download."""
+        item = self.downloads_list.currentItem()
+        if item is None:
+            return
+        job_id = item.data(Qt.ItemDataRole.UserRole)
+        getattr(self.download_scheduler, action)(job_id)
+    
+    def _on_pause_all_downloads(self):
+        """Toggle starting new downloads."""
+        if self.download_scheduler.paused:
+            self.download_scheduler.resume()
+            self.pause_all_btn.setText("Pause All")
+        else:
+            self.download_scheduler.pause()
+            self.pause_all_btn.setText("Resume All")
+    
+    def _forward_download_event(self, event):
+        """ModuleBus handler; runs on download worker threads."""
+        if event.sender is self.download_scheduler:
+            self.download_event.emit(event.name, event.payload)
+    
+    def _on_download_event(self, event_name: str, payload):
+        """Update the row of the download the event is about."""
+        job = payload["job"]
+        self._show_download(job)
+        if event_name == DOWNLOAD_COMPLETED:
+            self.status_label.setText(f"Download finished: {job['label']}")
+        elif event_name == DOWNLOAD_FAILED:
+            self.status_label.setText(f"Download failed: {job['label']} - {job['error']}")
+    
+    def _show_download(self, job):
+        """Add or update the list row of a download job."""
+        item = self._download_items.get(job["job_id"])
+        if item is None:
+            item = QListWidgetItem()
+            item.setData(Qt.ItemDataRole.UserRole, job["job_id"])
+            self._download_items[job["job_id"]] = item
+            self.downloads_list.addItem(item)
+        total = job["bytes_total"]
+        if total:
+            progress = f"{100 * job['bytes_done'] // total}% of {total / 1024 ** 2:.1f} MB"
+        else:
+            progress = f"{job['bytes_done'] / 1024 ** 2:.1f} MB"
+        item.setText(f"{job['label']} - {job['state']} - {progress}")
+    
+    def _game_size(self, game_id: str) -> Optional[int]:
+        for game in self.games_data:
+            if game.get('game_id') == game_id:
+                return game.get('size')
+        return None
+    
+    def _game_name(self, game_id: str) -> str:
+        for game in self.games_data:
+            if game.get('game_id') == game_id:
+                return game.get('name') or game_id
+        return game_id
+    
     def _on_view_changed(self, view_type: str):
         """Handle view change between achievements and leaderboard."""
-        if view_type == "Leaderboard":
-            self.leaderboard_category.setVisible(True)
+        leaderboard = view_type == "Leaderboard"
+        self.leaderboard_category.setVisible(leaderboard)
+        self.my_rank_btn.setVisible(leaderboard)
+        self.leaderboard_view.setVisible(leaderboard)
+        self.achievements_list.setVisible(not leaderboard)
+        if leaderboard:
             self._load_leaderboard()
         else:
-            self.leaderboard_category.setVisible(False)
             self._load_achievements()
     
-    def _load_achievements(self):
-        """Load achievements for current game."""
+    def _forward_prefetched(self, event):
+        """ModuleBus handler; runs on the prefetch thread."""
+        if event.sender is self.prefetcher:
+            self.prefetched.emit(event.payload)
+    
+    def _on_prefetched(self, payload):
+        """Refresh the view when data of the selected game (or the profile) arrives."""
+        if payload["kind"] == PROFILE:
+            profile = self.game_launcher.player_profile
+            if profile:
+                self.profile_label.setText(
+                    f"Player: {profile.get('username', 'Unknown')} (Level {profile.get('level', 0)})")
+        elif payload["kind"] == ACHIEVEMENTS and payload["game_id"] == self.current_game_id:
+            if self.view_selector.currentText() == "Achievements":
+                # Never re-request from here: a failed (or uncacheable) load would loop forever
+                self._load_achievements(request=False)
+    
+    def _on_achievement_unlocked(self, payload):
+        """Show an unlock of the selected game's achievement as soon as it is cached."""
+        if (payload or {}).get("game_id") == self.current_game_id and \
+                self.view_selector.currentText() == "Achievements":
+            self._load_achievements()
+    
+    def _load_achievements(self, request: bool = True):
+        """
+        Load achievements for current game.
+
+        Args:
+            request: Ask the prefetcher for them if they are not cached; when False a
+                missing entry means the last load failed
+        """
         if not self.current_game_id:
             return
         
-        achievements = self.game_launcher.get_achievements(self.current_game_id)
+        achievements = self.game_launcher.cached_achievements(self.current_game_id)
+        if achievements is None:
+            self.achievements_list.clear()
+            if request:
+                self.achievements_list.addItem("Loading...")
+                self.prefetcher.request(self.current_game_id)
+            else:
+                self.achievements_list.addItem("Failed to load achievements")
+            return
         
         self.achievements_list.clear()
         for achievement in achievements:
@@ -218,10 +577,39 @@ class GamePlayerPanel(QWidget):
             return
         
         category = self.leaderboard_category.currentText().lower()
-        leaderboard = self.game_launcher.get_leaderboard(self.current_game_id, category)
-        
-        self.achievements_list.clear()
-        for i, entry in enumerate(leaderboard, 1):
-            player = entry.get('player_name', 'Unknown')
-            score = entry.get('score', 0)
-            self.achievements_list.addItem(f"{i}. {player} - {score}")
+        board = self.leaderboard_board
+        if board is None or board.game_id != self.current_game_id or board.category != category:
+            if board is not None:
+                board.close()
+            board = self.game_launcher.open_leaderboard(self.current_game_id, category)
+            # Top entries warmed by the prefetcher show until the first page arrives
+            cached = self.game_launcher.cached_leaderboard(
+                self.current_game_id, category, self.prefetcher.leaderboard_limit)
+            if cached:
+                board.seed(cached)
+            self.leaderboard_board = board
+            self.leaderboard_model.set_board(board)
+        board.request(1, board.page_size)
+    
+    def _on_my_rank(self):
+        """Load the player's neighbourhood and scroll to the player's row."""
+        board = self.leaderboard_board
+        if board is None:
+            return
+        rank = board.load_around_player()
+        if rank:
+            index = self.leaderboard_model.index(rank - 1)
+            self.leaderboard_view.scrollTo(index, QAbstractItemView.ScrollHint.PositionAtCenter)
+            self.leaderboard_view.setCurrentIndex(index)
+        else:
+            self.status_label.setText("You are not ranked on this leaderboard")
+    
+    def _forward_leaderboard_changed(self, event):
+        """ModuleBus handler; runs on leaderboard page threads or the event poll."""
+        if event.sender is self.leaderboard_board:
+            self.leaderboard_changed.emit(event.payload)
+    
+    def _on_leaderboard_changed(self, payload):
+        board = self.leaderboard_board
+        if board is not None and payload["game_id"] == board.game_id and payload["category"] == board.category:
+            self.leaderboard_model.refresh(payload["first"], payload["last"], payload["total"])
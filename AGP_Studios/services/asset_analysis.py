@@ -0,0 +1,315 @@
+"""
+Local asset analysis engine for RaOS content.
+Computes thumbnails, dimensions, color histograms, perceptual hashes and audio
+duration/peaks with NumPy-vectorized kernels in a worker process pool.
+Results are cached on disk by content hash, so rescanning a library is nearly free.
+Note: Image analysis requires Pillow; histograms, hashes and peaks require NumPy.
+Only WAV audio is decoded; other audio formats, and images without Pillow, are
+reported with an "unsupported" reason instead of features.
+"""
+import hashlib
+import json
+import os
+import wave
+from collections import defaultdict
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Dict, Iterable, List, Optional
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+    np = None
+
+try:
+    from PIL import Image
+    PIL_AVAILABLE = True
+except ImportError:
+    PIL_AVAILABLE = False
+    Image = None
+
+DEFAULT_ANALYSIS_DIR = os.path.join(os.path.expanduser("~"), ".rastudio", "cache", "analysis")
+
+# Bump when analysis output changes so stale cache entries are recomputed
+ANALYSIS_VERSION = 2
+
+IMAGE_EXTENSIONS = {".png", ".jpg", ".jpeg", ".gif", ".bmp", ".webp", ".tga", ".tif", ".tiff"}
+AUDIO_EXTENSIONS = {".wav"}
+# Recognized as audio but not decoded (the standard library only reads WAV)
+UNSUPPORTED_AUDIO_EXTENSIONS = {".mp3", ".ogg", ".flac", ".m4a", ".aac", ".opus", ".wma", ".aiff", ".aif"}
+
+def _dct_matrix(n: int):
+    """Orthonormal DCT-II basis matrix."""
+    k = np.arange(n)[:, None]
+    x = np.arange(n)[None, :]
+    matrix = np.cos(np.pi * (2 * x + 1) * k / (2 * n)) * np.sqrt(2.0 / n)
+    matrix[0] /= np.sqrt(2.0)
+    return matrix
+
+def _bits_to_hex(bits) -> str:
+    """Pack a boolean array into a hex string."""
+    return np.packbits(bits.astype(np.uint8)).tobytes().hex()
+
+def image_features(image, thumbnail_path: Optional[str] = None, thumbnail_size: int = 128) -> Dict:
+    """
+    Compute image features.
+
+    Args:
+        image: PIL image
+        thumbnail_path: Optional path where a PNG thumbnail is written
+        thumbnail_size: Maximum thumbnail width/height in pixels
+
+    Returns:
+        Dict: Dimensions, mode, and (with NumPy) histogram, dhash and phash
+    """
+    features = {"width": image.width, "height": image.height, "mode": image.mode}
+
+    if thumbnail_path:
+        thumbnail = image.copy()
+        thumbnail.thumbnail((thumbnail_size, thumbnail_size))
+        if thumbnail.mode not in ("RGB", "RGBA", "L"):
+            thumbnail = thumbnail.convert("RGBA")
+        thumbnail.save(thumbnail_path, format="PNG")
+        features["thumbnail"] = thumbnail_path
+
+    if not NUMPY_AVAILABLE:
+        return features
+
+    # Color histogram: 16 bins per RGB channel on a downscaled copy
+    rgb = np.asarray(image.convert("RGB").resize((128, 128)), dtype=np.uint8).reshape(-1, 3)
+    bins = rgb >> 4
+    histogram = np.stack([np.bincount(bins[:, c], minlength=16) for c in range(3)])
+    features["histogram"] = (histogram / rgb.shape[0]).round(4).tolist()
+    features["mean_color"] = rgb.mean(axis=0).round(1).tolist()
+
+    gray = image.convert("L")
+
+    # Difference hash: compare adjacent pixels of a 9x8 grayscale image
+    small = np.asarray(gray.resize((9, 8)), dtype=np.int16)
+    features["dhash"] = _bits_to_hex((small[:, 1:] > small[:, :-1]).ravel())
+
+    # Perceptual hash: low frequencies of a 32x32 DCT compared to their median
+    pixels = np.asarray(gray.resize((32, 32)), dtype=np.float64)
+    dct = _dct_matrix(32)
+    low = (dct @ pixels @ dct.T)[:8, :8].ravel()
+    features["phash"] = _bits_to_hex(low > np.median(low[1:]))
+    return features
+
+def audio_features(path: str, peak_buckets: int = 200) -> Dict:
+    """
+    Compute duration and a waveform peak envelope of a WAV file.
+
+    Args:
+        path: WAV file path
+        peak_buckets: Number of peak values in the envelope
+
+    Returns:
+        Dict: Duration, sample rate, channels and (with NumPy) normalized peaks
+    """
+    with wave.open(path, "rb") as wav:
+        frames = wav.getnframes()
+        rate = wav.getframerate()
+        channels = wav.getnchannels()
+        width = wav.getsampwidth()
+        features = {
+            "duration": frames / float(rate) if rate else 0.0,
+            "sample_rate": rate,
+            "channels": channels
+        }
+        if not NUMPY_AVAILABLE or width not in (1, 2, 4) or frames == 0:
+            return features
+        raw = wav.readframes(frames)
+
+    dtype = {1: np.uint8, 2: np.int16, 4: np.int32}[width]
+    samples = np.frombuffer(raw, dtype=dtype).astype(np.float32)
+    if width == 1:
+        samples -= 128.0
+    samples = np.abs(samples.reshape(-1, channels)).max(axis=1)
+
+    # Max absolute amplitude per bucket, normalized to the sample range
+    usable = len(samples) - len(samples) % peak_buckets
+    if usable:
+        peaks = samples[:usable].reshape(peak_buckets, -1).max(axis=1)
+        full_scale = float(np.iinfo(dtype).max) if width > 1 else 128.0
+        features["peaks"] = (peaks / full_scale).round(3).tolist()
+    return features
+
+def analyze_file(path: str, cache_dir: Optional[str] = DEFAULT_ANALYSIS_DIR) -> Dict:
+    """
+    Analyze a file, using the on-disk cache keyed by content hash. Runs in worker processes.
+
+    Args:
+        path: File to analyze
+        cache_dir: Directory of cached results and thumbnails, or None to disable caching
+
+    Returns:
+        Dict: Analysis results (always includes path, sha256 and size; "unsupported" holds
+              the reason when a recognized format could not be analyzed)
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(block)
+    sha256 = digest.hexdigest()
+
+    cache_path = os.path.join(cache_dir, sha256 + ".json") if cache_dir else None
+    if cache_path and os.path.exists(cache_path):
+        try:
+            with open(cache_path, "r", encoding="utf-8") as f:
+                cached = json.load(f)
+            if cached.get("analysis_version") == ANALYSIS_VERSION:
+                cached["path"] = path
+                cached["cached"] = True
+                return cached
+        except (OSError, ValueError):
+            pass
+
+    result = {
+        "path": path,
+        "sha256": sha256,
+        "size": os.path.getsize(path),
+        "analysis_version": ANALYSIS_VERSION
+    }
+    _, ext = os.path.splitext(path.lower())
+
+    try:
+        if ext in IMAGE_EXTENSIONS and not PIL_AVAILABLE:
+            result["kind"] = "image"
+            result["unsupported"] = "image analysis requires Pillow"
+        elif ext in IMAGE_EXTENSIONS:
+            result["kind"] = "image"
+            thumbnail_path = os.path.join(cache_dir, sha256 + ".thumb.png") if cache_dir else None
+            if cache_dir:
+                os.makedirs(cache_dir, exist_ok=True)
+            with Image.open(path) as image:
+                result["format"] = image.format
+                result.update(image_features(image, thumbnail_path))
+        elif ext in AUDIO_EXTENSIONS:
+            result["kind"] = "audio"
+            result.update(audio_features(path))
+        elif ext in UNSUPPORTED_AUDIO_EXTENSIONS:
+            result["kind"] = "audio"
+            result["unsupported"] = f"{ext[1:].upper()} audio is not supported (WAV only)"
+        else:
+            result["kind"] = "generic"
+    except Exception as e:
+        result["error"] = str(e)
+
+    # Unsupported results are not cached so they are analyzed once support is available
+    if cache_path and "error" not in result and "unsupported" not in result:
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+            tmp_path = cache_path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(result, f)
+            os.replace(tmp_path, cache_path)
+        except OSError:
+            pass
+    return result
+
+def hamming_distance(a: str, b: str) -> int:
+    """Number of differing bits between two hex hashes."""
+    return bin(int(a, 16) ^ int(b, 16)).count("1")
+
+def find_near_duplicates(results: Iterable[Dict], max_distance: int = 6, key: str = "phash") -> List[List[str]]:
+    """
+    Group images whose perceptual hashes are within a Hamming distance.
+    Uses band pigeonholing: hashes within distance d share at least one of d+1 bands
+    exactly, so only hashes colliding in some band are compared.
+
+    Args:
+        results: Analysis results
+        max_distance: Maximum differing bits for two images to be near-duplicates
+        key: Hash field to compare ("phash" or "dhash")
+
+    Returns:
+        List[List[str]]: Groups of paths (each with at least two entries)
+    """
+    hashed = [(r["path"], int(r[key], 16)) for r in results if r.get(key)]
+    bands = max_distance + 1
+    band_bits = max(1, 64 // bands)
+    mask = (1 << band_bits) - 1
+
+    buckets = defaultdict(list)
+    for i, (_, value) in enumerate(hashed):
+        for band in range(bands):
+            buckets[(band, (value >> (band * band_bits)) & mask)].append(i)
+
+    # Union-find over verified candidate pairs
+    parent = list(range(len(hashed)))
+
+    def find(i):
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    for members in buckets.values():
+        for a_index, a in enumerate(members):
+            for b in members[a_index + 1:]:
+                if find(a) != find(b) and bin(hashed[a][1] ^ hashed[b][1]).count("1") <= max_distance:
+                    parent[find(a)] = find(b)
+
+    groups = defaultdict(list)
+    for i, (path, _) in enumerate(hashed):
+        groups[find(i)].append(path)
+    return [paths for paths in groups.values() if len(paths) > 1]
+
+class AssetAnalyzer:
+    """
+    Runs local asset analysis in a process pool.
+    Avoids a server round trip per asset; repeated scans hit the on-disk cache.
+    """
+
+    def __init__(self, max_workers: Optional[int] = None, cache_dir: Optional[str] = DEFAULT_ANALYSIS_DIR):
+        """
+        Initialize AssetAnalyzer.
+
+        Args:
+            max_workers: Number of worker processes (defaults to CPU count)
+            cache_dir: Directory for cached results and thumbnails, or None to disable caching
+        """
+        self.max_workers = max_workers
+        self.cache_dir = cache_dir
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    def submit(self, path: str) -> Future:
+        """
+        Schedule analysis of one file.
+
+        Returns:
+            Future: Resolves to the analysis result dict
+        """
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+        return self._executor.submit(analyze_file, path, self.cache_dir)
+
+    def analyze_files(self, paths: Iterable[str]) -> Dict[str, Future]:
+        """
+        Schedule analysis of many files.
+
+        Returns:
+            Dict[str, Future]: Path -> future resolving to the analysis result
+        """
+        return {path: self.submit(path) for path in paths}
+
+    def analyze_directory(self, root: str) -> List[Dict]:
+        """
+        Analyze every file under a directory, blocking until done.
+
+        Args:
+            root: Directory to scan
+
+        Returns:
+            List[Dict]: Analysis results
+        """
+        paths = [os.path.join(directory, name)
+                 for directory, _, names in os.walk(root) for name in names]
+        return [future.result() for future in self.analyze_files(paths).values()]
+
+    def shutdown(self):
+        """Shut down the worker processes."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
@@ -0,0 +1,151 @@
+"""
+Merkle manifest over a project's asset records.
+Assets are bucketed by the hash of their key into a fixed-depth hex tree; comparing
+node hashes level by level with the server locates changed buckets in a few
+small exchanges, so only added, removed or changed assets are transferred.
+"""
+import hashlib
+import json
+from typing import Dict, Iterable, List, Optional
+
+from services.project_workspace import entity_key
+
+HEX_DIGITS = "0123456789abcdef"
+
+# Tree depth in hex digits: 16^3 = 4096 buckets, about a dozen assets each at 50k assets
+DEFAULT_DEPTH = 3
+
+# Hashes are truncated to 64 bits; they only need to detect changes, not resist attacks
+HASH_LENGTH = 16
+
+def _digest(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:HASH_LENGTH]
+
+def asset_hash(record: Dict) -> str:
+    """Hash of an asset record over its canonical JSON form (non-ASCII kept unescaped)."""
+    return _digest(json.dumps(dict(record), sort_keys=True, separators=(",", ":"), ensure_ascii=False))
+
+def bucket_of(key: str, depth: int = DEFAULT_DEPTH) -> str:
+    """Leaf bucket (hex prefix) an asset key belongs to."""
+    return hashlib.sha256(key.encode("utf-8")).hexdigest()[:depth]
+
+class AssetManifest:
+    """
+    Hash tree over asset records.
+    Leaf buckets map asset keys to record hashes; a bucket hashes its sorted
+    entries, an inner node hashes its 16 child hashes. Empty subtrees hash to "".
+    Node hashes are memoized and invalidated along the path of each change.
+    """
+
+    def __init__(self, assets: Iterable[Dict] = (), depth: int = DEFAULT_DEPTH):
+        """
+        Initialize AssetManifest.
+
+        Args:
+            assets: Asset records
+            depth: Tree depth in hex digits (must match the server)
+        """
+        self.depth = depth
+        self.buckets: Dict[str, Dict[str, str]] = {}
+        self._nodes: Dict[str, str] = {}
+        for record in assets:
+            self.add(record)
+
+    def add(self, record: Dict):
+        """Add or replace an asset record."""
+        key = entity_key("assets", record)
+        bucket = bucket_of(key, self.depth)
+        self.buckets.setdefault(bucket, {})[key] = asset_hash(record)
+        self._invalidate(bucket)
+
+    def remove(self, key: str):
+        """Remove an asset by key."""
+        bucket = bucket_of(key, self.depth)
+        entries = self.buckets.get(bucket)
+        if entries and entries.pop(key, None) is not None:
+            if not entries:
+                del self.buckets[bucket]
+            self._invalidate(bucket)
+
+    def node_hash(self, prefix: str = "") -> str:
+        """Hash of the subtree under a hex prefix ("" is the root)."""
+        cached = self._nodes.get(prefix)
+        if cached is not None:
+            return cached
+
+        if len(prefix) >= self.depth:
+            entries = self.buckets.get(prefix)
+            value = _digest("\n".join(f"{k}:{h}" for k, h in sorted(entries.items()))) if entries else ""
+        else:
+            children = self.children(prefix)
+            value = _digest(",".join(children)) if any(children) else ""
+        self._nodes[prefix] = value
+        return value
+
+    def children(self, prefix: str = "") -> List[str]:
+        """Hashes of the 16 children of an inner node."""
+        return [self.node_hash(prefix + digit) for digit in HEX_DIGITS]
+
+    def bucket(self, prefix: str) -> Dict[str, str]:
+        """Entries (asset key -> record hash) of a leaf bucket."""
+        return dict(self.buckets.get(prefix, {}))
+
+    def diff_children(self, prefix: str, remote_children: List[str]) -> List[str]:
+        """
+        Compare children of a node with the server's.
+
+        Returns:
+            List[str]: Child prefixes whose hashes differ
+        """
+        local_children = self.children(prefix)
+        remote_children = list(remote_children) + [""] * (16 - len(remote_children))
+        return [prefix + digit for digit, local, remote in zip(HEX_DIGITS, local_children, remote_children)
+                if local != remote]
+
+    def diff_bucket(self, prefix: str, remote_entries: Dict[str, str]) -> Dict[str, List[str]]:
+        """
+        Compare a leaf bucket with the server's.
+
+        Returns:
+            Dict: {"fetch": keys changed or added upstream, "delete": keys removed upstream}
+        """
+        local = self.buckets.get(prefix, {})
+        return {
+            "fetch": [key for key, value in remote_entries.items() if local.get(key) != value],
+            "delete": [key for key in local if key not in remote_entries]
+        }
+
+    def _invalidate(self, bucket: str):
+        for i in range(len(bucket) + 1):
+            self._nodes.pop(bucket[:i], None)
+
+def apply_asset_changes(assets: List[Dict], fetched: Iterable[Dict], deleted: Iterable[str],
+                        manifest: Optional[AssetManifest] = None) -> List[Dict]:
+    """
+    Merge fetched and deleted assets into an asset list, keeping order.
+
+    Args:
+        assets: Current asset records
+        fetched: Added or changed records from the server
+        deleted: Keys of assets removed upstream
+        manifest: Optional manifest updated alongside
+
+    Returns:
+        List[Dict]: New asset list (changed records replaced in place, new ones appended)
+    """
+    upserts = {entity_key("assets", record): record for record in fetched}
+    deleted = set(deleted)
+    result = []
+    for record in assets:
+        key = entity_key("assets", record)
+        if key in deleted:
+            continue
+        result.append(upserts.pop(key, record))
+    result.extend(upserts.values())
+
+    if manifest is not None:
+        for key in deleted:
+            manifest.remove(key)
+        for record in fetched:
+            manifest.add(record)
+    return result
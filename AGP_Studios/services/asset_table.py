@@ -0,0 +1,219 @@
+"""
+Compact in-memory asset table for game projects.
+Asset records use __slots__ with interned type strings instead of free-form dicts,
+and the table keeps indexes by ID, name and type for fast lookups and filtering.
+"""
+import sys
+from collections.abc import Mapping, MutableSequence
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
+
+# Fields stored in slots; any other record fields go to the "extra" dict
+CORE_FIELDS = ("asset_id", "name", "type", "url", "content_hash")
+
+class AssetRecord(Mapping):
+    """
+    Immutable asset record.
+    Behaves as a read-only mapping, so code written for asset dicts (record.get("name"),
+    dict(record)) keeps working; use replace() to derive a changed record.
+    """
+
+    __slots__ = CORE_FIELDS + ("extra",)
+
+    def __init__(self, asset_id: Optional[str] = None, name: Optional[str] = None,
+                 type: Optional[str] = None, url: Optional[str] = None,
+                 content_hash: Optional[str] = None, extra: Optional[Dict] = None):
+        self.asset_id = asset_id
+        self.name = name
+        self.type = sys.intern(type) if isinstance(type, str) else type
+        self.url = url
+        self.content_hash = content_hash
+        self.extra = extra or None
+
+    @classmethod
+    def from_dict(cls, data: Mapping) -> "AssetRecord":
+        """Create a record from an asset dict (returns records unchanged)."""
+        if isinstance(data, AssetRecord):
+            return data
+        # Core fields explicitly set to None are kept in extra so the dict round-trips exactly
+        extra = {key: value for key, value in data.items() if key not in CORE_FIELDS or value is None}
+        return cls(data.get("asset_id"), data.get("name"), data.get("type"),
+                   data.get("url"), data.get("content_hash"), extra)
+
+    def to_dict(self) -> Dict:
+        """Convert record to a plain dict."""
+        return dict(self.items())
+
+    def replace(self, **changes) -> "AssetRecord":
+        """Return a copy with the given fields changed."""
+        data = self.to_dict()
+        data.update(changes)
+        return AssetRecord.from_dict(data)
+
+    def __getitem__(self, key: str):
+        if key in CORE_FIELDS:
+            value = getattr(self, key)
+            if value is not None:
+                return value
+        if self.extra and key in self.extra:
+            return self.extra[key]
+        raise KeyError(key)
+
+    def __iter__(self) -> Iterator[str]:
+        for key in CORE_FIELDS:
+            if getattr(self, key) is not None:
+                yield key
+        if self.extra:
+            yield from self.extra
+
+    def __len__(self) -> int:
+        return sum(1 for _ in self)
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, Mapping):
+            return self.to_dict() == dict(other)
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return f"AssetRecord({self.to_dict()!r})"
+
+class AssetTable(MutableSequence):
+    """
+    Ordered table of AssetRecord objects with lookup indexes.
+    Accepts dicts wherever records are expected and converts them. Indexes are
+    built on first query and kept current on append; other edits rebuild them lazily.
+    """
+
+    def __init__(self, records: Iterable = ()):
+        """
+        Initialize AssetTable.
+
+        Args:
+            records: Asset records or dicts
+        """
+        self._records: List[AssetRecord] = [AssetRecord.from_dict(r) for r in records]
+        self._by_id: Optional[Dict[str, AssetRecord]] = None
+        self._by_name: Optional[Dict[str, List[AssetRecord]]] = None
+        self._by_type: Optional[Dict[str, List[AssetRecord]]] = None
+
+    def __getitem__(self, index):
+        return self._records[index]
+
+    def __setitem__(self, index, value):
+        if isinstance(index, slice):
+            self._records[index] = [AssetRecord.from_dict(v) for v in value]
+        else:
+            self._records[index] = AssetRecord.from_dict(value)
+        self._invalidate()
+
+    def __delitem__(self, index):
+        del self._records[index]
+        self._invalidate()
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def __iter__(self) -> Iterator[AssetRecord]:
+        return iter(self._records)
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, (AssetTable, list)):
+            return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"AssetTable({len(self)} assets)"
+
+    def insert(self, index: int, value):
+        self._records.insert(index, AssetRecord.from_dict(value))
+        self._invalidate()
+
+    def append(self, value):
+        record = AssetRecord.from_dict(value)
+        self._records.append(record)
+        if self._by_id is not None:
+            self._index(record)
+
+    def copy(self) -> "AssetTable":
+        """Shallow copy sharing the (immutable) records."""
+        table = AssetTable()
+        table._records = list(self._records)
+        return table
+
+    def discard(self, asset_id: str) -> bool:
+        """
+        Remove the asset with the given ID, if present.
+
+        Returns:
+            bool: True if an asset was removed
+        """
+        record = self.get(asset_id)
+        if record is None:
+            return False
+        del self[next(i for i, r in enumerate(self._records) if r is record)]
+        return True
+
+    def get(self, asset_id: str) -> Optional[AssetRecord]:
+        """Look up an asset by ID."""
+        self._ensure_indexes()
+        return self._by_id.get(asset_id)
+
+    def by_name(self, name: str) -> List[AssetRecord]:
+        """Assets with the given name."""
+        self._ensure_indexes()
+        return list(self._by_name.get(name, []))
+
+    def by_type(self, asset_type: str) -> List[AssetRecord]:
+        """Assets of the given type."""
+        self._ensure_indexes()
+        return list(self._by_type.get(asset_type, []))
+
+    def types(self) -> Dict[str, int]:
+        """Asset count per type."""
+        self._ensure_indexes()
+        return {asset_type: len(records) for asset_type, records in self._by_type.items()}
+
+    def filter(self, asset_type: Optional[str] = None, text: Optional[str] = None,
+               predicate: Optional[Callable[[AssetRecord], bool]] = None) -> List[AssetRecord]:
+        """
+        Filter assets, in table order.
+
+        Args:
+            asset_type: Only assets of this type (uses the type index)
+            text: Case-insensitive substring of the asset name
+            predicate: Additional condition
+
+        Returns:
+            List[AssetRecord]: Matching assets
+        """
+        if asset_type is not None:
+            self._ensure_indexes()
+            records = self._by_type.get(asset_type, [])
+        else:
+            records = self._records
+        if text:
+            text = text.lower()
+            records = [r for r in records if r.name and text in r.name.lower()]
+        if predicate is not None:
+            records = [r for r in records if predicate(r)]
+        return list(records)
+
+    def to_list(self) -> List[Dict]:
+        """Convert to a list of plain dicts (for serialization)."""
+        return [record.to_dict() for record in self._records]
+
+    def _ensure_indexes(self):
+        if self._by_id is None:
+            self._by_id, self._by_name, self._by_type = {}, {}, {}
+            for record in self._records:
+                self._index(record)
+
+    def _index(self, record: AssetRecord):
+        if record.asset_id is not None:
+            self._by_id[record.asset_id] = record
+        self._by_name.setdefault(record.name, []).append(record)
+        self._by_type.setdefault(record.type, []).append(record)
+
+    def _invalidate(self):
+        self._by_id = self._by_name = self._by_type = None
@@ -4,9 +4,25 @@ Handles token-based authentication, session management, and secure connections.
 """
 import hashlib
 import json
+import os
 from datetime import datetime, timedelta
 from typing import Optional, Dict
 
+from services.module_bus import ModuleBus
+
+# ModuleBus event after a login or logout; payload is {"username": str or None, "roles": list}
+AUTH_CHANGED = "auth_changed"
+
+def account_path(path: str, account: Optional[str]) -> str:
+    """
+    Per-account variant of a local state file ("content_index.json" becomes
+    "content_index.<account>.json"); the path itself when account is None.
+    """
+    if not account:
+        return path
+    root, ext = os.path.splitext(path)
+    return f"{root}.{account}{ext}"
+
 class AuthService:
     """
     Manages authentication and authorization with RaOS server.
@@ -26,6 +42,7 @@ class AuthService:
         self.token_expiry: Optional[datetime] = None
         self.user_profile: Optional[Dict] = None
         self.user_roles: list = []
+        self.username: Optional[str] = None  # Name of the logged-in user
         
     def authenticate(self, username: str, password: str) -> bool:
         """
@@ -57,11 +74,13 @@ class AuthService:
                 self.refresh_token = auth_data.get("refresh_token")
                 self.user_profile = auth_data.get("user_profile", {})
                 self.user_roles = auth_data.get("roles", [])
+                self.username = username
                 
                 # Set token expiry (default 1 hour)
                 expiry_minutes = auth_data.get("expires_in", 60)
                 self.token_expiry = datetime.now() + timedelta(minutes=expiry_minutes)
                 
+                self._publish_changed()
                 return True
             return False
             
@@ -99,6 +118,23 @@ class AuthService:
             print(f"Token refresh error: {e}")
             return False
     
+    def refresh_if_expiring(self, margin_seconds: float = 300) -> bool:
+        """
+        Refresh the access token now if it expires within the margin, so a request
+        about to be made does not pay for the refresh.
+        
+        Args:
+            margin_seconds: Refresh when fewer seconds than this remain
+            
+        Returns:
+            bool: True if the token is valid for at least the margin afterwards
+        """
+        if not self.access_token or not self.token_expiry:
+            return False
+        if datetime.now() + timedelta(seconds=margin_seconds) < self.token_expiry:
+            return True
+        return self.refresh_access_token()
+    
     def is_authenticated(self) -> bool:
         """
         Check if user is currently authenticated with valid token.
@@ -135,6 +171,30 @@ class AuthService:
             self.token_expiry = None
             self.user_profile = None
             self.user_roles = []
+            self.username = None
+            self._publish_changed()
+    
+    def account_key(self) -> Optional[str]:
+        """
+        Filesystem-safe key of the logged-in user on this server, for local state
+        (journals, replicas, caches) that must not be shared between accounts.
+        
+        Returns:
+            str: Key, or None when nobody is logged in
+        """
+        if not self.username:
+            return None
+        server = getattr(self.rcore_client, "url", "") or ""
+        digest = hashlib.sha256(f"{server}\n{self.username}".encode("utf-8")).hexdigest()[:12]
+        name = "".join(c if c.isalnum() or c in "-_" else "_" for c in self.username)[:32]
+        return f"{name}-{digest}"
+    
+    def _publish_changed(self):
+        """Tell other services (download scheduler, caches, ...) who is logged in now."""
+        ModuleBus.publish(AUTH_CHANGED, {
+            "username": self.username,
+            "roles": list(self.user_roles)
+        }, sender=self)
     
     def get_auth_header(self) -> Optional[str]:
         """
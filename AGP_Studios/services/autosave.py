@@ -0,0 +1,199 @@
+"""
+Debounced background autosave for RaOS content.
+Edits are coalesced per asset and written by a worker thread, so editing never
+blocks on the network and bursts of typing produce a single save of the latest state.
+"""
+import threading
+import time
+from typing import Callable, Dict, Optional, Set
+
+from services.content_manager import ContentAsset, ContentManager, SAVE_CONFLICT, SAVE_OK
+
+class _PendingSave:
+    """Latest unsaved state of one asset."""
+
+    __slots__ = ("asset", "title", "content", "first_change", "last_change")
+
+    def __init__(self, asset: ContentAsset, title: str, content: str):
+        now = time.monotonic()
+        self.asset = asset
+        self.title = title
+        self.content = content
+        self.first_change = now
+        self.last_change = now
+
+class AutosaveWorker:
+    """
+    Saves content edits in the background after a quiet period.
+    Saves use version checks; when the server holds a newer version the asset is
+    reported as conflicted and not autosaved again until the conflict is resolved.
+    """
+
+    def __init__(self, content_manager: ContentManager, delay: float = 1.5, max_delay: float = 10.0,
+                 on_result: Optional[Callable[[str, str], None]] = None):
+        """
+        Initialize AutosaveWorker.
+
+        Args:
+            content_manager: ContentManager used to save assets
+            delay: Seconds without edits before a save is sent (debounce)
+            max_delay: Maximum seconds an edit waits during continuous typing
+            on_result: Optional callback(asset_id, status) invoked from the worker thread
+                       with SAVE_OK, SAVE_CONFLICT or SAVE_FAILED
+        """
+        self.content_manager = content_manager
+        self.delay = delay
+        self.max_delay = max_delay
+        self.on_result = on_result
+        self._pending: Dict[str, _PendingSave] = {}
+        self._conflicted: Set[str] = set()
+        self._flush_requested: Set[str] = set()  # Assets to save without waiting for the debounce
+        self._running = True
+        self._condition = threading.Condition()
+        self._thread = threading.Thread(target=self._run, name="AutosaveWorker", daemon=True)
+        self._thread.start()
+
+    def schedule(self, asset: ContentAsset, title: str, content: str):
+        """
+        Record the latest edited state of an asset; the save is debounced.
+
+        Args:
+            asset: Asset being edited
+            title: Current title
+            content: Current body
+        """
+        with self._condition:
+            if asset.asset_id in self._conflicted:
+                return
+            pending = self._pending.get(asset.asset_id)
+            if pending is None or pending.asset is not asset:
+                self._pending[asset.asset_id] = _PendingSave(asset, title, content)
+            else:
+                pending.title = title
+                pending.content = content
+                pending.last_change = time.monotonic()
+            self._condition.notify()
+
+    def flush(self):
+        """Save all pending edits as soon as possible, without waiting for the debounce."""
+        with self._condition:
+            self._flush_requested.update(self._pending)
+            self._condition.notify()
+
+    def has_pending(self, asset_id: Optional[str] = None) -> bool:
+        """Check whether edits are waiting to be saved."""
+        with self._condition:
+            return bool(self._pending) if asset_id is None else asset_id in self._pending
+
+    def is_conflicted(self, asset_id: str) -> bool:
+        """Check whether an asset is blocked by an unresolved conflict."""
+        with self._condition:
+            return asset_id in self._conflicted
+
+    def discard(self, asset_id: str):
+        """Drop pending edits and conflict state of an asset (e.g. after reloading it)."""
+        with self._condition:
+            self._pending.pop(asset_id, None)
+            self._conflicted.discard(asset_id)
+            self._flush_requested.discard(asset_id)
+
+    def resolve_conflict(self, asset: ContentAsset, title: Optional[str] = None,
+                         content: Optional[str] = None) -> bool:
+        """
+        Resolve a conflict by overwriting the server version with the local state.
+
+        Args:
+            asset: Asset being edited
+            title: Current title in the editor (defaults to the latest pending edit)
+            content: Current body in the editor (defaults to the latest pending edit)
+
+        Returns:
+            bool: True if the overwrite succeeded
+        """
+        with self._condition:
+            pending = self._pending.pop(asset.asset_id, None)
+            self._conflicted.discard(asset.asset_id)
+            self._flush_requested.discard(asset.asset_id)
+        if pending is not None:
+            asset.title, asset.content = pending.title, pending.content
+        if title is not None:
+            asset.title = title
+        if content is not None:
+            asset.content = content
+        return self.content_manager.update_content(asset)
+
+    def stop(self, flush: bool = True):
+        """
+        Stop the worker thread.
+
+        Args:
+            flush: Save pending edits before stopping
+        """
+        with self._condition:
+            if not flush:
+                self._pending.clear()
+            self._running = False
+            self._condition.notify()
+        self._thread.join(timeout=30)
+
+    def _run(self):
+        while True:
+            with self._condition:
+                due = self._wait_for_due()
+                if due is None:
+                    return
+                pending = self._pending.pop(due)
+                self._flush_requested.discard(due)
+                # Save a copy of the latest state, so the request sees one consistent asset
+                # while the UI thread keeps working with the shared one
+                saved = pending.asset.copy()
+                saved.title = pending.title
+                saved.content = pending.content
+
+            status = self.content_manager.update_content_checked(saved)
+
+            if status == SAVE_OK:
+                with self._condition:
+                    asset = pending.asset
+                    asset.title, asset.content = saved.title, saved.content
+                    asset.version, asset.modified_date = saved.version, saved.modified_date
+            elif status == SAVE_CONFLICT:
+                # Edits that arrived during the request stay pending for resolve_conflict()
+                with self._condition:
+                    self._conflicted.add(due)
+            elif status != SAVE_OK:
+                # Retry after another debounce period unless a newer edit arrived meanwhile
+                with self._condition:
+                    if due not in self._pending and self._running:
+                        pending.first_change = pending.last_change = time.monotonic()
+                        self._pending[due] = pending
+
+            if self.on_result:
+                self.on_result(due, status)
+
+    def _wait_for_due(self) -> Optional[str]:
+        """Block until a pending save is due; returns its asset ID, or None to stop."""
+        while True:
+            # Conflicted assets keep their pending edits but are not saved until resolved
+            ready = [asset_id for asset_id in self._pending if asset_id not in self._conflicted]
+            if not ready:
+                if not self._running:
+                    return None
+                self._condition.wait()
+                continue
+
+            if not self._running:
+                return ready[0]
+            for asset_id in ready:
+                if asset_id in self._flush_requested:
+                    return asset_id
+
+            now = time.monotonic()
+            wait = None
+            for asset_id in ready:
+                pending = self._pending[asset_id]
+                due_at = min(pending.last_change + self.delay, pending.first_change + self.max_delay)
+                if due_at <= now:
+                    return asset_id
+                wait = due_at - now if wait is None else min(wait, due_at - now)
+            self._condition.wait(wait)
@@ -0,0 +1,275 @@
+"""
+Bulk content operations for RaOS.
+Chunks iterables of assets into batched requests, runs them over pooled
+connections with bounded parallelism, and streams back per-item results.
+"""
+import json
+import os
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from typing import Dict, Iterable, Iterator, List, Optional, Union
+
+from services.content_manager import ContentAsset, ContentManager
+from services.rapi_client import RaCoreClientPool
+
+# File extensions imported as text content when importing a directory tree
+TEXT_CONTENT_EXTENSIONS = {".txt", ".md", ".markdown", ".html", ".htm", ".rst"}
+
+class BulkResult:
+    """Outcome of one item in a bulk operation."""
+
+    def __init__(self, index: int, success: bool, asset_id: Optional[str] = None,
+                 error: Optional[str] = None, title: Optional[str] = None):
+        self.index = index  # Position of the item in the input iterable
+        self.success = success
+        self.asset_id = asset_id
+        self.error = error
+        self.title = title
+
+    def to_dict(self) -> Dict:
+        """Convert result to dictionary."""
+        return {
+            "index": self.index,
+            "success": self.success,
+            "asset_id": self.asset_id,
+            "error": self.error,
+            "title": self.title
+        }
+
+class _InvalidItem(dict):
+    """Placeholder for an input item that could not be read or parsed; reported as failed, never sent."""
+
+    def __init__(self, error: str, title: Optional[str] = None):
+        super().__init__()
+        self.error = error
+        self.title = title
+
+class BulkContentOperations:
+    """
+    Batched create/update/delete of content assets.
+    Results are yielded chunk by chunk, so callers can report progress
+    without holding the whole input or output in memory.
+    """
+
+    def __init__(self, content_manager: ContentManager, chunk_size: int = 200, max_parallel: int = 4,
+                 pool: Optional[RaCoreClientPool] = None):
+        """
+        Initialize BulkContentOperations.
+
+        Args:
+            content_manager: ContentManager providing auth and cache invalidation
+            chunk_size: Number of items per batched request
+            max_parallel: Maximum number of batches in flight
+            pool: Optional connection pool (one is created from the manager's client otherwise)
+        """
+        self.content_manager = content_manager
+        self.auth_service = content_manager.auth_service
+        self.chunk_size = chunk_size
+        self.max_parallel = max_parallel
+        self.pool = pool or RaCoreClientPool.from_client(content_manager.rcore_client, max_parallel)
+
+    def create_many(self, assets: Iterable[Union[Dict, ContentAsset]]) -> Iterator[BulkResult]:
+        """
+        Create many content assets.
+
+        Args:
+            assets: Iterable of ContentAsset objects or dicts with asset_type, title, content, metadata
+
+        Yields:
+            BulkResult: Per-item result, in input order
+        """
+        items = (asset if isinstance(asset, _InvalidItem) else {
+            "asset_type": asset.get("asset_type", "post"),
+            "title": asset.get("title", ""),
+            "content": asset.get("content", ""),
+            "metadata": asset.get("metadata", {})
+        } for asset in (self._as_dict(a) for a in assets))
+        yield from self._run("create", items)
+
+    def update_many(self, assets: Iterable[ContentAsset]) -> Iterator[BulkResult]:
+        """
+        Update many content assets.
+
+        Args:
+            assets: Iterable of ContentAsset objects (or their to_dict() form)
+
+        Yields:
+            BulkResult: Per-item result, in input order
+        """
+        yield from self._run("update", (self._as_dict(a) for a in assets))
+
+    def delete_many(self, asset_ids: Iterable[str]) -> Iterator[BulkResult]:
+        """
+        Delete many content assets.
+
+        Args:
+            asset_ids: Iterable of asset IDs
+
+        Yields:
+            BulkResult: Per-item result, in input order
+        """
+        yield from self._run("delete", ({"asset_id": asset_id} for asset_id in asset_ids))
+
+    def import_ndjson(self, path: str, default_type: str = "post") -> Iterator[BulkResult]:
+        """
+        Create content from a newline-delimited JSON file (one asset object per line).
+        Malformed lines are reported as failed items and the import continues.
+
+        Args:
+            path: Path of the NDJSON file
+            default_type: Asset type for records without one
+
+        Yields:
+            BulkResult: Per-item result, in input order (one per non-empty line)
+        """
+        def records():
+            with open(path, "r", encoding="utf-8") as f:
+                for number, line in enumerate(f, 1):
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        record = json.loads(line)
+                    except ValueError as e:
+                        yield _InvalidItem(f"line {number}: invalid JSON ({e})")
+                        continue
+                    if not isinstance(record, dict):
+                        yield _InvalidItem(f"line {number}: expected a JSON object")
+                        continue
+                    record.setdefault("asset_type", default_type)
+                    yield record
+        yield from self.create_many(records())
+
+    def import_directory(self, root: str, default_type: str = "post") -> Iterator[BulkResult]:
+        """
+        Create content from a directory tree of text files.
+        The first-level subdirectory name is used as asset type when present, the
+        file name (without extension) as title and the file text as content.
+        Unreadable files and directories are reported as failed items and the import continues.
+
+        Args:
+            root: Root directory to walk
+            default_type: Asset type for files directly under the root
+
+        Yields:
+            BulkResult: Per-item result, in input order
+        """
+        errors: List[OSError] = []  # Directories os.walk could not list
+
+        def walk_errors():
+            while errors:
+                error = errors.pop(0)
+                yield _InvalidItem(f"{os.path.relpath(error.filename or root, root)}: {error.strerror or error}")
+
+        def records():
+            for directory, _, filenames in os.walk(root, onerror=errors.append):
+                yield from walk_errors()
+                relative = os.path.relpath(directory, root)
+                asset_type = default_type if relative == "." else relative.split(os.sep)[0].lower()
+                for filename in sorted(filenames):
+                    title, ext = os.path.splitext(filename)
+                    if ext.lower() not in TEXT_CONTENT_EXTENSIONS:
+                        continue
+                    path = os.path.join(directory, filename)
+                    try:
+                        with open(path, "r", encoding="utf-8", errors="replace") as f:
+                            content = f.read()
+                    except OSError as e:
+                        yield _InvalidItem(f"{os.path.relpath(path, root)}: {e.strerror or e}", title)
+                        continue
+                    yield {
+                        "asset_type": asset_type,
+                        "title": title,
+                        "content": content,
+                        "metadata": {"source_path": os.path.relpath(path, root)}
+                    }
+            yield from walk_errors()
+        yield from self.create_many(records())
+
+    def _run(self, operation: str, items: Iterable[Dict]) -> Iterator[BulkResult]:
+        if not self.auth_service.is_authenticated():
+            # Reported per item like any other failure, so callers do not take it for an empty input
+            for index, item in enumerate(items):
+                yield BulkResult(index, False, item.get("asset_id"), "Authentication required",
+                                 getattr(item, "title", None) or item.get("title"))
+            return
+
+        iterator = iter(items)
+        offset = 0
+        in_flight = deque()
+
+        with ThreadPoolExecutor(max_workers=self.max_parallel) as executor:
+            try:
+                while True:
+                    # Keep at most max_parallel batches in flight (bounded memory)
+                    while len(in_flight) < self.max_parallel:
+                        chunk = list(islice(iterator, self.chunk_size))
+                        if not chunk:
+                            break
+                        in_flight.append(executor.submit(self._send_batch, operation, chunk, offset))
+                        offset += len(chunk)
+
+                    if not in_flight:
+                        break
+                    yield from in_flight.popleft().result()
+            finally:
+                for future in in_flight:
+                    future.cancel()
+                self.content_manager.cache.invalidate("content_list")
+
+    def _send_batch(self, operation: str, chunk: List[Dict], offset: int) -> List[BulkResult]:
+        invalid = [BulkResult(offset + i, False, error=item.error, title=item.title)
+                   for i, item in enumerate(chunk) if isinstance(item, _InvalidItem)]
+        if invalid:
+            positions = [i for i, item in enumerate(chunk) if not isinstance(item, _InvalidItem)]
+            results = invalid
+            if positions:
+                sent = self._send_batch(operation, [chunk[i] for i in positions], 0)
+                for result in sent:
+                    # Map the position within the sent items back to the input
+                    result.index = offset + positions[result.index] if result.index < len(positions) else offset
+                results = invalid + sent
+            return sorted(results, key=lambda result: result.index)
+
+        try:
+            request = json.dumps({
+                "action": "bulk_content",
+                "auth_token": self.auth_service.access_token,
+                "operation": operation,
+                "items": chunk
+            })
+
+            response = self.pool.send(request)
+            data = json.loads(response)
+
+            if not data.get("success"):
+                error = data.get("error", "Unknown error")
+                return [BulkResult(offset + i, False, item.get("asset_id"), error, item.get("title"))
+                        for i, item in enumerate(chunk)]
+
+            results = {}
+            for entry in data.get("results", []):
+                i = entry.get("index", 0)
+                if not 0 <= i < len(chunk):
+                    continue
+                item = chunk[i]
+                asset_id = entry.get("asset_id", item.get("asset_id"))
+                results[i] = BulkResult(offset + i, entry.get("success", False),
+                                        asset_id, entry.get("error"), item.get("title"))
+                if operation != "create" and asset_id:
+                    self.content_manager.cache.invalidate("content", asset_id)
+            # Items the reply left out were not confirmed; report them instead of dropping them
+            for i, item in enumerate(chunk):
+                if i not in results:
+                    results[i] = BulkResult(offset + i, False, item.get("asset_id"),
+                                            "No result returned by the server", item.get("title"))
+            return [results[i] for i in range(len(chunk))]
+
+        except Exception as e:
+            return [BulkResult(offset + i, False, item.get("asset_id"), str(e), item.get("title"))
+                    for i, item in enumerate(chunk)]
+
+    @staticmethod
+    def _as_dict(asset: Union[Dict, ContentAsset]) -> Dict:
+        return asset.to_dict() if isinstance(asset, ContentAsset) else asset
@@ -0,0 +1,229 @@
+"""
+Adaptive compression policy for the RaOS asset pipeline.
+Decides per asset whether compression is worthwhile and which codec/level to use,
+based on content type detection, sampled entropy and measured codec throughput.
+"""
+import bz2
+import gzip
+import lzma
+import math
+import os
+import time
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+# Magic-byte signatures of formats that are already compressed
+INCOMPRESSIBLE_SIGNATURES = [
+    (0, b"\x89PNG\r\n\x1a\n", "png"),
+    (0, b"\xff\xd8\xff", "jpeg"),
+    (0, b"GIF8", "gif"),
+    (0, b"ID3", "mp3"),
+    (0, b"\xff\xfb", "mp3"),
+    (0, b"\xff\xf3", "mp3"),
+    (0, b"OggS", "ogg"),
+    (0, b"fLaC", "flac"),
+    (0, b"\x1aE\xdf\xa3", "webm"),
+    (4, b"ftyp", "mp4"),
+    (0, b"\x1f\x8b", "gzip"),
+    (0, b"PK\x03\x04", "zip"),
+    (0, b"BZh", "bz2"),
+    (0, b"\xfd7zXZ\x00", "xz"),
+    (0, b"7z\xbc\xaf\x27\x1c", "7z"),
+    (0, b"\x28\xb5\x2f\xfd", "zstd"),
+]
+
+INCOMPRESSIBLE_EXTENSIONS = {
+    ".png", ".jpg", ".jpeg", ".gif", ".webp", ".mp3", ".mp4", ".m4a", ".aac",
+    ".ogg", ".flac", ".webm", ".mkv", ".mov", ".avi", ".zip", ".gz", ".bz2",
+    ".xz", ".7z", ".zst", ".docx", ".pdf",
+}
+
+# Codec name -> compression function taking (data, level)
+CODECS = {
+    "gzip": lambda data, level: gzip.compress(data, compresslevel=level),
+    "bz2": lambda data, level: bz2.compress(data, compresslevel=level),
+    "lzma": lambda data, level: lzma.compress(data, preset=level),
+}
+
+class CompressionDecision:
+    """Outcome of the compression policy for a single asset."""
+
+    def __init__(self, codec: Optional[str], level: Optional[int], reason: str,
+                 original_size: int, entropy: float = 0.0, detected_format: Optional[str] = None):
+        self.codec = codec  # None means the asset is sent uncompressed
+        self.level = level
+        self.reason = reason
+        self.original_size = original_size
+        self.compressed_size = original_size
+        self.entropy = entropy
+        self.detected_format = detected_format
+        self.throughput = 0.0  # Measured bytes/second of the chosen codec on the sample
+
+    @property
+    def compressed(self) -> bool:
+        """Whether the asset payload is compressed."""
+        return self.codec is not None
+
+    @property
+    def bytes_saved(self) -> int:
+        """Bytes saved by compression (0 when skipped)."""
+        return max(0, self.original_size - self.compressed_size)
+
+    def to_dict(self) -> Dict:
+        """Convert decision to dictionary for upload metadata."""
+        return {
+            "codec": self.codec,
+            "level": self.level,
+            "reason": self.reason,
+            "original_size": self.original_size,
+            "compressed_size": self.compressed_size,
+            "bytes_saved": self.bytes_saved,
+            "entropy": round(self.entropy, 3),
+            "detected_format": self.detected_format,
+            "throughput": round(self.throughput)
+        }
+
+class CompressionPolicy:
+    """
+    Chooses whether and how to compress an asset before upload.
+    Already-compressed formats and high-entropy data are skipped; otherwise each
+    candidate codec is timed on a sample block and the one that minimises
+    estimated compress + transfer time is used.
+    """
+
+    DEFAULT_CANDIDATES: List[Tuple[str, int]] = [
+        ("gzip", 1), ("gzip", 6), ("gzip", 9), ("bz2", 9), ("lzma", 6)
+    ]
+
+    def __init__(self, sample_size: int = 64 * 1024, entropy_threshold: float = 7.5,
+                 min_size: int = 512, upload_bandwidth: float = 10 * 1024 * 1024,
+                 candidates: Optional[List[Tuple[str, int]]] = None):
+        """
+        Initialize CompressionPolicy.
+
+        Args:
+            sample_size: Total bytes sampled (from start, middle and end) for probing
+            entropy_threshold: Shannon entropy (bits/byte) above which data is treated as incompressible
+            min_size: Assets smaller than this are never compressed
+            upload_bandwidth: Estimated upload bandwidth in bytes/second used to weigh CPU time against transfer time
+            candidates: (codec, level) pairs to evaluate
+        """
+        self.sample_size = sample_size
+        self.entropy_threshold = entropy_threshold
+        self.min_size = min_size
+        self.upload_bandwidth = upload_bandwidth
+        self.candidates = candidates or list(self.DEFAULT_CANDIDATES)
+
+    def detect_format(self, data: bytes, filename: Optional[str] = None) -> Optional[str]:
+        """
+        Detect an already-compressed format from magic bytes or file extension.
+
+        Args:
+            data: Binary asset data
+            filename: Optional original filename
+
+        Returns:
+            str: Detected format name, or None if the data is not a known compressed format
+        """
+        for offset, signature, name in INCOMPRESSIBLE_SIGNATURES:
+            if data[offset:offset + len(signature)] == signature:
+                return name
+        if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+            return "webp"
+        if filename:
+            _, ext = os.path.splitext(filename.lower())
+            if ext in INCOMPRESSIBLE_EXTENSIONS:
+                return ext.lstrip(".")
+        return None
+
+    def sample(self, data: bytes) -> bytes:
+        """Take a sample block from the start, middle and end of the data."""
+        if len(data) <= self.sample_size:
+            return data
+        part = self.sample_size // 3
+        middle = len(data) // 2 - part // 2
+        return data[:part] + data[middle:middle + part] + data[-part:]
+
+    @staticmethod
+    def entropy(sample: bytes) -> float:
+        """
+        Compute Shannon entropy of a byte sample.
+
+        Returns:
+            float: Entropy in bits per byte (0.0 - 8.0)
+        """
+        if not sample:
+            return 0.0
+        total = len(sample)
+        return -sum((count / total) * math.log2(count / total)
+                    for count in Counter(sample).values())
+
+    def decide(self, data: bytes, filename: Optional[str] = None) -> CompressionDecision:
+        """
+        Decide how to compress an asset without compressing the full payload.
+
+        Args:
+            data: Binary asset data
+            filename: Optional original filename
+
+        Returns:
+            CompressionDecision: Chosen codec/level, or a skip decision with reason
+        """
+        size = len(data)
+        if size < self.min_size:
+            return CompressionDecision(None, None, "too_small", size)
+
+        detected = self.detect_format(data, filename)
+        if detected:
+            return CompressionDecision(None, None, "already_compressed", size,
+                                       detected_format=detected)
+
+        sample = self.sample(data)
+        entropy = self.entropy(sample)
+        if entropy >= self.entropy_threshold:
+            return CompressionDecision(None, None, "high_entropy", size, entropy)
+
+        # Baseline: send the raw bytes
+        best_cost = size / self.upload_bandwidth
+        best = CompressionDecision(None, None, "not_beneficial", size, entropy)
+
+        for codec, level in self.candidates:
+            start = time.perf_counter()
+            compressed_sample = CODECS[codec](sample, level)
+            elapsed = max(time.perf_counter() - start, 1e-6)
+
+            throughput = len(sample) / elapsed
+            ratio = len(compressed_sample) / len(sample)
+            cost = size / throughput + (size * ratio) / self.upload_bandwidth
+
+            if cost < best_cost:
+                best_cost = cost
+                best = CompressionDecision(codec, level, "measured", size, entropy)
+                best.compressed_size = int(size * ratio)
+                best.throughput = throughput
+
+        return best
+
+    def compress(self, data: bytes, filename: Optional[str] = None) -> Tuple[bytes, CompressionDecision]:
+        """
+        Apply the policy to an asset.
+
+        Args:
+            data: Binary asset data
+            filename: Optional original filename
+
+        Returns:
+            Tuple[bytes, CompressionDecision]: Payload to upload and the decision taken
+        """
+        decision = self.decide(data, filename)
+        if not decision.compressed:
+            return data, decision
+
+        compressed = CODECS[decision.codec](data, decision.level)
+        if len(compressed) >= len(data):
+            # Sample was not representative; fall back to raw upload
+            skipped = CompressionDecision(None, None, "not_beneficial", len(data), decision.entropy)
+            return data, skipped
+
+        decision.compressed_size = len(compressed)
+        return compressed, decision
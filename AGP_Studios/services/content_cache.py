@@ -0,0 +1,259 @@
+"""
+Local response cache for RaOS services.
+Layered per-resource TTLs, a memory budget with LRU eviction, and version/ETag
+revalidation so unchanged resources cost a small "not modified" reply. Entries are
+scoped to the logged-in account, and values are handed out as copies.
+"""
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+
+# Default time-to-live in seconds per resource namespace (see docs/ARCHITECTURE.md)
+DEFAULT_TTLS = {
+    "content_list": 30,
+    "content": 60,
+    "games": 60,
+    "profile": 300,
+    "achievements": 120,
+    "leaderboard": 30,
+}
+
+def copy_value(value: Any) -> Any:
+    """Copy the lists and dicts of a JSON-like value (callers may modify what they get)."""
+    if isinstance(value, list):
+        return [copy_value(item) for item in value]
+    if isinstance(value, dict):
+        return {key: copy_value(item) for key, item in value.items()}
+    return value
+
+def versioned_loader(rcore_client, message: Dict, field: str, default: Any = None,
+                     version: Optional[Callable[[Any], Optional[str]]] = None,
+                     on_loaded: Optional[Callable[[Any, Optional[str]], None]] = None,
+                     description: str = "resource") -> Callable[[Optional[str]], Optional[Dict]]:
+    """
+    Build a ContentCache.fetch loader for a request that supports "if_none_match".
+
+    Args:
+        rcore_client: RaCoreClient used to send the request
+        message: Request (action, auth_token, ...) without "if_none_match"
+        field: Response field holding the value
+        default: Value when the field is missing
+        version: Takes the version from the value instead of the response "version" field
+        on_loaded: Called with a newly loaded value and its version (e.g. to persist it)
+        description: What is fetched, for error messages
+
+    Returns:
+        Callable: Loader taking the cached version (or None)
+    """
+    def load(current_version: Optional[str]) -> Optional[Dict]:
+        try:
+            response = rcore_client.send(json.dumps(dict(message, if_none_match=current_version)))
+            data = json.loads(response)
+
+            if data.get("success"):
+                if data.get("not_modified"):
+                    return {"not_modified": True}
+                value = data.get(field, default)
+                new_version = version(value) if version is not None else data.get("version")
+                if on_loaded is not None:
+                    on_loaded(value, new_version)
+                return {"value": value, "version": new_version}
+
+            print(f"Error fetching {description}: {data.get('error', 'Unknown error')}")
+            return None
+
+        except Exception as e:
+            print(f"Error fetching {description}: {e}")
+            return None
+
+    return load
+
+class CacheEntry:
+    """A cached value together with its server version and expiry."""
+
+    __slots__ = ("value", "version", "expires_at", "size")
+
+    def __init__(self, value: Any, version: Optional[str], expires_at: float, size: int):
+        self.value = value
+        self.version = version
+        self.expires_at = expires_at
+        self.size = size
+
+    @property
+    def fresh(self) -> bool:
+        """Whether the entry is still within its TTL."""
+        return time.monotonic() < self.expires_at
+
+class ContentCache:
+    """
+    Thread-safe LRU cache shared by the RaOS services.
+    Entries are grouped by namespace (content_list, content, games, profile...),
+    each with its own TTL. Stale entries are kept until evicted so they can be
+    revalidated with their version instead of being refetched in full.
+    With a scope (e.g. AuthService.account_key) every account sees only its own
+    entries; entries of other accounts stay until evicted.
+    """
+
+    def __init__(self, memory_budget: int = 32 * 1024 * 1024, ttls: Optional[Dict[str, float]] = None,
+                 scope: Optional[Callable[[], Hashable]] = None):
+        """
+        Initialize ContentCache.
+
+        Args:
+            memory_budget: Approximate maximum size of cached values in bytes
+            ttls: Optional per-namespace TTL overrides in seconds
+            scope: Optional callable returning the current scope (account); part of every key
+        """
+        self.memory_budget = memory_budget
+        self.ttls = dict(DEFAULT_TTLS)
+        if ttls:
+            self.ttls.update(ttls)
+        self.scope = scope
+        # (scope, namespace, key) -> entry
+        self._entries: "OrderedDict[Tuple[Hashable, str, Hashable], CacheEntry]" = OrderedDict()
+        self._size = 0
+        self._lock = threading.RLock()
+        self.stats = {"hits": 0, "misses": 0, "revalidated": 0, "evictions": 0}
+
+    def get(self, namespace: str, key: Hashable, allow_stale: bool = False) -> Optional[CacheEntry]:
+        """
+        Look up a cache entry.
+
+        Args:
+            namespace: Resource namespace
+            key: Resource key within the namespace
+            allow_stale: Return expired entries too (for revalidation)
+
+        Returns:
+            CacheEntry: The entry, or None if missing (or stale and allow_stale is False);
+                        its value is shared with the cache and must not be modified
+        """
+        return self._get(self._key(namespace, key), allow_stale)
+
+    def peek(self, namespace: str, key: Hashable) -> Optional[Any]:
+        """Copy of a cached value, even if stale, or None if missing."""
+        entry = self.get(namespace, key, allow_stale=True)
+        return copy_value(entry.value) if entry is not None else None
+
+    def put(self, namespace: str, key: Hashable, value: Any, version: Optional[str] = None,
+            expired: bool = False):
+        """
+        Store a value, evicting least recently used entries beyond the memory budget.
+
+        Args:
+            namespace: Resource namespace
+            key: Resource key within the namespace
+            value: JSON-serializable value to cache
+            version: Optional server version/ETag used for revalidation
+            expired: Store the value as already stale (e.g. restored from disk), so the
+                     next fetch revalidates it
+        """
+        self._put(self._key(namespace, key), value, version, expired)
+
+    def touch(self, namespace: str, key: Hashable):
+        """Renew the TTL of an entry confirmed unchanged by the server."""
+        self._touch(self._key(namespace, key))
+
+    def invalidate(self, namespace: str, key: Optional[Hashable] = None):
+        """
+        Drop cached entries.
+
+        Args:
+            namespace: Resource namespace
+            key: Key to drop, or None to drop the whole namespace
+        """
+        with self._lock:
+            if key is not None:
+                self._remove(self._key(namespace, key))
+                return
+            for cache_key in [k for k in self._entries if k[1] == namespace]:
+                self._remove(cache_key)
+
+    def clear(self):
+        """Drop all cached entries."""
+        with self._lock:
+            self._entries.clear()
+            self._size = 0
+
+    def fetch(self, namespace: str, key: Hashable,
+              loader: Callable[[Optional[str]], Optional[Dict]]) -> Optional[Any]:
+        """
+        Return a cached value, revalidating or loading it through the server when needed.
+
+        The loader is called with the stale entry's version (or None) and must return
+        None on failure, {"not_modified": True} when the version is still current, or
+        {"value": ..., "version": ...} with the new value (see versioned_loader).
+        The result is stored for the scope current when the fetch started.
+
+        Args:
+            namespace: Resource namespace
+            key: Resource key within the namespace
+            loader: Callable performing the server round trip
+
+        Returns:
+            Any: A copy of the cached or freshly loaded value, or None if loading failed
+        """
+        cache_key = self._key(namespace, key)
+        entry = self._get(cache_key, allow_stale=True)
+        if entry is not None and entry.fresh:
+            self.stats["hits"] += 1
+            return copy_value(entry.value)
+
+        self.stats["misses"] += 1
+        result = loader(entry.version if entry is not None else None)
+        if result is None:
+            return None
+
+        if result.get("not_modified") and entry is not None:
+            self.stats["revalidated"] += 1
+            self._touch(cache_key)
+            return copy_value(entry.value)
+
+        value = result.get("value")
+        self._put(cache_key, value, result.get("version"))
+        return copy_value(value)
+
+    @property
+    def size(self) -> int:
+        """Approximate size of cached values in bytes."""
+        return self._size
+
+    def _key(self, namespace: str, key: Hashable) -> Tuple[Hashable, str, Hashable]:
+        return (self.scope() if self.scope is not None else None, namespace, key)
+
+    def _get(self, cache_key: Tuple[Hashable, str, Hashable], allow_stale: bool) -> Optional[CacheEntry]:
+        with self._lock:
+            entry = self._entries.get(cache_key)
+            if entry is None or (not allow_stale and not entry.fresh):
+                return None
+            self._entries.move_to_end(cache_key)
+            return entry
+
+    def _put(self, cache_key: Tuple[Hashable, str, Hashable], value: Any, version: Optional[str] = None,
+             expired: bool = False):
+        size = len(json.dumps(value, default=str))
+        with self._lock:
+            self._remove(cache_key)
+            if size > self.memory_budget:
+                return
+            expires_at = time.monotonic() + (0 if expired else self.ttls.get(cache_key[1], 60))
+            self._entries[cache_key] = CacheEntry(value, version, expires_at, size)
+            self._size += size
+            while self._size > self.memory_budget:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.stats["evictions"] += 1
+
+    def _touch(self, cache_key: Tuple[Hashable, str, Hashable]):
+        with self._lock:
+            entry = self._entries.get(cache_key)
+            if entry:
+                entry.expires_at = time.monotonic() + self.ttls.get(cache_key[1], 60)
+                self._entries.move_to_end(cache_key)
+
+    def _remove(self, cache_key: Tuple[Hashable, str, Hashable]):
+        entry = self._entries.pop(cache_key, None)
+        if entry is not None:
+            self._size -= entry.size
@@ -0,0 +1,134 @@
+"""
+Local replica of the RaOS content index.
+Kept current by applying delta change sets (including delete tombstones) so a
+refresh only transfers what changed since the last sync token.
+"""
+import json
+import os
+from typing import Dict, Iterable, List, Optional
+
+DEFAULT_INDEX_PATH = os.path.join(os.path.expanduser("~"), ".rastudio", "cache", "content_index.json")
+
+class ContentChanges:
+    """Summary of a delta sync: asset IDs added, updated and removed."""
+
+    def __init__(self):
+        self.added: List[str] = []
+        self.updated: List[str] = []
+        self.removed: List[str] = []
+        self.full_resync = False
+
+    def __bool__(self) -> bool:
+        return bool(self.added or self.updated or self.removed or self.full_resync)
+
+    def to_dict(self) -> Dict:
+        """Convert change summary to dictionary."""
+        return {
+            "added": self.added,
+            "updated": self.updated,
+            "removed": self.removed,
+            "full_resync": self.full_resync
+        }
+
+class ContentIndex:
+    """
+    Local replica of content metadata keyed by asset ID.
+    Persisted to disk together with the server sync token.
+    """
+
+    def __init__(self, path: Optional[str] = DEFAULT_INDEX_PATH):
+        """
+        Initialize ContentIndex.
+
+        Args:
+            path: JSON file used to persist the replica, or None for memory only
+        """
+        self.path = path
+        self.items: Dict[str, Dict] = {}
+        self.sync_token: Optional[str] = None
+        self.load()
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def get(self, asset_id: str) -> Optional[Dict]:
+        """Get metadata for an asset."""
+        return self.items.get(asset_id)
+
+    def filter(self, content_type: Optional[str] = None) -> List[Dict]:
+        """
+        List replica entries, optionally filtered by content type.
+
+        Args:
+            content_type: Optional content type filter
+
+        Returns:
+            List[Dict]: Matching content metadata
+        """
+        if content_type is None:
+            return list(self.items.values())
+        return [item for item in self.items.values() if item.get("asset_type") == content_type]
+
+    def reset(self):
+        """Drop the replica (forces a full resync)."""
+        self.items.clear()
+        self.sync_token = None
+
+    def apply(self, changes: Iterable[Dict], summary: Optional[ContentChanges] = None) -> ContentChanges:
+        """
+        Apply a change set to the replica.
+
+        Args:
+            changes: Content metadata records; records with "deleted": true are tombstones
+            summary: Optional summary to accumulate into
+
+        Returns:
+            ContentChanges: Asset IDs added, updated and removed
+        """
+        if summary is None:
+            summary = ContentChanges()
+        for change in changes:
+            asset_id = change.get("asset_id")
+            if asset_id is None:
+                continue
+
+            if change.get("deleted"):
+                if self.items.pop(asset_id, None) is not None:
+                    summary.removed.append(asset_id)
+                continue
+
+            record = {k: v for k, v in change.items() if k != "deleted"}
+            if asset_id in self.items:
+                # Changes may carry only modified fields
+                self.items[asset_id] = {**self.items[asset_id], **record}
+                summary.updated.append(asset_id)
+            else:
+                self.items[asset_id] = record
+                summary.added.append(asset_id)
+        return summary
+
+    def load(self):
+        """Load the replica from disk, if persisted."""
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            self.items = {item["asset_id"]: item for item in data.get("items", [])}
+            self.sync_token = data.get("sync_token")
+        except (OSError, ValueError, KeyError) as e:
+            print(f"Error loading content index: {e}")
+            self.reset()
+
+    def save(self):
+        """Persist the replica to disk atomically."""
+        if not self.path:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"sync_token": self.sync_token, "items": list(self.items.values())}, f)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            print(f"Error saving content index: {e}")
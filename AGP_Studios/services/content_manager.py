@@ -3,21 +3,51 @@ Content manager for RaOS content processing.
 Handles fetching, editing, and uploading RaOS content assets (blogs, posts, images, etc.).
 """
 import json
-from typing import List, Dict, Optional
+import sys
+import threading
+from concurrent.futures import Future
+from typing import List, Dict, Iterator, Optional, Tuple
 from datetime import datetime
+from services.compression_policy import CompressionPolicy, CompressionDecision
+from services.image_converter import ImageConverter, converted_filename
+from services.asset_analysis import AssetAnalyzer, find_near_duplicates
+from services.auth_service import AUTH_CHANGED, account_path
+from services.content_cache import ContentCache, versioned_loader
+from services.content_index import DEFAULT_INDEX_PATH, ContentIndex, ContentChanges
+from services.content_search import DEFAULT_SEARCH_INDEX_PATH, ContentSearchIndex
+from services.module_bus import ModuleBus
+from services.content_patch import SyncedState, content_hash
+
+# Outcomes of ContentManager.update_content_checked
+SAVE_OK = "saved"
+SAVE_CONFLICT = "conflict"
+SAVE_FAILED = "failed"
 
 class ContentAsset:
     """Represents a content asset in RaOS."""
     
+    __slots__ = ("asset_id", "asset_type", "title", "content", "metadata", "version",
+                 "created_date", "modified_date")
+    
     def __init__(self, asset_id: str, asset_type: str, title: str, content: str = ""):
         self.asset_id = asset_id
-        self.asset_type = asset_type  # blog, post, image, video, code, etc.
+        # blog, post, image, video, code, etc. (records without a type keep None)
+        self.asset_type = sys.intern(asset_type) if isinstance(asset_type, str) else asset_type
         self.title = title
         self.content = content
         self.metadata: Dict = {}
+        self.version: Optional[str] = None  # Server version of the last synced state
         self.created_date = datetime.now()
         self.modified_date = datetime.now()
         
+    def copy(self) -> "ContentAsset":
+        """Shallow copy with its own metadata dict."""
+        clone = ContentAsset.__new__(ContentAsset)
+        for field in self.__slots__:
+            setattr(clone, field, getattr(self, field))
+        clone.metadata = dict(self.metadata)
+        return clone
+        
     def to_dict(self) -> Dict:
         """Convert asset to dictionary for serialization."""
         return {
@@ -26,6 +56,7 @@ class ContentAsset:
             "title": self.title,
             "content": self.content,
             "metadata": self.metadata,
+            "version": self.version,
             "created_date": self.created_date.isoformat(),
             "modified_date": self.modified_date.isoformat()
         }
@@ -36,21 +67,56 @@ class ContentManager:
     Provides content fetching, editing, uploading, and asset pipeline integration.
     """
     
-    def __init__(self, rcore_client, auth_service):
+    def __init__(self, rcore_client, auth_service, cache: Optional[ContentCache] = None):
         """
         Initialize ContentManager.
         
         Args:
             rcore_client: RaCoreClient instance for server communication
             auth_service: AuthService instance for authenticated requests
+            cache: Optional shared ContentCache (a private one is created otherwise)
         """
         self.rcore_client = rcore_client
         self.auth_service = auth_service
+        self.cache = cache or ContentCache(scope=auth_service.account_key)
+        self._account: Optional[str] = None
+        self._open_indexes()
+        self._synced: Dict[str, SyncedState] = {}  # asset_id -> last state known to the server
+        self._synced_lock = threading.Lock()  # Autosave and prefetch threads update _synced too
         self.current_asset: Optional[ContentAsset] = None
+        self.compression_policy = CompressionPolicy()
+        self.compression_stats: Dict[str, Dict] = {}  # asset_id -> compression decision
+        self.image_converter = ImageConverter()
+        self.asset_analyzer = AssetAnalyzer()
+        ModuleBus.subscribe(AUTH_CHANGED, self._on_auth_changed)
+        
+    def _open_indexes(self):
+        """
+        Use the content replica and search index of the logged-in account (on this server);
+        while nobody is logged in both are empty and kept in memory only.
+        """
+        self._account = self.auth_service.account_key()
+        if self._account is None:
+            self.content_index = ContentIndex(path=None)
+            self.search_index = ContentSearchIndex(path=None)
+        else:
+            self.content_index = ContentIndex(account_path(DEFAULT_INDEX_PATH, self._account))
+            self.search_index = ContentSearchIndex(account_path(DEFAULT_SEARCH_INDEX_PATH, self._account))
+    
+    def _on_auth_changed(self, event):
+        """Switch replicas when another account logs in, or drop them on logout."""
+        if self.auth_service.account_key() == self._account:
+            return
+        self.search_index.save()
+        self._open_indexes()
+        # Versions known to another server (or visible to another user) do not apply
+        with self._synced_lock:
+            self._synced.clear()
         
     def fetch_content(self, asset_id: str) -> Optional[ContentAsset]:
         """
         Fetch content asset from RaOS server.
+        Served from the local cache while fresh; stale entries are revalidated by version.
         
         Args:
             asset_id: ID of asset to fetch
@@ -61,39 +127,34 @@ class ContentManager:
         if not self.auth_service.is_authenticated():
             print("Error: Authentication required")
             return None
-            
-        try:
-            request = json.dumps({
-                "action": "fetch_content",
-                "auth_token": self.auth_service.access_token,
-                "asset_id": asset_id
-            })
-            
-            response = self.rcore_client.send(request)
-            data = json.loads(response)
-            
-            if data.get("success"):
-                asset_data = data.get("asset", {})
-                asset = ContentAsset(
-                    asset_data.get("asset_id"),
-                    asset_data.get("asset_type"),
-                    asset_data.get("title"),
-                    asset_data.get("content", "")
-                )
-                asset.metadata = asset_data.get("metadata", {})
-                self.current_asset = asset
-                return asset
-                
-            print(f"Content fetch failed: {data.get('error', 'Unknown error')}")
-            return None
-            
-        except Exception as e:
-            print(f"Error fetching content: {e}")
+        
+        load = versioned_loader(self.rcore_client, {
+            "action": "fetch_content",
+            "auth_token": self.auth_service.access_token,
+            "asset_id": asset_id
+        }, "asset", {}, version=lambda asset_data: asset_data.get("version"), description="content")
+        
+        asset_data = self.cache.fetch("content", asset_id, load)
+        if asset_data is None:
             return None
+        
+        asset = ContentAsset(
+            asset_data.get("asset_id"),
+            asset_data.get("asset_type"),
+            asset_data.get("title"),
+            asset_data.get("content", "")
+        )
+        asset.metadata = dict(asset_data.get("metadata", {}))
+        asset.version = asset_data.get("version")
+        self.search_index.add(asset.asset_id, asset.title, asset.content, asset.metadata)
+        self._mark_synced(asset)
+        self.current_asset = asset
+        return asset
     
     def list_content(self, content_type: Optional[str] = None) -> List[Dict]:
         """
         List available content from RaOS server.
+        Served from the local cache while fresh; stale lists are revalidated by version.
         
         Args:
             content_type: Optional filter by content type
@@ -103,24 +164,178 @@ class ContentManager:
         """
         if not self.auth_service.is_authenticated():
             return []
+        
+        load = versioned_loader(self.rcore_client, {
+            "action": "list_content",
+            "auth_token": self.auth_service.access_token,
+            "content_type": content_type
+        }, "content_list", [], description="content list")
+        
+        return self.cache.fetch("content_list", content_type or "*", load) or []
+    
+    def list_content_page(self, content_type: Optional[str] = None, cursor: Optional[str] = None,
+                          limit: int = 500) -> Tuple[List[Dict], Optional[str]]:
+        """
+        Fetch one page of the content list.
+        
+        Args:
+            content_type: Optional filter by content type
+            cursor: Opaque cursor from the previous page, or None for the first page
+            limit: Maximum number of items per page
+            
+        Returns:
+            Tuple[List[Dict], Optional[str]]: Page items and the cursor of the next page (None at the end)
+        """
+        if not self.auth_service.is_authenticated():
+            return [], None
             
         try:
             request = json.dumps({
                 "action": "list_content",
                 "auth_token": self.auth_service.access_token,
-                "content_type": content_type
+                "content_type": content_type,
+                "cursor": cursor,
+                "limit": limit
             })
             
             response = self.rcore_client.send(request)
             data = json.loads(response)
             
             if data.get("success"):
-                return data.get("content_list", [])
-            return []
+                return data.get("content_list", []), data.get("next_cursor")
+            return [], None
             
         except Exception as e:
-            print(f"Error listing content: {e}")
-            return []
+            print(f"Error listing content page: {e}")
+            return [], None
+    
+    def iter_content(self, content_type: Optional[str] = None, page_size: int = 500) -> Iterator[Dict]:
+        """
+        Iterate over the whole content list page by page.
+        
+        Args:
+            content_type: Optional filter by content type
+            page_size: Number of items requested per page
+            
+        Yields:
+            Dict: Content metadata
+        """
+        cursor = None
+        while True:
+            items, cursor = self.list_content_page(content_type, cursor, page_size)
+            yield from items
+            if not cursor:
+                return
+    
+    def sync_content_index(self, page_size: int = 1000) -> Optional[ContentChanges]:
+        """
+        Bring the local content index replica up to date.
+        Only changes (including delete tombstones) since the last sync token are transferred;
+        a full paginated load happens on first use or when the server requests a resync.
+        
+        Args:
+            page_size: Number of changes requested per page
+            
+        Returns:
+            ContentChanges: Asset IDs added, updated and removed, or None if sync failed
+        """
+        if not self.auth_service.is_authenticated():
+            return None
+        
+        index = self.content_index
+        changes = ContentChanges()
+        
+        try:
+            cursor = None
+            resynced = False
+            while True:
+                request = json.dumps({
+                    "action": "list_content_changes",
+                    "auth_token": self.auth_service.access_token,
+                    "since": index.sync_token,
+                    "cursor": cursor,
+                    "limit": page_size
+                })
+                
+                response = self.rcore_client.send(request)
+                data = json.loads(response)
+                
+                if not data.get("success"):
+                    print(f"Content sync failed: {data.get('error', 'Unknown error')}")
+                    return None
+                
+                if data.get("resync_required"):
+                    if resynced:
+                        # A full load must not be refused again; don't loop on the shared socket
+                        print("Content sync failed: server requested another resync")
+                        return None
+                    resynced = True
+                    # Sync token expired on the server; rebuild the replica from scratch
+                    removed = list(index.items)
+                    index.reset()
+                    changes = ContentChanges()
+                    changes.removed = removed
+                    changes.full_resync = True
+                    cursor = None
+                    continue
+                
+                index.apply(data.get("changes", []), changes)
+                cursor = data.get("next_cursor")
+                if not cursor:
+                    index.sync_token = data.get("sync_token", index.sync_token)
+                    break
+            
+            if changes:
+                index.save()
+                self.cache.invalidate("content_list")
+                self._update_search_index(changes)
+            return changes
+            
+        except Exception as e:
+            print(f"Error syncing content index: {e}")
+            return None
+    
+    def search_content(self, query: str, content_type: Optional[str] = None, limit: int = 50) -> List[Dict]:
+        """
+        Search locally indexed content by title, body and metadata.
+        Supports prefix matching on the last word and typo-tolerant matching.
+        
+        Args:
+            query: Free-text query
+            content_type: Optional filter by content type
+            limit: Maximum number of results
+            
+        Returns:
+            List[Dict]: Matching content metadata, best match first, with a "score" field
+        """
+        results = []
+        for asset_id, score in self.search_index.search(query, limit=limit * 4 if content_type else limit):
+            content = self.content_index.get(asset_id) or {
+                "asset_id": asset_id,
+                "title": self.search_index.titles.get(asset_id, "Untitled")
+            }
+            if content_type and content.get("asset_type") != content_type:
+                continue
+            results.append({**content, "score": score})
+            if len(results) >= limit:
+                break
+        return results
+    
+    def _update_search_index(self, changes: ContentChanges):
+        """Index added/updated replica records and drop removed ones."""
+        synced = set(changes.added + changes.updated)
+        for asset_id in changes.removed:
+            if asset_id not in synced:  # A full resync removes and re-adds everything
+                self.search_index.remove(asset_id)
+        for asset_id in synced:
+            content = self.content_index.get(asset_id) or {}
+            # Bodies are indexed when fetched; list records only update title and metadata,
+            # and their excerpt stands in until a body is indexed
+            body = content.get("content")
+            if body is None and not self.search_index.has_body(asset_id):
+                body = content.get("excerpt") or ""
+            self.search_index.add(asset_id, content.get("title", ""), body, content.get("metadata"))
+        self.search_index.save()
     
     def create_content(self, asset_type: str, title: str, content: str = "") -> Optional[ContentAsset]:
         """
@@ -152,7 +367,11 @@ class ContentManager:
             if data.get("success"):
                 asset_id = data.get("asset_id")
                 asset = ContentAsset(asset_id, asset_type, title, content)
+                asset.version = data.get("version")
                 self.current_asset = asset
+                self.cache.invalidate("content_list")
+                self.search_index.add(asset_id, title, content)
+                self._mark_synced(asset)
                 return asset
                 
             print(f"Content creation failed: {data.get('error', 'Unknown error')}")
@@ -165,6 +384,8 @@ class ContentManager:
     def update_content(self, asset: ContentAsset) -> bool:
         """
         Update content asset on RaOS server.
+        When the last synced version is known, only a compact diff against it is sent;
+        a full upload is used for new bases or when the server rejects the base version.
         
         Args:
             asset: ContentAsset to update
@@ -172,26 +393,114 @@ class ContentManager:
         Returns:
             bool: True if update successful
         """
+        return self._save_content(asset, overwrite=True) == SAVE_OK
+    
+    def update_content_checked(self, asset: ContentAsset) -> str:
+        """
+        Update content asset only if nobody else changed it since it was last synced.
+        
+        Args:
+            asset: ContentAsset to update
+            
+        Returns:
+            str: SAVE_OK, SAVE_CONFLICT if the server holds a newer version, or SAVE_FAILED
+        """
+        return self._save_content(asset, overwrite=False)
+    
+    def _save_content(self, asset: ContentAsset, overwrite: bool) -> str:
+        """
+        Send an asset update, as a patch when possible.
+        
+        Args:
+            asset: ContentAsset to update
+            overwrite: Replace newer server versions (True) or report a conflict (False)
+            
+        Returns:
+            str: SAVE_OK, SAVE_CONFLICT or SAVE_FAILED
+        """
         if not self.auth_service.is_authenticated():
-            return False
+            return SAVE_FAILED
             
         try:
             asset.modified_date = datetime.now()
             
-            request = json.dumps({
-                "action": "update_content",
-                "auth_token": self.auth_service.access_token,
-                "asset": asset.to_dict()
-            })
-            
-            response = self.rcore_client.send(request)
-            data = json.loads(response)
+            data = self._patch_content(asset)
+            if data is not None and data.get("error") == "version_mismatch" and not overwrite:
+                return SAVE_CONFLICT
+            
+            if data is None or not data.get("success"):
+                request = {
+                    "action": "update_content",
+                    "auth_token": self.auth_service.access_token,
+                    "asset": asset.to_dict()
+                }
+                if not overwrite:
+                    request["expected_version"] = asset.version
+                
+                response = self.rcore_client.send(json.dumps(request))
+                data = json.loads(response)
+                
+                if data.get("error") == "version_mismatch" and not overwrite:
+                    return SAVE_CONFLICT
             
-            return data.get("success", False)
+            if data.get("success"):
+                asset.version = data.get("version", asset.version)
+                self._mark_synced(asset)
+                self.search_index.add(asset.asset_id, asset.title, asset.content, asset.metadata)
+                self.cache.invalidate("content", asset.asset_id)
+                self.cache.invalidate("content_list")
+                return SAVE_OK
+            return SAVE_FAILED
             
         except Exception as e:
             print(f"Error updating content: {e}")
-            return False
+            return SAVE_FAILED
+    
+    def _patch_content(self, asset: ContentAsset) -> Optional[Dict]:
+        """
+        Try to update an asset by sending a diff against its last synced state.
+        
+        Args:
+            asset: ContentAsset to update
+            
+        Returns:
+            Dict: Server response to the patch, or None if a full upload is needed instead
+        """
+        with self._synced_lock:
+            synced = self._synced.get(asset.asset_id)
+        if synced is None or synced.version is None or synced.version != asset.version:
+            return None
+        
+        patch = synced.make_patch(asset.title, asset.content, asset.metadata)
+        patch["modified_date"] = asset.modified_date.isoformat()
+        request = json.dumps({
+            "action": "patch_content",
+            "auth_token": self.auth_service.access_token,
+            "asset_id": asset.asset_id,
+            "base_version": synced.version,
+            "patch": patch,
+            "content_hash": content_hash(asset.content)
+        })
+        
+        # A patch only pays off if it is smaller than resending the asset
+        if len(request) >= len(json.dumps(asset.to_dict())):
+            return None
+        
+        response = self.rcore_client.send(request)
+        data = json.loads(response)
+        
+        if not data.get("success"):
+            # Base version mismatch or unsupported patch: drop the base, a full upload follows
+            print(f"Content patch rejected: {data.get('error', 'Unknown error')}")
+            with self._synced_lock:
+                self._synced.pop(asset.asset_id, None)
+        return data
+    
+    def _mark_synced(self, asset: ContentAsset):
+        """Remember the asset state as the base for future patches."""
+        state = SyncedState(asset.version, asset.title, asset.content, asset.metadata)
+        with self._synced_lock:
+            self._synced[asset.asset_id] = state
     
     def delete_content(self, asset_id: str) -> bool:
         """
@@ -216,14 +525,22 @@ class ContentManager:
             response = self.rcore_client.send(request)
             data = json.loads(response)
             
-            return data.get("success", False)
+            if data.get("success"):
+                self.cache.invalidate("content", asset_id)
+                self.cache.invalidate("content_list")
+                self.search_index.remove(asset_id)
+                with self._synced_lock:
+                    self._synced.pop(asset_id, None)
+                return True
+            return False
             
         except Exception as e:
             print(f"Error deleting content: {e}")
             return False
     
     def upload_binary_asset(self, asset_type: str, filename: str, file_data: bytes, 
-                           compress: bool = True, convert_format: Optional[str] = None) -> Optional[str]:
+                           compress: bool = True, convert_format: Optional[str] = None,
+                           convert_options: Optional[Dict] = None, converted: bool = False) -> Optional[str]:
         """
         Upload binary asset with optional compression and conversion.
         
@@ -233,6 +550,8 @@ class ContentManager:
             file_data: Binary file data
             compress: Whether to compress the asset
             convert_format: Optional target format for conversion
+            convert_options: Optional conversion targets (quality, max_size, target_bytes)
+            converted: file_data is already converted to convert_format (e.g. by convert_batch)
             
         Returns:
             str: Asset ID if upload successful, None otherwise
@@ -243,13 +562,19 @@ class ContentManager:
         try:
             import base64
             
-            # Apply compression if requested
-            if compress:
-                file_data = self._compress_data(file_data)
+            # Apply format conversion if requested; the file name takes the new extension
+            if convert_format and not converted:
+                converted = asset_type == "image" and self.image_converter.supports(convert_format)
+                file_data = self._convert_format(file_data, asset_type, convert_format,
+                                                 **(convert_options or {}))
+            if converted:
+                filename = converted_filename(filename, convert_format)
             
-            # Apply format conversion if requested
-            if convert_format:
-                file_data = self._convert_format(file_data, asset_type, convert_format)
+            # Apply compression if requested and worthwhile for this content
+            if compress:
+                file_data, decision = self._compress_data(file_data, filename)
+            else:
+                decision = CompressionDecision(None, None, "disabled", len(file_data))
             
             file_data_b64 = base64.b64encode(file_data).decode('utf-8')
             
@@ -259,15 +584,18 @@ class ContentManager:
                 "asset_type": asset_type,
                 "filename": filename,
                 "file_data": file_data_b64,
-                "compressed": compress,
-                "format": convert_format
+                "compressed": decision.compressed,
+                "compression": decision.to_dict(),
+                "format": convert_format if converted else None
             })
             
             response = self.rcore_client.send(request)
             data = json.loads(response)
             
             if data.get("success"):
-                return data.get("asset_id")
+                asset_id = data.get("asset_id")
+                self.compression_stats[asset_id] = decision.to_dict()
+                return asset_id
                 
             print(f"Binary asset upload failed: {data.get('error', 'Unknown error')}")
             return None
@@ -276,36 +604,64 @@ class ContentManager:
             print(f"Error uploading binary asset: {e}")
             return None
     
-    def _compress_data(self, data: bytes) -> bytes:
+    def _compress_data(self, data: bytes, filename: Optional[str] = None) -> Tuple[bytes, CompressionDecision]:
         """
-        Compress binary data using gzip.
+        Compress binary data according to the adaptive compression policy.
+        Already-compressed formats and high-entropy data are passed through unchanged.
         
         Args:
             data: Binary data to compress
+            filename: Optional original filename used for format detection
             
         Returns:
-            bytes: Compressed data
+            Tuple[bytes, CompressionDecision]: Payload and the compression decision taken
         """
-        import gzip
-        return gzip.compress(data)
+        return self.compression_policy.compress(data, filename)
     
-    def _convert_format(self, data: bytes, asset_type: str, target_format: str) -> bytes:
+    def _convert_format(self, data: bytes, asset_type: str, target_format: str,
+                        quality: Optional[int] = None, max_size: Optional[int] = None,
+                        target_bytes: Optional[int] = None) -> bytes:
         """
-        Convert asset to different format (placeholder for actual implementation).
+        Convert asset to different format.
+        Images are converted in the ImageConverter process pool; results are cached,
+        so converting the same source with the same parameters again is free.
         
         Args:
             data: Binary asset data
             asset_type: Type of asset
             target_format: Target format
+            quality: Optional encoder quality (1-100) for lossy formats
+            max_size: Optional maximum width/height in pixels
+            target_bytes: Optional output size target in bytes
             
         Returns:
             bytes: Converted data
         """
-        # TODO: Implement actual format conversion based on asset type
-        # This would use libraries like PIL for images, ffmpeg for video/audio, etc.
-        print(f"Format conversion from {asset_type} to {target_format} - not yet implemented")
+        if asset_type == "image" and self.image_converter.supports(target_format):
+            return self.image_converter.convert(data, target_format, quality, max_size, target_bytes)
+        
+        # Video/audio conversion would need ffmpeg; upload the original data unchanged
+        print(f"Format conversion from {asset_type} to {target_format} - not supported")
         return data
     
+    def convert_batch(self, files: List[Tuple[str, bytes]], target_format: str,
+                      quality: Optional[int] = None, max_size: Optional[int] = None,
+                      target_bytes: Optional[int] = None) -> Dict[str, Future]:
+        """
+        Schedule conversion of many image files in the background process pool.
+        
+        Args:
+            files: List of (filename, image bytes) pairs
+            target_format: Target format (png, jpeg, webp)
+            quality: Optional encoder quality (1-100) for lossy formats
+            max_size: Optional maximum width/height in pixels
+            target_bytes: Optional output size target in bytes
+            
+        Returns:
+            Dict[str, Future]: Filename -> future resolving to converted bytes
+        """
+        return self.image_converter.convert_batch(files, target_format, quality, max_size, target_bytes)
+    
     def analyze_asset(self, asset_id: str) -> Optional[Dict]:
         """
         Analyze asset and return metadata/statistics.
@@ -336,3 +692,30 @@ class ContentManager:
         except Exception as e:
             print(f"Error analyzing asset: {e}")
             return None
+    
+    def analyze_local(self, paths: List[str]) -> Dict[str, Future]:
+        """
+        Analyze local files without a server round trip.
+        Thumbnails, dimensions, histograms, perceptual hashes and audio peaks are
+        computed in worker processes and cached on disk by content hash.
+        
+        Args:
+            paths: Local file paths
+            
+        Returns:
+            Dict[str, Future]: Path -> future resolving to the analysis result
+        """
+        return self.asset_analyzer.analyze_files(paths)
+    
+    def find_duplicate_images(self, results: List[Dict], max_distance: int = 6) -> List[List[str]]:
+        """
+        Group near-duplicate images from local analysis results.
+        
+        Args:
+            results: Results produced by analyze_local
+            max_distance: Maximum perceptual hash distance in bits
+            
+        Returns:
+            List[List[str]]: Groups of near-duplicate file paths
+        """
+        return find_near_duplicates(results, max_distance)
@@ -0,0 +1,168 @@
+"""
+Compact text and metadata diffs for RaOS content updates.
+Patches are lists of [start, end, replacement] operations against the base text,
+so fixing a typo in a long document costs a few bytes instead of the whole body.
+Offsets count UTF-16 code units, as the server indexes strings; they differ from
+Python string indexes only when the text has characters outside the BMP (e.g. emoji).
+"""
+import copy
+import difflib
+import hashlib
+from typing import Dict, List, Optional
+
+def _trim(old: str, new: str) -> tuple:
+    """Return lengths of the common prefix and suffix of two strings."""
+    limit = min(len(old), len(new))
+    prefix = 0
+    while prefix < limit and old[prefix] == new[prefix]:
+        prefix += 1
+    suffix = 0
+    while suffix < limit - prefix and old[-1 - suffix] == new[-1 - suffix]:
+        suffix += 1
+    return prefix, suffix
+
+def _has_astral(text: str) -> bool:
+    """Check for characters that take two UTF-16 code units."""
+    return not text.isascii() and len(text.encode("utf-16-le")) != 2 * len(text)
+
+def _to_utf16(text: str, ops: List[List]) -> List[List]:
+    """Convert ascending code point offsets of ops on text to UTF-16 code unit offsets."""
+    position = extra = 0
+    converted = []
+    for start, end, replacement in ops:
+        extra += len(text[position:start].encode("utf-16-le")) // 2 - (start - position)
+        utf16_start = start + extra
+        extra += len(text[start:end].encode("utf-16-le")) // 2 - (end - start)
+        converted.append([utf16_start, end + extra, replacement])
+        position = end
+    return converted
+
+def make_text_patch(old: str, new: str) -> List[List]:
+    """
+    Compute a patch turning old text into new text.
+    The unchanged head and tail are skipped, the rest is diffed by line and each
+    changed region is narrowed to the changed characters.
+
+    Args:
+        old: Base text
+        new: Target text
+
+    Returns:
+        List[List]: Ascending, non-overlapping [start, end, replacement] operations on old,
+            with offsets in UTF-16 code units
+    """
+    if old == new:
+        return []
+    ops = _make_ops(old, new)
+    return _to_utf16(old, ops) if _has_astral(old) else ops
+
+def _make_ops(old: str, new: str) -> List[List]:
+    """make_text_patch with code point offsets."""
+
+    # Skip the unchanged head and tail first; a single edit then costs O(n) with no line diff
+    prefix, suffix = _trim(old, new)
+    old_middle = old[prefix:len(old) - suffix]
+    new_middle = new[prefix:len(new) - suffix]
+    if "\n" not in old_middle or "\n" not in new_middle:
+        return [[prefix, len(old) - suffix, new_middle]]
+
+    old_lines = old_middle.splitlines(keepends=True)
+    new_lines = new_middle.splitlines(keepends=True)
+
+    # Character offset of each line start
+    old_offsets = [0]
+    for line in old_lines:
+        old_offsets.append(old_offsets[-1] + len(line))
+    new_offsets = [0]
+    for line in new_lines:
+        new_offsets.append(new_offsets[-1] + len(line))
+
+    ops = []
+    matcher = difflib.SequenceMatcher(None, old_lines, new_lines, autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "equal":
+            continue
+        start, end = old_offsets[i1], old_offsets[i2]
+        replacement = new_middle[new_offsets[j1]:new_offsets[j2]]
+        head, tail = _trim(old_middle[start:end], replacement)
+        ops.append([prefix + start + head, prefix + end - tail, replacement[head:len(replacement) - tail]])
+    return ops
+
+def apply_text_patch(base: str, ops: List[List]) -> str:
+    """
+    Apply a patch produced by make_text_patch.
+
+    Args:
+        base: Base text the patch was computed against
+        ops: [start, end, replacement] operations (UTF-16 code unit offsets)
+
+    Returns:
+        str: Patched text
+    """
+    if _has_astral(base):
+        encoded = base.encode("utf-16-le")
+        parts = []
+        position = 0
+        for start, end, replacement in ops:
+            parts.append(encoded[2 * position:2 * start].decode("utf-16-le"))
+            parts.append(replacement)
+            position = end
+        parts.append(encoded[2 * position:].decode("utf-16-le"))
+        return "".join(parts)
+    parts = []
+    position = 0
+    for start, end, replacement in ops:
+        parts.append(base[position:start])
+        parts.append(replacement)
+        position = end
+    parts.append(base[position:])
+    return "".join(parts)
+
+def make_metadata_patch(old: Dict, new: Dict) -> Dict:
+    """
+    Compute changed metadata keys.
+
+    Returns:
+        Dict: {"set": {key: value}, "unset": [key]} (empty dict when unchanged)
+    """
+    changed = {key: value for key, value in new.items() if key not in old or old[key] != value}
+    removed = [key for key in old if key not in new]
+    patch = {}
+    if changed:
+        patch["set"] = changed
+    if removed:
+        patch["unset"] = removed
+    return patch
+
+def content_hash(text: str) -> str:
+    """Hash of a content body, sent so the server can verify the patched result."""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+class SyncedState:
+    """Last state of an asset known to match the server, used as patch base."""
+
+    __slots__ = ("version", "title", "content", "metadata")
+
+    def __init__(self, version: Optional[str], title: str, content: str, metadata: Dict):
+        self.version = version
+        self.title = title
+        self.content = content
+        self.metadata = copy.deepcopy(metadata)
+
+    def make_patch(self, title: str, content: str, metadata: Dict) -> Dict:
+        """
+        Build the patch from this state to the given one.
+
+        Returns:
+            Dict: Patch with optional "title", "content_ops" and "metadata" keys
+        """
+        patch = {}
+        if title != self.title:
+            patch["title"] = title
+        ops = make_text_patch(self.content, content)
+        if ops:
+            patch["content_ops"] = ops
+        metadata_patch = make_metadata_patch(self.metadata, metadata)
+        if metadata_patch:
+            patch["metadata"] = metadata_patch
+        return patch
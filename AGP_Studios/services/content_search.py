@@ -0,0 +1,386 @@
+"""
+Local full-text search over RaOS content assets.
+An incrementally maintained, on-disk inverted index with BM25 ranking,
+prefix matching and typo-tolerant (edit distance) term expansion. Queries read
+postings in impact order and stop once no unseen document can enter the top results.
+"""
+import bisect
+import heapq
+import json
+import math
+import os
+import re
+import threading
+from collections import Counter, defaultdict
+from typing import Dict, List, Optional, Set, Tuple
+
+DEFAULT_SEARCH_INDEX_PATH = os.path.join(os.path.expanduser("~"), ".rastudio", "cache", "content_search.json")
+
+# Prefix and fuzzy expansions used per query token; the most frequent terms are kept
+MAX_EXPANSIONS = 16
+
+# Postings read per prefix or fuzzy expansion (highest impact first); exact terms are read fully
+EXPANSION_DEPTH = 200
+
+# Documents scored per query at most; beyond this, ranking no longer exactly separates documents
+# whose impacts differ little (only reached by queries of several common terms)
+MAX_SCORED = 2000
+
+# Relative change in document count after which the average length used for scoring is refreshed
+# (impact-ordered postings are rebuilt then)
+AVERAGE_REFRESH = 0.1
+
+TOKEN_PATTERN = re.compile(r"\w+", re.UNICODE)
+
+# Field weights applied to term frequencies
+FIELD_WEIGHTS = {"title": 3, "metadata": 1, "content": 1}
+
+def tokenize(text: str) -> List[str]:
+    """Split text into lowercase word tokens."""
+    return TOKEN_PATTERN.findall(text.lower()) if text else []
+
+def within_edit_distance(a: str, b: str, max_distance: int) -> bool:
+    """Check whether two terms are within a Levenshtein distance, with early exit."""
+    if abs(len(a) - len(b)) > max_distance:
+        return False
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb)))
+        if min(current) > max_distance:
+            return False
+        previous = current
+    return previous[-1] <= max_distance
+
+class ContentSearchIndex:
+    """
+    Inverted index over content asset titles, bodies and metadata.
+    Documents are added/removed incrementally as assets are fetched or synced;
+    the index is persisted to disk and reloaded on startup. Methods are thread-safe:
+    saves and syncs update it from worker threads while the UI searches.
+    """
+
+    def __init__(self, path: Optional[str] = DEFAULT_SEARCH_INDEX_PATH, k1: float = 1.2, b: float = 0.75):
+        """
+        Initialize ContentSearchIndex.
+
+        Args:
+            path: File used to persist the index, or None for memory only
+            k1: BM25 term frequency saturation parameter
+            b: BM25 length normalization parameter
+        """
+        self.path = path
+        self.k1 = k1
+        self.b = b
+        self.postings: Dict[str, Dict[str, int]] = defaultdict(dict)  # term -> {doc_id: weighted tf}
+        self.doc_terms: Dict[str, Dict[str, int]] = {}  # doc_id -> {term: weighted tf}
+        self.doc_lengths: Dict[str, int] = {}
+        self.titles: Dict[str, str] = {}
+        self.bodies: Dict[str, Dict[str, int]] = {}  # doc_id -> {term: weighted tf} of the body alone
+        self._total_length = 0
+        self._vocabulary: List[str] = []  # Sorted terms for prefix lookup
+        self._trigrams: Dict[str, Set[str]] = defaultdict(set)  # Trigram -> terms, for fuzzy candidates
+        self._dirty = False
+        self._lock = threading.RLock()
+        # term -> [(-impact, doc_id)] sorted best first, built on first query and kept up to date
+        self._impacts: Dict[str, List[Tuple[float, str]]] = {}
+        self._scoring_average = 0.0  # Average document length the impacts were computed with
+        self._scoring_count = 0
+        self.load()
+
+    def __len__(self) -> int:
+        return len(self.doc_terms)
+
+    def add(self, doc_id: str, title: str = "", content: Optional[str] = "", metadata: Optional[Dict] = None):
+        """
+        Add or replace a document in the index.
+
+        Args:
+            doc_id: Asset ID
+            title: Asset title
+            content: Asset body, or None to keep the body already indexed for the document
+            metadata: Optional asset metadata (values are indexed as text)
+        """
+        with self._lock:
+            if content is None:
+                body = Counter(self.bodies.get(doc_id, {}))
+            else:
+                body = Counter()
+                for token in tokenize(content):
+                    body[token] += FIELD_WEIGHTS["content"]
+            self.remove(doc_id)
+
+            terms: Counter = Counter(body)
+            for field, text in (("title", title),
+                                ("metadata", " ".join(str(v) for v in (metadata or {}).values()))):
+                weight = FIELD_WEIGHTS[field]
+                for token in tokenize(text):
+                    terms[token] += weight
+
+            length = sum(terms.values())
+            for term, tf in terms.items():
+                if term not in self.postings:
+                    self._add_term(term)
+                self.postings[term][doc_id] = tf
+                impacts = self._impacts.get(term)
+                if impacts is not None:
+                    bisect.insort(impacts, (-self._impact(tf, length), doc_id))
+
+            self.doc_terms[doc_id] = dict(terms)
+            self.doc_lengths[doc_id] = length
+            self.titles[doc_id] = title or ""
+            if body:
+                self.bodies[doc_id] = dict(body)
+            self._total_length += length
+            self._dirty = True
+
+    def has_body(self, doc_id: str) -> bool:
+        """Check whether a body is indexed for a document."""
+        with self._lock:
+            return doc_id in self.bodies
+
+    def remove(self, doc_id: str):
+        """Remove a document from the index, if present."""
+        with self._lock:
+            terms = self.doc_terms.pop(doc_id, None)
+            if terms is None:
+                return
+            length = self.doc_lengths.get(doc_id, 0)
+            for term, tf in terms.items():
+                impacts = self._impacts.get(term)
+                if impacts is not None:
+                    entry = (-self._impact(tf, length), doc_id)
+                    position = bisect.bisect_left(impacts, entry)
+                    if position < len(impacts) and impacts[position] == entry:
+                        del impacts[position]
+                postings = self.postings.get(term)
+                if postings is not None:
+                    postings.pop(doc_id, None)
+                    if not postings:
+                        del self.postings[term]
+                        self._impacts.pop(term, None)
+                        self._remove_term(term)
+            self._total_length -= self.doc_lengths.pop(doc_id, 0)
+            self.titles.pop(doc_id, None)
+            self.bodies.pop(doc_id, None)
+            self._dirty = True
+
+    def search(self, query: str, limit: int = 50, prefix: bool = True, fuzzy: bool = True) -> List[Tuple[str, float]]:
+        """
+        Search the index.
+        Scoring is BM25; each term's postings are read best first (threshold algorithm) and
+        at most MAX_SCORED documents are scored, so common terms cost about as much as rare
+        ones. Prefix and fuzzy expansions are limited to MAX_EXPANSIONS terms and their
+        EXPANSION_DEPTH best postings.
+
+        Args:
+            query: Free-text query
+            limit: Maximum number of results
+            prefix: Also match terms starting with the last query token
+            fuzzy: Also match terms within a small edit distance of each query token
+
+        Returns:
+            List[Tuple[str, float]]: (doc_id, score) pairs, best first
+        """
+        with self._lock:
+            tokens = tokenize(query)
+            if not tokens or not self.doc_terms or limit <= 0:
+                return []
+            self._refresh_scoring()
+
+            # term -> [weight, postings to read]; a term matched by several tokens adds up
+            lists: Dict[str, List] = {}
+            doc_count = len(self.doc_terms)
+            for position, token in enumerate(tokens):
+                # Expanded terms with a score multiplier (exact > prefix > fuzzy)
+                expansions: Dict[str, float] = {}
+                if token in self.postings:
+                    expansions[token] = 1.0
+                if prefix and position == len(tokens) - 1 and len(token) >= 2:
+                    for term in self._most_frequent(self._prefix_terms(token)):
+                        expansions.setdefault(term, 0.8)
+                if fuzzy and len(token) >= 4 and not expansions:
+                    for term in self._most_frequent(self._fuzzy_terms(token, 1 if len(token) < 8 else 2)):
+                        expansions.setdefault(term, 0.6)
+
+                for term, boost in expansions.items():
+                    df = len(self.postings[term])
+                    weight = boost * math.log(1 + (doc_count - df + 0.5) / (df + 0.5))
+                    depth = df if term == token else min(df, EXPANSION_DEPTH)
+                    entry = lists.setdefault(term, [0.0, 0])
+                    entry[0] += weight
+                    entry[1] = max(entry[1], depth)
+
+            return self._top(lists, limit)
+
+    def _top(self, lists: Dict[str, List], limit: int) -> List[Tuple[str, float]]:
+        """
+        Threshold algorithm over impact-ordered postings: (doc_id, score) of the best documents.
+        Stops once no unseen document can beat the current top results, or after scoring
+        MAX_SCORED documents (the unseen ones then have impacts close to the last ones read).
+        """
+        # [weight, impacts, postings read, frontier impact, postings]; low-weight lists last
+        cursors = sorted(([weight, self._impact_list(term), depth, 0.0, self.postings[term]]
+                          for term, (weight, depth) in lists.items()), key=lambda cursor: -cursor[0])
+        for cursor in cursors:
+            cursor[3] = -cursor[1][0][0] * cursor[0] if cursor[2] else 0.0
+        k1, b, average = self.k1, self.b, self._scoring_average or 1
+        doc_lengths = self.doc_lengths
+        heap: List[Tuple[float, str]] = []  # Min-heap of the best (score, doc_id) so far
+        seen: Set[str] = set()
+        row = 0
+        active = cursors
+        while active and len(seen) < MAX_SCORED:
+            for cursor in active:
+                weight, impacts = cursor[0], cursor[1]
+                negative_impact, doc_id = impacts[row]
+                cursor[3] = -weight * negative_impact
+                if doc_id in seen:
+                    continue
+                seen.add(doc_id)
+                norm = k1 * (1 - b + b * doc_lengths[doc_id] / average)
+                score = 0.0
+                for other_weight, _, _, _, postings in cursors:
+                    tf = postings.get(doc_id)
+                    if tf:
+                        score += other_weight * tf * (k1 + 1) / (tf + norm)
+                if len(heap) < limit:
+                    heapq.heappush(heap, (score, doc_id))
+                elif score > heap[0][0]:
+                    heapq.heapreplace(heap, (score, doc_id))
+            row += 1
+            for cursor in active:
+                if row >= cursor[2]:
+                    cursor[3] = 0.0  # Every document of an exhausted list has been scored
+            active = [cursor for cursor in active if row < cursor[2]]
+            if len(heap) < limit:
+                continue
+            # No unseen document can score more than the sum of the current impacts
+            kth = heap[0][0]
+            bound = sum(cursor[3] for cursor in cursors)
+            if kth >= bound:
+                break
+            # Documents found only in lists whose impacts add up to less than the k-th score cannot
+            # enter the results; those lists stop being read (their impacts still bound the rest)
+            skipped = bound - sum(cursor[3] for cursor in active)
+            while active and skipped + active[-1][3] <= kth:
+                skipped += active[-1][3]
+                active = active[:-1]
+        return [(doc_id, score) for score, doc_id in sorted(heap, key=lambda item: (-item[0], item[1]))]
+
+    def _impact(self, tf: int, length: int) -> float:
+        """BM25 term frequency component of a posting (multiplied by the term's idf when scoring)."""
+        norm = self.k1 * (1 - self.b + self.b * length / (self._scoring_average or 1))
+        return tf * (self.k1 + 1) / (tf + norm)
+
+    def _impact_list(self, term: str) -> List[Tuple[float, str]]:
+        impacts = self._impacts.get(term)
+        if impacts is None:
+            impacts = sorted((-self._impact(tf, self.doc_lengths[doc_id]), doc_id)
+                             for doc_id, tf in self.postings[term].items())
+            self._impacts[term] = impacts
+        return impacts
+
+    def _refresh_scoring(self):
+        """Recompute the average document length once the collection has changed noticeably."""
+        count = len(self.doc_terms)
+        if self._scoring_count and abs(count - self._scoring_count) <= AVERAGE_REFRESH * self._scoring_count:
+            return
+        self._scoring_count = count
+        self._scoring_average = self._total_length / count if count else 0.0
+        self._impacts = {}
+
+    def _most_frequent(self, terms: List[str]) -> List[str]:
+        if len(terms) <= MAX_EXPANSIONS:
+            return terms
+        return heapq.nlargest(MAX_EXPANSIONS, terms, key=lambda term: len(self.postings[term]))
+
+    def _prefix_terms(self, token: str, max_terms: int = 64) -> List[str]:
+        start = bisect.bisect_left(self._vocabulary, token)
+        matches = []
+        for term in self._vocabulary[start:start + max_terms]:
+            if not term.startswith(token):
+                break
+            matches.append(term)
+        return matches
+
+    def _fuzzy_terms(self, token: str, max_distance: int) -> List[str]:
+        grams = self._grams(token)
+        candidates: Counter = Counter()
+        for gram in grams:
+            for term in self._trigrams.get(gram, ()):
+                candidates[term] += 1
+
+        # A term within distance d shares at least len(grams) - 3d trigrams with the token
+        required = max(1, len(grams) - 3 * max_distance)
+        return [term for term, shared in candidates.items()
+                if shared >= required and within_edit_distance(token, term, max_distance)]
+
+    @staticmethod
+    def _grams(term: str) -> Set[str]:
+        padded = f"^{term}$"
+        return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+    def _add_term(self, term: str):
+        bisect.insort(self._vocabulary, term)
+        for gram in self._grams(term):
+            self._trigrams[gram].add(term)
+
+    def _remove_term(self, term: str):
+        position = bisect.bisect_left(self._vocabulary, term)
+        if position < len(self._vocabulary) and self._vocabulary[position] == term:
+            del self._vocabulary[position]
+        for gram in self._grams(term):
+            terms = self._trigrams.get(gram)
+            if terms is not None:
+                terms.discard(term)
+                if not terms:
+                    del self._trigrams[gram]
+
+    def load(self):
+        """Load the index from disk, if persisted."""
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            self.doc_terms = dict(data["doc_terms"])
+            self.titles = dict(data["titles"])
+            self.bodies = dict(data.get("bodies", {}))
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            print(f"Error loading search index: {e}")
+            self.doc_terms, self.titles, self.bodies = {}, {}, {}
+
+        # Postings and lengths are derived from the per-document term maps
+        self.postings = defaultdict(dict)
+        self.doc_lengths = {}
+        for doc_id, terms in self.doc_terms.items():
+            for term, tf in terms.items():
+                self.postings[term][doc_id] = tf
+            self.doc_lengths[doc_id] = sum(terms.values())
+        self._total_length = sum(self.doc_lengths.values())
+        self._vocabulary = sorted(self.postings)
+        self._trigrams = defaultdict(set)
+        for term in self._vocabulary:
+            for gram in self._grams(term):
+                self._trigrams[gram].add(term)
+        self._impacts = {}
+        self._scoring_count = 0
+        self._dirty = False
+
+    def save(self):
+        """Persist the index to disk atomically (no-op when unchanged)."""
+        with self._lock:
+            if not self.path or not self._dirty:
+                return
+            try:
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+                tmp_path = self.path + ".tmp"
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    json.dump({"doc_terms": self.doc_terms, "titles": self.titles, "bodies": self.bodies}, f,
+                              separators=(",", ":"))
+                os.replace(tmp_path, self.path)
+                self._dirty = False
+            except OSError as e:
+                print(f"Error saving search index: {e}")
@@ -0,0 +1,252 @@
+"""
+Dependency graph and incremental build cache for game projects.
+References from scenes and scripts to assets (and to other scripts) are extracted
+from their data, so a change only invalidates the entities that depend on it
+(incremental validation), and assets nothing appears to refer to are reported.
+"""
+import hashlib
+import json
+import os
+import re
+from typing import Dict, Iterable, List, Optional, Set
+
+from services.project_workspace import ENTITY_KINDS, entity_key, record_hash
+
+DEFAULT_BUILD_CACHE_PATH = os.path.join(os.path.expanduser("~"), ".rastudio", "cache", "build_cache.json")
+
+# Quoted string literals in script source, e.g. load("player.png") or require 'enemy'
+_STRING_LITERAL = re.compile(r"""["']([^"'\n]{1,260})["']""")
+
+# References that look like file names, e.g. "sprites/player.png"
+_FILE_LIKE = re.compile(r"^[\w\-./\\]+\.[A-Za-z0-9]{1,5}$")
+
+# Script source fields scanned for string literals
+SOURCE_FIELDS = ("code", "source", "content")
+
+def node_id(kind: str, key: str) -> str:
+    """Graph node ID of an entity, e.g. "assets:uuid"."""
+    return f"{kind}:{key}"
+
+def extract_references(record: Dict) -> Set[str]:
+    """
+    Collect strings in an entity that may name other entities.
+    All string values are candidates; script source is scanned for quoted literals.
+
+    Args:
+        record: Scene or script record
+
+    Returns:
+        Set[str]: Candidate references (IDs, names or paths)
+    """
+    references = set()
+    stack = [record]
+    while stack:
+        value = stack.pop()
+        if isinstance(value, dict):
+            for key, item in value.items():
+                if key in SOURCE_FIELDS and isinstance(item, str):
+                    references.update(_STRING_LITERAL.findall(item))
+                else:
+                    stack.append(item)
+        elif isinstance(value, (list, tuple)):
+            stack.extend(value)
+        elif isinstance(value, str) and len(value) <= 260:
+            references.add(value)
+    return references
+
+class DependencyGraph:
+    """
+    Directed graph from scenes and scripts to the entities they reference.
+    References are resolved against entity IDs, names, URLs and file base names
+    (with and without extension).
+    """
+
+    def __init__(self, project: Dict):
+        """
+        Initialize DependencyGraph.
+
+        Args:
+            project: Project in GameProject.to_dict() form (or an object with assets/scenes/scripts)
+        """
+        self.records: Dict[str, Dict] = {}
+        self.dependencies: Dict[str, Set[str]] = {}
+        self.dependents: Dict[str, Set[str]] = {}
+        self._names: Dict[str, Set[str]] = {}  # lookup name -> node IDs
+
+        for kind in ENTITY_KINDS:
+            records = project.get(kind, []) if isinstance(project, dict) else getattr(project, kind)
+            for record in records:
+                node = node_id(kind, entity_key(kind, record))
+                self.records[node] = record
+                self.dependencies[node] = set()
+                self.dependents.setdefault(node, set())
+                for name in self._lookup_names(kind, record):
+                    self._names.setdefault(name, set()).add(node)
+
+        for node, record in self.records.items():
+            if not node.startswith("assets:"):
+                self._link(node, record)
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def unreferenced_assets(self) -> List[str]:
+        """
+        Asset nodes no scene or script appears to refer to.
+        Heuristic: references are guessed from strings, so assets loaded by computed
+        names are listed too. Empty when the project has no scenes or scripts.
+        """
+        if not any(node.startswith(("scenes:", "scripts:")) for node in self.records):
+            return []
+        return [node for node in self.records
+                if node.startswith("assets:") and not self.dependents.get(node)]
+
+    def unresolved(self, nodes: Optional[Iterable[str]] = None) -> Dict[str, List[str]]:
+        """
+        References that look like file names but match no entity (validation aid).
+
+        Args:
+            nodes: Scene/script nodes to check (all when None)
+
+        Returns:
+            Dict[str, List[str]]: Node -> unresolved file-like references
+        """
+        result = {}
+        for node in (self.records if nodes is None else nodes):
+            if node.startswith("assets:") or node not in self.records:
+                continue
+            missing = sorted(ref for ref in extract_references(self.records[node])
+                             if _FILE_LIKE.match(ref) and not self._resolve(ref, None))
+            if missing:
+                result[node] = missing
+        return result
+
+    def _link(self, node: str, record: Dict):
+        for target in self._resolve_all(extract_references(record), node):
+            self.dependencies[node].add(target)
+            self.dependents.setdefault(target, set()).add(node)
+
+    def _resolve_all(self, references: Iterable[str], source: str) -> Set[str]:
+        targets = set()
+        for reference in references:
+            targets |= self._resolve(reference, source)
+        return targets
+
+    def _resolve(self, reference: str, source: Optional[str]) -> Set[str]:
+        targets = self._names.get(reference)
+        if targets is None:
+            base = os.path.basename(reference.replace("\\", "/"))
+            targets = self._names.get(base) or self._names.get(os.path.splitext(base)[0]) or set()
+        return {target for target in targets if target != source}
+
+    @staticmethod
+    def _lookup_names(kind: str, record: Dict) -> Set[str]:
+        names = {entity_key(kind, record)}
+        for field in ("asset_id", "scene_id", "script_id", "id", "url"):
+            if isinstance(record.get(field), str):
+                names.add(record[field])
+        name = record.get("name")
+        if isinstance(name, str) and name:
+            names.add(name)
+            names.add(os.path.splitext(name)[0])
+        return names
+
+class BuildCache:
+    """
+    Content-hash build cache for project entities.
+    An entity's input hash covers its own record and the input hashes of its
+    dependencies, so a changed asset also marks every scene that uses it as stale.
+    """
+
+    def __init__(self, path: Optional[str] = DEFAULT_BUILD_CACHE_PATH):
+        """
+        Initialize BuildCache.
+
+        Args:
+            path: JSON file used to persist built hashes, or None for memory only
+        """
+        self.path = path
+        self.targets: Dict[str, Dict[str, str]] = {}  # "project_id/target" -> node -> built input hash
+        self.load()
+
+    @staticmethod
+    def input_hashes(graph: DependencyGraph) -> Dict[str, str]:
+        """Compute input hashes for every node (dependency cycles are broken arbitrarily)."""
+        hashes: Dict[str, str] = {}
+        visiting: Set[str] = set()
+
+        def visit(node: str) -> str:
+            if node in hashes:
+                return hashes[node]
+            if node in visiting:
+                return ""
+            visiting.add(node)
+            parts = [record_hash(graph.records[node])]
+            parts.extend(sorted(visit(dependency) for dependency in graph.dependencies.get(node, ())))
+            visiting.discard(node)
+            hashes[node] = hashlib.sha1("|".join(parts).encode("utf-8")).hexdigest()
+            return hashes[node]
+
+        for node in graph.records:
+            visit(node)
+        return hashes
+
+    def stale(self, project_id: str, graph: DependencyGraph, target: str = "package") -> List[str]:
+        """
+        Nodes whose inputs changed since they were last built.
+
+        Args:
+            project_id: Project ID
+            graph: Current dependency graph
+            target: Build step (e.g. "package", "validate"), tracked independently
+
+        Returns:
+            List[str]: Stale node IDs
+        """
+        built = self.targets.get(f"{project_id}/{target}", {})
+        return [node for node, value in self.input_hashes(graph).items() if built.get(node) != value]
+
+    def mark_built(self, project_id: str, graph: DependencyGraph, nodes: Optional[Iterable[str]] = None,
+                   target: str = "package"):
+        """
+        Record nodes as built with their current inputs.
+
+        Args:
+            project_id: Project ID
+            graph: Current dependency graph
+            nodes: Nodes that were built (all when None)
+            target: Build step the nodes were built for
+        """
+        hashes = self.input_hashes(graph)
+        built = self.targets.setdefault(f"{project_id}/{target}", {})
+        for node in (hashes if nodes is None else nodes):
+            if node in hashes:
+                built[node] = hashes[node]
+        # Forget entities that no longer exist
+        for node in [node for node in built if node not in hashes]:
+            del built[node]
+        self.save()
+
+    def load(self):
+        """Load built hashes from disk."""
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                self.targets = json.load(f).get("targets", {})
+        except (OSError, ValueError) as e:
+            print(f"Error loading build cache: {e}")
+            self.targets = {}
+
+    def save(self):
+        """Persist built hashes to disk."""
+        if not self.path:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            tmp_path = self.path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump({"targets": self.targets}, f)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            print(f"Error saving build cache: {e}")
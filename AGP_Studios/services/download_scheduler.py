@@ -0,0 +1,517 @@
+"""
+Background download scheduler for games and assets.
+Downloads run concurrently in priority order under global and per-job bandwidth
+limits, can be paused and resumed, survive restarts, and report progress on the
+ModuleBus. While a game is being streamed, background downloads are capped so the
+stream keeps its bandwidth.
+"""
+import heapq
+import itertools
+import json
+import os
+import threading
+import time
+from typing import Dict, List, Optional
+
+from services.auth_service import AUTH_CHANGED
+from services.game_downloader import GameDownloader
+from services.game_launcher import GameLauncher
+from services.module_bus import ModuleBus
+
+DEFAULT_STATE_PATH = os.path.join(os.path.expanduser("~"), ".rastudio", "cache", "downloads.json")
+
+# ModuleBus events; payload is {"job": DownloadJob.to_dict(), "stats": DownloadScheduler.stats()}
+DOWNLOAD_QUEUED = "download_queued"
+DOWNLOAD_STARTED = "download_started"
+DOWNLOAD_PROGRESS = "download_progress"
+DOWNLOAD_PAUSED = "download_paused"
+DOWNLOAD_COMPLETED = "download_completed"
+DOWNLOAD_FAILED = "download_failed"
+DOWNLOAD_CANCELLED = "download_cancelled"
+
+# Job kinds and their default priorities (lower starts first)
+GAME = "game"  # Full game download (GameLauncher.download_game)
+UPDATE = "update"  # Block-delta update of an installed game (GameLauncher.update_game)
+ASSET = "asset"  # Any file by URL
+DEFAULT_PRIORITIES = {UPDATE: 2, GAME: 3, ASSET: 5}
+
+# Background bandwidth while a game is streamed (bytes/s)
+DEFAULT_STREAMING_LIMIT = 512 * 1024
+
+# Job states
+QUEUED = "queued"
+DOWNLOADING = "downloading"
+PAUSED = "paused"
+COMPLETED = "completed"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+class TokenBucket:
+    """
+    Bandwidth limiter; consume() blocks callers so the long-run rate stays under the limit.
+    Bursts up to one second of traffic are allowed. A rate of 0 or None means unlimited.
+    """
+
+    def __init__(self, rate: Optional[float] = None):
+        self.rate = rate
+        self._tokens = float(rate or 0)
+        self._last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def consume(self, amount: int):
+        """Account for amount bytes, sleeping while the bucket is in debt."""
+        with self._lock:
+            rate = self.rate
+            now = time.monotonic()
+            if not rate:
+                self._last = now
+                return
+            self._tokens = min(float(rate), self._tokens + (now - self._last) * rate)
+            self._last = now
+            self._tokens -= amount
+            delay = -self._tokens / rate if self._tokens < 0 else 0.0
+        if delay:
+            time.sleep(delay)
+
+class DownloadJob:
+    """One game or asset download."""
+
+    def __init__(self, job_id: int, kind: str, destination: str, priority: int,
+                 game_id: Optional[str] = None, url: Optional[str] = None,
+                 rate_limit: Optional[float] = None, label: Optional[str] = None):
+        self.job_id = job_id
+        self.kind = kind
+        self.destination = destination
+        self.priority = priority
+        self.game_id = game_id
+        self.url = url
+        self.rate_limit = rate_limit
+        self.label = label or game_id or os.path.basename(destination)
+        self.state = QUEUED
+        self.bytes_done = 0
+        self.bytes_total = 0
+        self.error: Optional[str] = None
+        self.bucket = TokenBucket(rate_limit)
+        self.stop_state: Optional[str] = None  # State to take when a running download is interrupted
+        self.downloader: Optional[GameDownloader] = None  # Running asset download
+
+    def to_dict(self) -> Dict:
+        """Convert job to dictionary (also the persisted form)."""
+        return {
+            "job_id": self.job_id,
+            "kind": self.kind,
+            "destination": self.destination,
+            "priority": self.priority,
+            "game_id": self.game_id,
+            "url": self.url,
+            "rate_limit": self.rate_limit,
+            "label": self.label,
+            "state": self.state,
+            "bytes_done": self.bytes_done,
+            "bytes_total": self.bytes_total,
+            "error": self.error
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "DownloadJob":
+        job = cls(data["job_id"], data["kind"], data["destination"], data["priority"],
+                  data.get("game_id"), data.get("url"), data.get("rate_limit"), data.get("label"))
+        # Interrupted downloads continue from their partial files
+        job.state = PAUSED if data.get("state") == PAUSED else QUEUED
+        job.bytes_done = data.get("bytes_done", 0)
+        job.bytes_total = data.get("bytes_total", 0)
+        return job
+
+class DownloadScheduler:
+    """
+    Concurrent, prioritized download scheduler.
+    A higher-priority job preempts the lowest-priority running one when all slots are
+    busy; preempted and paused downloads resume from their partial files.
+    """
+
+    def __init__(self, game_launcher: GameLauncher, concurrency: int = 2,
+                 rate_limit: Optional[float] = None,
+                 streaming_limit: Optional[float] = DEFAULT_STREAMING_LIMIT,
+                 connections_per_job: int = 4, state_path: Optional[str] = DEFAULT_STATE_PATH,
+                 held: bool = False):
+        """
+        Initialize DownloadScheduler.
+
+        Args:
+            game_launcher: GameLauncher used for game downloads and updates
+            concurrency: Number of simultaneous downloads
+            rate_limit: Global bandwidth limit in bytes/s (None for unlimited)
+            streaming_limit: Global limit while a game is streamed (None to not cap)
+            connections_per_job: Parallel connections per download
+            state_path: JSON file persisting the queue, or None for memory only
+            held: Start no jobs until release() is called or a player logs in
+        """
+        self.game_launcher = game_launcher
+        self.concurrency = concurrency
+        self.rate_limit = rate_limit
+        self.streaming_limit = streaming_limit
+        self.connections_per_job = connections_per_job
+        self.state_path = state_path
+        self.bucket = TokenBucket(rate_limit)
+        self.jobs: Dict[int, DownloadJob] = {}
+        self._ready = []  # Heap of (priority, sequence, job)
+        self._sequence = itertools.count()
+        self._active: List[DownloadJob] = []
+        self._paused = False
+        self._held = held
+        self._logged_out_jobs = set()  # IDs of game jobs paused because no player was logged in
+        self._running = True
+        self._condition = threading.Condition()
+        self._save_lock = threading.Lock()  # Serializes writes of the state file
+        self._load()
+        self._job_ids = itertools.count(max(self.jobs, default=0) + 1)
+        self._threads = [
+            threading.Thread(target=self._run, name=f"DownloadScheduler-{i}", daemon=True)
+            for i in range(concurrency)
+        ]
+        for thread in self._threads:
+            thread.start()
+        ModuleBus.subscribe(AUTH_CHANGED, self._on_auth_changed)
+
+    def enqueue_game(self, game_id: str, destination: str, priority: Optional[int] = None,
+                     rate_limit: Optional[float] = None, label: Optional[str] = None) -> DownloadJob:
+        """Queue a full game download (destination is a file or directory)."""
+        return self._enqueue(DownloadJob(next(self._job_ids), GAME, destination,
+                                         DEFAULT_PRIORITIES[GAME] if priority is None else priority,
+                                         game_id=game_id, rate_limit=rate_limit, label=label))
+
+    def enqueue_update(self, game_id: str, installed_path: str, priority: Optional[int] = None,
+                       rate_limit: Optional[float] = None, label: Optional[str] = None) -> DownloadJob:
+        """Queue a block-delta update of an installed game."""
+        return self._enqueue(DownloadJob(next(self._job_ids), UPDATE, installed_path,
+                                         DEFAULT_PRIORITIES[UPDATE] if priority is None else priority,
+                                         game_id=game_id, rate_limit=rate_limit, label=label))
+
+    def enqueue_asset(self, url: str, destination: str, priority: Optional[int] = None,
+                      rate_limit: Optional[float] = None, label: Optional[str] = None) -> DownloadJob:
+        """Queue a download of a file by URL."""
+        return self._enqueue(DownloadJob(next(self._job_ids), ASSET, destination,
+                                         DEFAULT_PRIORITIES[ASSET] if priority is None else priority,
+                                         url=url, rate_limit=rate_limit, label=label))
+
+    def pause(self, job_id: Optional[int] = None) -> bool:
+        """
+        Pause one job, or the whole scheduler when job_id is None.
+        A paused scheduler starts no new jobs; running ones finish.
+
+        Returns:
+            bool: True if something was paused
+        """
+        if job_id is None:
+            with self._condition:
+                self._paused = True
+            return True
+        with self._condition:
+            job = self.jobs.get(job_id)
+            if job is None or job.state not in (QUEUED, DOWNLOADING):
+                return False
+            if job.state == DOWNLOADING:
+                self._interrupt(job, PAUSED)
+                return True
+            job.state = PAUSED
+        self._changed(DOWNLOAD_PAUSED, job)
+        return True
+
+    def resume(self, job_id: Optional[int] = None) -> bool:
+        """
+        Resume one paused (or retry one failed) job, or the whole scheduler when job_id is None.
+
+        Returns:
+            bool: True if something was resumed
+        """
+        with self._condition:
+            if job_id is None:
+                self._paused = False
+                self._condition.notify_all()
+                return True
+            job = self.jobs.get(job_id)
+            if job is None or job.state not in (PAUSED, FAILED):
+                return False
+            job.state = QUEUED
+            job.error = None
+            heapq.heappush(self._ready, (job.priority, next(self._sequence), job))
+            self._condition.notify()
+        self._changed(DOWNLOAD_QUEUED, job)
+        return True
+
+    @property
+    def paused(self) -> bool:
+        return self._paused
+
+    def release(self):
+        """Start queued jobs of a scheduler created held."""
+        with self._condition:
+            self._held = False
+            self._condition.notify_all()
+
+    def cancel(self, job_id: int) -> bool:
+        """
+        Cancel a job; partial files are kept until the job is queued again.
+
+        Returns:
+            bool: True if the job was cancelled
+        """
+        with self._condition:
+            job = self.jobs.get(job_id)
+            if job is None or job.state in (COMPLETED, CANCELLED):
+                return False
+            if job.state == DOWNLOADING:
+                self._interrupt(job, CANCELLED)
+                return True
+            # Queued heap entries stay and are skipped when popped
+            job.state = CANCELLED
+        self._changed(DOWNLOAD_CANCELLED, job)
+        return True
+
+    def set_priority(self, job_id: int, priority: int) -> bool:
+        """Change the priority of a job that has not finished."""
+        with self._condition:
+            job = self.jobs.get(job_id)
+            if job is None or job.state in (COMPLETED, CANCELLED, FAILED):
+                return False
+            job.priority = priority
+            if job.state == QUEUED:
+                # Re-push; the stale entry is skipped because the priority no longer matches
+                heapq.heappush(self._ready, (priority, next(self._sequence), job))
+                self._preempt(job)
+                self._condition.notify()
+        self._save()
+        return True
+
+    def set_rate_limit(self, rate_limit: Optional[float], job_id: Optional[int] = None):
+        """Change the global limit, or one job's limit (bytes/s, None for unlimited)."""
+        with self._condition:
+            if job_id is None:
+                self.rate_limit = rate_limit
+            elif job_id in self.jobs:
+                self.jobs[job_id].rate_limit = rate_limit
+                self.jobs[job_id].bucket.rate = rate_limit
+        self._save()
+
+    def stats(self) -> Dict:
+        """Counts per state, byte totals and the effective global limit."""
+        with self._condition:
+            counts = {state: 0 for state in (QUEUED, DOWNLOADING, PAUSED, COMPLETED, FAILED, CANCELLED)}
+            bytes_total = bytes_done = 0
+            for job in self.jobs.values():
+                counts[job.state] += 1
+                if job.state != CANCELLED:
+                    bytes_total += job.bytes_total
+                    bytes_done += job.bytes_done
+            counts["bytes_total"] = bytes_total
+            counts["bytes_done"] = bytes_done
+            counts["paused"] = self._paused
+            counts["rate_limit"] = self._effective_rate()
+        return counts
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """
+        Block until no jobs are queued or downloading.
+
+        Returns:
+            bool: True if the scheduler drained within the timeout
+        """
+        with self._condition:
+            return self._condition.wait_for(
+                lambda: not self._active and not any(j.state == QUEUED for j in self.jobs.values()), timeout)
+
+    def clear_finished(self):
+        """Forget completed, failed and cancelled jobs."""
+        with self._condition:
+            self.jobs = {job_id: job for job_id, job in self.jobs.items()
+                         if job.state in (QUEUED, DOWNLOADING, PAUSED)}
+        self._save()
+
+    def stop(self):
+        """Stop the workers; running downloads are interrupted and resume on the next start."""
+        ModuleBus.unsubscribe(AUTH_CHANGED, self._on_auth_changed)
+        with self._condition:
+            self._running = False
+            for job in list(self._active):
+                self._interrupt(job, QUEUED)
+            self._condition.notify_all()
+        for thread in self._threads:
+            thread.join(timeout=5)
+        self._save()
+
+    def _enqueue(self, job: DownloadJob) -> DownloadJob:
+        with self._condition:
+            self.jobs[job.job_id] = job
+            heapq.heappush(self._ready, (job.priority, next(self._sequence), job))
+            self._preempt(job)
+            self._condition.notify()
+        self._changed(DOWNLOAD_QUEUED, job)
+        return job
+
+    def _preempt(self, job: DownloadJob):
+        """Requeue the lowest-priority running job if a more urgent job cannot start."""
+        if len(self._active) < self.concurrency or self._paused or self._held:
+            return
+        victim = max(self._active, key=lambda active: active.priority)
+        if victim.priority > job.priority and victim.stop_state is None:
+            self._interrupt(victim, QUEUED)
+
+    def _interrupt(self, job: DownloadJob, state: str):
+        """Stop a running download; the worker moves the job to state once it returns."""
+        job.stop_state = state
+        if job.kind == ASSET:
+            if job.downloader is not None:
+                job.downloader.cancel()
+        else:
+            self.game_launcher.cancel_download(job.game_id)
+
+    def _effective_rate(self) -> Optional[float]:
+        rate = self.rate_limit
+        if self.streaming_limit and self.game_launcher.is_streaming():
+            rate = min(rate, self.streaming_limit) if rate else self.streaming_limit
+        return rate
+
+    def _next_job(self) -> Optional[DownloadJob]:
+        """Block until a job may start; returns None when stopping."""
+        while self._running:
+            while self._ready:
+                priority, _, job = self._ready[0]
+                if job.state == QUEUED and job.priority == priority and job not in self._active:
+                    break
+                heapq.heappop(self._ready)  # Cancelled, paused or re-prioritized entry
+
+            if self._ready and not self._paused and not self._held:
+                job = heapq.heappop(self._ready)[2]
+                job.state = DOWNLOADING
+                job.stop_state = None
+                self._active.append(job)
+                return job
+            self._condition.wait()
+        return None
+
+    def _run(self):
+        while True:
+            with self._condition:
+                job = self._next_job()
+            if job is None:
+                return
+
+            self._changed(DOWNLOAD_STARTED, job)
+            last_publish = [0.0]
+
+            def on_progress(done: int, total: int):
+                job.bytes_done, job.bytes_total = done, total
+                now = time.monotonic()
+                if now - last_publish[0] >= 0.5:
+                    last_publish[0] = now
+                    self._publish(DOWNLOAD_PROGRESS, job)
+
+            def throttle(amount: int):
+                job.bucket.consume(amount)
+                self.bucket.rate = self._effective_rate()
+                self.bucket.consume(amount)
+
+            try:
+                success = self._execute(job, on_progress, throttle)
+                job.error = None if success else (job.error or "Download failed")
+            except Exception as e:
+                success = False
+                job.error = str(e)
+
+            with self._condition:
+                self._active.remove(job)
+                if success:
+                    job.state = COMPLETED
+                    job.bytes_done = job.bytes_total
+                elif job.stop_state is not None:
+                    job.state = job.stop_state
+                    job.error = None
+                    if job.state == QUEUED and self._running:
+                        heapq.heappush(self._ready, (job.priority, next(self._sequence), job))
+                else:
+                    job.state = FAILED
+                job.stop_state = None
+                job.downloader = None
+                self._condition.notify_all()
+            event = {COMPLETED: DOWNLOAD_COMPLETED, FAILED: DOWNLOAD_FAILED, PAUSED: DOWNLOAD_PAUSED,
+                     CANCELLED: DOWNLOAD_CANCELLED, QUEUED: DOWNLOAD_QUEUED}[job.state]
+            self._changed(event, job)
+
+    def _execute(self, job: DownloadJob, on_progress, throttle) -> bool:
+        if job.kind in (GAME, UPDATE):
+            if not self.game_launcher.auth_service.is_player():
+                # Logged out: keep the job (paused) rather than failing and forgetting it;
+                # it is resumed when a player logs in
+                with self._condition:
+                    self._logged_out_jobs.add(job.job_id)
+                job.stop_state = PAUSED
+                return False
+            # Interrupts that arrive before the launcher has registered the download
+            # are picked up through stopped()
+            stopped = lambda: job.stop_state is not None
+            if job.kind == GAME:
+                return self.game_launcher.download_game(job.game_id, job.destination, on_progress,
+                                                        self.connections_per_job, throttle, stopped)
+            return self.game_launcher.update_game(job.game_id, job.destination, on_progress,
+                                                  self.connections_per_job, throttle, stopped)
+        job.downloader = GameDownloader(job.url, job.destination, connections=self.connections_per_job,
+                                        on_progress=on_progress, throttle=throttle)
+        if job.stop_state is not None:
+            return False
+        success = job.downloader.run()
+        job.error = job.downloader.error
+        return success
+
+    def _on_auth_changed(self, event):
+        """Start held jobs, and resume those paused while logged out, once a player logs in."""
+        if not self.game_launcher.auth_service.is_player():
+            return
+        self.release()
+        with self._condition:
+            job_ids, self._logged_out_jobs = self._logged_out_jobs, set()
+        for job_id in job_ids:
+            self.resume(job_id)
+
+    def _changed(self, event_name: str, job: DownloadJob):
+        self._save()
+        self._publish(event_name, job)
+
+    def _publish(self, event_name: str, job: DownloadJob):
+        ModuleBus.publish(event_name, {"job": job.to_dict(), "stats": self.stats()}, sender=self)
+
+    def _load(self):
+        """Restore unfinished jobs from disk."""
+        if not self.state_path or not os.path.exists(self.state_path):
+            return
+        try:
+            with open(self.state_path, "r", encoding="utf-8") as f:
+                state = json.load(f)
+            for data in state.get("jobs", []):
+                job = DownloadJob.from_dict(data)
+                self.jobs[job.job_id] = job
+                if job.state == QUEUED:
+                    heapq.heappush(self._ready, (job.priority, next(self._sequence), job))
+            self.rate_limit = state.get("rate_limit", self.rate_limit)
+        except (OSError, ValueError, KeyError) as e:
+            print(f"Error loading download queue: {e}")
+
+    def _save(self):
+        """Persist unfinished jobs to disk."""
+        if not self.state_path:
+            return
+        # Called from every worker and the UI thread; the snapshot and write must not interleave
+        with self._save_lock:
+            with self._condition:
+                state = {
+                    "rate_limit": self.rate_limit,
+                    "jobs": [job.to_dict() for job in self.jobs.values()
+                             if job.state in (QUEUED, DOWNLOADING, PAUSED)]
+                }
+            try:
+                os.makedirs(os.path.dirname(self.state_path), exist_ok=True)
+                tmp_path = self.state_path + ".tmp"
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    json.dump(state, f)
+                os.replace(tmp_path, self.state_path)
+            except OSError as e:
+                print(f"Error saving download queue: {e}")
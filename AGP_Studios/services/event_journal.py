@@ -0,0 +1,520 @@
+"""
+Durable journal of player-side events (achievement unlocks, gameplay telemetry).
+Recording an event only appends it to memory; a background thread writes events to
+an append-only log in groups, sends them to RaOS in compressed batches and drops
+them from the log once accepted. Events survive going offline and restarts, and
+gameplay code never waits for disk or network. Each account (user on a server) has
+its own log, which is only sent while that account is logged in.
+"""
+import base64
+import gzip
+import json
+import os
+import threading
+import time
+import uuid
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from services.auth_service import AUTH_CHANGED, account_path
+from services.content_cache import ContentCache
+from services.module_bus import ModuleBus
+from services.server_events import ACHIEVEMENT_UNLOCKED
+
+DEFAULT_JOURNAL_PATH = os.path.join(os.path.expanduser("~"), ".rastudio", "cache", "player_events.log")
+
+# Event types
+EVENT_ACHIEVEMENT = "achievement_unlocked"
+EVENT_TELEMETRY = "telemetry"
+
+# Seconds between batch sends, and between group writes of recorded events to the log
+FLUSH_INTERVAL = 10.0
+WRITE_INTERVAL = 0.1
+
+# Events per submitted batch
+MAX_BATCH = 500
+
+# Retry delay after a failed send doubles up to this many seconds
+MAX_BACKOFF = 60.0
+
+# The sent prefix of the log is cut off once it is this large
+COMPACT_BYTES = 1024 * 1024
+
+class PlayerEventJournal:
+    """
+    Append-only event log with batched, idempotent delivery.
+    Every event carries a unique event_id, so a batch resent after a lost response is
+    deduplicated by the server; unlocks of the same achievement are also deduplicated
+    locally. The log file holds JSON lines; "<log>.offset" holds the byte offset of the
+    first event not yet accepted by the server.
+    Events are written to the log of the account logged in when they are recorded.
+    Events recorded while logged out go to a shared log that the next account to log in
+    takes over (this is also where journals of earlier versions are found).
+    """
+
+    def __init__(self, rcore_client, auth_service, cache: Optional[ContentCache] = None,
+                 path: str = DEFAULT_JOURNAL_PATH, flush_interval: float = FLUSH_INTERVAL):
+        """
+        Initialize PlayerEventJournal.
+
+        Args:
+            rcore_client: RaCoreClient instance for server communication
+            auth_service: AuthService instance for authenticated requests
+            cache: ContentCache holding achievements and the profile (updated optimistically)
+            path: Log of events recorded while logged out; account logs are kept next to it
+            flush_interval: Seconds between batch sends
+        """
+        self.rcore_client = rcore_client
+        self.auth_service = auth_service
+        self.cache = cache
+        self.base_path = path
+        # The log being sent: that of the logged-in account (switched by the background thread)
+        self._account = auth_service.account_key()
+        self.path = account_path(path, self._account)
+        self.offset_path = self.path + ".offset"
+        self.flush_interval = flush_interval
+        self.stats = {"recorded": 0, "sent": 0, "duplicates": 0, "rejected": 0, "batches": 0, "failures": 0}
+        self._buffer: List[Tuple[str, Dict]] = []  # (log path, event) recorded, not yet written
+        self._pending_keys = set()  # (log path, dedup key) of events not yet accepted
+        self._pending = 0  # Events in the log after the offset
+        self._offset = 0
+        self._backoff = 0.0
+        self._next_flush = time.monotonic() + flush_interval
+        self._flush_requested = False
+        self._account_changed = False
+        self._stopped = False
+        self._condition = threading.Condition()
+        self._load()
+        ModuleBus.subscribe(ACHIEVEMENT_UNLOCKED, self._on_achievement_unlocked)
+        ModuleBus.subscribe(AUTH_CHANGED, self._on_auth_changed)
+        self._thread = threading.Thread(target=self._run, name="player-events", daemon=True)
+        self._thread.start()
+
+    def record(self, event_type: str, game_id: Optional[str], data: Optional[Dict] = None,
+               dedup_key: Optional[str] = None) -> Optional[str]:
+        """
+        Record an event; returns at once.
+
+        Args:
+            event_type: EVENT_ACHIEVEMENT, EVENT_TELEMETRY or another server-known type
+            game_id: Game the event belongs to
+            data: Event data
+            dedup_key: Events with a key already pending are dropped
+
+        Returns:
+            str: Event ID, or None if the event was a duplicate
+        """
+        event = {
+            "event_id": uuid.uuid4().hex,
+            "type": event_type,
+            "game_id": game_id,
+            "data": data or {},
+            "timestamp": datetime.utcnow().isoformat() + "Z"
+        }
+        path = account_path(self.base_path, self.auth_service.account_key())
+        with self._condition:
+            if dedup_key is not None:
+                if (path, dedup_key) in self._pending_keys:
+                    return None
+                self._pending_keys.add((path, dedup_key))
+                event["dedup_key"] = dedup_key
+            self._buffer.append((path, event))
+            self.stats["recorded"] += 1
+            if len(self._buffer) == 1:
+                self._condition.notify()
+        return event["event_id"]
+
+    def track(self, game_id: Optional[str], name: str, data: Optional[Dict] = None) -> Optional[str]:
+        """Record a gameplay telemetry event (e.g. "level_completed")."""
+        return self.record(EVENT_TELEMETRY, game_id, dict(data or {}, name=name))
+
+    def unlock_achievement(self, game_id: str, achievement_id: str, data: Optional[Dict] = None) -> bool:
+        """
+        Record an achievement unlock and show it as unlocked right away.
+        The cached achievements and profile are updated optimistically; if the server
+        rejects the unlock they are dropped from the cache and refetched.
+
+        Args:
+            game_id: Game ID
+            achievement_id: Unlocked achievement
+            data: Optional extra data (e.g. {"points": 10})
+
+        Returns:
+            bool: False if the achievement is already unlocked or pending
+        """
+        if self._is_unlocked(game_id, achievement_id):
+            return False
+        event_id = self.record(EVENT_ACHIEVEMENT, game_id, dict(data or {}, achievement_id=achievement_id),
+                               dedup_key=f"achievement:{game_id}:{achievement_id}")
+        if event_id is None:
+            return False
+        self._apply_unlock(game_id, achievement_id, data or {})
+        ModuleBus.publish(ACHIEVEMENT_UNLOCKED, {
+            "game_id": game_id,
+            "achievement_id": achievement_id,
+            "optimistic": True
+        }, sender=self)
+        return True
+
+    def flush_now(self):
+        """Write and send pending events as soon as possible (e.g. after reconnecting)."""
+        with self._condition:
+            self._flush_requested = True
+            self._backoff = 0.0
+            self._condition.notify()
+
+    def pending(self) -> int:
+        """Events not yet accepted by the server."""
+        with self._condition:
+            return self._pending + len(self._buffer)
+
+    def close(self, timeout: float = 5.0):
+        """Write buffered events, try one last send and stop the background thread."""
+        ModuleBus.unsubscribe(ACHIEVEMENT_UNLOCKED, self._on_achievement_unlocked)
+        ModuleBus.unsubscribe(AUTH_CHANGED, self._on_auth_changed)
+        with self._condition:
+            self._stopped = True
+            self._condition.notify()
+        self._thread.join(timeout)
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._stopped and not self._flush_requested and not self._account_changed:
+                    now = time.monotonic()
+                    if self._buffer:
+                        self._condition.wait(WRITE_INTERVAL)
+                        break
+                    if self._pending and now >= self._next_flush:
+                        break
+                    self._condition.wait(max(self._next_flush - now, WRITE_INTERVAL) if self._pending else None)
+                stopping = self._stopped
+                switch = self._account_changed
+                flush = self._flush_requested or stopping or switch or time.monotonic() >= self._next_flush
+                self._flush_requested = self._account_changed = False
+                events, self._buffer = self._buffer, []
+
+            if switch:
+                events = self._switch_account(events)
+            if events:
+                self._append(events)
+            if flush:
+                self._send_batches()
+            if stopping:
+                return
+
+    def _append(self, events: List[Tuple[str, Dict]]):
+        """Group write: one append and fsync per log for all events recorded since the last write."""
+        by_path: Dict[str, List[Dict]] = {}
+        for path, event in events:
+            by_path.setdefault(path, []).append(event)
+        for path, group in by_path.items():
+            data = "".join(json.dumps(event, separators=(",", ":")) + "\n" for event in group).encode("utf-8")
+            try:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                with open(path, "ab") as f:
+                    f.write(data)
+                    f.flush()
+                    os.fsync(f.fileno())
+                if path == self.path:
+                    with self._condition:
+                        self._pending += len(group)
+            except OSError as e:
+                # Keep them in memory and retry with the next write
+                print(f"Error writing player events: {e}")
+                with self._condition:
+                    self._buffer[:0] = [(path, event) for event in group]
+
+    def _switch_account(self, events: List[Tuple[str, Dict]]) -> List[Tuple[str, Dict]]:
+        """
+        Send the log of the account that is logged in now; it takes over the events
+        recorded while nobody was logged in. Logs of other accounts wait for their login.
+
+        Args:
+            events: Recorded events about to be written
+
+        Returns:
+            List[Tuple[str, Dict]]: The events, with logged-out ones moved to the account's log
+        """
+        account = self.auth_service.account_key()
+        if account is None or account == self._account:
+            return events
+        path = account_path(self.base_path, account)
+        if not self._adopt_logged_out_events(path):
+            return events
+        self._account = account
+        self.path = path
+        self.offset_path = path + ".offset"
+        events = [(path if event_path == self.base_path else event_path, event) for event_path, event in events]
+        with self._condition:
+            self._pending_keys = {(path if key_path == self.base_path else key_path, key)
+                                  for key_path, key in self._pending_keys}
+        self._load()
+        return events
+
+    def _adopt_logged_out_events(self, path: str) -> bool:
+        """Move unsent events of the logged-out log to the end of an account's log."""
+        offset_path = self.base_path + ".offset"
+        try:
+            with open(offset_path, "r", encoding="utf-8") as f:
+                offset = int(f.read().strip() or 0)
+        except (OSError, ValueError):
+            offset = 0
+        try:
+            with open(self.base_path, "rb") as f:
+                if offset > os.fstat(f.fileno()).st_size:
+                    offset = 0
+                f.seek(offset)
+                tail = f.read()
+        except FileNotFoundError:
+            return True
+        except OSError as e:
+            print(f"Error reading player event log: {e}")
+            return False
+        # Whole lines only; a torn last line was never a recorded event
+        tail = tail[:tail.rfind(b"\n") + 1]
+        try:
+            if tail:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                with open(path, "ab") as f:
+                    f.write(tail)
+                    f.flush()
+                    os.fsync(f.fileno())
+            os.remove(self.base_path)
+            if os.path.exists(offset_path):
+                os.remove(offset_path)
+        except OSError as e:
+            # Events appended before the failure are sent again later; the server deduplicates them
+            print(f"Error moving player events: {e}")
+            return False
+        return True
+
+    def _send_batches(self):
+        while True:
+            events, end = self._read_batch()
+            if not events:
+                self._schedule(success=True)
+                return
+            response = self._submit(events)
+            if response is None:
+                self.stats["failures"] += 1
+                self._schedule(success=False)
+                return
+            self._apply_response(events, response)
+            self._save_offset(end)
+            with self._condition:
+                self._pending = max(self._pending - len(events), 0)
+                for event in events:
+                    self._pending_keys.discard((self.path, event.get("dedup_key")))
+            if self._offset >= COMPACT_BYTES:
+                self._compact()
+
+    def _schedule(self, success: bool):
+        with self._condition:
+            if success:
+                self._backoff = 0.0
+                self._next_flush = time.monotonic() + self.flush_interval
+            else:
+                self._backoff = min(max(self._backoff * 2, 1.0), MAX_BACKOFF)
+                self._next_flush = time.monotonic() + self._backoff
+
+    def _read_batch(self):
+        """Up to MAX_BATCH events after the offset, and the offset after them."""
+        events = []
+        try:
+            with open(self.path, "rb") as f:
+                f.seek(self._offset)
+                end = self._offset
+                while len(events) < MAX_BATCH:
+                    line = f.readline()
+                    if not line.endswith(b"\n"):
+                        break
+                    end += len(line)
+                    try:
+                        events.append(json.loads(line))
+                    except ValueError:
+                        continue
+        except FileNotFoundError:
+            return [], self._offset
+        return events, end
+
+    def _submit(self, events: List[Dict]) -> Optional[Dict]:
+        """Send one batch; returns the response, or None if it should be retried."""
+        # Only with the token of the account the events belong to
+        if self._account is None or self.auth_service.account_key() != self._account:
+            return None
+        if not self.auth_service.is_authenticated():
+            return None
+
+        try:
+            payload = json.dumps(events, separators=(",", ":")).encode("utf-8")
+            compressed = gzip.compress(payload, compresslevel=6)
+            request = json.dumps({
+                "action": "submit_player_events",
+                "auth_token": self.auth_service.access_token,
+                "events_data": base64.b64encode(compressed).decode("ascii"),
+                "compression": {"codec": "gzip", "original_size": len(payload)},
+                "count": len(events)
+            })
+
+            response = self.rcore_client.send(request)
+            data = json.loads(response)
+
+            if data.get("success"):
+                self.stats["batches"] += 1
+                return data
+            print(f"Player event submission failed: {data.get('error', 'Unknown error')}")
+            return None
+
+        except Exception as e:
+            print(f"Error submitting player events: {e}")
+            return None
+
+    def _apply_response(self, events: List[Dict], response: Dict):
+        """Count the outcome and reconcile optimistic achievement unlocks."""
+        rejected = response.get("rejected") or {}
+        results = response.get("results") or {}
+        self.stats["duplicates"] += len(response.get("duplicates") or [])
+        self.stats["rejected"] += len(rejected)
+        self.stats["sent"] += len(events) - len(rejected)
+        for event in events:
+            if event["type"] != EVENT_ACHIEVEMENT:
+                continue
+            if event["event_id"] in rejected:
+                print(f"Achievement unlock rejected: {rejected[event['event_id']]}")
+                self._invalidate(event["game_id"])
+            elif isinstance(results.get(event["event_id"]), dict) and results[event["event_id"]].get("achievement"):
+                achievement = results[event["event_id"]]["achievement"]
+                self._update_achievement(event["game_id"], event["data"].get("achievement_id"), achievement)
+
+    def _save_offset(self, offset: int):
+        self._offset = offset
+        try:
+            temp_path = self.offset_path + ".tmp"
+            with open(temp_path, "w", encoding="utf-8") as f:
+                f.write(str(offset))
+            os.replace(temp_path, self.offset_path)
+        except OSError as e:
+            # Worst case the batch is resent and deduplicated by the server
+            print(f"Error saving player event offset: {e}")
+
+    def _compact(self):
+        """
+        Cut the accepted prefix off the log.
+        The offset is reset before the log is replaced: a crash in between resends the
+        accepted events (deduplicated by event_id on the server) instead of leaving an
+        offset that points past unsent events of the shorter log.
+        """
+        try:
+            with open(self.path, "rb") as f:
+                f.seek(self._offset)
+                tail = f.read()
+            temp_path = self.path + ".tmp"
+            with open(temp_path, "wb") as f:
+                f.write(tail)
+                f.flush()
+                os.fsync(f.fileno())
+            self._save_offset(0)
+            os.replace(temp_path, self.path)
+        except OSError as e:
+            print(f"Error compacting player event log: {e}")
+
+    def _load(self):
+        """Restore the offset and pending events of the current log, dropping a torn last line."""
+        try:
+            with open(self.offset_path, "r", encoding="utf-8") as f:
+                offset = int(f.read().strip() or 0)
+        except (OSError, ValueError):
+            offset = 0
+        pending = 0
+        keys = set()
+        try:
+            if offset > os.path.getsize(self.path):
+                offset = 0  # Offset of another log; resending is safe
+            with open(self.path, "rb") as f:
+                f.seek(offset)
+                end = offset
+                for line in f:
+                    if not line.endswith(b"\n"):
+                        break
+                    end += len(line)
+                    pending += 1
+                    try:
+                        key = json.loads(line).get("dedup_key")
+                    except ValueError:
+                        continue
+                    if key:
+                        keys.add(key)
+            if os.path.getsize(self.path) > end:
+                with open(self.path, "r+b") as f:
+                    f.truncate(end)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            print(f"Error loading player event log: {e}")
+        with self._condition:
+            self._offset = offset
+            self._pending = pending
+            self._pending_keys.update((self.path, key) for key in keys)
+            if pending:
+                # Deliver what was left over soon after start or login
+                self._next_flush = time.monotonic()
+
+    def _on_auth_changed(self, event):
+        """Switch to the log of the account that logged in (done by the background thread)."""
+        with self._condition:
+            self._account_changed = True
+            self._condition.notify()
+
+    def _on_achievement_unlocked(self, event):
+        """Apply unlocks pushed by the server (e.g. from another device) to the cache once."""
+        payload = event.payload or {}
+        if event.sender is self or not payload.get("game_id") or not payload.get("achievement_id"):
+            return
+        if not self._is_unlocked(payload["game_id"], payload["achievement_id"]):
+            self._apply_unlock(payload["game_id"], payload["achievement_id"], payload)
+    
+    def _is_unlocked(self, game_id: str, achievement_id: str) -> bool:
+        if self.cache is None:
+            return False
+        entry = self.cache.get("achievements", game_id, allow_stale=True)
+        return entry is not None and any(
+            achievement.get("achievement_id") == achievement_id and achievement.get("unlocked")
+            for achievement in entry.value)
+
+    def _apply_unlock(self, game_id: str, achievement_id: str, data: Dict):
+        """Mark an achievement unlocked in the cached achievement lists and bump profile counters."""
+        if self.cache is None:
+            return
+        self._update_achievement(game_id, achievement_id, {
+            "unlocked": True,
+            "unlock_date": datetime.utcnow().isoformat() + "Z"
+        })
+        user_key = (self.auth_service.user_profile or {}).get("username", "me")
+        entry = self.cache.get("profile", user_key, allow_stale=True)
+        if entry is not None and isinstance(entry.value, dict):
+            profile = dict(entry.value)
+            if isinstance(profile.get("achievements_unlocked"), int):
+                profile["achievements_unlocked"] += 1
+            if isinstance(profile.get("achievement_points"), int) and data.get("points"):
+                profile["achievement_points"] += data["points"]
+            self.cache.put("profile", user_key, profile, entry.version, expired=not entry.fresh)
+
+    def _update_achievement(self, game_id: str, achievement_id: Optional[str], fields: Dict):
+        """Merge fields into an achievement in every cached list that contains it."""
+        if self.cache is None or not achievement_id:
+            return
+        for key in (game_id, "*"):
+            entry = self.cache.get("achievements", key, allow_stale=True)
+            if entry is None:
+                continue
+            achievements = [dict(achievement, **fields) if achievement.get("achievement_id") == achievement_id
+                            else achievement for achievement in entry.value]
+            self.cache.put("achievements", key, achievements, entry.version, expired=not entry.fresh)
+
+    def _invalidate(self, game_id: str):
+        if self.cache is None:
+            return
+        self.cache.invalidate("achievements", game_id)
+        self.cache.invalidate("achievements", "*")
+        self.cache.invalidate("profile")
@@ -0,0 +1,463 @@
+"""
+Parallel, resumable game downloads.
+Files are fetched as byte ranges over several keep-alive connections, written in
+place into a preallocated ".part" file and verified per chunk while streaming;
+completed chunks are recorded so an interrupted download resumes where it stopped.
+"""
+import errno
+import hashlib
+import http.client
+import json
+import os
+import queue
+import stat
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+from urllib.parse import urljoin, urlsplit
+
+# Size of the byte ranges requested (and verified) individually
+DEFAULT_CHUNK_SIZE = 8 * 1024 * 1024
+
+# Bytes read from the socket per write
+BLOCK_SIZE = 256 * 1024
+
+PART_SUFFIX = ".part"
+STATE_SUFFIX = ".part.json"
+
+_REDIRECTS = (301, 302, 303, 307, 308)
+
+# Request headers not sent on to another origin when following a redirect
+_CREDENTIAL_HEADERS = ("authorization", "cookie", "proxy-authorization")
+
+class DownloadError(Exception):
+    """A download failed and cannot continue without intervention."""
+
+class _RetryableError(Exception):
+    """A chunk request failed in a way worth retrying."""
+
+class _RangesIgnored(Exception):
+    """The server answered a range request with the whole file."""
+
+class GameDownloader:
+    """
+    Downloads one file with parallel ranged requests.
+    Chunks are verified against per-chunk SHA-256 hashes when the server provides
+    them, otherwise the whole file is checked against its SHA-256 at the end.
+    The file appears at its destination only once complete (atomic rename).
+    """
+
+    def __init__(self, url: str, destination: str, size: Optional[int] = None,
+                 sha256: Optional[str] = None, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                 chunk_hashes: Optional[List[str]] = None, connections: int = 4,
+                 headers: Optional[Dict[str, str]] = None, max_retries: int = 8,
+                 timeout: float = 30.0,
+                 on_progress: Optional[Callable[[int, int], None]] = None,
+                 throttle: Optional[Callable[[int], None]] = None):
+        """
+        Initialize GameDownloader.
+
+        Args:
+            url: HTTP(S) URL of the file
+            destination: Final file path
+            size: File size in bytes (probed with a HEAD request if unknown)
+            sha256: Expected SHA-256 of the whole file
+            chunk_size: Range size; must match the server's when chunk_hashes are given
+            chunk_hashes: Expected SHA-256 of each chunk, in order
+            connections: Parallel connections
+            headers: Extra request headers (e.g. Authorization)
+            max_retries: Consecutive failed attempts per chunk without any progress
+            timeout: Socket timeout in seconds
+            on_progress: Optional callback(bytes_done, bytes_total), called from worker threads
+            throttle: Optional callable(byte_count) invoked per block read; blocks to limit bandwidth
+        """
+        self.url = url
+        self.destination = destination
+        self.size = size
+        self.sha256 = sha256
+        self.chunk_size = chunk_size
+        self.chunk_hashes = list(chunk_hashes) if chunk_hashes else None
+        self.connections = max(1, connections)
+        self.headers = dict(headers or {})
+        self.max_retries = max_retries
+        self.timeout = timeout
+        self.on_progress = on_progress
+        self.throttle = throttle
+
+        self.part_path = destination + PART_SUFFIX
+        self.state_path = destination + STATE_SUFFIX
+        self.bytes_done = 0
+        self.error: Optional[str] = None
+        self._ranged = True
+        self._ranges_ignored = False
+        self._done: set = set()
+        self._lock = threading.Lock()
+        self._cancel = threading.Event()
+        self._last_state_save = 0.0
+        self._last_progress = 0.0
+
+    @property
+    def chunk_count(self) -> int:
+        return max(1, -(-self.size // self.chunk_size)) if self.size else 1
+
+    def cancel(self):
+        """Stop the download; completed chunks are kept for a later resume."""
+        self._cancel.set()
+
+    def run(self) -> bool:
+        """
+        Download (or resume) the file.
+
+        Returns:
+            bool: True if the file is complete and verified at its destination
+        """
+        try:
+            if self.size is None:
+                self._probe()
+            self._prepare()
+            self._download_pending()
+            if self._ranges_ignored and not self._cancel.is_set() and not self.error:
+                # The size came with the request but the server does not serve ranges
+                self._single_stream()
+                self._download_pending()
+
+            self._save_state(force=True)
+            if self._cancel.is_set() or self.error:
+                return False
+            if len(self._done) < self.chunk_count:
+                # A worker stopped without recording an error; never publish a partial file
+                raise DownloadError(f"incomplete: {len(self._done)} of {self.chunk_count} chunks")
+            self._finish()
+            return True
+
+        except DownloadError as e:
+            self.error = str(e)
+            print(f"Error downloading {self.url}: {e}")
+            return False
+        except OSError as e:
+            self.error = str(e)
+            print(f"Error writing download {self.part_path}: {e}")
+            return False
+
+    def _download_pending(self):
+        """Fetch the chunks not done yet with parallel workers."""
+        pending = queue.Queue()
+        for index in range(self.chunk_count):
+            if index not in self._done:
+                pending.put(index)
+        workers = [threading.Thread(target=self._worker, args=(pending,), daemon=True,
+                                    name=f"GameDownloader-{i}")
+                   for i in range(min(self.connections if self._ranged else 1, pending.qsize()))]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+
+    def _single_stream(self):
+        """Switch to one plain request for the whole file; no parallelism or per-chunk resume."""
+        self._ranged = False
+        self._ranges_ignored = False
+        self.chunk_hashes = None
+        if self.size:
+            self.chunk_size = self.size
+        with self._lock:
+            self._done = set()
+            self.bytes_done = 0
+
+    def _probe(self):
+        """Learn the file size and range support with a HEAD request."""
+        for _ in range(5):
+            conn = self._connect()
+            try:
+                conn.request("HEAD", self._path(), headers=self.headers)
+                response = conn.getresponse()
+                response.read()
+            except (OSError, http.client.HTTPException) as e:
+                raise DownloadError(f"server unreachable: {e}")
+            finally:
+                conn.close()
+            if response.status in _REDIRECTS and response.getheader("Location"):
+                self._redirect(response.getheader("Location"))
+                continue
+            if response.status != 200:
+                raise DownloadError(f"HTTP {response.status}")
+            length = response.getheader("Content-Length")
+            self.size = int(length) if length is not None else None
+            if self.size is None or response.getheader("Accept-Ranges", "") != "bytes":
+                self._single_stream()
+            return
+        raise DownloadError("too many redirects")
+
+    def _prepare(self):
+        """Create or reopen the preallocated part file and load resume state."""
+        state = self._load_state()
+        resumable = (state is not None and os.path.exists(self.part_path)
+                     and state.get("size") == self.size and state.get("chunk_size") == self.chunk_size
+                     and state.get("sha256") == self.sha256 and state.get("chunk_hashes") == self.chunk_hashes)
+        if resumable:
+            self._done = set(state.get("done", []))
+        else:
+            self._done = set()
+            # Reserve the space up front: fails early when the disk is full
+            preallocate(self.part_path, self.size or 0)
+        if not self._ranged:
+            self._done = set()
+        self.bytes_done = sum(self._chunk_length(index) for index in self._done)
+        self._save_state(force=True)
+
+    def _worker(self, pending: queue.Queue):
+        conn = None
+        try:
+            with open(self.part_path, "r+b", buffering=0) as f:
+                while not self._cancel.is_set() and not self.error and not self._ranges_ignored:
+                    try:
+                        index = pending.get_nowait()
+                    except queue.Empty:
+                        break
+                    try:
+                        conn = self._download_chunk(index, f, conn)
+                    except _RangesIgnored:
+                        self._ranges_ignored = True
+        except Exception as e:
+            # Any failure (file access, callbacks, ...) must fail the download, not end it early
+            self.error = str(e)
+            print(f"Error downloading {self.url}: {e}")
+        finally:
+            if conn is not None:
+                conn.close()
+
+    def _download_chunk(self, index: int, f, conn):
+        """Fetch and verify one chunk; returns the (kept-alive) connection."""
+        for _ in range(self.max_retries + 1):
+            conn, digest, received = self._fetch_chunk(index, f, conn)
+            if self._cancel.is_set():
+                self._add_progress(-received)
+                return conn
+            if not self.chunk_hashes or digest.hexdigest() == self.chunk_hashes[index]:
+                with self._lock:
+                    self._done.add(index)
+                self._save_state()
+                return conn
+            # Corrupted in transit: fetch the whole chunk again
+            self._add_progress(-received)
+        raise DownloadError(f"chunk {index} failed verification")
+
+    def _fetch_chunk(self, index: int, f, conn):
+        """
+        Stream one chunk to disk, resuming the range after connection failures.
+
+        Returns:
+            tuple: (connection, SHA-256 of the chunk data, bytes received)
+        """
+        start = index * self.chunk_size
+        length = self._chunk_length(index)
+        received = 0
+        digest = hashlib.sha256()
+        failures = 0
+        redirects = 0
+
+        while (received < length or not self.size) and not self._cancel.is_set():
+            try:
+                if conn is None:
+                    conn = self._connect()
+                headers = dict(self.headers)
+                if self._ranged:
+                    headers["Range"] = f"bytes={start + received}-{start + length - 1}"
+                conn.request("GET", self._path(), headers=headers)
+                response = conn.getresponse()
+
+                if response.status in _REDIRECTS and response.getheader("Location") and redirects < 5:
+                    redirects += 1
+                    response.read()
+                    self._redirect(response.getheader("Location"))
+                    conn.close()
+                    conn = None
+                    continue
+                if self._ranged and response.status == 200:
+                    conn.close()
+                    raise _RangesIgnored()
+                if response.status != (206 if self._ranged else 200):
+                    response.read()
+                    if response.status >= 500 or response.status == 429:
+                        raise _RetryableError(f"HTTP {response.status}")
+                    raise DownloadError(f"HTTP {response.status} for chunk {index}")
+
+                f.seek(start + received)
+                while not self._cancel.is_set():
+                    block = response.read(min(BLOCK_SIZE, length - received) if self.size else BLOCK_SIZE)
+                    if not block:
+                        break
+                    f.write(block)
+                    digest.update(block)
+                    received += len(block)
+                    failures = 0
+                    self._add_progress(len(block))
+                    if self.throttle is not None:
+                        self.throttle(len(block))
+                if not self.size:
+                    break
+                if received < length and not self._cancel.is_set():
+                    raise _RetryableError("connection closed early")
+
+            except (_RetryableError, OSError, http.client.HTTPException) as e:
+                # Flaky network: reconnect and continue the range from the last byte received
+                if conn is not None:
+                    conn.close()
+                    conn = None
+                if not self._ranged:
+                    # Without range support the file restarts from the beginning
+                    self._add_progress(-received)
+                    received = 0
+                    digest = hashlib.sha256()
+                failures += 1
+                if failures > self.max_retries:
+                    raise DownloadError(f"chunk {index} failed after {self.max_retries} retries: {e}")
+                self._cancel.wait(min(30.0, 0.5 * 2 ** (failures - 1)))
+
+        return conn, digest, received
+
+    def _finish(self):
+        """Verify the whole file if needed and move it into place."""
+        if not self._ranged and self.size is None:
+            self.size = os.path.getsize(self.part_path)
+        if self.sha256 and not self.chunk_hashes:
+            digest = hashlib.sha256()
+            with open(self.part_path, "rb") as f:
+                for block in iter(lambda: f.read(1024 * 1024), b""):
+                    digest.update(block)
+            if digest.hexdigest() != self.sha256:
+                # Start over next time rather than resuming corrupt data
+                self._discard()
+                raise DownloadError("file hash mismatch")
+        with open(self.part_path, "rb+") as f:
+            os.fsync(f.fileno())
+        make_writable(self.destination)
+        os.replace(self.part_path, self.destination)
+        if os.path.exists(self.state_path):
+            os.remove(self.state_path)
+
+    def _discard(self):
+        for path in (self.part_path, self.state_path):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def _chunk_length(self, index: int) -> int:
+        if not self.size:
+            return 0
+        return min(self.chunk_size, self.size - index * self.chunk_size)
+
+    def _add_progress(self, count: int):
+        with self._lock:
+            self.bytes_done += count
+            now = time.monotonic()
+            report = self.on_progress is not None and (now - self._last_progress >= 0.2 or count < 0)
+            if report:
+                self._last_progress = now
+            done = self.bytes_done
+        if report:
+            self.on_progress(done, self.size or 0)
+
+    def _load_state(self) -> Optional[Dict]:
+        if not os.path.exists(self.state_path):
+            return None
+        try:
+            with open(self.state_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _save_state(self, force: bool = False):
+        """Persist completed chunks (at most once a second unless forced)."""
+        now = time.monotonic()
+        with self._lock:
+            if not force and now - self._last_state_save < 1.0:
+                return
+            self._last_state_save = now
+            state = {
+                "url": self.url,
+                "size": self.size,
+                "sha256": self.sha256,
+                "chunk_size": self.chunk_size,
+                "chunk_hashes": self.chunk_hashes,
+                "done": sorted(self._done)
+            }
+        try:
+            # Chunks are only recorded as done once their data is on disk
+            if os.path.exists(self.part_path):
+                with open(self.part_path, "rb+") as f:
+                    os.fsync(f.fileno())
+            tmp_path = self.state_path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(state, f)
+            os.replace(tmp_path, self.state_path)
+        except OSError as e:
+            print(f"Error saving download state: {e}")
+
+    def _redirect(self, location: str):
+        """Follow a redirect; credentials are not sent on to another origin."""
+        self.url, self.headers = follow_redirect(self.url, self.headers, location)
+
+    def _connect(self) -> http.client.HTTPConnection:
+        return open_connection(self.url, self.timeout)
+
+    def _path(self) -> str:
+        return request_path(self.url)
+
+def open_connection(url: str, timeout: float = 30.0) -> http.client.HTTPConnection:
+    """Open a keep-alive connection to the host of an HTTP(S) URL."""
+    parts = urlsplit(url)
+    if parts.scheme == "https":
+        return http.client.HTTPSConnection(parts.hostname, parts.port, timeout=timeout)
+    if parts.scheme == "http":
+        return http.client.HTTPConnection(parts.hostname, parts.port, timeout=timeout)
+    raise DownloadError(f"unsupported URL scheme: {parts.scheme}")
+
+def redirect_location(response: http.client.HTTPResponse) -> Optional[str]:
+    """Location of a redirect response, or None for any other response."""
+    if response.status in _REDIRECTS:
+        return response.getheader("Location")
+    return None
+
+def follow_redirect(url: str, headers: Dict[str, str], location: str) -> Tuple[str, Dict[str, str]]:
+    """
+    Resolve a redirect; credentials are not sent on to another origin.
+
+    Returns:
+        Tuple[str, Dict[str, str]]: Target URL and the headers to send there
+    """
+    target = urljoin(url, location)
+    if _origin(target) != _origin(url):
+        headers = {name: value for name, value in headers.items() if name.lower() not in _CREDENTIAL_HEADERS}
+    return target, headers
+
+def _origin(url: str):
+    parts = urlsplit(url)
+    return parts.scheme, parts.hostname, parts.port or {"http": 80, "https": 443}.get(parts.scheme)
+
+def request_path(url: str) -> str:
+    """Path and query of a URL, as sent in the request line."""
+    parts = urlsplit(url)
+    return (parts.path or "/") + (f"?{parts.query}" if parts.query else "")
+
+def make_writable(path: str):
+    """Clear the read-only attribute that stops Windows from replacing or removing a file."""
+    if os.name == "nt" and os.path.isfile(path) and not os.access(path, os.W_OK):
+        os.chmod(path, stat.S_IREAD | stat.S_IWRITE)
+
+def preallocate(path: str, size: int):
+    """
+    Create a file of the given size, reserving disk space where supported.
+    Raises OSError early when the disk is full.
+    """
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, "wb") as f:
+        if not size:
+            return
+        if hasattr(os, "posix_fallocate"):
+            try:
+                os.posix_fallocate(f.fileno(), 0, size)
+                return
+            except OSError as e:
+                if e.errno == errno.ENOSPC:
+                    raise
+        f.truncate(size)  # File system without fallocate support: sparse file
@@ -3,7 +3,19 @@ Game launcher service for playing RaOS games.
 Handles game discovery, authentication, downloading/streaming, and launching games.
 """
 import json
-from typing import List, Dict, Optional
+import os
+from typing import Callable, List, Dict, Optional
+from urllib.parse import urlsplit
+from services.auth_service import account_path
+from services.content_cache import ContentCache, versioned_loader
+from services.game_downloader import GameDownloader, DEFAULT_CHUNK_SIZE
+from services.game_patcher import GamePatcher
+from services.game_store import GameStore
+from services.leaderboard import LeaderboardBoard
+from services.server_events import LEADERBOARD_UPDATED, subscribe_server_events
+
+# Last known game catalog of each account, shown right after login and revalidated by version
+DEFAULT_CATALOG_PATH = os.path.join(os.path.expanduser("~"), ".rastudio", "cache", "games.json")
 
 class GameLauncher:
     """
@@ -11,53 +23,99 @@ class GameLauncher:
     Supports game discovery, launching, profile management, achievements, and leaderboards.
     """
     
-    def __init__(self, rcore_client, auth_service):
+    def __init__(self, rcore_client, auth_service, cache: Optional[ContentCache] = None,
+                 store: Optional[GameStore] = None):
         """
         Initialize GameLauncher.
         
         Args:
             rcore_client: RaCoreClient instance for server communication
             auth_service: AuthService instance for authenticated requests
+            cache: Optional shared ContentCache (a private one is created otherwise)
+            store: Optional GameStore; downloaded games are deduplicated into it and
+                   versions it already holds are installed by linking instead of downloading
         """
         self.rcore_client = rcore_client
         self.auth_service = auth_service
+        self.cache = cache or ContentCache(scope=auth_service.account_key)
         self.current_game: Optional[Dict] = None
         self.player_profile: Optional[Dict] = None
+        self.store = store
+        self.catalog_path = DEFAULT_CATALOG_PATH  # Each account's catalog is saved next to it
+        self._restored_catalogs = set()  # Accounts whose saved catalog was put in the cache
+        self._leaderboard_subscription: Optional[str] = None
+        self._downloads: Dict[str, object] = {}  # game_id -> running GameDownloader or GamePatcher
         
     def get_available_games(self) -> List[Dict]:
         """
         Get list of available games from RaOS server.
+        Served from the local cache while fresh; stale lists are revalidated by version.
         
         Returns:
             List[Dict]: List of game metadata (id, name, description, etc.)
         """
         if not self.auth_service.is_authenticated():
             return []
-            
+        
+        load = versioned_loader(self.rcore_client, {
+            "action": "list_games",
+            "auth_token": self.auth_service.access_token
+        }, "games", [], on_loaded=self._save_catalog, description="games")
+        
+        self._restore_catalog()
+        
+        return self.cache.fetch("games", "*", load) or []
+    
+    def cached_games(self) -> List[Dict]:
+        """
+        Last known game list without contacting the server (possibly stale).
+        
+        Returns:
+            List[Dict]: Cached game metadata, or an empty list if none is known
+        """
+        self._restore_catalog()
+        games = self.cache.peek("games", "*")
+        return games if games is not None else []
+    
+    def _restore_catalog(self):
+        """Seed the cache with the catalog the logged-in account saw in a previous session (as stale)."""
+        account = self.auth_service.account_key()
+        if account is None or account in self._restored_catalogs:
+            return
+        self._restored_catalogs.add(account)
+        if self.cache.get("games", "*", allow_stale=True) is not None:
+            return
         try:
-            request = json.dumps({
-                "action": "list_games",
-                "auth_token": self.auth_service.access_token
-            })
-            
-            response = self.rcore_client.send(request)
-            data = json.loads(response)
-            
-            if data.get("success"):
-                return data.get("games", [])
-            return []
-            
-        except Exception as e:
-            print(f"Error fetching games: {e}")
-            return []
+            with open(account_path(self.catalog_path, account), "r", encoding="utf-8") as f:
+                catalog = json.load(f)
+            self.cache.put("games", "*", catalog.get("games", []), catalog.get("version"), expired=True)
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as e:
+            print(f"Error loading game catalog: {e}")
     
-    def launch_game(self, game_id: str, mode: str = "stream") -> bool:
+    def _save_catalog(self, games: List[Dict], version: Optional[str]):
+        account = self.auth_service.account_key()
+        if account is None:
+            return
+        path = account_path(self.catalog_path, account)
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            temp_path = path + ".tmp"
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump({"version": version, "games": games}, f)
+            os.replace(temp_path, path)
+        except OSError as e:
+            print(f"Error saving game catalog: {e}")
+    
+    def launch_game(self, game_id: str, mode: str = "stream", session_id: Optional[str] = None) -> bool:
         """
         Launch a game from RaOS server.
         
         Args:
             game_id: ID of the game to launch
             mode: Launch mode - 'stream' for streaming, 'download' for local play
+            session_id: Optional session staged by prepare_session() to activate
             
         Returns:
             bool: True if game launch successful
@@ -67,12 +125,15 @@ class GameLauncher:
             return False
             
         try:
-            request = json.dumps({
+            message = {
                 "action": "launch_game",
                 "auth_token": self.auth_service.access_token,
                 "game_id": game_id,
                 "mode": mode
-            })
+            }
+            if session_id:
+                message["session_id"] = session_id
+            request = json.dumps(message)
             
             response = self.rcore_client.send(request)
             data = json.loads(response)
@@ -93,6 +154,74 @@ class GameLauncher:
             print(f"Error launching game: {e}")
             return False
     
+    def prepare_session(self, game_id: str, mode: str = "stream") -> Optional[Dict]:
+        """
+        Ask the server to stage a game session ahead of launch.
+        Launching with the staged session ID skips session setup; unused sessions expire.
+        
+        Args:
+            game_id: ID of the game
+            mode: Launch mode the session is staged for
+            
+        Returns:
+            Dict: {"session_id", "stream_url", "expires_in"}, or None if staging failed
+        """
+        if not self.auth_service.is_player():
+            return None
+            
+        try:
+            request = json.dumps({
+                "action": "prepare_game_session",
+                "auth_token": self.auth_service.access_token,
+                "game_id": game_id,
+                "mode": mode
+            })
+            
+            response = self.rcore_client.send(request)
+            data = json.loads(response)
+            
+            if data.get("success"):
+                return {
+                    "session_id": data.get("session_id"),
+                    "stream_url": data.get("stream_url"),
+                    "expires_in": data.get("expires_in")
+                }
+            print(f"Session staging failed: {data.get('error', 'Unknown error')}")
+            return None
+            
+        except Exception as e:
+            print(f"Error staging game session: {e}")
+            return None
+    
+    def release_session(self, session_id: str) -> bool:
+        """
+        Release a staged session that will not be launched.
+        
+        Returns:
+            bool: True if the server released the session
+        """
+        if not self.auth_service.is_authenticated():
+            return False
+            
+        try:
+            request = json.dumps({
+                "action": "release_game_session",
+                "auth_token": self.auth_service.access_token,
+                "session_id": session_id
+            })
+            
+            response = self.rcore_client.send(request)
+            data = json.loads(response)
+            return bool(data.get("success"))
+            
+        except Exception as e:
+            print(f"Error releasing game session: {e}")
+            return False
+    
+    def is_streaming(self) -> bool:
+        """Check whether a game is currently being streamed."""
+        return bool(self.current_game) and self.current_game.get("mode") == "stream"
+    
     def stop_game(self) -> bool:
         """
         Stop currently running game.
@@ -125,34 +254,29 @@ class GameLauncher:
     def get_player_profile(self) -> Optional[Dict]:
         """
         Get player profile from RaOS server.
+        Served from the local cache while fresh; stale profiles are revalidated by version.
         
         Returns:
             Dict: Player profile data (username, level, stats, etc.)
         """
         if not self.auth_service.is_authenticated():
             return None
-            
-        try:
-            request = json.dumps({
-                "action": "get_player_profile",
-                "auth_token": self.auth_service.access_token
-            })
-            
-            response = self.rcore_client.send(request)
-            data = json.loads(response)
-            
-            if data.get("success"):
-                self.player_profile = data.get("profile", {})
-                return self.player_profile
-            return None
-            
-        except Exception as e:
-            print(f"Error fetching player profile: {e}")
-            return None
+        
+        load = versioned_loader(self.rcore_client, {
+            "action": "get_player_profile",
+            "auth_token": self.auth_service.access_token
+        }, "profile", {}, description="player profile")
+        
+        user_key = (self.auth_service.user_profile or {}).get("username", "me")
+        profile = self.cache.fetch("profile", user_key, load)
+        if profile is not None:
+            self.player_profile = profile
+        return profile
     
     def get_achievements(self, game_id: Optional[str] = None) -> List[Dict]:
         """
         Get player achievements from RaOS server.
+        Served from the local cache while fresh; stale lists are revalidated by version.
         
         Args:
             game_id: Optional game ID to filter achievements
@@ -162,65 +286,135 @@ class GameLauncher:
         """
         if not self.auth_service.is_authenticated():
             return []
-            
-        try:
-            request = json.dumps({
-                "action": "get_achievements",
-                "auth_token": self.auth_service.access_token,
-                "game_id": game_id
-            })
-            
-            response = self.rcore_client.send(request)
-            data = json.loads(response)
-            
-            if data.get("success"):
-                return data.get("achievements", [])
-            return []
-            
-        except Exception as e:
-            print(f"Error fetching achievements: {e}")
-            return []
+        
+        load = versioned_loader(self.rcore_client, {
+            "action": "get_achievements",
+            "auth_token": self.auth_service.access_token,
+            "game_id": game_id
+        }, "achievements", [], description="achievements")
+        
+        return self.cache.fetch("achievements", game_id or "*", load) or []
+    
+    def cached_achievements(self, game_id: Optional[str] = None) -> Optional[List[Dict]]:
+        """Achievements from the local cache without contacting the server (possibly stale), or None."""
+        return self.cache.peek("achievements", game_id or "*")
     
-    def get_leaderboard(self, game_id: str, category: str = "global") -> List[Dict]:
+    def get_leaderboard(self, game_id: str, category: str = "global", limit: Optional[int] = None) -> List[Dict]:
         """
         Get leaderboard data from RaOS server.
+        Served from the local cache while fresh; stale boards are revalidated by version.
         
         Args:
             game_id: Game ID for leaderboard
             category: Leaderboard category (global, friends, regional, etc.)
+            limit: Optional number of top entries to fetch
             
         Returns:
             List[Dict]: Leaderboard entries
         """
         if not self.auth_service.is_authenticated():
             return []
+        
+        message = {
+            "action": "get_leaderboard",
+            "auth_token": self.auth_service.access_token,
+            "game_id": game_id,
+            "category": category
+        }
+        if limit:
+            message["limit"] = limit
+        load = versioned_loader(self.rcore_client, message, "leaderboard", [], description="leaderboard")
+        
+        return self.cache.fetch("leaderboard", (game_id, category, limit), load) or []
+    
+    def cached_leaderboard(self, game_id: str, category: str = "global",
+                           limit: Optional[int] = None) -> Optional[List[Dict]]:
+        """Leaderboard from the local cache without contacting the server (possibly stale), or None."""
+        return self.cache.peek("leaderboard", (game_id, category, limit))
+    
+    def get_leaderboard_page(self, game_id: str, category: str = "global", offset: int = 0,
+                             limit: int = 100, around_player: Optional[int] = None) -> Optional[Dict]:
+        """
+        Get one page of a leaderboard.
+        
+        Args:
+            game_id: Game ID for leaderboard
+            category: Leaderboard category
+            offset: Number of entries to skip (rank - 1 of the first entry)
+            limit: Maximum entries to return
+            around_player: Instead of offset, return this many entries on each side of the player
+            
+        Returns:
+            Dict: {"entries", "offset", "total", "player_rank"}, or None if the request failed
+        """
+        if not self.auth_service.is_authenticated():
+            return None
             
         try:
-            request = json.dumps({
+            message = {
                 "action": "get_leaderboard",
                 "auth_token": self.auth_service.access_token,
                 "game_id": game_id,
-                "category": category
-            })
+                "category": category,
+                "offset": offset,
+                "limit": limit
+            }
+            if around_player:
+                message["around_player"] = around_player
+            request = json.dumps(message)
             
             response = self.rcore_client.send(request)
             data = json.loads(response)
             
             if data.get("success"):
-                return data.get("leaderboard", [])
-            return []
+                entries = data.get("leaderboard", [])
+                return {
+                    "entries": entries,
+                    "offset": data.get("offset", offset),
+                    "total": data.get("total", data.get("offset", offset) + len(entries)),
+                    "player_rank": data.get("player_rank")
+                }
+            print(f"Leaderboard fetch failed: {data.get('error', 'Unknown error')}")
+            return None
             
         except Exception as e:
-            print(f"Error fetching leaderboard: {e}")
-            return []
+            print(f"Error fetching leaderboard page: {e}")
+            return None
+    
+    def open_leaderboard(self, game_id: str, category: str = "global") -> LeaderboardBoard:
+        """
+        Open a windowed leaderboard kept current by leaderboard_updated events.
+        The board starts empty; request() the ranks to show. close() it when done.
+        
+        Args:
+            game_id: Game ID for leaderboard
+            category: Leaderboard category
+            
+        Returns:
+            LeaderboardBoard: The board
+        """
+        if self._leaderboard_subscription is None:
+            self._leaderboard_subscription = subscribe_server_events(
+                self.rcore_client, self.auth_service, [LEADERBOARD_UPDATED])
+        return LeaderboardBoard(self, game_id, category)
     
-    def download_game(self, game_id: str, destination_path: str) -> bool:
+    def download_game(self, game_id: str, destination_path: str,
+                      on_progress: Optional[Callable[[int, int], None]] = None,
+                      connections: int = 4, throttle: Optional[Callable[[int], None]] = None,
+                      stopped: Optional[Callable[[], bool]] = None) -> bool:
         """
         Download game for offline play.
+        The package is fetched in parallel byte ranges and verified while streaming;
+        an interrupted download resumes from its completed chunks when called again.
         
         Args:
             game_id: ID of game to download
-            destination_path: Local path to save game
+            destination_path: Local file path (or directory) to save game
+            on_progress: Optional callback(bytes_done, bytes_total), called from download threads
+            connections: Parallel connections
+            throttle: Optional callable(byte_count) that blocks to limit bandwidth
+            stopped: Optional callable; True cancels a download that cancel_download() missed
+                because it was not registered yet
             
         Returns:
             bool: True if download successful
@@ -238,15 +432,148 @@ class GameLauncher:
             response = self.rcore_client.send(request)
             data = json.loads(response)
             
-            if data.get("success"):
-                # In a real implementation, this would handle chunked download
-                download_url = data.get("download_url")
-                # TODO: Implement actual file download logic
-                print(f"Game download URL: {download_url}")
-                return True
-                
-            return False
+            if not data.get("success"):
+                print(f"Game download failed: {data.get('error', 'Unknown error')}")
+                return False
+            
+            download_url = data.get("download_url")
+            if os.path.isdir(destination_path):
+                file_name = data.get("file_name") or os.path.basename(urlsplit(download_url).path) or game_id
+                # Server-supplied: never let "../" or an absolute path leave the directory
+                file_name = os.path.basename(file_name.replace("\\", "/"))
+                if file_name in ("", ".", ".."):
+                    file_name = game_id
+                destination_path = os.path.join(destination_path, file_name)
+            
+            sha256 = data.get("sha256")
+            if self.store and sha256 and self.store.has_file(sha256):
+                # Already stored (another install, beta or mod): link it in place
+                version = data.get("version") or sha256
+                self.store.add_manifest(game_id, version, self._package_manifest(game_id, version, data, destination_path))
+                if self.store.install(game_id, version, os.path.dirname(destination_path)):
+                    return True
+            
+            downloader = GameDownloader(
+                download_url,
+                destination_path,
+                size=data.get("size"),
+                sha256=data.get("sha256"),
+                chunk_size=data.get("chunk_size") or DEFAULT_CHUNK_SIZE,
+                chunk_hashes=data.get("chunk_hashes"),
+                connections=connections,
+                headers={"Authorization": f"Bearer {self.auth_service.access_token}"},
+                on_progress=on_progress,
+                throttle=throttle
+            )
+            self._downloads[game_id] = downloader
+            if stopped is not None and stopped():
+                downloader.cancel()
+            try:
+                success = downloader.run()
+            finally:
+                self._downloads.pop(game_id, None)
+            if success:
+                self._store_package(game_id, data.get("version"), destination_path)
+            return success
             
         except Exception as e:
             print(f"Error downloading game: {e}")
             return False
+    
+    def update_game(self, game_id: str, installed_path: str,
+                    on_progress: Optional[Callable[[int, int], None]] = None,
+                    connections: int = 4, throttle: Optional[Callable[[int], None]] = None,
+                    stopped: Optional[Callable[[], bool]] = None) -> bool:
+        """
+        Update an installed game to the latest version by block-delta patching.
+        Blocks of the new version found anywhere in the installed file are reused;
+        only the rest is downloaded. Falls back to a full download when nothing is installed.
+        
+        Args:
+            game_id: ID of the installed game
+            installed_path: Installed game file (replaced by the new version)
+            on_progress: Optional callback(bytes_fetched, bytes_to_fetch), called from download threads
+            connections: Parallel connections
+            throttle: Optional callable(byte_count) that blocks to limit bandwidth
+            stopped: Optional callable; True cancels an update that cancel_download() missed
+            
+        Returns:
+            bool: True if the installed file is the latest version
+        """
+        if not self.auth_service.is_player():
+            return False
+        if not os.path.isfile(installed_path):
+            return self.download_game(game_id, installed_path, on_progress, connections, throttle, stopped)
+        
+        try:
+            request = json.dumps({
+                "action": "get_game_patch",
+                "auth_token": self.auth_service.access_token,
+                "game_id": game_id
+            })
+            
+            response = self.rcore_client.send(request)
+            data = json.loads(response)
+            
+            if not data.get("success"):
+                print(f"Game update failed: {data.get('error', 'Unknown error')}")
+                return False
+            
+            patcher = GamePatcher(
+                installed_path,
+                data.get("download_url"),
+                data.get("block_map", {}),
+                connections=connections,
+                headers={"Authorization": f"Bearer {self.auth_service.access_token}"},
+                on_progress=on_progress,
+                throttle=throttle
+            )
+            self._downloads[game_id] = patcher
+            if stopped is not None and stopped():
+                patcher.cancel()
+            try:
+                success = patcher.run()
+            finally:
+                self._downloads.pop(game_id, None)
+            if success:
+                self._store_package(game_id, data.get("version"), installed_path)
+            return success
+            
+        except Exception as e:
+            print(f"Error updating game: {e}")
+            return False
+    
+    def _package_manifest(self, game_id: str, version: str, data: Dict, destination_path: str) -> Dict:
+        """Store manifest of a single-file game package described by a download response."""
+        return {
+            "game_id": game_id,
+            "version": version,
+            "files": [{
+                "path": os.path.basename(destination_path),
+                "sha256": data["sha256"],
+                "size": data.get("size") or os.path.getsize(self.store.object_path(data["sha256"])),
+                "chunks": []
+            }]
+        }
+    
+    def _store_package(self, game_id: str, version: Optional[str], path: str):
+        """Deduplicate a downloaded or updated game package into the store."""
+        if not self.store:
+            return
+        try:
+            self.store.import_file(game_id, version, path)
+        except OSError as e:
+            print(f"Error adding game to store: {e}")
+    
+    def cancel_download(self, game_id: str) -> bool:
+        """
+        Stop a running game download or update; a download can be resumed by downloading again.
+        
+        Returns:
+            bool: True if a download was running
+        """
+        downloader = self._downloads.get(game_id)
+        if downloader is None:
+            return False
+        downloader.cancel()
+        return True
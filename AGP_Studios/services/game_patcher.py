@@ -0,0 +1,389 @@
+"""
+Block-delta patching of installed games (zsync-style).
+The server publishes a block map of the new version (a weak rolling checksum and a
+SHA-256 per block). The client finds those blocks anywhere in its installed copy,
+downloads only the missing ones as byte ranges and assembles the new version beside
+the old one, replacing it atomically once the result is verified.
+"""
+import hashlib
+import http.client
+import os
+import queue
+import threading
+from typing import Callable, Dict, List, Optional, Tuple
+
+from services.game_downloader import (DownloadError, follow_redirect, make_writable, open_connection, preallocate,
+                                      redirect_location, request_path)
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+    np = None
+
+DEFAULT_BLOCK_SIZE = 64 * 1024
+
+# Missing blocks are fetched in ranges of at most this many bytes
+MAX_RANGE_BYTES = 4 * 1024 * 1024
+
+# Bytes of the installed file scanned per rolling-checksum pass
+SCAN_SEGMENT = 1024 * 1024
+
+def weak_checksum(data: bytes) -> int:
+    """
+    rsync rolling checksum of a block: a = sum of bytes, b = sum of (len - i) * byte,
+    both mod 2^16; returns a | b << 16.
+    """
+    a = b = 0
+    length = len(data)
+    for i, byte in enumerate(data):
+        a += byte
+        b += (length - i) * byte
+    return (a & 0xFFFF) | ((b & 0xFFFF) << 16)
+
+def strong_checksum(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+def build_block_map(path: str, block_size: int = DEFAULT_BLOCK_SIZE) -> Dict:
+    """
+    Compute the block map of a file (what the server publishes for a version).
+
+    Returns:
+        Dict: {"size", "sha256", "block_size", "blocks": [[weak, strong], ...]}
+    """
+    blocks = []
+    digest = hashlib.sha256()
+    size = 0
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+            size += len(block)
+            blocks.append([weak_checksum(block), strong_checksum(block)])
+    return {"size": size, "sha256": digest.hexdigest(), "block_size": block_size, "blocks": blocks}
+
+class PatchPlan:
+    """Where each block of the new version comes from: an offset in the installed file, or the network."""
+
+    def __init__(self, size: int, block_size: int, sources: List[Optional[int]]):
+        self.size = size
+        self.block_size = block_size
+        self.sources = sources  # Block index -> offset in the installed file, None if missing
+
+    def block_length(self, index: int) -> int:
+        return min(self.block_size, self.size - index * self.block_size)
+
+    def missing_ranges(self, max_bytes: int = MAX_RANGE_BYTES) -> List[Tuple[int, int]]:
+        """Runs of consecutive missing blocks as (first index, end index), capped at max_bytes."""
+        per_range = max(1, max_bytes // self.block_size)
+        ranges = []
+        start = None
+        for index, source in enumerate(self.sources + [0]):
+            if source is None and start is None:
+                start = index
+            elif start is not None and (source is not None or index - start == per_range):
+                ranges.append((start, index))
+                start = index if source is None else None
+        return ranges
+
+    @property
+    def bytes_to_fetch(self) -> int:
+        return sum(self.block_length(i) for i, source in enumerate(self.sources) if source is None)
+
+    @property
+    def up_to_date(self) -> bool:
+        """True if every block is already at its own offset."""
+        return all(source == i * self.block_size for i, source in enumerate(self.sources))
+
+def plan_patch(installed_path: str, block_map: Dict) -> PatchPlan:
+    """
+    Match the blocks of a new version against an installed file.
+    Blocks still at their old offset are found by a fast aligned pass; the rest are
+    searched at every byte offset with the rolling checksum (vectorized with numpy
+    when available) and confirmed by SHA-256.
+
+    Args:
+        installed_path: Installed (old) file
+        block_map: Block map of the new version
+
+    Returns:
+        PatchPlan: Source of every block
+    """
+    block_size = block_map["block_size"]
+    blocks = block_map["blocks"]
+    sources: List[Optional[int]] = [None] * len(blocks)
+    if not os.path.exists(installed_path):
+        return PatchPlan(block_map["size"], block_size, sources)
+
+    old_size = os.path.getsize(installed_path)
+    with open(installed_path, "rb") as f:
+        # Aligned pass: unchanged regions keep their offsets
+        for index, (_, strong) in enumerate(blocks):
+            f.seek(index * block_size)
+            data = f.read(block_size)
+            if data and strong_checksum(data) == strong:
+                sources[index] = index * block_size
+
+        # The last block is usually short; also try it at the end of the installed file
+        tail = block_map["size"] - (len(blocks) - 1) * block_size
+        if blocks and sources[-1] is None and tail < block_size and old_size >= tail:
+            f.seek(old_size - tail)
+            if strong_checksum(f.read(tail)) == blocks[-1][1]:
+                sources[-1] = old_size - tail
+
+        wanted: Dict[int, List[int]] = {}
+        for index, (weak, _) in enumerate(blocks):
+            if sources[index] is None and (index < len(blocks) - 1 or tail == block_size):
+                wanted.setdefault(weak, []).append(index)
+        if wanted and old_size >= block_size:
+            _rolling_scan(f, old_size, block_size, blocks, wanted, sources)
+
+    return PatchPlan(block_map["size"], block_size, sources)
+
+def _rolling_scan(f, old_size: int, block_size: int, blocks: List, wanted: Dict[int, List[int]],
+                  sources: List[Optional[int]]):
+    """Find wanted full-size blocks at any offset of the installed file."""
+    next_allowed = 0
+    offset = 0
+    while offset + block_size <= old_size and wanted:
+        f.seek(offset)
+        buffer = f.read(SCAN_SEGMENT + block_size - 1)
+        count = len(buffer) - block_size + 1
+        if count <= 0:
+            break
+        for position, weak in _candidates(buffer, block_size, count, wanted):
+            if offset + position < next_allowed or weak not in wanted:
+                continue
+            window = buffer[position:position + block_size]
+            indexes = wanted[weak]
+            strong = strong_checksum(window)
+            matched = [i for i in indexes if blocks[i][1] == strong]
+            if not matched:
+                continue
+            for index in matched:
+                sources[index] = offset + position
+            for weak_key in {blocks[i][0] for i in matched}:
+                remaining = [i for i in wanted[weak_key] if i not in matched]
+                if remaining:
+                    wanted[weak_key] = remaining
+                else:
+                    del wanted[weak_key]
+            # Matches do not overlap, as in rsync
+            next_allowed = offset + position + block_size
+        offset += count
+
+def _candidates(buffer: bytes, block_size: int, count: int, wanted: Dict[int, List[int]]):
+    """(window start position, weak checksum) of windows whose checksum is wanted."""
+    if NUMPY_AVAILABLE:
+        data = np.frombuffer(buffer, dtype=np.uint8).astype(np.int64)
+        positions = np.arange(len(data) + 1, dtype=np.int64)
+        sums = np.concatenate(([0], np.cumsum(data)))
+        weighted = np.concatenate(([0], np.cumsum(positions[:-1] * data)))
+        starts = positions[:count]
+        a = sums[starts + block_size] - sums[starts]
+        b = (starts + block_size) * a - (weighted[starts + block_size] - weighted[starts])
+        weak = (a & 0xFFFF) | ((b & 0xFFFF) << 16)
+        hits = np.nonzero(np.isin(weak, np.fromiter(wanted.keys(), dtype=np.int64)))[0]
+        return zip(hits.tolist(), weak[hits].tolist())
+
+    # Pure Python rolling update: a' = a - out + in, b' = b - len * out + a'
+    hits = []
+    window = buffer[:block_size]
+    a = sum(window)
+    b = sum((block_size - i) * byte for i, byte in enumerate(window))
+    for position in range(count):
+        weak = (a & 0xFFFF) | ((b & 0xFFFF) << 16)
+        if weak in wanted:
+            hits.append((position, weak))
+        if position + block_size < len(buffer):
+            out_byte = buffer[position]
+            a += buffer[position + block_size] - out_byte
+            b += a - block_size * out_byte
+    return hits
+
+class GamePatcher:
+    """
+    Applies a block map to an installed game file.
+    The new version is assembled in "<installed>.part" from local blocks and fetched
+    ranges, verified against the version SHA-256 and renamed over the installed file.
+    """
+
+    def __init__(self, installed_path: str, url: str, block_map: Dict, connections: int = 4,
+                 headers: Optional[Dict[str, str]] = None, max_retries: int = 5, timeout: float = 30.0,
+                 on_progress: Optional[Callable[[int, int], None]] = None,
+                 throttle: Optional[Callable[[int], None]] = None):
+        """
+        Initialize GamePatcher.
+
+        Args:
+            installed_path: Installed (old) file, replaced by the new version
+            url: HTTP(S) URL of the new version (must support range requests)
+            block_map: Block map of the new version (see build_block_map)
+            connections: Parallel connections for missing ranges
+            headers: Extra request headers (e.g. Authorization)
+            max_retries: Attempts per range
+            timeout: Socket timeout in seconds
+            on_progress: Optional callback(bytes_fetched, bytes_to_fetch), called from worker threads
+            throttle: Optional callable(byte_count) invoked per fetched range; blocks to limit bandwidth
+        """
+        self.installed_path = installed_path
+        self.url = url
+        self.block_map = block_map
+        self.connections = max(1, connections)
+        self.headers = dict(headers or {})
+        self.max_retries = max_retries
+        self.timeout = timeout
+        self.on_progress = on_progress
+        self.throttle = throttle
+        self.part_path = installed_path + ".part"
+        self.plan: Optional[PatchPlan] = None
+        self.bytes_fetched = 0
+        self.bytes_to_fetch = 0
+        self.error: Optional[str] = None
+        self._lock = threading.Lock()
+        self._cancel = threading.Event()
+
+    def cancel(self):
+        """Stop patching; the installed file is left unchanged."""
+        self._cancel.set()
+
+    def run(self) -> bool:
+        """
+        Patch the installed file to the new version.
+
+        Returns:
+            bool: True if the installed file now is the new version
+        """
+        try:
+            self.plan = plan_patch(self.installed_path, self.block_map)
+            if self.plan.up_to_date and os.path.getsize(self.installed_path) == self.plan.size:
+                return True
+            self.bytes_to_fetch = self.plan.bytes_to_fetch
+
+            preallocate(self.part_path, self.plan.size)
+            self._copy_local_blocks()
+            self._fetch_missing()
+            if self._cancel.is_set() or self.error:
+                self._discard()
+                return False
+
+            digest = hashlib.sha256()
+            with open(self.part_path, "rb") as f:
+                for block in iter(lambda: f.read(1024 * 1024), b""):
+                    digest.update(block)
+                os.fsync(f.fileno())
+            if digest.hexdigest() != self.block_map["sha256"]:
+                raise DownloadError("patched file hash mismatch")
+            make_writable(self.installed_path)
+            os.replace(self.part_path, self.installed_path)
+            return True
+
+        except (DownloadError, OSError) as e:
+            self.error = str(e)
+            print(f"Error patching {self.installed_path}: {e}")
+            self._discard()
+            return False
+
+    def _copy_local_blocks(self):
+        plan = self.plan
+        with open(self.installed_path, "rb") as source, open(self.part_path, "r+b") as target:
+            for index, offset in enumerate(plan.sources):
+                if offset is None:
+                    continue
+                source.seek(offset)
+                target.seek(index * plan.block_size)
+                target.write(source.read(plan.block_length(index)))
+
+    def _fetch_missing(self):
+        pending = queue.Queue()
+        for run in self.plan.missing_ranges():
+            pending.put(run)
+        workers = [threading.Thread(target=self._worker, args=(pending,), daemon=True,
+                                    name=f"GamePatcher-{i}")
+                   for i in range(min(self.connections, pending.qsize()))]
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+
+    def _worker(self, pending: queue.Queue):
+        conn = None
+        with open(self.part_path, "r+b") as f:
+            while not self._cancel.is_set() and not self.error:
+                try:
+                    first, end = pending.get_nowait()
+                except queue.Empty:
+                    break
+                try:
+                    conn = self._fetch_range(first, end, f, conn)
+                except DownloadError as e:
+                    self.error = str(e)
+        if conn is not None:
+            conn.close()
+
+    def _fetch_range(self, first: int, end: int, f, conn):
+        """Fetch blocks [first, end) in one ranged request and verify each block."""
+        plan = self.plan
+        start = first * plan.block_size
+        stop = start + sum(plan.block_length(i) for i in range(first, end))
+        for attempt in range(self.max_retries + 1):
+            try:
+                conn, response, data = self._get(conn, {"Range": f"bytes={start}-{stop - 1}"})
+                if self.throttle is not None:
+                    self.throttle(len(data))
+                if response.status != 206:
+                    if response.status >= 500 or response.status == 429:
+                        raise OSError(f"HTTP {response.status}")
+                    raise DownloadError(f"HTTP {response.status} (range requests required for patching)")
+                if len(data) != stop - start:
+                    raise OSError("short range response")
+                for index in range(first, end):
+                    offset = (index - first) * plan.block_size
+                    if strong_checksum(data[offset:offset + plan.block_length(index)]) != self.block_map["blocks"][index][1]:
+                        raise OSError(f"block {index} failed verification")
+                f.seek(start)
+                f.write(data)
+                with self._lock:
+                    self.bytes_fetched += len(data)
+                    fetched = self.bytes_fetched
+                if self.on_progress:
+                    self.on_progress(fetched, self.bytes_to_fetch)
+                return conn
+            except (OSError, http.client.HTTPException) as e:
+                if conn is not None:
+                    conn.close()
+                    conn = None
+                if attempt == self.max_retries:
+                    raise DownloadError(f"range {start}-{stop - 1} failed: {e}")
+                self._cancel.wait(min(30.0, 0.5 * 2 ** attempt))
+        return conn
+
+    def _get(self, conn, extra_headers: Dict[str, str]):
+        """Send a GET and follow redirects; returns (connection, response, body)."""
+        try:
+            for _ in range(5):
+                with self._lock:
+                    url, headers = self.url, self.headers
+                if conn is None:
+                    conn = open_connection(url, self.timeout)
+                conn.request("GET", request_path(url), headers=dict(headers, **extra_headers))
+                response = conn.getresponse()
+                data = response.read()
+                location = redirect_location(response)
+                if not location:
+                    return conn, response, data
+                with self._lock:
+                    # Another worker may have followed the same redirect already
+                    if self.url == url:
+                        self.url, self.headers = follow_redirect(url, headers, location)
+                conn.close()
+                conn = None
+        except BaseException:
+            if conn is not None:
+                conn.close()
+            raise
+        raise DownloadError("too many redirects")
+
+    def _discard(self):
+        if os.path.exists(self.part_path):
+            os.remove(self.part_path)
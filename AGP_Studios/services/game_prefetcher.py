@@ -0,0 +1,152 @@
+"""
+Speculative prefetch of game details for the game browser.
+While the player looks at the game list, the profile, achievements and top
+leaderboard entries of the visible and adjacent games are loaded into the
+ContentCache in the background, so selecting a game shows its data immediately.
+"""
+import heapq
+import itertools
+import json
+import threading
+from typing import Iterable, Optional
+
+from services.download_scheduler import TokenBucket
+from services.game_launcher import GameLauncher
+from services.module_bus import ModuleBus
+
+# ModuleBus event published after a resource was loaded or failed to load;
+# payload is {"game_id", "kind", "ok"}
+GAME_PREFETCHED = "game_prefetched"
+
+# Prefetched resources
+PROFILE = "profile"
+ACHIEVEMENTS = "achievements"
+LEADERBOARD = "leaderboard"
+
+# Queue priorities (lower first)
+URGENT = 0  # Selected by the player
+VISIBLE = 1
+ADJACENT = 2
+
+# Background bandwidth budget for speculative requests (bytes/s of response data)
+DEFAULT_BUDGET = 64 * 1024
+
+# Leaderboard entries prefetched (and shown) per game
+LEADERBOARD_TOP = 50
+
+# Seconds to wait before retrying while a game is streamed
+STREAMING_BACKOFF = 2.0
+
+class GamePrefetcher:
+    """
+    Background loader of per-game data with a priority queue and bandwidth budget.
+    Call focus() whenever the visible rows change and request() when a game is selected.
+    Cached and fresh resources cost nothing; speculative work pauses while a game streams.
+    """
+
+    def __init__(self, game_launcher: GameLauncher, budget: Optional[float] = DEFAULT_BUDGET,
+                 leaderboard_category: str = "global", leaderboard_limit: int = LEADERBOARD_TOP):
+        """
+        Initialize GamePrefetcher.
+
+        Args:
+            game_launcher: GameLauncher whose cache is warmed
+            budget: Bytes per second of speculative responses, or None for unlimited
+            leaderboard_category: Leaderboard category to prefetch
+            leaderboard_limit: Number of top leaderboard entries to prefetch
+        """
+        self.game_launcher = game_launcher
+        self.leaderboard_category = leaderboard_category
+        self.leaderboard_limit = leaderboard_limit
+        self.bucket = TokenBucket(budget)
+        self._heap = []
+        self._pending = {}  # (kind, game_id) -> queued priority
+        self._order = itertools.count()
+        self._condition = threading.Condition()
+        self._stopped = False
+        self._thread = threading.Thread(target=self._run, name="game-prefetch", daemon=True)
+        self._thread.start()
+
+    def focus(self, visible: Iterable[str], adjacent: Iterable[str] = ()):
+        """
+        Replace the speculative queue with the given games.
+
+        Args:
+            visible: Game IDs currently on screen
+            adjacent: Game IDs just off screen or next to the selection
+        """
+        with self._condition:
+            self._heap = [item for item in self._heap if item[0] == URGENT]
+            self._pending = {(item[2], item[3]): URGENT for item in self._heap}
+            heapq.heapify(self._heap)
+            self._push(VISIBLE, PROFILE, None)
+            for priority, game_ids in ((VISIBLE, visible), (ADJACENT, adjacent)):
+                for game_id in game_ids:
+                    self._push(priority, ACHIEVEMENTS, game_id)
+                    self._push(priority, LEADERBOARD, game_id)
+            self._condition.notify()
+
+    def request(self, game_id: str):
+        """Load a selected game's data ahead of speculative work and outside the budget."""
+        with self._condition:
+            self._push(URGENT, ACHIEVEMENTS, game_id)
+            self._push(URGENT, LEADERBOARD, game_id)
+            self._condition.notify()
+
+    def stop(self):
+        """Stop the worker thread; queued work is dropped."""
+        with self._condition:
+            self._stopped = True
+            self._heap = []
+            self._pending = {}
+            self._condition.notify_all()
+
+    def _push(self, priority: int, kind: str, game_id: Optional[str]):
+        queued = self._pending.get((kind, game_id))
+        if queued is not None and queued <= priority:
+            return
+        self._pending[(kind, game_id)] = priority
+        heapq.heappush(self._heap, (priority, next(self._order), kind, game_id))
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._stopped and not self._heap:
+                    self._condition.wait()
+                if self._stopped:
+                    return
+                priority, _, kind, game_id = heapq.heappop(self._heap)
+                if self._pending.get((kind, game_id)) != priority:
+                    continue  # Superseded by a more urgent entry
+                del self._pending[(kind, game_id)]
+                if priority != URGENT and self.game_launcher.is_streaming():
+                    # Leave the bandwidth to the stream; try again later
+                    self._push(priority, kind, game_id)
+                    self._condition.wait(STREAMING_BACKOFF)
+                    continue
+
+            misses = self.game_launcher.cache.stats["misses"]
+            result = self._load(kind, game_id)
+            if self.game_launcher.cache.stats["misses"] != misses and priority != URGENT:
+                self.bucket.consume(len(json.dumps(result, default=str)))
+            ok = result is not None if kind == PROFILE else self._fresh(kind, game_id)
+            ModuleBus.publish(GAME_PREFETCHED, {"game_id": game_id, "kind": kind, "ok": ok}, sender=self)
+
+    def _fresh(self, kind: str, game_id: Optional[str]) -> bool:
+        """Whether a list resource is fresh in the cache; its getter returns [] when loading fails."""
+        if kind == ACHIEVEMENTS:
+            key = game_id or "*"
+        else:
+            key = (game_id, self.leaderboard_category, self.leaderboard_limit)
+        return self.game_launcher.cache.get(kind, key) is not None
+
+    def _load(self, kind: str, game_id: Optional[str]):
+        try:
+            if kind == PROFILE:
+                return self.game_launcher.get_player_profile()
+            if kind == ACHIEVEMENTS:
+                return self.game_launcher.get_achievements(game_id)
+            return self.game_launcher.get_leaderboard(game_id, self.leaderboard_category, self.leaderboard_limit)
+        except Exception as e:
+            print(f"Error prefetching {kind} for {game_id}: {e}")
+            return None
@@ -3,8 +3,24 @@ Game project manager for RaOS game development.
 Handles game project creation, loading, asset management, and synchronization with RaOS server.
 """
 import json
-from typing import List, Dict, Optional
+import threading
+from typing import Callable, List, Dict, Optional, Set
 from datetime import datetime
+from services.project_workspace import ProjectWorkspace, ProjectChanges, ENTITY_KINDS, entity_key, record_hash
+from services.asset_manifest import AssetManifest, apply_asset_changes
+from services.asset_table import AssetTable
+from services.dependency_graph import DependencyGraph, BuildCache
+from services.project_history import ProjectHistory, changed_keys, changed_kinds
+from services.module_bus import ModuleBus
+from services.server_events import PROJECT_MODIFIED, subscribe_server_events
+
+# Conflict policies for upstream changes to entities that also have unsaved local edits
+CONFLICT_KEEP_LOCAL = "keep_local"  # Keep the local edit; the next save overwrites the upstream change
+CONFLICT_TAKE_REMOTE = "take_remote"  # Discard the local edit in favour of the upstream change
+
+# ModuleBus event published after upstream changes were merged into the current project;
+# payload is {"project_id", "changes": ProjectChanges applied, "conflicts": ["kind:key", ...]}
+PROJECT_CHANGES_MERGED = "project_changes_merged"
 
 class GameProject:
     """Represents a game project in RaOS."""
@@ -15,9 +31,19 @@ class GameProject:
         self.description = description
         self.created_date = datetime.now()
         self.modified_date = datetime.now()
-        self.assets: List[Dict] = []
+        self._assets = AssetTable()
         self.scenes: List[Dict] = []
         self.scripts: List[Dict] = []
+    
+    @property
+    def assets(self) -> AssetTable:
+        """Project assets as a compact, indexed table."""
+        return self._assets
+    
+    @assets.setter
+    def assets(self, value):
+        # Plain lists of asset dicts are converted; AssetRecords are shared, not copied
+        self._assets = value if isinstance(value, AssetTable) else AssetTable(value)
         
     def to_dict(self) -> Dict:
         """Convert project to dictionary for serialization."""
@@ -27,7 +53,7 @@ class GameProject:
             "description": self.description,
             "created_date": self.created_date.isoformat(),
             "modified_date": self.modified_date.isoformat(),
-            "assets": self.assets,
+            "assets": self.assets.to_list(),
             "scenes": self.scenes,
             "scripts": self.scripts
         }
@@ -38,17 +64,36 @@ class GameProjectManager:
     Provides IDE functionality for game development with RaOS server integration.
     """
     
-    def __init__(self, rcore_client, auth_service):
+    def __init__(self, rcore_client, auth_service, workspace: Optional[ProjectWorkspace] = None,
+                 build_cache: Optional[BuildCache] = None, conflict_policy: str = CONFLICT_KEEP_LOCAL):
         """
         Initialize GameProjectManager.
         
         Args:
             rcore_client: RaCoreClient instance for server communication
             auth_service: AuthService instance for authenticated requests
+            workspace: Optional local workspace (the default on-disk one is used otherwise)
+            build_cache: Optional build cache (the default on-disk one is used otherwise)
+            conflict_policy: CONFLICT_KEEP_LOCAL or CONFLICT_TAKE_REMOTE for upstream changes
+                             to entities with unsaved local edits
         """
         self.rcore_client = rcore_client
         self.auth_service = auth_service
+        self.workspace = workspace or ProjectWorkspace()
+        self.build_cache = build_cache or BuildCache()
         self.current_project: Optional[GameProject] = None
+        self.history = ProjectHistory()
+        self.conflict_policy = conflict_policy
+        self._assets_lock = threading.Lock()
+        # Manifest of the asset table it was built from; other edits replace the table
+        # (the lists are never mutated in place), which marks the manifest stale
+        self._manifest: Optional[AssetManifest] = None
+        self._manifest_assets: Optional[AssetTable] = None
+        self._event_subscription: Optional[str] = None
+        # Runs server event handling on the thread that edits the project (e.g. by emitting a
+        # queued Qt signal). Events arrive on whichever thread called send(); None handles them there.
+        self.event_dispatcher: Optional[Callable[[Callable[[], None]], None]] = None
+        ModuleBus.subscribe(PROJECT_MODIFIED, self._on_project_modified)
         
     def create_project(self, name: str, description: str = "") -> Optional[GameProject]:
         """
@@ -80,6 +125,9 @@ class GameProjectManager:
                 project_id = data.get("project_id")
                 project = GameProject(project_id, name, description)
                 self.current_project = project
+                self.workspace.store(project.to_dict(), data.get("revision"))
+                self.history.reset(project)
+                self._subscribe_project_events()
                 return project
                 
             print(f"Project creation failed: {data.get('error', 'Unknown error')}")
@@ -91,7 +139,9 @@ class GameProjectManager:
     
     def load_project(self, project_id: str) -> Optional[GameProject]:
         """
-        Load existing game project from RaOS server.
+        Load existing game project.
+        A project already in the local workspace opens from disk and only the
+        changes made upstream since it was stored are fetched.
         
         Args:
             project_id: Project ID to load
@@ -102,7 +152,60 @@ class GameProjectManager:
         if not self.auth_service.is_authenticated():
             print("Error: Authentication required")
             return None
+        
+        stored = self.workspace.load(project_id)
+        if stored is None:
+            return self._load_full_project(project_id)
+        
+        self.current_project = self._project_from_dict(stored)
+        self.refresh_project()
+        self.history.reset(self.current_project)
+        self._subscribe_project_events()
+        return self.current_project
+    
+    def refresh_project(self) -> Optional[ProjectChanges]:
+        """
+        Fetch changes made upstream since the workspace revision and merge them.
+        Local edits to other entities are kept; edits to the same entities follow
+        the conflict policy.
+        
+        Returns:
+            ProjectChanges: Applied upstream changes, or None if the fetch failed
+        """
+        if not self.current_project or not self.auth_service.is_authenticated():
+            return None
+        
+        project_id = self.current_project.project_id
+        try:
+            request = json.dumps({
+                "action": "load_game_project_changes",
+                "auth_token": self.auth_service.access_token,
+                "project_id": project_id,
+                "since": self.workspace.revision(project_id)
+            })
+            
+            response = self.rcore_client.send(request)
+            data = json.loads(response)
+            
+            if not data.get("success"):
+                print(f"Project refresh failed: {data.get('error', 'Unknown error')}")
+                return None
             
+            if data.get("resync_required"):
+                self.workspace.remove(project_id)
+                return ProjectChanges() if self._load_full_project(project_id) else None
+            
+            changes = ProjectChanges.from_dict(data.get("changes", {}), data.get("project"))
+            if changes or data.get("revision") != self.workspace.revision(project_id):
+                self.merge_remote_changes(changes, data.get("revision"))
+            return changes
+            
+        except Exception as e:
+            print(f"Error refreshing project: {e}")
+            return None
+    
+    def _load_full_project(self, project_id: str) -> Optional[GameProject]:
+        """Download a whole project and store it in the workspace."""
         try:
             request = json.dumps({
                 "action": "load_game_project",
@@ -124,6 +227,9 @@ class GameProjectManager:
                 project.scenes = project_data.get("scenes", [])
                 project.scripts = project_data.get("scripts", [])
                 self.current_project = project
+                self.workspace.store(project.to_dict(), data.get("revision"))
+                self.history.reset(project)
+                self._subscribe_project_events()
                 return project
                 
             print(f"Project load failed: {data.get('error', 'Unknown error')}")
@@ -136,6 +242,9 @@ class GameProjectManager:
     def save_project(self) -> bool:
         """
         Save current project to RaOS server.
+        Only entities changed since the last save or load are sent; the whole
+        project is sent when the workspace has no base state or the server
+        does not accept the delta.
         
         Returns:
             bool: True if save successful
@@ -147,25 +256,268 @@ class GameProjectManager:
         if not self.auth_service.is_developer():
             print("Error: Developer role required to save projects")
             return False
+        
+        project_id = self.current_project.project_id
+        if not self.workspace.has_project(project_id):
+            return self._save_full_project()
+        
+        changes = self.workspace.diff(self.current_project.to_dict())
+        if not changes:
+            return True
+            
+        try:
+            self.current_project.modified_date = datetime.now()
+            changes.project["modified_date"] = self.current_project.to_dict()["modified_date"]
+            
+            request = json.dumps({
+                "action": "save_game_project_delta",
+                "auth_token": self.auth_service.access_token,
+                "project_id": project_id,
+                "base_revision": self.workspace.revision(project_id),
+                "project": changes.project,
+                "changes": changes.to_dict()
+            })
+            
+            response = self.rcore_client.send(request)
+            data = json.loads(response)
+            
+            if data.get("success"):
+                # project_modified events that arrived ahead of the response were merged into
+                # the project inside send(); record the state after them as the saved base
+                with self._assets_lock:
+                    project_dict = self.current_project.to_dict()
+                self.workspace.commit(project_dict, changes, data.get("revision"))
+                return True
             
+            # Base revision is stale or delta saves are unsupported: fall back to a full save
+            print(f"Delta save rejected ({data.get('error', 'Unknown error')}), saving full project")
+            return self._save_full_project()
+            
+        except Exception as e:
+            print(f"Error saving project: {e}")
+            return False
+    
+    def _save_full_project(self) -> bool:
+        """Send the whole project and store it in the workspace."""
         try:
             self.current_project.modified_date = datetime.now()
+            project_dict = self.current_project.to_dict()
             
             request = json.dumps({
                 "action": "save_game_project",
                 "auth_token": self.auth_service.access_token,
-                "project": self.current_project.to_dict()
+                "project": project_dict
             })
             
             response = self.rcore_client.send(request)
             data = json.loads(response)
             
-            return data.get("success", False)
+            if data.get("success"):
+                self.workspace.store(project_dict, data.get("revision"))
+                return True
+            return False
             
         except Exception as e:
             print(f"Error saving project: {e}")
             return False
     
+    def has_unsaved_changes(self) -> bool:
+        """Check whether the current project differs from its last saved state."""
+        if not self.current_project:
+            return False
+        if not self.workspace.has_project(self.current_project.project_id):
+            return True
+        return bool(self.workspace.diff(self.current_project.to_dict()))
+    
+    def merge_remote_changes(self, changes: ProjectChanges, revision: Optional[str] = None,
+                             policy: Optional[str] = None) -> Optional[Dict]:
+        """
+        Merge upstream changes into the current project.
+        Entities without unsaved local edits take the upstream state. Entities edited
+        on both sides are conflicts, resolved by the policy. The workspace always
+        records the upstream state, so kept local edits are sent by the next save.
+        
+        Args:
+            changes: Upstream changes
+            revision: Server revision after the changes
+            policy: Conflict policy (defaults to conflict_policy)
+            
+        Returns:
+            Dict: {"changes": ProjectChanges applied to the project,
+                   "conflicts": conflicting entities as "kind:key" (fields as "project:name")},
+                  or None if no project is open
+        """
+        project = self.current_project
+        if project is None:
+            return None
+        take_remote = (policy or self.conflict_policy) == CONFLICT_TAKE_REMOTE
+        project_id = project.project_id
+        applied = ProjectChanges()
+        conflicts = []
+        
+        with self._assets_lock:
+            stored_meta = self.workspace.meta(project_id) or {}
+            for field in ("name", "description"):
+                if field not in changes.project:
+                    continue
+                local = getattr(project, field)
+                if local != stored_meta.get(field) and local != changes.project[field]:
+                    conflicts.append(f"project:{field}")
+                    if not take_remote:
+                        continue
+                applied.project[field] = changes.project[field]
+            
+            for kind in ENTITY_KINDS:
+                upserts = {entity_key(kind, record): record for record in changes.upserts[kind]}
+                deletes = changes.deletes[kind]
+                if not upserts and not deletes:
+                    continue
+                stored = self.workspace.entity_hashes(project_id, kind, list(upserts) + deletes)
+                local = {}
+                for record in getattr(project, kind):
+                    key = entity_key(kind, record)
+                    if key in upserts or key in stored:
+                        local[key] = record_hash(record)
+                
+                for key, record in upserts.items():
+                    # Edited locally (changed, added or deleted) and different from upstream
+                    if local.get(key) != stored.get(key) and local.get(key) != record_hash(record):
+                        conflicts.append(f"{kind}:{key}")
+                        if not take_remote:
+                            continue
+                    applied.upserts[kind].append(record)
+                for key in deletes:
+                    if key not in local:
+                        continue
+                    if local[key] != stored.get(key):
+                        conflicts.append(f"{kind}:{key}")
+                        if not take_remote:
+                            continue
+                    applied.deletes[kind].append(key)
+            
+            self.workspace.apply_remote(project_id, changes, revision)
+            self._apply_changes(project, applied)
+        
+        if applied:
+            self.checkpoint("Remote Changes", changed_keys(applied))
+        ModuleBus.publish(PROJECT_CHANGES_MERGED,
+                          {"project_id": project_id, "changes": applied, "conflicts": conflicts},
+                          sender=self)
+        return {"changes": applied, "conflicts": conflicts}
+    
+    def _on_project_modified(self, event):
+        """ModuleBus handler for project_modified server events."""
+        data = event.payload or {}
+        if self.event_dispatcher is not None:
+            self.event_dispatcher(lambda: self.handle_project_modified(data))
+        else:
+            self.handle_project_modified(data)
+    
+    def handle_project_modified(self, data: Dict):
+        """
+        Apply a project_modified server event to the current project.
+        Must run on the thread that edits the project (see event_dispatcher).
+        
+        Args:
+            data: Event payload ({"project_id", "revision", "base_revision", "changes", "project"})
+        """
+        project = self.current_project
+        if project is None or data.get("project_id") != project.project_id:
+            return
+        known = self.workspace.revision(project.project_id)
+        if data.get("revision") is not None and data.get("revision") == known:
+            return  # Already applied, e.g. the echo of our own save
+        if "changes" not in data or data.get("base_revision") != known:
+            # An earlier event was missed (or this one carries no change-set): catch up by delta
+            self.refresh_project()
+            return
+        changes = ProjectChanges.from_dict(data["changes"], data.get("project"))
+        self.merge_remote_changes(changes, data.get("revision"))
+    
+    def _subscribe_project_events(self):
+        """Ask the server to push project_modified events (once per session)."""
+        if self._event_subscription is None:
+            self._event_subscription = subscribe_server_events(
+                self.rcore_client, self.auth_service, [PROJECT_MODIFIED])
+    
+    def checkpoint(self, label: str, changed: Optional[Dict[str, Optional[Set[str]]]] = None) -> bool:
+        """
+        Record the current project state as an undoable step.
+        Call after each edit; unchanged entities are shared with the previous state.
+        
+        Args:
+            label: Description of the edit (e.g. "Remove Asset")
+            changed: What the edit touched (see project_history.changed_keys/changed_kinds);
+                None re-captures the whole project
+            
+        Returns:
+            bool: True if the project changed since the last checkpoint
+        """
+        if not self.current_project:
+            return False
+        with self._assets_lock:
+            return self.history.checkpoint(self.current_project, label, changed)
+    
+    def undo(self) -> Optional[ProjectChanges]:
+        """
+        Revert the current project to the state before the last checkpointed edit.
+        
+        Returns:
+            ProjectChanges: Entities the undo changed, or None if there is nothing to undo
+        """
+        if not self.current_project:
+            return None
+        with self._assets_lock:
+            return self.history.undo(self.current_project)
+    
+    def redo(self) -> Optional[ProjectChanges]:
+        """
+        Re-apply the last undone edit.
+        
+        Returns:
+            ProjectChanges: Entities the redo changed, or None if there is nothing to redo
+        """
+        if not self.current_project:
+            return None
+        with self._assets_lock:
+            return self.history.redo(self.current_project)
+    
+    @staticmethod
+    def _project_from_dict(project_data: Dict) -> GameProject:
+        """Build a GameProject from its to_dict() form."""
+        project = GameProject(
+            project_data.get("project_id"),
+            project_data.get("name"),
+            project_data.get("description", "")
+        )
+        for field in ("created_date", "modified_date"):
+            if project_data.get(field):
+                setattr(project, field, datetime.fromisoformat(project_data[field]))
+        for kind in ENTITY_KINDS:
+            setattr(project, kind, project_data.get(kind, []))
+        return project
+    
+    @staticmethod
+    def _apply_changes(project: GameProject, changes: ProjectChanges):
+        """Apply upstream changes to an in-memory project, replacing records in place."""
+        if "name" in changes.project:
+            project.name = changes.project["name"]
+        if "description" in changes.project:
+            project.description = changes.project["description"]
+        for kind in ENTITY_KINDS:
+            upserts = {entity_key(kind, record): record for record in changes.upserts[kind]}
+            deletes = set(changes.deletes[kind])
+            if not upserts and not deletes:
+                continue
+            records = []
+            for record in getattr(project, kind):
+                key = entity_key(kind, record)
+                if key in deletes:
+                    continue
+                records.append(upserts.pop(key, record))
+            records.extend(upserts.values())
+            setattr(project, kind, records)
+    
     def list_projects(self) -> List[Dict]:
         """
         Get list of available game projects from RaOS server.
@@ -193,35 +545,163 @@ class GameProjectManager:
             print(f"Error listing projects: {e}")
             return []
     
+    def dependency_graph(self) -> Optional[DependencyGraph]:
+        """
+        Build the dependency graph of the current project.
+        
+        Returns:
+            DependencyGraph: Scene/script -> asset references, or None if no project is loaded
+        """
+        if not self.current_project:
+            return None
+        return DependencyGraph(self.current_project)
+    
+    def validate_project(self) -> Optional[Dict]:
+        """
+        Check scenes and scripts for references to missing assets.
+        Only entities whose inputs changed since the last clean validation are checked.
+        
+        Returns:
+            Dict: {"checked": number of entities checked,
+                   "unresolved": node -> missing file references,
+                   "unreferenced_assets": asset nodes nothing appears to refer to (heuristic)}
+        """
+        graph = self.dependency_graph()
+        if graph is None:
+            return None
+        project_id = self.current_project.project_id
+        stale = self.build_cache.stale(project_id, graph, "validate")
+        unresolved = graph.unresolved(stale)
+        self.build_cache.mark_built(project_id, graph, [n for n in stale if n not in unresolved], "validate")
+        return {
+            "checked": len(stale),
+            "unresolved": unresolved,
+            "unreferenced_assets": graph.unreferenced_assets()
+        }
+    
     def sync_assets(self) -> bool:
         """
         Synchronize project assets with RaOS server.
+        Compares Merkle manifests with the server level by level and transfers
+        only assets that were added, removed or changed upstream.
         
         Returns:
             bool: True if sync successful
         """
         if not self.current_project:
             return False
-            
+        
+        project = self.current_project
+        with self._assets_lock:
+            manifest = self._asset_manifest(project)
         try:
-            request = json.dumps({
-                "action": "sync_assets",
-                "auth_token": self.auth_service.access_token,
-                "project_id": self.current_project.project_id
-            })
-            
-            response = self.rcore_client.send(request)
-            data = json.loads(response)
+            # Descend from the root, one request per tree level, following differing nodes
+            differing = [""]
+            while differing and len(differing[0]) < manifest.depth:
+                data = self._request_manifest(differing, manifest.depth)
+                if data is None:
+                    return self._sync_all_assets()
+                nodes = data.get("nodes", {})
+                next_level = []
+                for prefix in differing:
+                    node = nodes.get(prefix, {})
+                    if node.get("hash", "") != manifest.node_hash(prefix):
+                        next_level.extend(manifest.diff_children(prefix, node.get("children", [])))
+                differing = next_level
             
-            if data.get("success"):
-                self.current_project.assets = data.get("assets", [])
+            if not differing:
                 return True
-            return False
+            
+            data = self._request_manifest(differing, manifest.depth, leaves=True)
+            if data is None:
+                return self._sync_all_assets()
+            to_fetch, to_delete = [], []
+            for prefix in differing:
+                diff = manifest.diff_bucket(prefix, data.get("buckets", {}).get(prefix, {}))
+                to_fetch.extend(diff["fetch"])
+                to_delete.extend(diff["delete"])
+            
+            fetched = self._fetch_assets(to_fetch) if to_fetch else []
+            if fetched is None:
+                return False
+            
+            with self._assets_lock:
+                manifest = self._asset_manifest(project)
+                project.assets = apply_asset_changes(project.assets, fetched, to_delete, manifest)
+                self._manifest_assets = project.assets
+            if self.workspace.has_project(project.project_id):
+                changes = ProjectChanges()
+                changes.upserts["assets"] = fetched
+                changes.deletes["assets"] = to_delete
+                self.workspace.apply_remote(project.project_id, changes,
+                                            self.workspace.revision(project.project_id))
+            self.checkpoint("Sync Assets", {"assets": {entity_key("assets", record) for record in fetched}})
+            return True
             
         except Exception as e:
             print(f"Error syncing assets: {e}")
             return False
     
+    def _asset_manifest(self, project: GameProject) -> AssetManifest:
+        """Manifest of a project's assets, rebuilt only if the asset table was replaced since."""
+        if self._manifest is None or self._manifest_assets is not project.assets:
+            self._manifest = AssetManifest(project.assets)
+            self._manifest_assets = project.assets
+        return self._manifest
+    
+    def _request_manifest(self, prefixes: List[str], depth: int, leaves: bool = False) -> Optional[Dict]:
+        """Request manifest node hashes (or leaf bucket entries) for tree prefixes."""
+        request = json.dumps({
+            "action": "asset_manifest",
+            "auth_token": self.auth_service.access_token,
+            "project_id": self.current_project.project_id,
+            "depth": depth,
+            "prefixes": prefixes,
+            "leaves": leaves
+        })
+        
+        response = self.rcore_client.send(request)
+        data = json.loads(response)
+        
+        if data.get("success"):
+            return data
+        print(f"Asset manifest unavailable: {data.get('error', 'Unknown error')}")
+        return None
+    
+    def _fetch_assets(self, keys: List[str]) -> Optional[List[Dict]]:
+        """Fetch asset records by key."""
+        request = json.dumps({
+            "action": "get_project_assets",
+            "auth_token": self.auth_service.access_token,
+            "project_id": self.current_project.project_id,
+            "keys": keys
+        })
+        
+        response = self.rcore_client.send(request)
+        data = json.loads(response)
+        
+        if data.get("success"):
+            return data.get("assets", [])
+        print(f"Asset fetch failed: {data.get('error', 'Unknown error')}")
+        return None
+    
+    def _sync_all_assets(self) -> bool:
+        """Replace the asset list with the server's full list."""
+        request = json.dumps({
+            "action": "sync_assets",
+            "auth_token": self.auth_service.access_token,
+            "project_id": self.current_project.project_id
+        })
+        
+        response = self.rcore_client.send(request)
+        data = json.loads(response)
+        
+        if data.get("success"):
+            self.current_project.assets = data.get("assets", [])
+            self.checkpoint("Sync Assets", changed_kinds(["assets"]))
+            return True
+        return False
+    
     def add_asset(self, asset_name: str, asset_type: str, asset_data: bytes) -> bool:
         """
         Add asset to current project and upload to RaOS server.
@@ -234,23 +714,97 @@ class GameProjectManager:
         Returns:
             bool: True if asset added successfully
         """
-        if not self.current_project or not self.auth_service.is_developer():
-            return False
+        asset_info = self.upload_asset(asset_name, asset_type, asset_data)
+        if asset_info:
+            self.record_asset(asset_info)
+            return True
+        return False
+    
+    def record_asset(self, asset_info: Dict, project: Optional[GameProject] = None):
+        """
+        Add an uploaded asset to a project's asset list atomically.
+        
+        Args:
+            asset_info: Asset info returned by upload_asset
+            project: Project the asset was uploaded to (defaults to the current project)
+        """
+        self.record_assets([asset_info], project)
+    
+    def record_assets(self, asset_infos: List[Dict], project: Optional[GameProject] = None):
+        """
+        Add uploaded assets to a project's asset list atomically.
+        The list is replaced rather than mutated, so readers iterating the old
+        list from another thread see a consistent snapshot; a batch costs one copy.
+        
+        Args:
+            asset_infos: Asset infos returned by upload_asset
+            project: Project the assets were uploaded to (defaults to the current project)
+        """
+        project = project or self.current_project
+        if project is None or not asset_infos:
+            return
+        # A later info for the same asset replaces an earlier one
+        batch: Dict = {}
+        for asset_info in asset_infos:
+            key = asset_info.get("asset_id") or id(asset_info)
+            batch.pop(key, None)
+            batch[key] = asset_info
+        with self._assets_lock:
+            tracked = self._manifest is not None and self._manifest_assets is project.assets
+            if any(project.assets.get(key) is not None for key in batch if isinstance(key, str)):
+                assets = AssetTable(record for record in project.assets if record.asset_id not in batch)
+            else:
+                assets = project.assets.copy()
+            for asset_info in batch.values():
+                assets.append(asset_info)
+            project.assets = assets
+            if tracked:
+                for asset_info in batch.values():
+                    self._manifest.add(asset_info)
+                self._manifest_assets = project.assets
+    
+    def upload_asset(self, asset_name: str, asset_type: str, asset_data: bytes,
+                     content_hash: Optional[str] = None, compression: Optional[Dict] = None,
+                     client=None, project: Optional[GameProject] = None) -> Optional[Dict]:
+        """
+        Upload an asset of a project without adding it to the asset list.
+        Safe to call from worker threads; each thread may pass its own pooled client.
+        
+        Args:
+            asset_name: Name of the asset
+            asset_type: Type of asset (image, audio, model, etc.)
+            asset_data: Binary asset data (compressed when compression says so)
+            content_hash: Optional SHA-256 of the original data
+            compression: Optional CompressionDecision.to_dict() describing asset_data
+            client: Optional client to send with (defaults to the manager's client)
+            project: Project to upload to (defaults to the current project)
+            
+        Returns:
+            Dict: Asset info (name, type, asset_id, url), or None if upload failed
+        """
+        project = project or self.current_project
+        if not project or not self.auth_service.is_developer():
+            return None
             
         try:
             import base64
             asset_data_b64 = base64.b64encode(asset_data).decode('utf-8')
             
-            request = json.dumps({
+            message = {
                 "action": "add_asset",
                 "auth_token": self.auth_service.access_token,
-                "project_id": self.current_project.project_id,
+                "project_id": project.project_id,
                 "asset_name": asset_name,
                 "asset_type": asset_type,
                 "asset_data": asset_data_b64
-            })
+            }
+            if content_hash:
+                message["content_hash"] = content_hash
+            if compression is not None:
+                message["compressed"] = bool(compression.get("codec"))
+                message["compression"] = compression
             
-            response = self.rcore_client.send(request)
+            response = (client or self.rcore_client).send(json.dumps(message))
             data = json.loads(response)
             
             if data.get("success"):
@@ -260,10 +814,11 @@ class GameProjectManager:
                     "asset_id": data.get("asset_id"),
                     "url": data.get("asset_url")
                 }
-                self.current_project.assets.append(asset_info)
-                return True
-            return False
+                if content_hash:
+                    asset_info["content_hash"] = content_hash
+                return asset_info
+            return None
             
         except Exception as e:
             print(f"Error adding asset: {e}")
-            return False
+            return None
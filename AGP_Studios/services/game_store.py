@@ -0,0 +1,570 @@
+"""
+Content-addressed local store for installed games.
+Every distinct file is kept once under its SHA-256 and hardlinked (or reflinked)
+into install directories, so versions, betas and mods that share files take no
+extra space and install without copying. Files are also indexed as content-defined
+chunks; a file that is not in the store is assembled from chunks already on disk
+and only the missing chunks have to be fetched.
+"""
+import bisect
+import hashlib
+import json
+import os
+import re
+import shutil
+import sqlite3
+import threading
+from typing import Callable, Dict, Iterator, List, Optional
+
+from services.game_downloader import make_writable
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+    np = None
+
+DEFAULT_STORE_DIR = os.path.join(os.path.expanduser("~"), ".rastudio", "store")
+
+# Content-defined chunking: a chunk ends where the rolling hash of the last WINDOW bytes has
+# the MASK bits clear (about 64 KB apart), bounded by MIN_CHUNK and MAX_CHUNK.
+WINDOW = 32
+MIN_CHUNK = 16 * 1024
+MAX_CHUNK = 256 * 1024
+MASK = 0xFFFF
+
+# Bytes read per chunking pass
+SCAN_SEGMENT = 4 * 1024 * 1024
+
+# Ways of placing a stored file into an install directory, cheapest first
+LINK_HARDLINK = "hardlink"
+LINK_REFLINK = "reflink"
+LINK_COPY = "copy"
+# Whether a read-only store object stays protected when hardlinked into an install.
+# On Windows the read-only attribute belongs to the shared file, so the installed copy
+# cannot be replaced or removed without unprotecting the store object as well.
+HARDLINKS_PROTECTED = os.name != "nt"
+LINK_MODES = (LINK_HARDLINK, LINK_REFLINK, LINK_COPY) if HARDLINKS_PROTECTED else (LINK_REFLINK, LINK_COPY)
+
+# Written into each install directory, one per game: the installed version and its files.
+# Games may share a directory (e.g. a common Games folder), so each only prunes its own files.
+INSTALL_RECORD_PREFIX = ".rastudio_install"
+# Single shared record written by earlier versions
+LEGACY_INSTALL_RECORD = INSTALL_RECORD_PREFIX + ".json"
+
+# Linux FICLONE ioctl (btrfs, XFS, bcachefs): the copy shares the source's extents
+FICLONE = 0x40049409
+
+_GEAR = [int.from_bytes(hashlib.sha256(bytes([i])).digest()[:4], "little") for i in range(256)]
+_GEAR_TABLE = np.array(_GEAR, dtype=np.uint64) if NUMPY_AVAILABLE else None
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS chunks (
+    hash TEXT PRIMARY KEY,
+    object TEXT NOT NULL,
+    offset INTEGER NOT NULL,
+    length INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS chunks_object ON chunks (object);
+CREATE TABLE IF NOT EXISTS versions (
+    game_id TEXT NOT NULL,
+    version TEXT NOT NULL,
+    manifest TEXT NOT NULL,
+    PRIMARY KEY (game_id, version)
+);
+"""
+
+def _cut_candidates(buffer: bytes) -> List[int]:
+    """Offsets after which the rolling window hash marks a chunk boundary."""
+    if len(buffer) < WINDOW:
+        return []
+    if NUMPY_AVAILABLE:
+        sums = np.cumsum(_GEAR_TABLE[np.frombuffer(buffer, dtype=np.uint8)])
+        window = sums[WINDOW - 1:] - np.concatenate((np.zeros(1, dtype=np.uint64), sums[:-WINDOW]))
+        return (np.nonzero((window & MASK) == 0)[0] + WINDOW).tolist()
+
+    candidates = []
+    rolling = sum(_GEAR[byte] for byte in buffer[:WINDOW])
+    for end in range(WINDOW, len(buffer) + 1):
+        if rolling & MASK == 0:
+            candidates.append(end)
+        if end < len(buffer):
+            rolling += _GEAR[buffer[end]] - _GEAR[buffer[end - WINDOW]]
+    return candidates
+
+def _cut_points(buffer: bytes, final: bool) -> List[int]:
+    """Chunk end offsets in a buffer starting at a chunk boundary; the unterminated tail is left out unless final."""
+    candidates = _cut_candidates(buffer)
+    cuts = []
+    start = 0
+    while True:
+        index = bisect.bisect_left(candidates, start + MIN_CHUNK)
+        if index < len(candidates) and candidates[index] <= start + MAX_CHUNK:
+            start = candidates[index]
+        elif start + MAX_CHUNK <= len(buffer):
+            start += MAX_CHUNK
+        else:
+            break
+        cuts.append(start)
+    if final and start < len(buffer):
+        cuts.append(len(buffer))
+    return cuts
+
+def iter_chunks(stream) -> Iterator[bytes]:
+    """
+    Split a binary stream into content-defined chunks.
+    Boundaries depend only on nearby content, so an edit changes only the chunks around it.
+    """
+    buffer = b""
+    while True:
+        data = stream.read(SCAN_SEGMENT)
+        buffer += data
+        final = not data
+        start = 0
+        for cut in _cut_points(buffer, final):
+            yield buffer[start:cut]
+            start = cut
+        buffer = buffer[start:]
+        if final:
+            return
+
+def scan_file(path: str) -> Dict:
+    """
+    Hash a file and its chunks.
+
+    Returns:
+        dict: {"sha256", "size", "chunks": [[chunk sha256, length], ...]}
+    """
+    digest = hashlib.sha256()
+    chunks = []
+    size = 0
+    with open(path, "rb") as f:
+        for chunk in iter_chunks(f):
+            digest.update(chunk)
+            chunks.append([hashlib.sha256(chunk).hexdigest(), len(chunk)])
+            size += len(chunk)
+    return {"sha256": digest.hexdigest(), "size": size, "chunks": chunks}
+
+def reflink(source: str, destination: str) -> bool:
+    """
+    Create destination as a reflink of source (shares data blocks until either is written).
+
+    Returns:
+        bool: True on success, False if the platform or filesystem does not support it
+    """
+    if fcntl is None:
+        return False
+    try:
+        with open(source, "rb") as src, open(destination, "wb") as dst:
+            fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+        return True
+    except OSError:
+        if os.path.exists(destination):
+            os.remove(destination)
+        return False
+
+def clone_file(source: str, destination: str):
+    """Copy a file, as a reflink where the filesystem supports it."""
+    if not reflink(source, destination):
+        shutil.copyfile(source, destination)
+
+def install_record_path(directory: str, game_id: str) -> str:
+    """Path of a game's install record in a directory."""
+    return os.path.join(directory, f"{INSTALL_RECORD_PREFIX}.{re.sub(r'[^A-Za-z0-9_.-]', '_', game_id)}.json")
+
+def _safe_join(directory: str, relative: str) -> str:
+    """Join a manifest path to an install directory, rejecting paths that escape it."""
+    path = os.path.normpath(os.path.join(directory, relative))
+    if os.path.isabs(relative) or os.path.commonpath([os.path.abspath(directory), os.path.abspath(path)]) != os.path.abspath(directory):
+        raise ValueError(f"Invalid path in manifest: {relative}")
+    return path
+
+class GameStore:
+    """
+    Deduplicating store of game files and version manifests.
+    A manifest lists the files of one game version: {"files": [{"path", "sha256", "size", "chunks"}]}.
+    Stored files are read-only; installs link to them, and updates replace installed
+    files by rename, so installed copies never modify the store.
+    """
+
+    def __init__(self, root: str = DEFAULT_STORE_DIR, link_mode: Optional[str] = None):
+        """
+        Initialize GameStore.
+
+        Args:
+            root: Store directory (install directories should be on the same filesystem for hardlinks)
+            link_mode: Force one of LINK_MODES, or None to use the cheapest that works
+        """
+        self.root = root
+        self.link_mode = link_mode
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.RLock()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(os.path.join(self.root, "objects"), exist_ok=True)
+            self._conn = sqlite3.connect(os.path.join(self.root, "index.db"), check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(_SCHEMA)
+        return self._conn
+
+    def object_path(self, sha256: str) -> str:
+        """Path of the stored file with the given SHA-256."""
+        return os.path.join(self.root, "objects", sha256[:2], sha256)
+
+    def has_file(self, sha256: str) -> bool:
+        return os.path.isfile(self.object_path(sha256))
+
+    def add_file(self, path: str, link_back: bool = True) -> Dict:
+        """
+        Add a file to the store.
+        With link_back the file itself becomes a link to the stored copy, so a file
+        the store already has stops using its own disk space. Where that link is a
+        hardlink the file shares the store object's inode and therefore becomes
+        read-only too; it can still be replaced or deleted, but not edited in place.
+
+        Args:
+            path: File to add
+            link_back: Replace the file with a (read-only) link to the stored copy
+
+        Returns:
+            dict: Manifest file entry without "path"
+        """
+        entry = scan_file(path)
+        stored = self.object_path(entry["sha256"])
+        with self._lock:
+            if not os.path.isfile(stored):
+                os.makedirs(os.path.dirname(stored), exist_ok=True)
+                temp_path = stored + ".tmp"
+                if os.path.exists(temp_path):
+                    os.remove(temp_path)
+                linked = False
+                if link_back and HARDLINKS_PROTECTED:
+                    # Taking over the file's inode stores it without copying
+                    try:
+                        os.link(path, temp_path)
+                        linked = True
+                    except OSError:
+                        pass
+                if not linked:
+                    clone_file(path, temp_path)
+                os.chmod(temp_path, 0o444)
+                os.replace(temp_path, stored)
+                self._index_chunks(entry)
+        if link_back:
+            self._place(stored, path)
+        return entry
+
+    def import_tree(self, game_id: str, version: str, directory: str, link_back: bool = True) -> Dict:
+        """
+        Add an installed game directory to the store as a version.
+
+        Args:
+            game_id: Game ID
+            version: Version label
+            directory: Install directory
+            link_back: Replace the files with links to the stored copies
+
+        Returns:
+            dict: Version manifest
+        """
+        files = []
+        for folder, _, names in os.walk(directory):
+            for name in sorted(names):
+                path = os.path.join(folder, name)
+                if name.startswith(INSTALL_RECORD_PREFIX) or os.path.islink(path):
+                    continue
+                entry = self.add_file(path, link_back)
+                entry["path"] = os.path.relpath(path, directory).replace(os.sep, "/")
+                files.append(entry)
+        manifest = {"game_id": game_id, "version": version, "files": files}
+        self.add_manifest(game_id, version, manifest)
+        if link_back:
+            self._write_install_record(directory, game_id, version, [entry["path"] for entry in files])
+        return manifest
+
+    def import_file(self, game_id: str, version: Optional[str], path: str, link_back: bool = True) -> Dict:
+        """Add a single-file game (e.g. a downloaded package) to the store as a version (default: its SHA-256)."""
+        entry = self.add_file(path, link_back)
+        entry["path"] = os.path.basename(path)
+        version = version or entry["sha256"]
+        manifest = {"game_id": game_id, "version": version, "files": [entry]}
+        self.add_manifest(game_id, version, manifest)
+        return manifest
+
+    def add_manifest(self, game_id: str, version: str, manifest: Dict):
+        """Record the manifest of a game version (its files need not be stored yet)."""
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                conn.execute("INSERT OR REPLACE INTO versions (game_id, version, manifest) VALUES (?, ?, ?)",
+                             (game_id, version, json.dumps(manifest)))
+
+    def manifest(self, game_id: str, version: str) -> Optional[Dict]:
+        with self._lock:
+            row = self._connect().execute(
+                "SELECT manifest FROM versions WHERE game_id = ? AND version = ?", (game_id, version)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def versions(self, game_id: str) -> List[str]:
+        with self._lock:
+            rows = self._connect().execute(
+                "SELECT version FROM versions WHERE game_id = ? ORDER BY version", (game_id,)).fetchall()
+        return [row[0] for row in rows]
+
+    def missing_chunks(self, manifest: Dict) -> List[List]:
+        """
+        Chunks of a manifest's files that are not available locally.
+
+        Returns:
+            list: [chunk sha256, length] pairs, each listed once
+        """
+        missing = {}
+        with self._lock:
+            conn = self._connect()
+            for entry in manifest.get("files", []):
+                if self.has_file(entry["sha256"]):
+                    continue
+                for chunk_hash, length in entry.get("chunks", []):
+                    if chunk_hash not in missing and self._chunk_location(conn, chunk_hash) is None:
+                        missing[chunk_hash] = length
+        return [[chunk_hash, length] for chunk_hash, length in missing.items()]
+
+    def install(self, game_id: str, version: str, directory: str,
+                fetch_chunk: Optional[Callable[[str, int], bytes]] = None) -> bool:
+        """
+        Materialize a stored game version into an install directory.
+        Files are linked from the store; files not stored yet are assembled from local
+        chunks plus chunks returned by fetch_chunk. Files of the previously installed
+        version of the same game that the new one does not have are removed; files
+        of other games installed in the directory are left alone.
+
+        Args:
+            game_id: Game ID
+            version: Version to install
+            directory: Install directory
+            fetch_chunk: Optional callable(chunk sha256, length) returning chunk data not available locally
+
+        Returns:
+            bool: True if every file of the version was installed
+        """
+        manifest = self.manifest(game_id, version)
+        if manifest is None:
+            print(f"Error installing game: {game_id} {version} is not in the store")
+            return False
+
+        try:
+            os.makedirs(directory, exist_ok=True)
+            paths = []
+            for entry in manifest.get("files", []):
+                if not self.has_file(entry["sha256"]) and not self._assemble(entry, fetch_chunk):
+                    print(f"Error installing game: missing data for {entry['path']}")
+                    return False
+                self._place(self.object_path(entry["sha256"]), _safe_join(directory, entry["path"]))
+                paths.append(entry["path"])
+
+            previous = self.installed_version(directory, game_id)
+            if previous is not None:
+                keep = set(paths)
+                for record in self._install_records(directory):
+                    if record.get("game_id") != game_id:
+                        keep.update(record.get("files", []))
+                for stale in set(previous.get("files", [])) - keep:
+                    stale_path = _safe_join(directory, stale)
+                    if os.path.isfile(stale_path):
+                        make_writable(stale_path)
+                        os.remove(stale_path)
+            self._write_install_record(directory, game_id, version, paths)
+            return True
+
+        except (OSError, ValueError) as e:
+            print(f"Error installing game: {e}")
+            return False
+
+    def installed_version(self, directory: str, game_id: str) -> Optional[Dict]:
+        """Install record ({"game_id", "version", "files"}) of a game in a directory, if any."""
+        for path in (install_record_path(directory, game_id), os.path.join(directory, LEGACY_INSTALL_RECORD)):
+            record = self._read_install_record(path)
+            if record is not None and record.get("game_id") == game_id:
+                return record
+        return None
+
+    def _install_records(self, directory: str) -> List[Dict]:
+        """Install records of all games in a directory."""
+        records = []
+        for name in os.listdir(directory):
+            if name.startswith(INSTALL_RECORD_PREFIX) and name.endswith(".json"):
+                record = self._read_install_record(os.path.join(directory, name))
+                if record is not None:
+                    records.append(record)
+        return records
+
+    @staticmethod
+    def _read_install_record(path: str) -> Optional[Dict]:
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                record = json.load(f)
+            return record if isinstance(record, dict) else None
+        except (OSError, ValueError):
+            return None
+
+    def remove_version(self, game_id: str, version: str):
+        """Forget a version; its files are freed by gc() once no install uses them."""
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                conn.execute("DELETE FROM versions WHERE game_id = ? AND version = ?", (game_id, version))
+
+    def gc(self) -> int:
+        """
+        Delete stored files that no manifest lists and no install directory links to.
+
+        Returns:
+            int: Bytes freed
+        """
+        freed = 0
+        with self._lock:
+            conn = self._connect()
+            referenced = set()
+            for (manifest,) in conn.execute("SELECT manifest FROM versions"):
+                referenced.update(entry["sha256"] for entry in json.loads(manifest).get("files", []))
+            for sha256, path in self._objects():
+                if sha256 in referenced:
+                    continue
+                stat = os.stat(path)
+                if stat.st_nlink > 1:
+                    continue  # Still hardlinked into an install
+                make_writable(path)
+                os.remove(path)
+                freed += stat.st_size
+                with conn:
+                    conn.execute("DELETE FROM chunks WHERE object = ?", (sha256,))
+        return freed
+
+    def stats(self) -> Dict:
+        """Stored bytes versus the total size of all recorded versions."""
+        with self._lock:
+            manifests = [json.loads(row[0]) for row in self._connect().execute("SELECT manifest FROM versions")]
+            stored = sum(os.path.getsize(path) for _, path in self._objects())
+        return {
+            "versions": len(manifests),
+            "logical_bytes": sum(entry["size"] for manifest in manifests for entry in manifest.get("files", [])),
+            "stored_bytes": stored
+        }
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def _objects(self):
+        objects_dir = os.path.join(self.root, "objects")
+        for prefix in os.listdir(objects_dir) if os.path.isdir(objects_dir) else ():
+            folder = os.path.join(objects_dir, prefix)
+            for name in os.listdir(folder):
+                if not name.endswith(".tmp"):
+                    yield name, os.path.join(folder, name)
+
+    def _index_chunks(self, entry: Dict):
+        conn = self._connect()
+        rows = []
+        offset = 0
+        for chunk_hash, length in entry["chunks"]:
+            rows.append((chunk_hash, entry["sha256"], offset, length))
+            offset += length
+        with conn:
+            conn.executemany("INSERT OR IGNORE INTO chunks (hash, object, offset, length) VALUES (?, ?, ?, ?)", rows)
+
+    def _chunk_location(self, conn: sqlite3.Connection, chunk_hash: str):
+        row = conn.execute("SELECT object, offset, length FROM chunks WHERE hash = ?", (chunk_hash,)).fetchone()
+        if row is None or not self.has_file(row[0]):
+            return None
+        return row
+
+    def _assemble(self, entry: Dict, fetch_chunk: Optional[Callable[[str, int], bytes]]) -> bool:
+        """Build a file from stored chunks and fetched ones, then add it to the store."""
+        stored = self.object_path(entry["sha256"])
+        os.makedirs(os.path.dirname(stored), exist_ok=True)
+        temp_path = stored + ".tmp"
+        digest = hashlib.sha256()
+        with self._lock:
+            conn = self._connect()
+            locations = {chunk_hash: self._chunk_location(conn, chunk_hash) for chunk_hash, _ in entry["chunks"]}
+        try:
+            with open(temp_path, "wb") as out:
+                for chunk_hash, length in entry["chunks"]:
+                    location = locations[chunk_hash]
+                    if location is not None:
+                        with open(self.object_path(location[0]), "rb") as source:
+                            source.seek(location[1])
+                            data = source.read(length)
+                    elif fetch_chunk is not None:
+                        data = fetch_chunk(chunk_hash, length)
+                    else:
+                        return False
+                    if hashlib.sha256(data).hexdigest() != chunk_hash:
+                        print(f"Error assembling {entry['path']}: chunk {chunk_hash[:12]} hash mismatch")
+                        return False
+                    digest.update(data)
+                    out.write(data)
+            if digest.hexdigest() != entry["sha256"]:
+                print(f"Error assembling {entry['path']}: file hash mismatch")
+                return False
+            os.chmod(temp_path, 0o444)
+            os.replace(temp_path, stored)
+            with self._lock:
+                self._index_chunks(entry)
+            return True
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+    def _place(self, stored: str, path: str):
+        """Put a stored file at path (atomically), unless it is already linked there."""
+        try:
+            if os.path.samefile(stored, path):
+                return
+        except OSError:
+            pass
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        temp_path = path + ".link.tmp"
+        if os.path.lexists(temp_path):
+            os.remove(temp_path)
+        modes = (self.link_mode,) if self.link_mode else LINK_MODES
+        for mode in modes:
+            try:
+                if mode == LINK_HARDLINK:
+                    os.link(stored, temp_path)
+                elif mode == LINK_REFLINK:
+                    if not reflink(stored, temp_path):
+                        continue
+                    os.chmod(temp_path, 0o644)
+                else:
+                    shutil.copyfile(stored, temp_path)
+                    os.chmod(temp_path, 0o644)
+                break
+            except OSError:
+                if os.path.lexists(temp_path):
+                    os.remove(temp_path)
+        else:
+            raise OSError(f"Could not place {path} ({'/'.join(modes)} failed)")
+        make_writable(path)
+        os.replace(temp_path, path)
+
+    def _write_install_record(self, directory: str, game_id: str, version: str, paths: List[str]):
+        record_path = install_record_path(directory, game_id)
+        temp_path = record_path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump({"game_id": game_id, "version": version, "files": paths}, f)
+        os.replace(temp_path, record_path)
+        legacy_path = os.path.join(directory, LEGACY_INSTALL_RECORD)
+        legacy = self._read_install_record(legacy_path)
+        if legacy is not None and legacy.get("game_id") == game_id:
+            os.remove(legacy_path)
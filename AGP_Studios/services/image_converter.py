@@ -0,0 +1,237 @@
+"""
+Image conversion service for the RaOS asset pipeline.
+Converts and resizes images in a process pool, with a result cache keyed by
+(source hash, target parameters) so repeated uploads skip the work.
+Note: Requires the Pillow package to be installed.
+"""
+import hashlib
+import io
+import json
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Dict, Iterable, Optional, Tuple
+
+try:
+    from PIL import Image
+    PIL_AVAILABLE = True
+except ImportError:
+    PIL_AVAILABLE = False
+    Image = None
+
+# Target format name -> (Pillow format, file extension, lossy)
+IMAGE_FORMATS = {
+    "png": ("PNG", ".png", False),
+    "jpeg": ("JPEG", ".jpg", True),
+    "jpg": ("JPEG", ".jpg", True),
+    "webp": ("WEBP", ".webp", True),
+}
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".rastudio", "cache", "conversions")
+
+def converted_filename(filename: str, target_format: str) -> str:
+    """Replace a file name's extension with the one of the target format."""
+    return os.path.splitext(filename)[0] + IMAGE_FORMATS[target_format.lower()][1]
+
+def convert_image(data: bytes, target_format: str, quality: Optional[int] = None,
+                  max_size: Optional[int] = None, target_bytes: Optional[int] = None) -> bytes:
+    """
+    Convert and optionally resize an image. Runs inside worker processes.
+
+    Args:
+        data: Source image bytes
+        target_format: Target format (png, jpeg, webp)
+        quality: Optional encoder quality (1-100) for lossy formats
+        max_size: Optional maximum width/height in pixels, aspect ratio preserved
+        target_bytes: Optional output size target; lossy quality is lowered until it fits
+
+    Returns:
+        bytes: Encoded image in the target format
+    """
+    pil_format, _, lossy = IMAGE_FORMATS[target_format.lower()]
+
+    image = Image.open(io.BytesIO(data))
+    image.load()
+
+    if max_size and max(image.size) > max_size:
+        image.thumbnail((max_size, max_size), Image.LANCZOS)
+
+    # JPEG has no alpha channel or palette support
+    if pil_format == "JPEG" and image.mode not in ("RGB", "L"):
+        image = image.convert("RGB")
+
+    def encode(q: Optional[int]) -> bytes:
+        output = io.BytesIO()
+        options = {"optimize": True}
+        if lossy and q is not None:
+            options["quality"] = q
+        image.save(output, format=pil_format, **options)
+        return output.getvalue()
+
+    result = encode(quality if quality is not None else (85 if lossy else None))
+    if not (lossy and target_bytes) or len(result) <= target_bytes:
+        return result
+
+    # Binary search the highest quality that fits the size target
+    low, high = 5, (quality or 85) - 1
+    best = None
+    while low <= high:
+        mid = (low + high) // 2
+        candidate = encode(mid)
+        if len(candidate) <= target_bytes:
+            best = candidate
+            low = mid + 1
+        else:
+            high = mid - 1
+    return best if best is not None else encode(5)
+
+class ImageConverter:
+    """
+    Converts images off the UI thread using a process pool.
+    Results are cached in memory (LRU) and on disk by source hash and target parameters.
+    """
+
+    def __init__(self, max_workers: Optional[int] = None, cache_dir: Optional[str] = DEFAULT_CACHE_DIR,
+                 memory_cache_entries: int = 64):
+        """
+        Initialize ImageConverter.
+
+        Args:
+            max_workers: Number of worker processes (defaults to CPU count)
+            cache_dir: Directory for the on-disk conversion cache, or None to disable it
+            memory_cache_entries: Number of converted results kept in memory
+        """
+        self.max_workers = max_workers
+        self.cache_dir = cache_dir
+        self.memory_cache_entries = memory_cache_entries
+        self._memory_cache: "OrderedDict[str, bytes]" = OrderedDict()
+        self._lock = threading.Lock()  # Done-callbacks run on the executor's thread
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    @staticmethod
+    def supports(target_format: str) -> bool:
+        """Check if a target format can be produced by this converter."""
+        return PIL_AVAILABLE and target_format.lower() in IMAGE_FORMATS
+
+    @staticmethod
+    def cache_key(data: bytes, target_format: str, quality: Optional[int] = None,
+                  max_size: Optional[int] = None, target_bytes: Optional[int] = None) -> str:
+        """
+        Compute cache key from the source hash and target parameters.
+
+        Returns:
+            str: Hex digest identifying the conversion result
+        """
+        params = json.dumps({
+            "format": IMAGE_FORMATS[target_format.lower()][0],
+            "quality": quality,
+            "max_size": max_size,
+            "target_bytes": target_bytes
+        }, sort_keys=True)
+        source_hash = hashlib.sha256(data).hexdigest()
+        return hashlib.sha256(f"{source_hash}:{params}".encode()).hexdigest()
+
+    def convert(self, data: bytes, target_format: str, quality: Optional[int] = None,
+                max_size: Optional[int] = None, target_bytes: Optional[int] = None) -> bytes:
+        """
+        Convert an image, blocking until the result is available.
+
+        Returns:
+            bytes: Converted image data
+        """
+        return self.submit(data, target_format, quality, max_size, target_bytes).result()
+
+    def submit(self, data: bytes, target_format: str, quality: Optional[int] = None,
+               max_size: Optional[int] = None, target_bytes: Optional[int] = None) -> Future:
+        """
+        Schedule an image conversion in the process pool.
+
+        Returns:
+            Future: Resolves to the converted bytes (already resolved on cache hit)
+        """
+        if not self.supports(target_format):
+            raise ValueError(f"Unsupported image target format: {target_format}")
+
+        key = self.cache_key(data, target_format, quality, max_size, target_bytes)
+        cached = self._cache_get(key, target_format)
+        if cached is not None:
+            future = Future()
+            future.set_result(cached)
+            return future
+
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+
+        future = self._executor.submit(convert_image, data, target_format, quality, max_size, target_bytes)
+        future.add_done_callback(
+            lambda f: self._cache_put(key, target_format, f.result())
+            if not f.cancelled() and f.exception() is None else None
+        )
+        return future
+
+    def convert_batch(self, items: Iterable[Tuple[str, bytes]], target_format: str,
+                      quality: Optional[int] = None, max_size: Optional[int] = None,
+                      target_bytes: Optional[int] = None) -> Dict[str, Future]:
+        """
+        Schedule conversion of many images at once.
+
+        Args:
+            items: Iterable of (name, image bytes) pairs
+
+        Returns:
+            Dict[str, Future]: Name -> future resolving to converted bytes
+        """
+        return {
+            name: self.submit(data, target_format, quality, max_size, target_bytes)
+            for name, data in items
+        }
+
+    def shutdown(self):
+        """Shut down the worker processes."""
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    def _cache_path(self, key: str, target_format: str) -> Optional[str]:
+        if not self.cache_dir:
+            return None
+        return os.path.join(self.cache_dir, key + IMAGE_FORMATS[target_format.lower()][1])
+
+    def _cache_get(self, key: str, target_format: str) -> Optional[bytes]:
+        with self._lock:
+            if key in self._memory_cache:
+                self._memory_cache.move_to_end(key)
+                return self._memory_cache[key]
+
+        path = self._cache_path(key, target_format)
+        if path and os.path.exists(path):
+            try:
+                with open(path, "rb") as f:
+                    data = f.read()
+                self._remember(key, data)
+                return data
+            except OSError:
+                return None
+        return None
+
+    def _cache_put(self, key: str, target_format: str, data: bytes):
+        self._remember(key, data)
+
+        path = self._cache_path(key, target_format)
+        if path:
+            try:
+                os.makedirs(self.cache_dir, exist_ok=True)
+                tmp_path = path + ".tmp"
+                with open(tmp_path, "wb") as f:
+                    f.write(data)
+                os.replace(tmp_path, path)
+            except OSError as e:
+                print(f"Error writing conversion cache: {e}")
+
+    def _remember(self, key: str, data: bytes):
+        with self._lock:
+            self._memory_cache[key] = data
+            self._memory_cache.move_to_end(key)
+            while len(self._memory_cache) > self.memory_cache_entries:
+                self._memory_cache.popitem(last=False)
@@ -0,0 +1,410 @@
+"""
+Staged folder import pipeline for game project assets.
+Files flow through read -> hash -> compress -> upload stages, each with its own
+worker threads, connected by bounded queues so a slow stage applies backpressure.
+"""
+import hashlib
+import os
+import queue
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional
+
+from services.compression_policy import CompressionPolicy
+from services.game_project_manager import GameProjectManager
+from services.rapi_client import RaCoreClientPool
+
+# Marks the end of the stream on a stage queue
+_DONE = object()
+
+# Uploaded assets recorded on the project per batch (each batch copies the asset list once)
+RECORD_BATCH = 256
+
+class ImportItem:
+    """One file moving through the import pipeline."""
+
+    __slots__ = ("path", "name", "asset_type", "size", "data", "content_hash",
+                 "compression", "asset_info", "error", "skipped", "duplicate")
+
+    def __init__(self, path: str, name: str, asset_type: str):
+        self.path = path
+        self.name = name
+        self.asset_type = asset_type
+        self.size = 0
+        self.data: Optional[bytes] = None
+        self.content_hash: Optional[str] = None
+        self.compression: Optional[Dict] = None
+        self.asset_info: Optional[Dict] = None
+        self.error: Optional[str] = None
+        self.skipped = False  # Content already in the project or earlier in this import
+        self.duplicate = False  # Same content as a file still in flight; settled by the collector
+
+class ImportProgress:
+    """Snapshot of import progress with throughput and ETA."""
+
+    def __init__(self, files_total: int, files_done: int, files_failed: int, files_skipped: int,
+                 bytes_total: int, bytes_done: int, elapsed: float, scanning: bool):
+        self.files_total = files_total
+        self.files_done = files_done  # Includes failed and skipped files
+        self.files_failed = files_failed
+        self.files_skipped = files_skipped
+        self.bytes_total = bytes_total
+        self.bytes_done = bytes_done
+        self.elapsed = elapsed
+        self.scanning = scanning  # Directory walk still running, totals may grow
+
+    @property
+    def throughput(self) -> float:
+        """Processed bytes per second."""
+        return self.bytes_done / self.elapsed if self.elapsed > 0 else 0.0
+
+    @property
+    def files_per_second(self) -> float:
+        return self.files_done / self.elapsed if self.elapsed > 0 else 0.0
+
+    @property
+    def eta(self) -> Optional[float]:
+        """Estimated seconds remaining, or None while unknown."""
+        if self.scanning or self.throughput <= 0:
+            return None
+        return max(0.0, (self.bytes_total - self.bytes_done) / self.throughput)
+
+    def to_dict(self) -> Dict:
+        """Convert progress to dictionary."""
+        return {
+            "files_total": self.files_total,
+            "files_done": self.files_done,
+            "files_failed": self.files_failed,
+            "files_skipped": self.files_skipped,
+            "bytes_total": self.bytes_total,
+            "bytes_done": self.bytes_done,
+            "elapsed": self.elapsed,
+            "throughput": self.throughput,
+            "eta": self.eta
+        }
+
+class ImportPipeline:
+    """
+    Imports a directory tree into the current game project.
+    Run it from a background thread; progress and per-file results are reported
+    through callbacks invoked from worker threads.
+    """
+
+    def __init__(self, project_manager: GameProjectManager,
+                 detect_type: Callable[[str], str],
+                 read_workers: int = 4, hash_workers: int = 2, compress_workers: int = 2,
+                 upload_workers: int = 4, queue_size: int = 32,
+                 compression_policy: Optional[CompressionPolicy] = None,
+                 pool: Optional[RaCoreClientPool] = None,
+                 on_progress: Optional[Callable[[ImportProgress], None]] = None,
+                 on_item: Optional[Callable[[ImportItem], None]] = None,
+                 progress_interval: float = 0.25):
+        """
+        Initialize ImportPipeline.
+
+        Args:
+            project_manager: GameProjectManager holding the target project
+            detect_type: Maps a file name to an asset type
+            read_workers: Threads reading files from disk
+            hash_workers: Threads hashing file contents
+            compress_workers: Threads compressing file contents
+            upload_workers: Threads (and pooled connections) uploading assets
+            queue_size: Capacity of each queue between stages; bounds memory use
+            compression_policy: Policy deciding per file whether to compress (None disables compression)
+            pool: Optional connection pool (one is created from the manager's client otherwise)
+            on_progress: Optional callback receiving ImportProgress snapshots
+            on_item: Optional callback receiving each finished ImportItem
+            progress_interval: Minimum seconds between progress callbacks
+        """
+        self.project_manager = project_manager
+        self.detect_type = detect_type
+        self.workers = {
+            "read": read_workers,
+            "hash": hash_workers,
+            "compress": compress_workers,
+            "upload": upload_workers
+        }
+        self.queue_size = queue_size
+        self.compression_policy = compression_policy
+        self.pool = pool or RaCoreClientPool.from_client(project_manager.rcore_client, upload_workers)
+        self.on_progress = on_progress
+        self.on_item = on_item
+        self.progress_interval = progress_interval
+        self._cancelled = threading.Event()
+        self._lock = threading.Lock()
+        self._seen_hashes = set()  # Content in the project or uploaded by this import
+        self._claimed = set()  # Content whose first copy is still in flight
+        self._reset_counters()
+
+    def cancel(self):
+        """Stop the import; files already uploaded stay in the project."""
+        self._cancelled.set()
+
+    def import_directory(self, root: str) -> List[ImportItem]:
+        """
+        Import every file under a directory. Blocks until done.
+
+        Args:
+            root: Directory to walk
+
+        Returns:
+            List[ImportItem]: Finished items (uploaded, skipped or failed)
+        """
+        def paths():
+            for directory, _, filenames in os.walk(root):
+                for filename in sorted(filenames):
+                    yield os.path.join(directory, filename)
+        return self.import_files(paths())
+
+    def import_files(self, paths: Iterable[str]) -> List[ImportItem]:
+        """
+        Import files. Blocks until done.
+
+        Args:
+            paths: File paths; may be a lazy iterable, consumed as the pipeline has room
+
+        Returns:
+            List[ImportItem]: Finished items (uploaded, skipped or failed)
+        """
+        project = self.project_manager.current_project
+        if not project or not self.project_manager.auth_service.is_developer():
+            print("Error: Developer role and a loaded project are required to import assets")
+            return []
+
+        self._reset_counters()
+        self._cancelled.clear()
+        self._seen_hashes = {a.get("content_hash") for a in project.assets if a.get("content_hash")}
+        self._claimed = set()
+
+        stages = [
+            ("read", self._read),
+            ("hash", self._hash),
+            ("compress", self._compress),
+            ("upload", self._upload)
+        ]
+        queues = [queue.Queue(maxsize=self.queue_size) for _ in range(len(stages) + 1)]
+        results: List[ImportItem] = []
+
+        threads = []
+        for index, (name, func) in enumerate(stages):
+            count = self.workers[name]
+            remaining = [count]
+            next_count = self.workers[stages[index + 1][0]] if index + 1 < len(stages) else 1
+            for i in range(count):
+                thread = threading.Thread(
+                    target=self._stage_worker,
+                    args=(func, queues[index], queues[index + 1], remaining, next_count),
+                    name=f"ImportPipeline-{name}-{i}",
+                    daemon=True
+                )
+                thread.start()
+                threads.append(thread)
+
+        collector = threading.Thread(target=self._collect, args=(queues[-1], results),
+                                     name="ImportPipeline-collect", daemon=True)
+        collector.start()
+
+        # Feed the first stage; put() blocks while the read queue is full
+        for path in paths:
+            if self._cancelled.is_set():
+                break
+            with self._lock:
+                self._files_total += 1
+                try:
+                    self._bytes_total += os.path.getsize(path)
+                except OSError:
+                    pass
+            item = ImportItem(path, os.path.basename(path), self.detect_type(os.path.basename(path)))
+            queues[0].put(item)
+        with self._lock:
+            self._scanning = False
+        for _ in range(self.workers["read"]):
+            queues[0].put(_DONE)
+
+        for thread in threads:
+            thread.join()
+        collector.join()
+        self._report(force=True)
+        return results
+
+    def progress(self) -> ImportProgress:
+        """Current progress snapshot."""
+        with self._lock:
+            return ImportProgress(self._files_total, self._files_done, self._files_failed,
+                                  self._files_skipped, self._bytes_total, self._bytes_done,
+                                  time.monotonic() - self._started, self._scanning)
+
+    def _reset_counters(self):
+        self._files_total = 0
+        self._files_done = 0
+        self._files_failed = 0
+        self._files_skipped = 0
+        self._bytes_total = 0
+        self._bytes_done = 0
+        self._scanning = True
+        self._started = time.monotonic()
+        self._last_report = 0.0
+
+    def _stage_worker(self, func, inbox: queue.Queue, outbox: queue.Queue, remaining: List[int],
+                      next_count: int):
+        """Run one stage function over its queue; the last worker to finish closes the next queue."""
+        while True:
+            item = inbox.get()
+            if item is _DONE:
+                break
+            # Failed, skipped, duplicate and cancelled items pass straight through to the collector
+            if item.error is None and not item.skipped and not item.duplicate:
+                if self._cancelled.is_set():
+                    item.error = "Cancelled"
+                else:
+                    try:
+                        func(item)
+                    except Exception as e:
+                        item.error = str(e)
+            if item.error is not None or item.skipped or item.duplicate:
+                item.data = None
+            outbox.put(item)
+
+        with self._lock:
+            remaining[0] -= 1
+            last = remaining[0] == 0
+        if last:
+            for _ in range(next_count):
+                outbox.put(_DONE)
+
+    def _read(self, item: ImportItem):
+        with open(item.path, "rb") as f:
+            item.data = f.read()
+        item.size = len(item.data)
+
+    def _hash(self, item: ImportItem):
+        item.content_hash = hashlib.sha256(item.data).hexdigest()
+        with self._lock:
+            if item.content_hash in self._seen_hashes:
+                item.skipped = True
+            elif item.content_hash in self._claimed:
+                item.duplicate = True
+            else:
+                self._claimed.add(item.content_hash)
+
+    def _compress(self, item: ImportItem):
+        if self.compression_policy is None:
+            return
+        item.data, decision = self.compression_policy.compress(item.data, item.name)
+        item.compression = decision.to_dict()
+
+    def _upload(self, item: ImportItem):
+        client = self.pool.acquire()
+        try:
+            item.asset_info = self.project_manager.upload_asset(
+                item.name, item.asset_type, item.data,
+                content_hash=item.content_hash, compression=item.compression, client=client
+            )
+        finally:
+            self.pool.release(client)
+        if item.asset_info is None:
+            item.error = "Upload failed"
+
+    def _collect(self, inbox: queue.Queue, results: List[ImportItem]):
+        """Settle duplicates, record finished items on the project and report progress."""
+        project = self.project_manager.current_project
+        waiting: Dict[str, List[ImportItem]] = {}  # Duplicates by hash, until the first copy finishes
+        batch: List[Dict] = []
+        last_record = time.monotonic()
+        while True:
+            item = inbox.get()
+            if item is _DONE:
+                break
+            item.data = None
+            for finished in self._settle(item, waiting):
+                if finished.asset_info is not None:
+                    batch.append(finished.asset_info)
+                with self._lock:
+                    self._files_done += 1
+                    self._bytes_done += finished.size or self._file_size(finished.path)
+                    if finished.error is not None:
+                        self._files_failed += 1
+                    elif finished.skipped:
+                        self._files_skipped += 1
+                results.append(finished)
+                if self.on_item:
+                    self.on_item(finished)
+            if batch and (len(batch) >= RECORD_BATCH or time.monotonic() - last_record >= self.progress_interval):
+                self.project_manager.record_assets(batch, project)
+                batch = []
+                last_record = time.monotonic()
+            self._report()
+        if batch:
+            self.project_manager.record_assets(batch, project)
+
+    def _settle(self, item: ImportItem, waiting: Dict[str, List[ImportItem]]) -> List[ImportItem]:
+        """
+        Resolve an item reaching the collector.
+        A hash only counts as seen once a copy uploaded. Duplicates wait for the first
+        copy; if it fails, they are uploaded from here one at a time until one succeeds.
+
+        Returns:
+            List[ImportItem]: Items now finished
+        """
+        content_hash = item.content_hash
+        if item.duplicate:
+            with self._lock:
+                if content_hash in self._seen_hashes:
+                    item.duplicate, item.skipped = False, True
+                    return [item]
+                if content_hash in self._claimed:
+                    waiting.setdefault(content_hash, []).append(item)
+                    return []
+                # The first copy already failed: this one takes over
+                self._claimed.add(content_hash)
+            item.duplicate = False
+            self._retry(item)
+        elif content_hash is None or item.skipped:
+            return [item]
+
+        finished = [item]
+        duplicates = waiting.pop(content_hash, [])
+        while item.asset_info is None and duplicates:
+            item = duplicates.pop(0)
+            item.duplicate = False
+            self._retry(item)
+            finished.append(item)
+        with self._lock:
+            self._claimed.discard(content_hash)
+            if item.asset_info is not None:
+                self._seen_hashes.add(content_hash)
+        for duplicate in duplicates:
+            duplicate.duplicate, duplicate.skipped = False, True
+        return finished + duplicates
+
+    def _retry(self, item: ImportItem):
+        """Run a duplicate through the stages its first copy went through."""
+        if self._cancelled.is_set():
+            item.error = "Cancelled"
+            return
+        try:
+            self._read(item)
+            if hashlib.sha256(item.data).hexdigest() != item.content_hash:
+                item.error = "File changed during import"
+            else:
+                self._compress(item)
+                self._upload(item)
+        except Exception as e:
+            item.error = str(e)
+        item.data = None
+
+    def _report(self, force: bool = False):
+        if not self.on_progress:
+            return
+        now = time.monotonic()
+        if not force and now - self._last_report < self.progress_interval:
+            return
+        self._last_report = now
+        self.on_progress(self.progress())
+
+    @staticmethod
+    def _file_size(path: str) -> int:
+        try:
+            return os.path.getsize(path)
+        except OSError:
+            return 0
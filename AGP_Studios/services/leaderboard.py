@@ -0,0 +1,318 @@
+"""
+Windowed, incrementally updated leaderboards.
+Only the pages being looked at (the top entries and the player's neighbourhood) are
+loaded. leaderboard_updated events are applied to the loaded ranks as moves, so a
+board with millions of entries is never downloaded or rebuilt as a whole.
+"""
+import bisect
+import threading
+from typing import Dict, List, Optional, Tuple
+
+from services.module_bus import ModuleBus
+from services.server_events import LEADERBOARD_UPDATED
+
+# Entries per fetched page; pages start at ranks 1, PAGE_SIZE + 1, ...
+PAGE_SIZE = 100
+
+# Loaded entries kept per board; pages farthest from the viewed rank are dropped beyond this
+MAX_LOADED = 20000
+
+# ModuleBus event published after pages load or an update is applied (sender is the board).
+# Payload: {"game_id", "category", "first", "last", "total"}; first/last are the affected
+# ranks (1-based, inclusive).
+LEADERBOARD_CHANGED = "leaderboard_changed"
+
+class _Segment:
+    """A run of loaded entries with consecutive ranks."""
+
+    __slots__ = ("start", "entries")
+
+    def __init__(self, start: int, entries: List[Dict]):
+        self.start = start  # Rank of entries[0]
+        self.entries = entries
+
+    @property
+    def end(self) -> int:
+        """Rank after the last entry."""
+        return self.start + len(self.entries)
+
+class LeaderboardBoard:
+    """
+    Sparse local copy of one leaderboard (game and category).
+    Loaded entries are kept as sorted runs of consecutive ranks; lookups bisect the
+    runs, and a rank change moves one entry and shifts the start of later runs.
+    Pages are fetched on a background thread; LEADERBOARD_CHANGED reports what changed.
+    """
+
+    def __init__(self, game_launcher, game_id: str, category: str = "global",
+                 page_size: int = PAGE_SIZE, max_loaded: int = MAX_LOADED):
+        """
+        Initialize LeaderboardBoard.
+
+        Args:
+            game_launcher: GameLauncher used to fetch pages
+            game_id: Game ID
+            category: Leaderboard category
+            page_size: Entries per fetched page
+            max_loaded: Maximum loaded entries
+        """
+        self.game_launcher = game_launcher
+        self.game_id = game_id
+        self.category = category
+        self.page_size = page_size
+        self.max_loaded = max_loaded
+        self.total = 0
+        self.player_rank: Optional[int] = None
+        self._segments: List[_Segment] = []
+        self._focus = 1  # Rank last requested, kept loaded when trimming
+        self._lock = threading.RLock()
+        self._wanted: List[int] = []  # Page start ranks to fetch, newest last
+        self._condition = threading.Condition(self._lock)
+        self._worker: Optional[threading.Thread] = None
+        self._closed = False
+        ModuleBus.subscribe(LEADERBOARD_UPDATED, self._on_leaderboard_updated)
+
+    def entry(self, rank: int) -> Optional[Dict]:
+        """Loaded entry at a rank (1-based), or None if that page is not loaded."""
+        with self._lock:
+            segment = self._segment_at(rank)
+            return segment.entries[rank - segment.start] if segment else None
+
+    def window(self, first: int, count: int) -> List[Optional[Dict]]:
+        """Entries at ranks first .. first + count - 1; None where not loaded."""
+        with self._lock:
+            return [self.entry(rank) for rank in range(first, min(first + count, self.total + 1))]
+
+    def loaded_count(self) -> int:
+        with self._lock:
+            return sum(len(segment.entries) for segment in self._segments)
+
+    def seed(self, entries: List[Dict], start: int = 1, total: Optional[int] = None):
+        """Insert already known entries (e.g. a cached top list) without fetching."""
+        with self._lock:
+            self._merge(start, list(entries))
+            self.total = max(total or 0, self.total, start + len(entries) - 1)
+        self._changed(start, start + len(entries) - 1)
+
+    def load_page(self, first: int, around_player: Optional[int] = None) -> bool:
+        """
+        Fetch a page synchronously.
+
+        Args:
+            first: Rank of the first entry to fetch
+            around_player: Fetch this many entries on each side of the player instead
+
+        Returns:
+            bool: True if the page was loaded
+        """
+        page = self.game_launcher.get_leaderboard_page(
+            self.game_id, self.category, offset=first - 1, limit=self.page_size, around_player=around_player)
+        if page is None:
+            return False
+        entries = page.get("entries", [])
+        start = page.get("offset", first - 1) + 1
+        with self._lock:
+            self.total = page.get("total", max(self.total, start + len(entries) - 1))
+            if page.get("player_rank"):
+                self.player_rank = page["player_rank"]
+            self._merge(start, entries)
+            self._trim()
+        self._changed(start, start + len(entries) - 1)
+        return True
+
+    def load_around_player(self, radius: Optional[int] = None) -> Optional[int]:
+        """
+        Fetch the player's neighbourhood.
+
+        Returns:
+            int: The player's rank, or None if unranked or the fetch failed
+        """
+        if not self.load_page(1, around_player=radius or self.page_size // 2):
+            return None
+        return self.player_rank
+
+    def request(self, first: int, count: int = 1):
+        """Fetch the pages covering ranks first .. first + count - 1 in the background."""
+        with self._condition:
+            if self._closed:
+                return
+            self._focus = first
+            last = min(first + count - 1, self.total) if self.total else first + count - 1
+            for page_start in range(self._page_start(first), last + 1, self.page_size):
+                if page_start in self._wanted:
+                    self._wanted.remove(page_start)
+                if not self._page_loaded(page_start):
+                    self._wanted.append(page_start)
+            if self._wanted and self._worker is None:
+                self._worker = threading.Thread(target=self._run, name="leaderboard-pages", daemon=True)
+                self._worker.start()
+            self._condition.notify()
+
+    def apply_update(self, update: Dict) -> Optional[Tuple[int, int]]:
+        """
+        Apply a leaderboard_updated event.
+        The entry leaves old_rank (absent for a new player) and enters at rank; entries
+        between shift by one. A loaded entry at old_rank that is not the player means
+        the local copy missed an update, so the affected runs are dropped and refetched.
+
+        Args:
+            update: Event payload ({"player_id", "player_name", "score", "rank", "old_rank", "total"})
+
+        Returns:
+            tuple: (first, last) affected ranks, or None if the update does not apply
+        """
+        new_rank = update.get("rank")
+        if not new_rank:
+            return None
+        old_rank = update.get("old_rank")
+        entry = {key: value for key, value in update.items()
+                 if key not in ("game_id", "category", "old_rank", "total", "timestamp")}
+
+        with self._lock:
+            if old_rank:
+                segment = self._segment_at(old_rank)
+                if segment is not None:
+                    current = segment.entries[old_rank - segment.start]
+                    if current.get("player_id") != update.get("player_id"):
+                        affected = self._invalidate(min(old_rank, new_rank), max(old_rank, new_rank))
+                        self._changed(*affected)
+                        return affected
+                    del segment.entries[old_rank - segment.start]
+                for later in self._segments:
+                    if later.start > old_rank:
+                        later.start -= 1
+            else:
+                self.total += 1
+
+            target = None
+            for segment in self._segments:
+                if segment.start <= new_rank <= segment.end and segment.entries:
+                    target = segment
+                    break
+            for segment in self._segments:
+                if segment is not target and segment.start >= new_rank:
+                    segment.start += 1
+            if target is not None:
+                target.entries.insert(new_rank - target.start, entry)
+            self._segments = [segment for segment in self._segments if segment.entries]
+            self._coalesce()
+
+            if update.get("total"):
+                self.total = update["total"]
+            if update.get("player_id") and update.get("player_id") == self._own_player_id():
+                self.player_rank = new_rank
+            affected = (min(old_rank or new_rank, new_rank), max(old_rank or self.total, new_rank))
+        self._changed(*affected)
+        return affected
+
+    def close(self):
+        """Stop listening for updates and fetching pages."""
+        ModuleBus.unsubscribe(LEADERBOARD_UPDATED, self._on_leaderboard_updated)
+        with self._condition:
+            self._closed = True
+            self._wanted = []
+            self._condition.notify_all()
+
+    def _on_leaderboard_updated(self, event):
+        payload = event.payload or {}
+        if payload.get("game_id") == self.game_id and payload.get("category", "global") == self.category:
+            self.apply_update(payload)
+
+    def _own_player_id(self) -> Optional[str]:
+        profile = self.game_launcher.player_profile or {}
+        return profile.get("player_id") or profile.get("user_id")
+
+    def _run(self):
+        while True:
+            with self._condition:
+                while not self._closed and not self._wanted:
+                    self._condition.wait()
+                if self._closed:
+                    self._worker = None
+                    return
+                # Most recently requested first: the rows on screen now
+                page_start = self._wanted.pop()
+            if not self._page_loaded(page_start):
+                self.load_page(page_start)
+
+    def _page_start(self, rank: int) -> int:
+        return (max(rank, 1) - 1) // self.page_size * self.page_size + 1
+
+    def _page_loaded(self, page_start: int) -> bool:
+        with self._lock:
+            last = page_start + self.page_size - 1
+            if self.total:
+                last = min(last, self.total)
+            segment = self._segment_at(page_start)
+            return segment is not None and segment.end > last
+
+    def _segment_at(self, rank: int) -> Optional[_Segment]:
+        index = bisect.bisect_right([segment.start for segment in self._segments], rank) - 1
+        if index >= 0 and rank < self._segments[index].end:
+            return self._segments[index]
+        return None
+
+    def _merge(self, start: int, entries: List[Dict]):
+        """Insert a run of entries, replacing the overlapping parts of loaded runs."""
+        if not entries:
+            return
+        end = start + len(entries)
+        segments = []
+        for segment in self._segments:
+            if segment.end <= start or segment.start >= end:
+                segments.append(segment)
+                continue
+            if segment.start < start:
+                segments.append(_Segment(segment.start, segment.entries[:start - segment.start]))
+            if segment.end > end:
+                segments.append(_Segment(end, segment.entries[end - segment.start:]))
+        segments.append(_Segment(start, entries))
+        segments.sort(key=lambda segment: segment.start)
+        self._segments = segments
+        self._coalesce()
+
+    def _coalesce(self):
+        merged = []
+        for segment in self._segments:
+            if merged and merged[-1].end == segment.start:
+                merged[-1].entries.extend(segment.entries)
+            else:
+                merged.append(segment)
+        self._segments = merged
+
+    def _invalidate(self, first: int, last: int) -> Tuple[int, int]:
+        """Drop loaded runs overlapping the ranks (they are refetched when next viewed)."""
+        self._segments = [segment for segment in self._segments
+                          if segment.end <= first or segment.start > last]
+        return first, last
+
+    def _trim(self):
+        """Drop the entries farthest from the viewed rank while over the entry limit."""
+        excess = self.loaded_count() - self.max_loaded
+        while excess > 0 and self._segments:
+            farthest = max(self._segments, key=self._distance)
+            if len(farthest.entries) <= excess:
+                self._segments.remove(farthest)
+                excess -= len(farthest.entries)
+                continue
+            # Cut the side of the run away from the focus
+            if self._focus - farthest.start < farthest.end - 1 - self._focus:
+                farthest.entries = farthest.entries[:len(farthest.entries) - excess]
+            else:
+                farthest.start += excess
+                farthest.entries = farthest.entries[excess:]
+            return
+
+    def _distance(self, segment: _Segment) -> int:
+        if segment.start <= self._focus < segment.end:
+            return 0
+        return min(abs(segment.start - self._focus), abs(segment.end - 1 - self._focus))
+
+    def _changed(self, first: int, last: int):
+        ModuleBus.publish(LEADERBOARD_CHANGED, {
+            "game_id": self.game_id,
+            "category": self.category,
+            "first": first,
+            "last": max(first, last),
+            "total": self.total
+        }, sender=self)
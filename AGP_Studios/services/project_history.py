@@ -0,0 +1,279 @@
+"""
+Structurally shared snapshots and undo/redo history for game projects.
+A snapshot stores each entity collection as content-defined chunks; chunks that
+did not change are shared with the previous snapshot, so taking and keeping a
+snapshot costs memory proportional to what changed, and diffs skip shared chunks.
+When the caller says what changed, unchanged collections and records are taken
+from the previous snapshot as they are, so a snapshot also costs time proportional
+to the edit rather than to the project.
+"""
+import hashlib
+import json
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from services.asset_table import AssetRecord
+from services.project_workspace import ENTITY_KINDS, ProjectChanges, entity_key
+
+# A chunk ends after an entry whose key hash has these low bits clear (about 64 entries per chunk).
+# Boundaries depend on content, so inserting or removing a record only changes nearby chunks.
+CHUNK_MASK = 63
+
+# Rough per-entry overhead used for the history memory estimate
+ENTRY_OVERHEAD = 120
+
+def _boundary(key: str) -> bool:
+    return hashlib.blake2b(key.encode("utf-8"), digest_size=2).digest()[1] & CHUNK_MASK == 0
+
+def _freeze(record):
+    """Immutable form of a record: AssetRecords are shared, dicts become canonical JSON."""
+    if isinstance(record, AssetRecord):
+        return record
+    return json.dumps(record, sort_keys=True, separators=(",", ":"))
+
+def _thaw(frozen):
+    return frozen if isinstance(frozen, AssetRecord) else json.loads(frozen)
+
+def _same(a, b) -> bool:
+    return a is b if isinstance(a, AssetRecord) else a == b
+
+def _entry_size(frozen) -> int:
+    return ENTRY_OVERHEAD + (0 if isinstance(frozen, AssetRecord) else len(frozen))
+
+class Snapshot:
+    """Immutable project state: name, description and chunked entity collections."""
+
+    __slots__ = ("label", "name", "description", "collections", "new_bytes")
+
+    def __init__(self, label: str, name: str, description: str,
+                 collections: Dict[str, Tuple[Tuple, ...]], new_bytes: int):
+        self.label = label
+        self.name = name
+        self.description = description
+        self.collections = collections  # kind -> tuple of chunks; chunk = tuple of (key, frozen record)
+        self.new_bytes = new_bytes  # Estimated memory not shared with the previous snapshot
+
+    def records(self, kind: str) -> List:
+        """Thawed records of a collection, in order."""
+        return [_thaw(frozen) for chunk in self.collections[kind] for _, frozen in chunk]
+
+def changed_keys(changes: ProjectChanges) -> Dict[str, Set[str]]:
+    """Keys touched by a change-set, per collection, in the form capture() takes."""
+    return {kind: {entity_key(kind, record) for record in changes.upserts[kind]}
+            for kind in ENTITY_KINDS if changes.upserts[kind] or changes.deletes[kind]}
+
+def changed_kinds(kinds: Iterable[str]) -> Dict[str, None]:
+    """Collections that may have changed in any record, in the form capture() takes."""
+    return {kind: None for kind in kinds}
+
+def capture(project, label: str = "", previous: Optional[Snapshot] = None,
+            changed: Optional[Dict[str, Optional[Set[str]]]] = None) -> Snapshot:
+    """
+    Take a snapshot of a project, sharing unchanged chunks with a previous snapshot.
+
+    Args:
+        project: GameProject
+        label: Description of the edit that led to this state
+        previous: Snapshot to share chunks with
+        changed: What changed since previous: collection -> keys of added or modified
+            records (None for any record). Collections not listed are reused as they are
+            and listed records outside the key set are not serialized again. None
+            captures everything.
+
+    Returns:
+        Snapshot: New snapshot
+    """
+    collections = {}
+    new_bytes = 0
+    for kind in ENTITY_KINDS:
+        if previous is not None and changed is not None and kind not in changed:
+            collections[kind] = previous.collections[kind]
+            continue
+        reusable = {}
+        frozen_before = {}
+        if previous is not None:
+            reusable = {chunk[0][0]: chunk for chunk in previous.collections[kind] if chunk}
+            dirty = changed.get(kind) if changed is not None else None
+            if dirty is not None:
+                frozen_before = {key: frozen for chunk in previous.collections[kind]
+                                 for key, frozen in chunk if key not in dirty}
+
+        chunks = []
+        current = []
+        for record in getattr(project, kind):
+            key = entity_key(kind, record)
+            frozen = frozen_before.get(key)
+            current.append((key, frozen if frozen is not None else _freeze(record)))
+            if _boundary(key):
+                new_bytes += _append_chunk(chunks, current, reusable)
+                current = []
+        if current:
+            new_bytes += _append_chunk(chunks, current, reusable)
+        collections[kind] = tuple(chunks)
+    return Snapshot(label, project.name, project.description, collections, new_bytes)
+
+def _append_chunk(chunks: List, entries: List, reusable: Dict) -> int:
+    """Append a chunk, reusing an identical previous one; returns newly used bytes."""
+    candidate = reusable.get(entries[0][0])
+    if (candidate is not None and len(candidate) == len(entries)
+            and all(a[0] == b[0] and _same(a[1], b[1]) for a, b in zip(candidate, entries))):
+        chunks.append(candidate)
+        return 0
+    chunks.append(tuple(entries))
+    return sum(_entry_size(frozen) for _, frozen in entries)
+
+def restore(project, snapshot: Snapshot):
+    """
+    Restore a project to a snapshot.
+
+    Args:
+        project: GameProject to modify
+        snapshot: State to restore
+    """
+    project.name = snapshot.name
+    project.description = snapshot.description
+    for kind in ENTITY_KINDS:
+        setattr(project, kind, snapshot.records(kind))
+
+def diff(old: Snapshot, new: Snapshot) -> ProjectChanges:
+    """
+    Changes turning one snapshot into another, in the delta-save format.
+    Chunks shared by both snapshots are skipped without looking at their entries.
+
+    Args:
+        old: Base snapshot
+        new: Target snapshot
+
+    Returns:
+        ProjectChanges: Upserted records, deleted keys and changed project fields
+    """
+    changes = ProjectChanges()
+    if old.name != new.name:
+        changes.project["name"] = new.name
+    if old.description != new.description:
+        changes.project["description"] = new.description
+
+    for kind in ENTITY_KINDS:
+        old_chunks = old.collections[kind]
+        new_chunks = new.collections[kind]
+        shared = {id(chunk) for chunk in old_chunks} & {id(chunk) for chunk in new_chunks}
+        before = {key: frozen for chunk in old_chunks if id(chunk) not in shared for key, frozen in chunk}
+        after = [(key, frozen) for chunk in new_chunks if id(chunk) not in shared for key, frozen in chunk]
+        for key, frozen in after:
+            previous = before.pop(key, None)
+            if previous is None or not (_same(previous, frozen) or previous == frozen):
+                changes.upserts[kind].append(_thaw(frozen))
+        changes.deletes[kind] = list(before)
+    return changes
+
+class ProjectHistory:
+    """
+    Undo/redo stack of project snapshots with a memory cap.
+    Call checkpoint() after each edit; undo() and redo() restore neighbouring states.
+    """
+
+    def __init__(self, max_entries: int = 200, max_bytes: int = 64 * 1024 * 1024):
+        """
+        Initialize ProjectHistory.
+
+        Args:
+            max_entries: Maximum number of undo states kept
+            max_bytes: Approximate memory budget for unshared snapshot data
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._undo: List[Snapshot] = []  # Last entry is the current state
+        self._redo: List[Snapshot] = []
+        self._bytes = 0
+
+    def reset(self, project):
+        """Start a new history at the project's current state."""
+        snapshot = capture(project, "Open")
+        self._undo = [snapshot]
+        self._redo = []
+        self._bytes = snapshot.new_bytes
+
+    @property
+    def current(self) -> Optional[Snapshot]:
+        return self._undo[-1] if self._undo else None
+
+    def checkpoint(self, project, label: str, changed: Optional[Dict[str, Optional[Set[str]]]] = None) -> bool:
+        """
+        Record the project's current state as an undoable step.
+
+        Args:
+            project: GameProject after the edit
+            label: Description of the edit (shown as "Undo <label>")
+            changed: What the edit touched, as taken by capture() (None if unknown)
+
+        Returns:
+            bool: True if the state changed and a step was recorded
+        """
+        if self.current is None:
+            self.reset(project)
+            return False
+        snapshot = capture(project, label, self.current, changed)
+        if not snapshot.new_bytes and not diff(self.current, snapshot):
+            return False
+        # Undone states can no longer be redone; their own chunks are released
+        self._bytes -= sum(undone.new_bytes for undone in self._redo)
+        self._redo = []
+        self._undo.append(snapshot)
+        self._bytes += snapshot.new_bytes
+        self._trim()
+        return True
+
+    def can_undo(self) -> bool:
+        return len(self._undo) > 1
+
+    def can_redo(self) -> bool:
+        return bool(self._redo)
+
+    def undo_label(self) -> Optional[str]:
+        return self._undo[-1].label if self.can_undo() else None
+
+    def redo_label(self) -> Optional[str]:
+        return self._redo[-1].label if self._redo else None
+
+    def undo(self, project) -> Optional[ProjectChanges]:
+        """
+        Restore the state before the last step.
+
+        Returns:
+            ProjectChanges: What the undo changed, or None if there is nothing to undo
+        """
+        if not self.can_undo():
+            return None
+        snapshot = self._undo.pop()
+        self._redo.append(snapshot)
+        restore(project, self._undo[-1])
+        return diff(snapshot, self._undo[-1])
+
+    def redo(self, project) -> Optional[ProjectChanges]:
+        """
+        Re-apply the last undone step.
+
+        Returns:
+            ProjectChanges: What the redo changed, or None if there is nothing to redo
+        """
+        if not self._redo:
+            return None
+        snapshot = self._redo.pop()
+        previous = self._undo[-1]
+        self._undo.append(snapshot)
+        restore(project, snapshot)
+        return diff(previous, snapshot)
+
+    def memory_estimate(self) -> int:
+        """Approximate bytes held by history snapshots (records shared with the live project excluded)."""
+        return self._bytes
+
+    def _trim(self):
+        """Drop the oldest states while over the entry or memory limit."""
+        while len(self._undo) > 1 and (len(self._undo) > self.max_entries or self._bytes > self.max_bytes):
+            dropped = self._undo.pop(0)
+            # Only chunks the new oldest state does not share are freed
+            kept = {id(chunk) for chunks in self._undo[0].collections.values() for chunk in chunks}
+            self._bytes -= sum(_entry_size(frozen)
+                               for chunks in dropped.collections.values()
+                               for chunk in chunks if id(chunk) not in kept
+                               for _, frozen in chunk)
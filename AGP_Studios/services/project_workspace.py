@@ -0,0 +1,319 @@
+"""
+Local SQLite workspace for RaOS game projects.
+Stores the last state of each project known to match the server, so saves send
+only changed scenes, scripts and asset records and reopening a project is local.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+from typing import Dict, List, Optional
+
+DEFAULT_WORKSPACE_PATH = os.path.join(os.path.expanduser("~"), ".rastudio", "cache", "workspace.db")
+
+# Entity collections of a project and the ID field of their records
+ENTITY_KINDS = {"assets": "asset_id", "scenes": "scene_id", "scripts": "script_id"}
+
+# Project fields synchronized alongside the entity collections
+PROJECT_FIELDS = ("name", "description", "created_date", "modified_date")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS projects (
+    project_id TEXT PRIMARY KEY,
+    revision TEXT,
+    meta TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS entities (
+    project_id TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    entity_key TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    hash TEXT NOT NULL,
+    data TEXT NOT NULL,
+    PRIMARY KEY (project_id, kind, entity_key)
+);
+"""
+
+def record_hash(record: Dict) -> str:
+    """Stable hash of a record, used to detect changed entities."""
+    return hashlib.sha1(json.dumps(dict(record), sort_keys=True).encode("utf-8")).hexdigest()
+
+def entity_key(kind: str, record: Dict) -> str:
+    """
+    Identify a record within its collection.
+    Falls back to "id", then "name", then the record hash for records without an ID.
+    """
+    for field in (ENTITY_KINDS.get(kind), "id", "name"):
+        value = record.get(field) if field else None
+        if value:
+            return str(value)
+    return "#" + record_hash(record)
+
+class ProjectChanges:
+    """Entities changed locally or upstream, grouped by collection."""
+
+    def __init__(self):
+        self.upserts: Dict[str, List[Dict]] = {kind: [] for kind in ENTITY_KINDS}
+        self.deletes: Dict[str, List[str]] = {kind: [] for kind in ENTITY_KINDS}
+        self.project: Dict = {}  # Changed project fields
+
+    def __bool__(self) -> bool:
+        return bool(self.project or any(self.upserts.values()) or any(self.deletes.values()))
+
+    def count(self) -> int:
+        """Number of changed entities."""
+        return sum(len(v) for v in self.upserts.values()) + sum(len(v) for v in self.deletes.values())
+
+    def to_dict(self) -> Dict:
+        """Convert to the wire format used by delta save and load."""
+        changes = {}
+        for kind in ENTITY_KINDS:
+            if self.upserts[kind] or self.deletes[kind]:
+                changes[kind] = {"upsert": self.upserts[kind], "delete": self.deletes[kind]}
+        return changes
+
+    @classmethod
+    def from_dict(cls, changes: Dict, project: Optional[Dict] = None) -> "ProjectChanges":
+        """Parse the wire format."""
+        result = cls()
+        for kind in ENTITY_KINDS:
+            entry = changes.get(kind) or {}
+            result.upserts[kind] = list(entry.get("upsert", []))
+            result.deletes[kind] = [str(key) for key in entry.get("delete", [])]
+        result.project = dict(project or {})
+        return result
+
+class ProjectWorkspace:
+    """
+    SQLite store of synced project state.
+    Each entity row holds the record as last saved to or loaded from the server,
+    plus its hash; diffing the in-memory project against it yields the dirty set.
+    """
+
+    def __init__(self, path: Optional[str] = DEFAULT_WORKSPACE_PATH):
+        """
+        Initialize ProjectWorkspace.
+
+        Args:
+            path: SQLite database file, or None for an in-memory workspace
+        """
+        self.path = path
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            if self.path:
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self._conn = sqlite3.connect(self.path or ":memory:", check_same_thread=False)
+            if self.path:
+                self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.executescript(_SCHEMA)
+        return self._conn
+
+    def has_project(self, project_id: str) -> bool:
+        """Check whether a project has a synced state in the workspace."""
+        with self._lock:
+            row = self._connect().execute(
+                "SELECT 1 FROM projects WHERE project_id = ?", (project_id,)).fetchone()
+        return row is not None
+
+    def revision(self, project_id: str) -> Optional[str]:
+        """Server revision of the stored project state."""
+        with self._lock:
+            row = self._connect().execute(
+                "SELECT revision FROM projects WHERE project_id = ?", (project_id,)).fetchone()
+        return row[0] if row else None
+
+    def meta(self, project_id: str) -> Optional[Dict]:
+        """Stored project fields (name, description, dates), or None if not stored."""
+        with self._lock:
+            row = self._connect().execute(
+                "SELECT meta FROM projects WHERE project_id = ?", (project_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def entity_hashes(self, project_id: str, kind: str, keys: List[str]) -> Dict[str, str]:
+        """
+        Stored hashes of selected entities.
+
+        Args:
+            project_id: Project ID
+            kind: Entity collection
+            keys: Entity keys to look up
+
+        Returns:
+            Dict[str, str]: Entity key -> hash for the keys that are stored
+        """
+        hashes = {}
+        keys = list(keys)
+        with self._lock:
+            conn = self._connect()
+            # Stay below SQLite's bound parameter limit
+            for start in range(0, len(keys), 500):
+                batch = keys[start:start + 500]
+                hashes.update(conn.execute(
+                    "SELECT entity_key, hash FROM entities WHERE project_id = ? AND kind = ? "
+                    f"AND entity_key IN ({','.join('?' * len(batch))})",
+                    [project_id, kind] + batch).fetchall())
+        return hashes
+
+    def load(self, project_id: str) -> Optional[Dict]:
+        """
+        Load a stored project.
+
+        Returns:
+            Dict: Project in GameProject.to_dict() form, or None if not stored
+        """
+        with self._lock:
+            conn = self._connect()
+            row = conn.execute("SELECT meta FROM projects WHERE project_id = ?", (project_id,)).fetchone()
+            if row is None:
+                return None
+            project = json.loads(row[0])
+            project["project_id"] = project_id
+            for kind in ENTITY_KINDS:
+                project[kind] = [json.loads(data) for (data,) in conn.execute(
+                    "SELECT data FROM entities WHERE project_id = ? AND kind = ? ORDER BY position",
+                    (project_id, kind))]
+        return project
+
+    def store(self, project: Dict, revision: Optional[str] = None):
+        """
+        Replace the stored state of a project (after a full load or save).
+
+        Args:
+            project: Project in GameProject.to_dict() form
+            revision: Server revision of this state
+        """
+        project_id = project["project_id"]
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                conn.execute("DELETE FROM entities WHERE project_id = ?", (project_id,))
+                self._write_meta(conn, project, revision)
+                for kind in ENTITY_KINDS:
+                    conn.executemany(
+                        "INSERT OR REPLACE INTO entities VALUES (?, ?, ?, ?, ?, ?)",
+                        [(project_id, kind, entity_key(kind, record), position,
+                          record_hash(record), json.dumps(record))
+                         for position, record in enumerate(project.get(kind, []))]
+                    )
+
+    def diff(self, project: Dict) -> ProjectChanges:
+        """
+        Compute the dirty set of an in-memory project against the stored state.
+
+        Args:
+            project: Project in GameProject.to_dict() form
+
+        Returns:
+            ProjectChanges: Entities to upsert/delete and changed project fields
+        """
+        project_id = project["project_id"]
+        changes = ProjectChanges()
+        with self._lock:
+            conn = self._connect()
+            row = conn.execute("SELECT meta FROM projects WHERE project_id = ?", (project_id,)).fetchone()
+            stored_meta = json.loads(row[0]) if row else {}
+            changes.project = {field: project.get(field) for field in PROJECT_FIELDS
+                               if project.get(field) != stored_meta.get(field)}
+
+            for kind in ENTITY_KINDS:
+                stored = dict(conn.execute(
+                    "SELECT entity_key, hash FROM entities WHERE project_id = ? AND kind = ?",
+                    (project_id, kind)).fetchall())
+                for record in project.get(kind, []):
+                    key = entity_key(kind, record)
+                    if stored.pop(key, None) != record_hash(record):
+                        changes.upserts[kind].append(record)
+                changes.deletes[kind] = list(stored)
+        return changes
+
+    def commit(self, project: Dict, changes: ProjectChanges, revision: Optional[str] = None):
+        """
+        Record that local changes were saved to the server.
+
+        Args:
+            project: Project state that was saved (GameProject.to_dict() form)
+            changes: Changes that were sent
+            revision: New server revision
+        """
+        project_id = project["project_id"]
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                self._write_meta(conn, project, revision)
+                for kind in ENTITY_KINDS:
+                    self._delete(conn, project_id, kind, changes.deletes[kind])
+                    self._upsert(conn, project_id, kind, changes.upserts[kind])
+                    # Keep stored order in line with the saved lists
+                    conn.executemany(
+                        "UPDATE entities SET position = ? WHERE project_id = ? AND kind = ? AND entity_key = ?",
+                        [(position, project_id, kind, entity_key(kind, record))
+                         for position, record in enumerate(project.get(kind, []))]
+                    )
+
+    def apply_remote(self, project_id: str, changes: ProjectChanges, revision: Optional[str] = None):
+        """
+        Apply upstream changes to the stored state.
+
+        Args:
+            project_id: Project ID
+            changes: Changes fetched from the server
+            revision: Server revision after the changes
+        """
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                row = conn.execute("SELECT meta FROM projects WHERE project_id = ?", (project_id,)).fetchone()
+                meta = json.loads(row[0]) if row else {}
+                meta.update(changes.project)
+                meta["project_id"] = project_id
+                self._write_meta(conn, meta, revision)
+                for kind in ENTITY_KINDS:
+                    self._delete(conn, project_id, kind, changes.deletes[kind])
+                    self._upsert(conn, project_id, kind, changes.upserts[kind])
+
+    def remove(self, project_id: str):
+        """Drop a project from the workspace."""
+        with self._lock:
+            conn = self._connect()
+            with conn:
+                conn.execute("DELETE FROM entities WHERE project_id = ?", (project_id,))
+                conn.execute("DELETE FROM projects WHERE project_id = ?", (project_id,))
+
+    def close(self):
+        """Close the database connection."""
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    @staticmethod
+    def _write_meta(conn: sqlite3.Connection, project: Dict, revision: Optional[str]):
+        meta = {field: project.get(field) for field in PROJECT_FIELDS}
+        conn.execute("INSERT OR REPLACE INTO projects VALUES (?, ?, ?)",
+                     (project["project_id"], revision, json.dumps(meta)))
+
+    @staticmethod
+    def _delete(conn: sqlite3.Connection, project_id: str, kind: str, keys: List[str]):
+        conn.executemany("DELETE FROM entities WHERE project_id = ? AND kind = ? AND entity_key = ?",
+                         [(project_id, kind, key) for key in keys])
+
+    @staticmethod
+    def _upsert(conn: sqlite3.Connection, project_id: str, kind: str, records: List[Dict]):
+        if not records:
+            return
+        # New records go after existing ones; existing records keep their position
+        end = conn.execute("SELECT COALESCE(MAX(position), -1) FROM entities WHERE project_id = ? AND kind = ?",
+                           (project_id, kind)).fetchone()[0]
+        for record in records:
+            key = entity_key(kind, record)
+            updated = conn.execute(
+                "UPDATE entities SET hash = ?, data = ? WHERE project_id = ? AND kind = ? AND entity_key = ?",
+                (record_hash(record), json.dumps(record), project_id, kind, key)).rowcount
+            if not updated:
+                end += 1
+                conn.execute("INSERT INTO entities VALUES (?, ?, ?, ?, ?, ?)",
+                             (project_id, kind, key, end, record_hash(record), json.dumps(record)))
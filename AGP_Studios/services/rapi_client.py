@@ -1,4 +1,8 @@
+import queue
+import threading
+import time
 import websocket
+from services.server_events import is_server_event, dispatch_server_event
 
 class RaCoreClient:
     """
@@ -7,7 +11,115 @@ class RaCoreClient:
     def __init__(self, url):
         self.url = url
         self.ws = websocket.create_connection(url)
+        # One request/response pair at a time; background workers share this connection
+        self._lock = threading.Lock()
+        # Polling backs off while the connection is down (1s, 2s, 4s, ... max 60s)
+        self._poll_backoff = 0.0
+        self._poll_resume_at = 0.0
 
     def send(self, message):
-        self.ws.send(message)
-        return self.ws.recv()
\ No newline at end of file
+        # Events pushed by the server can arrive ahead of the response; they are
+        # dispatched after the lock is released so handlers may send requests
+        events = []
+        with self._lock:
+            self.ws.send(message)
+            response = self.ws.recv()
+            while is_server_event(response):
+                events.append(response)
+                response = self.ws.recv()
+        for event in events:
+            dispatch_server_event(event)
+        return response
+
+    def poll_events(self, timeout=0.01):
+        """
+        Dispatch server events received while no request was in flight.
+        Returns at once if another thread is using the connection (it dispatches them).
+        """
+        if time.monotonic() < self._poll_resume_at:
+            return 0
+        if not self._lock.acquire(blocking=False):
+            return 0
+        events = []
+        try:
+            self.ws.settimeout(timeout)
+            while True:
+                events.append(self.ws.recv())
+        except websocket.WebSocketTimeoutException:
+            self._poll_backoff = 0.0
+        except (websocket.WebSocketException, OSError) as e:
+            # Closed or dropped by the server; called from a UI timer, so never raise
+            self._poll_backoff = min(60.0, self._poll_backoff * 2 or 1.0)
+            self._poll_resume_at = time.monotonic() + self._poll_backoff
+            print(f"Error polling server events: {e}")
+        finally:
+            try:
+                self.ws.settimeout(None)
+            except (websocket.WebSocketException, OSError):
+                pass
+            self._lock.release()
+        for event in events:
+            dispatch_server_event(event)
+        return len(events)
+
+    def close(self):
+        self.ws.close()
+
+class RaCoreClientPool:
+    """
+    Pool of RaCoreClient connections for requests issued in parallel.
+    Connections are opened lazily up to the pool size and reused.
+    """
+    def __init__(self, url, size=4, factory=RaCoreClient):
+        self.url = url
+        self.size = size
+        self.factory = factory
+        self._idle = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_client(cls, client, size=4):
+        """Create a pool for the same server as an existing client (which joins the pool)."""
+        url = getattr(client, "url", None)
+        pool = cls(url, size if url else 1)
+        pool._idle.put(client)
+        pool._created = 1
+        return pool
+
+    def acquire(self):
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        with self._lock:
+            create = self._created < self.size
+            if create:
+                self._created += 1
+        if create:
+            try:
+                return self.factory(self.url)
+            except Exception:
+                with self._lock:
+                    self._created -= 1
+                raise
+        return self._idle.get()
+
+    def release(self, client):
+        self._idle.put(client)
+
+    def send(self, message):
+        client = self.acquire()
+        try:
+            return client.send(message)
+        finally:
+            self.release(client)
+
+    def close(self):
+        while True:
+            try:
+                client = self._idle.get_nowait()
+            except queue.Empty:
+                return
+            if hasattr(client, "close"):
+                client.close()
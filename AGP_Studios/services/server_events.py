@@ -0,0 +1,97 @@
+"""
+Real-time RaOS server events.
+Event messages pushed over the WebSocket are republished on the ModuleBus under
+their event type, so services and panels subscribe to server events like local ones.
+"""
+import json
+from typing import Dict, List, Optional, Union
+
+from services.module_bus import ModuleBus
+
+# Event types from the protocol (ModuleBus event names; payload is the event "data")
+ASSET_UPDATED = "asset_updated"
+PROJECT_MODIFIED = "project_modified"
+GAME_STATE_CHANGE = "game_state_change"
+ACHIEVEMENT_UNLOCKED = "achievement_unlocked"
+LEADERBOARD_UPDATED = "leaderboard_updated"
+CONTENT_PUBLISHED = "content_published"
+SYSTEM_NOTIFICATION = "system_notification"
+
+# ModuleBus sender of republished server events
+SERVER_SENDER = "raos"
+
+def is_server_event(message: Union[str, bytes, Dict]) -> bool:
+    """Check whether a received message is a pushed event rather than a response."""
+    if isinstance(message, dict):
+        return "event_type" in message and "success" not in message
+    if isinstance(message, bytes):
+        message = message.decode("utf-8", errors="replace")
+    # Cheap check first; responses never carry an event_type
+    if '"event_type"' not in message:
+        return False
+    try:
+        return is_server_event(json.loads(message))
+    except ValueError:
+        return False
+
+def dispatch_server_event(message: Union[str, bytes, Dict]) -> Optional[str]:
+    """
+    Publish a server event message on the ModuleBus.
+    Handlers run on the calling thread and get an event whose payload is the
+    event data with "timestamp" added.
+
+    Args:
+        message: Event message (JSON text or parsed)
+
+    Returns:
+        str: Event type, or None if the message is not a valid event
+    """
+    try:
+        event = json.loads(message) if isinstance(message, (str, bytes)) else message
+    except ValueError as e:
+        print(f"Error parsing server event: {e}")
+        return None
+    if not isinstance(event, dict) or not event.get("event_type"):
+        return None
+
+    payload = dict(event.get("data") or {})
+    payload.setdefault("timestamp", event.get("timestamp"))
+    try:
+        ModuleBus.publish(event["event_type"], payload, sender=SERVER_SENDER)
+    except Exception as e:
+        print(f"Error handling server event {event['event_type']}: {e}")
+    return event["event_type"]
+
+def subscribe_server_events(rcore_client, auth_service, event_types: List[str]) -> Optional[str]:
+    """
+    Ask the server to push events of the given types on this connection.
+
+    Args:
+        rcore_client: RaCoreClient the events should arrive on
+        auth_service: AuthService instance for authenticated requests
+        event_types: Event types to receive
+
+    Returns:
+        str: Subscription ID, or None if the subscription failed
+    """
+    if not auth_service.is_authenticated():
+        return None
+
+    try:
+        request = json.dumps({
+            "action": "subscribe_events",
+            "auth_token": auth_service.access_token,
+            "event_types": list(event_types)
+        })
+
+        response = rcore_client.send(request)
+        data = json.loads(response)
+
+        if data.get("success"):
+            return data.get("subscription_id")
+        print(f"Event subscription failed: {data.get('error', 'Unknown error')}")
+        return None
+
+    except Exception as e:
+        print(f"Error subscribing to events: {e}")
+        return None
@@ -0,0 +1,261 @@
+"""
+Game session pre-warming.
+When a game is selected, a session is staged on the server in the background while
+local launch preflight (token freshness, installed files, disk space) runs in
+parallel. Launching then activates the staged session instead of paying for
+session setup; sessions that are not launched are released when they expire.
+"""
+import os
+import shutil
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional
+
+from services.game_launcher import GameLauncher
+
+# Seconds a staged session is kept when the server does not say
+DEFAULT_SESSION_TTL = 60.0
+
+# A session this close to expiry is not used for a launch (seconds)
+EXPIRY_MARGIN = 5.0
+
+# Longest wait for an in-flight staging request when launching (seconds)
+STAGING_WAIT = 10.0
+
+# Refresh the access token if it expires within this many seconds
+TOKEN_MARGIN = 300
+
+# Free space kept in addition to the game size for download launches (bytes)
+DISK_HEADROOM = 512 * 1024 * 1024
+
+class WarmSession:
+    """A session staged for one game and launch mode, plus its preflight results."""
+
+    def __init__(self, game_id: str, mode: str):
+        self.game_id = game_id
+        self.mode = mode
+        self.session_id: Optional[str] = None
+        self.stream_url: Optional[str] = None
+        self.expires_at = 0.0  # time.monotonic() deadline
+        self.staging: Optional[Future] = None
+        self.preflight: Dict[str, Future] = {}  # check name -> Future of (ok, message)
+        self.timer: Optional[threading.Timer] = None
+
+    @property
+    def usable(self) -> bool:
+        return bool(self.session_id) and time.monotonic() < self.expires_at - EXPIRY_MARGIN
+
+class SessionWarmer:
+    """
+    Stages at most one game session ahead of launch.
+    Call warm() when a game is selected and launch() instead of GameLauncher.launch_game();
+    launch() falls back to a cold launch when no warm session is available.
+    """
+
+    def __init__(self, game_launcher: GameLauncher, enabled: bool = False,
+                 install_dir: Optional[str] = None, session_ttl: float = DEFAULT_SESSION_TTL):
+        """
+        Initialize SessionWarmer.
+
+        Args:
+            game_launcher: GameLauncher used to stage, launch and release sessions
+            enabled: Whether warm() stages sessions (preflight still runs when disabled)
+            install_dir: Directory downloaded games are installed under (for disk and install checks)
+            session_ttl: Seconds an unused session is kept at most
+        """
+        self.game_launcher = game_launcher
+        self.enabled = enabled
+        self.install_dir = install_dir
+        self.session_ttl = session_ttl
+        self._session: Optional[WarmSession] = None
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="session-warm")
+
+    def warm(self, game_id: str, mode: str = "stream", size: Optional[int] = None) -> WarmSession:
+        """
+        Start staging a session and running preflight for a game.
+        A session warmed for another game or mode is released.
+
+        Args:
+            game_id: Selected game
+            mode: Launch mode to prepare
+            size: Game package size in bytes, if known (for the disk space check)
+
+        Returns:
+            WarmSession: The session being prepared
+        """
+        with self._lock:
+            current = self._session
+            if current is not None and current.game_id == game_id and current.mode == mode \
+                    and (current.usable or (current.staging is not None and not current.staging.done())):
+                return current
+            session = WarmSession(game_id, mode)
+            self._session = session
+        if current is not None:
+            self._discard(current)
+
+        self._start_preflight(session, size)
+        if self.enabled:
+            session.staging = self._executor.submit(self._stage, session)
+        return session
+
+    def preflight_problems(self, game_id: str, mode: Optional[str] = None,
+                           timeout: float = STAGING_WAIT) -> List[str]:
+        """
+        Failed preflight checks of the warmed game; blocks until the checks finish.
+
+        Args:
+            game_id: Game ID
+            mode: Launch mode the checks must have been run for (None for any)
+            timeout: Seconds to wait for each check
+
+        Returns:
+            List[str]: Messages of failed checks (empty if all passed or nothing was warmed)
+        """
+        session = self._session
+        if session is None or session.game_id != game_id or (mode is not None and session.mode != mode):
+            return []
+        problems = []
+        for future in session.preflight.values():
+            try:
+                ok, message = future.result(timeout)
+            except Exception as e:
+                ok, message = False, str(e)
+            if not ok:
+                problems.append(message)
+        return problems
+
+    def launch(self, game_id: str, mode: str = "stream") -> bool:
+        """
+        Launch a game, activating its warm session when there is one.
+
+        Returns:
+            bool: True if game launch successful
+        """
+        session = self._take(game_id, mode)
+        if session is not None:
+            if self.game_launcher.launch_game(game_id, mode, session_id=session.session_id):
+                return True
+            # The server may have expired it; fall back to a cold launch
+        return self.game_launcher.launch_game(game_id, mode)
+
+    def launch_when_ready(self, game_id: str, mode: str, size: Optional[int],
+                          callback: Callable[[bool, List[str]], None]):
+        """
+        Run preflight for the launch mode and launch if it passes, without blocking the caller.
+
+        Args:
+            game_id: Game to launch
+            mode: Launch mode; preflight (e.g. disk space for downloads) is run for this mode
+            size: Game package size in bytes, if known
+            callback: Called from a worker thread with (launched, failed check messages)
+        """
+        session = self.warm(game_id, mode, size)
+        if all(future.done() for future in session.preflight.values()):
+            # Results of an earlier attempt may be stale (e.g. disk space was freed since)
+            self._start_preflight(session, size)
+
+        def run():
+            problems = self.preflight_problems(game_id, mode)
+            launched = not problems and self.launch(game_id, mode)
+            callback(launched, problems)
+
+        self._executor.submit(run)
+
+    def release(self):
+        """Release the warm session, if any."""
+        with self._lock:
+            session, self._session = self._session, None
+        if session is not None:
+            self._discard(session)
+
+    def close(self):
+        """Release the warm session and stop the worker threads."""
+        self.release()
+        self._executor.shutdown(wait=False)
+
+    def _start_preflight(self, session: WarmSession, size: Optional[int]):
+        session.preflight = {
+            "token": self._executor.submit(self._check_token),
+            "installed": self._executor.submit(self._check_installed, session.game_id),
+            "disk_space": self._executor.submit(self._check_disk_space, session.mode, size)
+        }
+
+    def _take(self, game_id: str, mode: str) -> Optional[WarmSession]:
+        with self._lock:
+            session = self._session
+            if session is None or session.game_id != game_id or session.mode != mode:
+                return None
+        if session.staging is not None:
+            try:
+                session.staging.result(STAGING_WAIT)
+            except Exception:
+                pass
+        with self._lock:
+            if self._session is not session or not session.usable:
+                return None
+            self._session = None
+            if session.timer is not None:
+                session.timer.cancel()
+        return session
+
+    def _stage(self, session: WarmSession):
+        staged = self.game_launcher.prepare_session(session.game_id, session.mode)
+        if staged is None or not staged.get("session_id"):
+            return
+        ttl = min(float(staged.get("expires_in") or self.session_ttl), self.session_ttl)
+        with self._lock:
+            session.session_id = staged["session_id"]
+            session.stream_url = staged.get("stream_url")
+            session.expires_at = time.monotonic() + ttl
+            if self._session is not session:
+                # Superseded while staging
+                orphan = True
+            else:
+                orphan = False
+                session.timer = threading.Timer(ttl, self._expire, args=(session,))
+                session.timer.daemon = True
+                session.timer.start()
+        if orphan:
+            self.game_launcher.release_session(session.session_id)
+
+    def _expire(self, session: WarmSession):
+        with self._lock:
+            if self._session is not session:
+                return
+            self._session = None
+        self._discard(session)
+
+    def _discard(self, session: WarmSession):
+        """Release a session that will not be launched (once it is staged)."""
+        if session.timer is not None:
+            session.timer.cancel()
+        if session.session_id:
+            self._executor.submit(self.game_launcher.release_session, session.session_id)
+        # Sessions still staging release themselves in _stage once superseded
+
+    def _check_token(self):
+        if self.game_launcher.auth_service.refresh_if_expiring(TOKEN_MARGIN):
+            return True, "Access token is fresh"
+        return False, "Login expired; please log in again"
+
+    def _check_installed(self, game_id: str):
+        store = self.game_launcher.store
+        if store is not None and store.versions(game_id):
+            return True, "Game files are in the local store"
+        if self.install_dir and os.path.isdir(os.path.join(self.install_dir, game_id)):
+            return True, "Game is installed"
+        # Not an error: streaming needs nothing local and downloads fetch the files
+        return True, "Game is not installed locally"
+
+    def _check_disk_space(self, mode: str, size: Optional[int]):
+        if mode != "download" or not size:
+            return True, "No local space needed"
+        path = self.install_dir or os.path.expanduser("~")
+        while not os.path.exists(path):
+            path = os.path.dirname(path)
+        free = shutil.disk_usage(path).free
+        if free < size + DISK_HEADROOM:
+            return False, f"Not enough disk space: {size / 1024 ** 3:.1f} GB needed, {free / 1024 ** 3:.1f} GB free"
+        return True, "Enough disk space"
@@ -0,0 +1,326 @@
+"""
+Managed upload queue for game project assets.
+Uploads run concurrently in priority order (scenes and scripts before large media),
+failed uploads are retried with exponential backoff, and progress is published
+on the ModuleBus.
+"""
+import heapq
+import itertools
+import os
+import random
+import threading
+import time
+from typing import Callable, Dict, Iterable, List, Optional
+
+from services.game_project_manager import GameProject, GameProjectManager
+from services.module_bus import ModuleBus
+from services.rapi_client import RaCoreClientPool
+
+# ModuleBus events; payload is {"job": UploadJob.to_dict(), "stats": UploadQueue.stats()}
+UPLOAD_QUEUED = "asset_upload_queued"
+UPLOAD_STARTED = "asset_upload_started"
+UPLOAD_RETRYING = "asset_upload_retrying"
+UPLOAD_COMPLETED = "asset_upload_completed"
+UPLOAD_FAILED = "asset_upload_failed"
+UPLOAD_CANCELLED = "asset_upload_cancelled"
+# Published when the queue drains; payload is {"stats": UploadQueue.stats()}
+UPLOAD_QUEUE_IDLE = "asset_upload_queue_idle"
+
+# Lower values upload first; unknown types use the "generic" priority
+DEFAULT_PRIORITIES = {
+    "scene": 0,
+    "script": 1,
+    "generic": 4,
+    "model": 5,
+    "image": 5,
+    "audio": 6,
+    "video": 8
+}
+
+# Job states
+QUEUED = "queued"
+UPLOADING = "uploading"
+RETRYING = "retrying"
+COMPLETED = "completed"
+FAILED = "failed"
+CANCELLED = "cancelled"
+
+class UploadJob:
+    """One asset waiting for or undergoing upload."""
+
+    def __init__(self, job_id: int, project: GameProject, name: str, asset_type: str, priority: int,
+                 data: Optional[bytes] = None, path: Optional[str] = None):
+        self.job_id = job_id
+        self.project = project  # Project current when the job was queued
+        self.name = name
+        self.asset_type = asset_type
+        self.priority = priority
+        self.data = data  # Either data or path is set; files are read when the upload starts
+        self.path = path
+        self.size = len(data) if data is not None else (os.path.getsize(path) if path and os.path.exists(path) else 0)
+        self.state = QUEUED
+        self.attempts = 0
+        self.error: Optional[str] = None
+        self.asset_info: Optional[Dict] = None
+        self.not_before = 0.0  # Monotonic time before which a retry must not start
+
+    def to_dict(self) -> Dict:
+        """Convert job to dictionary."""
+        return {
+            "job_id": self.job_id,
+            "project_id": self.project.project_id if self.project else None,
+            "name": self.name,
+            "asset_type": self.asset_type,
+            "priority": self.priority,
+            "size": self.size,
+            "state": self.state,
+            "attempts": self.attempts,
+            "error": self.error,
+            "asset_info": self.asset_info
+        }
+
+class UploadQueue:
+    """
+    Concurrent, prioritized asset upload queue.
+    Jobs are uploaded by a fixed set of worker threads over pooled connections;
+    completed assets are added to the project they were queued for.
+    """
+
+    def __init__(self, project_manager: GameProjectManager, concurrency: int = 4,
+                 max_retries: int = 3, backoff_base: float = 1.0, backoff_max: float = 30.0,
+                 priorities: Optional[Dict[str, int]] = None, pool: Optional[RaCoreClientPool] = None,
+                 detect_type: Optional[Callable[[str], str]] = None):
+        """
+        Initialize UploadQueue.
+
+        Args:
+            project_manager: GameProjectManager holding the target project
+            concurrency: Number of simultaneous uploads
+            max_retries: Retries after the first failed attempt
+            backoff_base: Delay before the first retry in seconds (doubles per attempt, with jitter)
+            backoff_max: Maximum retry delay in seconds
+            priorities: Asset type -> priority overrides (lower uploads first)
+            pool: Optional connection pool (one is created from the manager's client otherwise)
+            detect_type: Maps a file name to an asset type for enqueue_files
+        """
+        self.project_manager = project_manager
+        self.concurrency = concurrency
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.priorities = dict(DEFAULT_PRIORITIES, **(priorities or {}))
+        self.pool = pool or RaCoreClientPool.from_client(project_manager.rcore_client, concurrency)
+        self.detect_type = detect_type
+        self.jobs: Dict[int, UploadJob] = {}
+        self._ready = []  # Heap of (priority, sequence, job)
+        self._delayed = []  # Heap of (not_before, sequence, job) awaiting retry
+        self._sequence = itertools.count()
+        self._job_ids = itertools.count(1)
+        self._active = 0
+        self._paused = False
+        self._running = True
+        self._idle = True  # UPLOAD_QUEUE_IDLE was published for the last batch of work
+        self._condition = threading.Condition()
+        self._threads = [
+            threading.Thread(target=self._run, name=f"UploadQueue-{i}", daemon=True)
+            for i in range(concurrency)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def enqueue(self, name: str, asset_type: str, data: Optional[bytes] = None,
+                path: Optional[str] = None, priority: Optional[int] = None) -> UploadJob:
+        """
+        Queue an asset for upload to the current project.
+
+        Args:
+            name: Asset name
+            asset_type: Asset type (image, audio, scene, ...)
+            data: Asset data (or pass path to read the file when the upload starts)
+            path: File to upload
+            priority: Explicit priority (defaults to the asset type's priority)
+
+        Returns:
+            UploadJob: Queued job
+        """
+        if priority is None:
+            priority = self.priorities.get(asset_type, self.priorities["generic"])
+        job = UploadJob(next(self._job_ids), self.project_manager.current_project,
+                        name, asset_type, priority, data, path)
+        with self._condition:
+            self.jobs[job.job_id] = job
+            heapq.heappush(self._ready, (job.priority, next(self._sequence), job))
+            self._idle = False
+            self._condition.notify()
+        self._publish(UPLOAD_QUEUED, job)
+        return job
+
+    def enqueue_files(self, paths: Iterable[str]) -> List[UploadJob]:
+        """
+        Queue files for upload; smaller files go first within a priority.
+
+        Args:
+            paths: File paths
+
+        Returns:
+            List[UploadJob]: Queued jobs
+        """
+        detect_type = self.detect_type or (lambda name: "generic")
+        paths = sorted(paths, key=lambda p: os.path.getsize(p) if os.path.exists(p) else 0)
+        return [self.enqueue(os.path.basename(p), detect_type(os.path.basename(p)), path=p) for p in paths]
+
+    def pause(self):
+        """Stop starting new uploads; uploads in progress finish."""
+        with self._condition:
+            self._paused = True
+
+    def resume(self):
+        """Resume starting uploads."""
+        with self._condition:
+            self._paused = False
+            self._condition.notify_all()
+
+    @property
+    def paused(self) -> bool:
+        return self._paused
+
+    def cancel(self, job_id: int) -> bool:
+        """
+        Cancel a job that has not started uploading.
+
+        Returns:
+            bool: True if the job was cancelled
+        """
+        with self._condition:
+            job = self.jobs.get(job_id)
+            if job is None or job.state not in (QUEUED, RETRYING):
+                return False
+            # The heap entry stays and is skipped when popped
+            job.state = CANCELLED
+            job.data = None
+        self._publish(UPLOAD_CANCELLED, job)
+        return True
+
+    def stats(self) -> Dict:
+        """Counts and byte totals per state."""
+        with self._condition:
+            counts = {state: 0 for state in (QUEUED, UPLOADING, RETRYING, COMPLETED, FAILED, CANCELLED)}
+            bytes_total = bytes_done = 0
+            for job in self.jobs.values():
+                counts[job.state] += 1
+                if job.state != CANCELLED:
+                    bytes_total += job.size
+                if job.state == COMPLETED:
+                    bytes_done += job.size
+            counts["bytes_total"] = bytes_total
+            counts["bytes_done"] = bytes_done
+            counts["paused"] = self._paused
+        return counts
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """
+        Block until no jobs are queued, retrying or uploading.
+
+        Returns:
+            bool: True if the queue drained within the timeout
+        """
+        with self._condition:
+            return self._condition.wait_for(lambda: not self._has_work(), timeout)
+
+    def clear_finished(self):
+        """Forget completed, failed and cancelled jobs."""
+        with self._condition:
+            self.jobs = {job_id: job for job_id, job in self.jobs.items()
+                         if job.state in (QUEUED, UPLOADING, RETRYING)}
+
+    def stop(self):
+        """Stop the workers; queued jobs are not uploaded."""
+        with self._condition:
+            self._running = False
+            self._condition.notify_all()
+        for thread in self._threads:
+            thread.join(timeout=5)
+
+    def _has_work(self) -> bool:
+        return self._active > 0 or any(job.state in (QUEUED, RETRYING) for _, _, job in self._ready + self._delayed)
+
+    def _next_job(self) -> Optional[UploadJob]:
+        """Block until a job may start; returns None when stopping."""
+        while self._running:
+            now = time.monotonic()
+            while self._delayed and self._delayed[0][0] <= now:
+                _, sequence, job = heapq.heappop(self._delayed)
+                heapq.heappush(self._ready, (job.priority, sequence, job))
+
+            while self._ready and self._ready[0][2].state == CANCELLED:
+                heapq.heappop(self._ready)
+
+            if self._ready and not self._paused:
+                job = heapq.heappop(self._ready)[2]
+                job.state = UPLOADING
+                self._active += 1
+                return job
+
+            timeout = None
+            if self._delayed:
+                timeout = max(0.0, self._delayed[0][0] - now)
+            self._condition.wait(timeout)
+        return None
+
+    def _run(self):
+        while True:
+            with self._condition:
+                job = self._next_job()
+            if job is None:
+                return
+
+            self._publish(UPLOAD_STARTED, job)
+            job.attempts += 1
+            try:
+                data = job.data
+                if data is None:
+                    with open(job.path, "rb") as f:
+                        data = f.read()
+                client = self.pool.acquire()
+                try:
+                    job.asset_info = self.project_manager.upload_asset(job.name, job.asset_type, data,
+                                                                       client=client, project=job.project)
+                finally:
+                    self.pool.release(client)
+                job.error = None if job.asset_info else "Upload failed"
+            except Exception as e:
+                job.error = str(e)
+
+            if job.asset_info:
+                self.project_manager.record_asset(job.asset_info, job.project)
+                event = self._finish(job, COMPLETED)
+            elif job.attempts <= self.max_retries:
+                delay = min(self.backoff_max, self.backoff_base * 2 ** (job.attempts - 1))
+                job.not_before = time.monotonic() + delay * random.uniform(0.5, 1.0)
+                event = self._finish(job, RETRYING)
+            else:
+                event = self._finish(job, FAILED)
+
+            self._publish(event, job)
+            # Only the worker that sees the queue drain announces it
+            with self._condition:
+                idle = not self._idle and not self._has_work()
+                if idle:
+                    self._idle = True
+            if idle:
+                ModuleBus.publish(UPLOAD_QUEUE_IDLE, {"stats": self.stats()}, sender=self)
+
+    def _finish(self, job: UploadJob, state: str) -> str:
+        """Record the outcome of an attempt; returns the event to publish."""
+        with self._condition:
+            self._active -= 1
+            job.state = state
+            if state == RETRYING:
+                heapq.heappush(self._delayed, (job.not_before, next(self._sequence), job))
+            else:
+                job.data = None
+            self._condition.notify_all()
+        return {COMPLETED: UPLOAD_COMPLETED, RETRYING: UPLOAD_RETRYING, FAILED: UPLOAD_FAILED}[state]
+
+    def _publish(self, event_name: str, job: UploadJob):
+        ModuleBus.publish(event_name, {"job": job.to_dict(), "stats": self.stats()}, sender=self)
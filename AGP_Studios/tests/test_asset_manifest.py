@@ -0,0 +1,93 @@
+"""
+Tests for the Merkle asset manifest.
+"""
+import hashlib
+
+from services.asset_manifest import HEX_DIGITS, AssetManifest, apply_asset_changes, asset_hash, bucket_of
+
+
+def make_assets(count: int):
+    return [{"asset_id": f"asset-{i}", "name": f"file{i}.png", "type": "image"} for i in range(count)]
+
+
+def differing_keys(local: AssetManifest, remote: AssetManifest):
+    """Descend both trees the way sync_assets does; returns (fetch, delete) keys."""
+    differing = [""]
+    while differing and len(differing[0]) < local.depth:
+        next_level = []
+        for prefix in differing:
+            if local.node_hash(prefix) != remote.node_hash(prefix):
+                next_level.extend(local.diff_children(prefix, remote.children(prefix)))
+        differing = next_level
+    fetch, delete = [], []
+    for prefix in differing:
+        diff = local.diff_bucket(prefix, remote.bucket(prefix))
+        fetch.extend(diff["fetch"])
+        delete.extend(diff["delete"])
+    return sorted(fetch), sorted(delete)
+
+
+def test_asset_hash_uses_canonical_unescaped_json():
+    record = {"name": "drachenhöhle.png", "asset_id": "a1"}
+    canonical = '{"asset_id":"a1","name":"drachenhöhle.png"}'
+    assert asset_hash(record) == hashlib.sha256(canonical.encode("utf-8")).hexdigest()[:16]
+    assert asset_hash(record) == asset_hash(dict(reversed(list(record.items()))))
+
+
+def test_bucket_of_is_key_hash_prefix():
+    assert bucket_of("asset-1") == hashlib.sha256(b"asset-1").hexdigest()[:3]
+    assert len(bucket_of("asset-1", depth=2)) == 2
+
+
+def test_empty_manifest_hashes_to_empty_string():
+    manifest = AssetManifest()
+    assert manifest.node_hash() == ""
+    assert manifest.children() == [""] * 16
+
+
+def test_root_hash_is_order_independent():
+    assets = make_assets(200)
+    assert AssetManifest(assets).node_hash() == AssetManifest(list(reversed(assets))).node_hash()
+
+
+def test_incremental_updates_match_rebuild():
+    assets = make_assets(300)
+    manifest = AssetManifest(assets)
+    manifest.node_hash()  # Populate the memoized node hashes
+
+    changed = dict(assets[10], name="renamed.png")
+    manifest.add(changed)
+    manifest.remove("asset-20")
+    manifest.remove("missing")
+    expected = [changed if a["asset_id"] == "asset-10" else a for a in assets if a["asset_id"] != "asset-20"]
+    assert manifest.node_hash() == AssetManifest(expected).node_hash()
+
+
+def test_descent_finds_only_changed_assets():
+    assets = make_assets(500)
+    local = AssetManifest(assets)
+    upstream = [a for a in assets if a["asset_id"] != "asset-7"]
+    upstream[3] = dict(upstream[3], type="sprite")
+    upstream.append({"asset_id": "asset-new", "name": "new.png"})
+    remote = AssetManifest(upstream)
+
+    fetch, delete = differing_keys(local, remote)
+    assert fetch == sorted(["asset-3", "asset-new"])
+    assert delete == ["asset-7"]
+    assert differing_keys(local, AssetManifest(assets)) == ([], [])
+
+
+def test_diff_children_pads_short_remote_lists():
+    manifest = AssetManifest(make_assets(50))
+    assert manifest.diff_children("", []) == [digit for digit, h in zip(HEX_DIGITS, manifest.children()) if h]
+
+
+def test_apply_asset_changes_keeps_order_and_updates_manifest():
+    assets = make_assets(5)
+    manifest = AssetManifest(assets)
+    fetched = [dict(assets[1], name="changed.png"), {"asset_id": "asset-9", "name": "added.png"}]
+
+    result = apply_asset_changes(assets, fetched, ["asset-3"], manifest)
+    assert [a["asset_id"] for a in result] == ["asset-0", "asset-1", "asset-2", "asset-4", "asset-9"]
+    assert result[1]["name"] == "changed.png"
+    assert manifest.node_hash() == AssetManifest(result).node_hash()
@@ -0,0 +1,78 @@
+"""
+Tests for the local response cache (revalidation, account scopes and copies).
+"""
+import json
+
+from services.content_cache import ContentCache, versioned_loader
+
+
+class FakeClient:
+    """Answers requests from a queue of responses and records what was sent."""
+
+    def __init__(self, *responses):
+        self.responses = list(responses)
+        self.sent = []
+
+    def send(self, message):
+        self.sent.append(json.loads(message))
+        return json.dumps(self.responses.pop(0))
+
+
+def test_versioned_loader_revalidates_with_the_cached_version():
+    client = FakeClient({"success": True, "games": [{"game_id": "g1"}], "version": "v1"},
+                        {"success": True, "not_modified": True})
+    cache = ContentCache(ttls={"games": 0})
+    load = versioned_loader(client, {"action": "list_games"}, "games", [])
+
+    assert cache.fetch("games", "*", load) == [{"game_id": "g1"}]
+    assert cache.fetch("games", "*", load) == [{"game_id": "g1"}]
+    assert [message.get("if_none_match") for message in client.sent] == [None, "v1"]
+    assert cache.stats["revalidated"] == 1
+
+
+def test_versioned_loader_failures_and_callbacks():
+    loaded = []
+    client = FakeClient({"success": True, "asset": {"asset_id": "a", "version": "3"}},
+                        {"success": False, "error": "denied"})
+    load = versioned_loader(client, {"action": "fetch_content"}, "asset", {},
+                            version=lambda asset: asset.get("version"),
+                            on_loaded=lambda value, version: loaded.append(version))
+    assert load(None) == {"value": {"asset_id": "a", "version": "3"}, "version": "3"}
+    assert loaded == ["3"]
+    assert load(None) is None
+
+
+def test_entries_are_scoped_to_the_account():
+    account = ["alice"]
+    cache = ContentCache(scope=lambda: account[0])
+    cache.put("achievements", "*", [{"achievement_id": "a1"}])
+    account[0] = "bob"
+    assert cache.peek("achievements", "*") is None
+    assert cache.fetch("achievements", "*", lambda version: {"value": [], "version": None}) == []
+    account[0] = "alice"
+    assert cache.peek("achievements", "*") == [{"achievement_id": "a1"}]
+
+
+def test_fetch_stores_for_the_account_that_started_it():
+    account = ["alice"]
+    cache = ContentCache(scope=lambda: account[0])
+
+    def load(version):
+        account[0] = "bob"  # Logged in as someone else while the request was in flight
+        return {"value": ["alice's"], "version": "1"}
+
+    cache.fetch("content_list", "*", load)
+    assert cache.peek("content_list", "*") is None
+    account[0] = "alice"
+    assert cache.peek("content_list", "*") == ["alice's"]
+
+
+def test_values_are_handed_out_as_copies():
+    cache = ContentCache()
+    cache.put("games", "*", [{"game_id": "g1", "tags": ["rpg"]}])
+    games = cache.fetch("games", "*", lambda version: None)
+    games[0]["tags"].append("changed")
+    games.append({"game_id": "g2"})
+    peeked = cache.peek("games", "*")
+    peeked.clear()
+    assert cache.peek("games", "*") == [{"game_id": "g1", "tags": ["rpg"]}]
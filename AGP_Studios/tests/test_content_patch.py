@@ -0,0 +1,91 @@
+"""
+Tests for content text and metadata patches.
+"""
+import random
+
+import pytest
+
+from services.content_patch import (SyncedState, apply_text_patch, content_hash, make_metadata_patch,
+                                    make_text_patch)
+
+CASES = [
+    ("", ""),
+    ("", "new text"),
+    ("old text", ""),
+    ("The quick brown fox", "The quick red fox"),
+    ("line one\nline two\nline three\n", "line one\nline 2\nline three\nline four\n"),
+    ("a\nb\nc\nd\ne\n", "a\nB\nc\nd\nE\n"),
+    ("héllo wörld", "hello world"),
+    ("emoji 😀 here", "emoji 😃 here"),
+    ("😀\nfirst\n😀\nsecond\n", "😀\nfirst!\n😀\nsecond?\n"),
+    ("a😀b😀c", "a😀b😀c😀"),
+]
+
+
+@pytest.mark.parametrize("old, new", CASES)
+def test_patch_round_trip(old, new):
+    assert apply_text_patch(old, make_text_patch(old, new)) == new
+
+
+def test_identical_text_has_empty_patch():
+    assert make_text_patch("same", "same") == []
+
+
+def test_single_edit_is_narrowed_to_changed_characters():
+    old = "x" * 1000 + "typo" + "y" * 1000
+    new = "x" * 1000 + "type" + "y" * 1000
+    assert make_text_patch(old, new) == [[1003, 1004, "e"]]
+
+
+def test_multi_line_edits_produce_separate_ops():
+    old = "a\nb\nc\nd\ne\n"
+    new = "a\nB\nc\nd\nE\n"
+    assert make_text_patch(old, new) == [[2, 3, "B"], [8, 9, "E"]]
+
+
+def test_offsets_count_utf16_code_units():
+    # "😀" is one code point but two UTF-16 code units
+    assert make_text_patch("😀ab", "😀xb") == [[2, 3, "x"]]
+    assert apply_text_patch("😀ab", [[2, 3, "x"]]) == "😀xb"
+    # BMP-only text needs no conversion
+    assert make_text_patch("éab", "éxb") == [[1, 2, "x"]]
+
+
+def test_random_edits_round_trip():
+    rng = random.Random(1234)
+    alphabet = "ab\n é😀"
+    for _ in range(300):
+        old = "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 40)))
+        new = list(old)
+        for _ in range(rng.randint(1, 4)):
+            position = rng.randint(0, len(new))
+            new[position:position + rng.randint(0, 3)] = rng.choice(alphabet) * rng.randint(0, 2)
+        new = "".join(new)
+        ops = make_text_patch(old, new)
+        assert apply_text_patch(old, ops) == new
+        assert all(ops[i][1] <= ops[i + 1][0] for i in range(len(ops) - 1))
+
+
+def test_metadata_patch():
+    assert make_metadata_patch({"a": 1}, {"a": 1}) == {}
+    assert make_metadata_patch({"a": 1, "b": 2}, {"a": 3, "c": 4}) == {"set": {"a": 3, "c": 4}, "unset": ["b"]}
+
+
+def test_synced_state_patch():
+    state = SyncedState("v1", "Title", "Body text", {"tag": "x"})
+    assert state.make_patch("Title", "Body text", {"tag": "x"}) == {}
+    patch = state.make_patch("New Title", "Body test", {"tag": "x", "extra": 1})
+    assert patch == {"title": "New Title", "content_ops": [[7, 8, "s"]], "metadata": {"set": {"extra": 1}}}
+    assert apply_text_patch(state.content, patch["content_ops"]) == "Body test"
+
+
+def test_synced_state_copies_metadata():
+    metadata = {"tags": ["a"]}
+    state = SyncedState("v1", "", "", metadata)
+    metadata["tags"].append("b")
+    assert state.metadata == {"tags": ["a"]}
+
+
+def test_content_hash_is_utf8_sha256():
+    assert content_hash("") == "e3b0c44298fc1c149afbf4c8996fb92427ae41e4649b934ca495991b7852b855"
+    assert content_hash("é") != content_hash("e")
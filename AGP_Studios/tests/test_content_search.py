@@ -0,0 +1,138 @@
+"""
+Tests for the local content search index (BM25 ranking, prefix and fuzzy matching).
+"""
+import json
+import math
+import random
+
+from services.content_search import ContentSearchIndex, tokenize, within_edit_distance
+
+
+def make_index(path=None) -> ContentSearchIndex:
+    index = ContentSearchIndex(path=path)
+    index.add("dragons", "Dragon Lore", "Dragons hoard gold in mountain caves.")
+    index.add("potions", "Potion Guide", "Brewing healing potions needs herbs and water.")
+    index.add("maps", "World Map", "Mountain passes, rivers and the dragon caves are marked.")
+    return index
+
+
+def ids(results):
+    return [doc_id for doc_id, _ in results]
+
+
+def test_tokenize_lowercases_words():
+    assert tokenize("Hello, World_2 ünïcode!") == ["hello", "world_2", "ünïcode"]
+    assert tokenize("") == []
+
+
+def test_within_edit_distance():
+    assert within_edit_distance("dragon", "dragon", 0)
+    assert within_edit_distance("dragon", "dragin", 1)
+    assert within_edit_distance("dragon", "dragons", 1)
+    assert not within_edit_distance("dragon", "wagons", 1)
+    assert not within_edit_distance("dragon", "dragonfly", 2)
+
+
+def test_title_matches_rank_above_body_matches():
+    results = make_index().search("dragon", fuzzy=False)
+    assert ids(results)[0] == "dragons"
+    assert "maps" in ids(results)
+    assert results[0][1] > results[1][1]
+
+
+def test_prefix_matches_last_token_only():
+    index = make_index()
+    assert ids(index.search("pot", fuzzy=False)) == ["potions"]
+    assert index.search("pot", prefix=False, fuzzy=False) == []
+    assert index.search("pot water", fuzzy=False) == index.search("water", fuzzy=False)
+
+
+def test_fuzzy_matches_typos():
+    index = make_index()
+    assert ids(index.search("healng", prefix=False)) == ["potions"]
+    assert index.search("healng", prefix=False, fuzzy=False) == []
+
+
+def test_remove_and_replace_documents():
+    index = make_index()
+    index.remove("potions")
+    assert len(index) == 2
+    assert index.search("potion") == []
+    assert "potion" not in index._vocabulary
+
+    index.add("maps", "Sea Chart", "Harbours and reefs.")
+    assert "maps" not in ids(index.search("mountain"))
+    assert ids(index.search("reefs")) == ["maps"]
+
+
+def test_add_without_content_keeps_indexed_body():
+    index = make_index()
+    assert index.has_body("dragons")
+    index.add("dragons", "Renamed Lore", None)
+    assert ids(index.search("hoard")) == ["dragons"]
+    assert ids(index.search("renamed")) == ["dragons"]
+
+    index.add("stub", "Stub", None)
+    assert not index.has_body("stub")
+
+
+def test_metadata_is_indexed():
+    index = ContentSearchIndex(path=None)
+    index.add("a", "Untitled", "", {"author": "Morgana", "tags": "spells"})
+    assert ids(index.search("morgana")) == ["a"]
+
+
+def test_persists_and_reloads(tmp_path):
+    path = str(tmp_path / "search.json")
+    index = make_index(path)
+    index.save()
+    with open(path, encoding="utf-8") as f:
+        assert set(json.load(f)) == {"doc_terms", "titles", "bodies"}
+
+    reloaded = ContentSearchIndex(path=path)
+    assert len(reloaded) == 3
+    assert reloaded.search("dragon") == index.search("dragon")
+    assert reloaded.search("healng") == index.search("healng")
+    assert reloaded.has_body("maps")
+
+
+def test_corrupt_index_file_starts_empty(tmp_path):
+    path = tmp_path / "search.json"
+    path.write_bytes(b"not json")
+    index = ContentSearchIndex(path=str(path))
+    assert len(index) == 0
+    assert index.search("anything") == []
+
+
+def brute_force(index: ContentSearchIndex, query: str, limit: int):
+    """BM25 over every posting, with the average length the index scores with."""
+    scores = {}
+    count = len(index)
+    for term in tokenize(query):
+        postings = index.postings.get(term, {})
+        idf = math.log(1 + (count - len(postings) + 0.5) / (len(postings) + 0.5))
+        for doc_id, tf in postings.items():
+            norm = index.k1 * (1 - index.b + index.b * index.doc_lengths[doc_id] / index._scoring_average)
+            scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (index.k1 + 1) / (tf + norm)
+    ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))[:limit]
+    return [(doc_id, round(score, 9)) for doc_id, score in ranked]
+
+
+def test_early_stop_matches_full_scoring():
+    rng = random.Random(7)
+    vocabulary = [f"w{i}" for i in range(300)]
+    weights = [1 / (rank + 1) for rank in range(len(vocabulary))]  # Zipf-like: a few very common terms
+    index = ContentSearchIndex(path=None)
+    for i in range(2000):
+        words = rng.choices(vocabulary, weights, k=rng.randint(5, 80))
+        index.add(f"d{i}", " ".join(words[:3]), " ".join(words[3:]))
+
+    for query in ("w0", "w0 w1", "w0 w1 w2 w3 w4", "w5 w50 w150", "w299 w0", "w17 w17"):
+        results = index.search(query, limit=20, prefix=False, fuzzy=False)
+        assert [(doc_id, round(score, 9)) for doc_id, score in results] == brute_force(index, query, 20)
+
+    for i in range(0, 2000, 3):
+        index.remove(f"d{i}")
+    index.add("d1", "w3 w3 w3", "w3")
+    results = index.search("w3 w0", limit=20, prefix=False, fuzzy=False)
+    assert [(doc_id, round(score, 9)) for doc_id, score in results] == brute_force(index, "w3 w0", 20)
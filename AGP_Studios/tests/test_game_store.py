@@ -0,0 +1,191 @@
+"""
+Tests for the content-addressed game store (install, pruning and garbage collection).
+"""
+import hashlib
+import json
+import os
+import random
+
+import pytest
+
+from services.game_store import (LEGACY_INSTALL_RECORD, LINK_COPY, GameStore, install_record_path, iter_chunks,
+                                 scan_file)
+
+
+def write(path, data: bytes):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(data)
+
+
+def read(path) -> bytes:
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def random_bytes(size: int, seed: int) -> bytes:
+    return random.Random(seed).randbytes(size)
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = GameStore(str(tmp_path / "store"))
+    yield store
+    store.close()
+
+
+def make_version(store, tmp_path, game_id, version, files):
+    source = tmp_path / "source" / game_id / version
+    for relative, data in files.items():
+        write(str(source / relative), data)
+    return store.import_tree(game_id, version, str(source), link_back=False)
+
+
+def test_chunks_cover_the_file(tmp_path):
+    data = random_bytes(600 * 1024, 1)
+    path = str(tmp_path / "file.bin")
+    write(path, data)
+    entry = scan_file(path)
+    assert entry["sha256"] == hashlib.sha256(data).hexdigest()
+    assert sum(length for _, length in entry["chunks"]) == len(data)
+    with open(path, "rb") as f:
+        assert b"".join(iter_chunks(f)) == data
+
+
+def test_install_and_upgrade_prunes_stale_files(store, tmp_path):
+    make_version(store, tmp_path, "a", "1", {"a.bin": b"one", "data/old.dat": b"old"})
+    make_version(store, tmp_path, "a", "2", {"a.bin": b"two", "data/new.dat": b"new"})
+    target = str(tmp_path / "games")
+
+    assert store.install("a", "1", target)
+    assert read(os.path.join(target, "a.bin")) == b"one"
+    assert store.installed_version(target, "a")["version"] == "1"
+
+    assert store.install("a", "2", target)
+    assert read(os.path.join(target, "a.bin")) == b"two"
+    assert read(os.path.join(target, "data", "new.dat")) == b"new"
+    assert not os.path.exists(os.path.join(target, "data", "old.dat"))
+
+
+def test_installing_another_game_keeps_existing_files(store, tmp_path):
+    make_version(store, tmp_path, "a", "1", {"a.bin": b"game a"})
+    make_version(store, tmp_path, "b", "1", {"b.bin": b"game b"})
+    target = str(tmp_path / "games")
+
+    assert store.install("a", "1", target)
+    assert store.install("b", "1", target)
+    assert read(os.path.join(target, "a.bin")) == b"game a"
+    assert read(os.path.join(target, "b.bin")) == b"game b"
+    assert store.installed_version(target, "a")["files"] == ["a.bin"]
+    assert store.installed_version(target, "b")["files"] == ["b.bin"]
+
+
+def test_legacy_record_of_another_game_is_not_pruned(store, tmp_path):
+    make_version(store, tmp_path, "b", "1", {"b.bin": b"game b"})
+    target = str(tmp_path / "games")
+    write(os.path.join(target, "a.bin"), b"game a")
+    with open(os.path.join(target, LEGACY_INSTALL_RECORD), "w", encoding="utf-8") as f:
+        json.dump({"game_id": "a", "version": "1", "files": ["a.bin"]}, f)
+
+    assert store.install("b", "1", target)
+    assert read(os.path.join(target, "a.bin")) == b"game a"
+    assert store.installed_version(target, "a")["version"] == "1"
+    assert store.installed_version(target, "b")["version"] == "1"
+
+
+def test_upgrade_keeps_files_listed_by_other_games(store, tmp_path):
+    make_version(store, tmp_path, "a", "1", {"shared.cfg": b"cfg", "a.bin": b"a1"})
+    make_version(store, tmp_path, "a", "2", {"a.bin": b"a2"})
+    make_version(store, tmp_path, "b", "1", {"shared.cfg": b"cfg"})
+    target = str(tmp_path / "games")
+
+    assert store.install("a", "1", target)
+    assert store.install("b", "1", target)
+    assert store.install("a", "2", target)
+    assert read(os.path.join(target, "shared.cfg")) == b"cfg"
+
+
+def test_install_rejects_paths_outside_the_directory(store, tmp_path):
+    data = b"escape"
+    store.add_manifest("evil", "1", {"files": [{
+        "path": "../outside.bin", "sha256": hashlib.sha256(data).hexdigest(), "size": len(data), "chunks": []}]})
+    source = str(tmp_path / "evil.bin")
+    write(source, data)
+    store.add_file(source, link_back=False)
+
+    assert not store.install("evil", "1", str(tmp_path / "games"))
+    assert not os.path.exists(tmp_path / "outside.bin")
+
+
+def test_install_assembles_from_local_and_fetched_chunks(store, tmp_path):
+    base = random_bytes(2 * 1024 * 1024, 2)
+    make_version(store, tmp_path, "a", "1", {"pak.bin": base})
+    changed = base[:1024 * 1024] + random_bytes(64 * 1024, 3) + base[1024 * 1024:]
+    path = str(tmp_path / "new.bin")
+    write(path, changed)
+    entry = scan_file(path)
+    entry["path"] = "pak.bin"
+    store.add_manifest("a", "2", {"game_id": "a", "version": "2", "files": [entry]})
+
+    missing = store.missing_chunks(store.manifest("a", "2"))
+    assert 0 < sum(length for _, length in missing) < len(changed) / 2
+
+    with open(path, "rb") as f:
+        chunks = {hashlib.sha256(chunk).hexdigest(): chunk for chunk in iter_chunks(f)}
+    fetched = []
+
+    def fetch_chunk(chunk_hash, length):
+        fetched.append(chunk_hash)
+        return chunks[chunk_hash]
+
+    target = str(tmp_path / "games")
+    assert store.install("a", "2", target, fetch_chunk)
+    assert read(os.path.join(target, "pak.bin")) == changed
+    assert sorted(fetched) == sorted(chunk_hash for chunk_hash, _ in missing)
+
+
+def test_install_fails_without_missing_chunks(store, tmp_path):
+    path = str(tmp_path / "unknown.bin")
+    write(path, random_bytes(100 * 1024, 4))
+    entry = scan_file(path)
+    entry["path"] = "unknown.bin"
+    store.add_manifest("a", "1", {"files": [entry]})
+    assert not store.install("a", "1", str(tmp_path / "games"))
+
+
+def test_add_file_link_back_shares_the_stored_copy(store, tmp_path):
+    path = str(tmp_path / "download.bin")
+    write(path, b"package")
+    entry = store.add_file(path)
+    assert os.path.samefile(path, store.object_path(entry["sha256"]))
+    assert read(path) == b"package"
+
+
+def test_gc_frees_only_unreferenced_unlinked_objects(tmp_path):
+    store = GameStore(str(tmp_path / "store"), link_mode=LINK_COPY)
+    try:
+        make_version(store, tmp_path, "a", "1", {"a.bin": b"a" * 1000})
+        make_version(store, tmp_path, "b", "1", {"b.bin": b"b" * 500})
+        assert store.gc() == 0
+
+        store.remove_version("a", "1")
+        assert store.gc() == 1000
+        assert not store.has_file(hashlib.sha256(b"a" * 1000).hexdigest())
+        assert store.has_file(hashlib.sha256(b"b" * 500).hexdigest())
+    finally:
+        store.close()
+
+
+def test_gc_keeps_objects_linked_into_installs(store, tmp_path):
+    make_version(store, tmp_path, "a", "1", {"a.bin": b"linked"})
+    target = str(tmp_path / "games")
+    assert store.install("a", "1", target)
+    store.remove_version("a", "1")
+    if os.stat(os.path.join(target, "a.bin")).st_nlink > 1:
+        assert store.gc() == 0
+        assert read(os.path.join(target, "a.bin")) == b"linked"
+
+
+def test_install_record_path_is_per_game(tmp_path):
+    assert install_record_path("d", "a") != install_record_path("d", "b")
+    assert os.path.dirname(install_record_path("d", "../x")) == "d"
@@ -0,0 +1,106 @@
+"""
+Tests for incremental leaderboard updates (rank moves across loaded runs).
+"""
+import pytest
+
+from services.leaderboard import LEADERBOARD_CHANGED, LeaderboardBoard
+from services.module_bus import ModuleBus
+from services.server_events import LEADERBOARD_UPDATED
+
+
+class FakeLauncher:
+    player_profile = {"player_id": "me"}
+
+
+def entries(first: int, last: int):
+    return [{"player_id": f"p{rank}", "rank": rank} for rank in range(first, last + 1)]
+
+
+def players(board: LeaderboardBoard, first: int, last: int):
+    return [entry["player_id"] if entry else None for entry in board.window(first, last - first + 1)]
+
+
+@pytest.fixture
+def board():
+    board = LeaderboardBoard(FakeLauncher(), "game1")
+    board.seed(entries(1, 10), start=1, total=1000)
+    board.seed(entries(51, 60), start=51)
+    yield board
+    board.close()
+
+
+def test_move_up_within_run(board):
+    assert board.apply_update({"player_id": "p8", "rank": 3, "old_rank": 8}) == (3, 8)
+    assert players(board, 1, 10) == ["p1", "p2", "p8", "p3", "p4", "p5", "p6", "p7", "p9", "p10"]
+    assert players(board, 51, 52) == ["p51", "p52"]
+
+
+def test_move_down_within_run(board):
+    assert board.apply_update({"player_id": "p2", "rank": 9, "old_rank": 2}) == (2, 9)
+    assert players(board, 1, 10) == ["p1", "p3", "p4", "p5", "p6", "p7", "p8", "p9", "p2", "p10"]
+
+
+def test_move_between_runs(board):
+    board.apply_update({"player_id": "p55", "rank": 5, "old_rank": 55})
+    assert players(board, 1, 11) == ["p1", "p2", "p3", "p4", "p55", "p5", "p6", "p7", "p8", "p9", "p10"]
+    # Ranks 51..54 shifted down by one; 56..60 are unchanged
+    assert board.entry(51) is None
+    assert players(board, 52, 60) == ["p51", "p52", "p53", "p54", "p56", "p57", "p58", "p59", "p60"]
+    assert board.loaded_count() == 20
+
+
+def test_move_from_unloaded_rank(board):
+    board.apply_update({"player_id": "p500", "rank": 3, "old_rank": 500})
+    assert players(board, 1, 4) == ["p1", "p2", "p500", "p3"]
+    assert board.entry(11) == {"player_id": "p10", "rank": 10}
+    assert players(board, 52, 61) == [f"p{rank}" for rank in range(51, 61)]
+
+
+def test_move_into_unloaded_rank(board):
+    board.apply_update({"player_id": "p5", "rank": 30, "old_rank": 5})
+    assert players(board, 1, 9) == ["p1", "p2", "p3", "p4", "p6", "p7", "p8", "p9", "p10"]
+    assert board.entry(10) is None and board.entry(30) is None
+    assert board.entry(51)["player_id"] == "p51"
+
+
+def test_new_player_at_end_of_run(board):
+    total = board.total
+    board.apply_update({"player_id": "new", "rank": 11})
+    assert board.total == total + 1
+    assert board.entry(11)["player_id"] == "new"
+    assert players(board, 52, 53) == ["p51", "p52"]
+
+
+def test_mismatched_entry_invalidates_affected_runs(board):
+    assert board.apply_update({"player_id": "someone", "rank": 2, "old_rank": 6}) == (2, 6)
+    assert board.loaded_count() == 10
+    assert board.entry(1) is None
+    assert board.entry(51)["player_id"] == "p51"
+
+
+def test_update_without_rank_is_ignored(board):
+    assert board.apply_update({"player_id": "p1"}) is None
+    assert players(board, 1, 2) == ["p1", "p2"]
+
+
+def test_own_rank_and_total_follow_updates(board):
+    board.apply_update({"player_id": "me", "rank": 4, "old_rank": 700, "total": 1234})
+    assert board.player_rank == 4
+    assert board.total == 1234
+
+
+def test_bus_events(board):
+    changed = []
+
+    def on_changed(event):
+        changed.append(event.payload)
+
+    ModuleBus.subscribe(LEADERBOARD_CHANGED, on_changed)
+    try:
+        ModuleBus.publish(LEADERBOARD_UPDATED, {"game_id": "other", "player_id": "p8", "rank": 3, "old_rank": 8})
+        assert changed == []
+        ModuleBus.publish(LEADERBOARD_UPDATED, {"game_id": "game1", "player_id": "p8", "rank": 3, "old_rank": 8})
+    finally:
+        ModuleBus.unsubscribe(LEADERBOARD_CHANGED, on_changed)
+    assert changed == [{"game_id": "game1", "category": "global", "first": 3, "last": 8, "total": 1000}]
+    assert board.entry(3)["player_id"] == "p8"
@@ -0,0 +1,150 @@
+"""
+Tests for project snapshots, snapshot diffs and undo/redo history.
+"""
+from services.game_project_manager import GameProject
+from services.project_history import ProjectHistory, capture, changed_keys, changed_kinds, diff, restore
+from services.project_workspace import ProjectChanges
+
+
+def make_project(scene_count: int = 300) -> GameProject:
+    project = GameProject("p1", "Demo", "A demo project")
+    project.assets = [{"asset_id": f"a{i}", "name": f"a{i}.png", "type": "image"} for i in range(50)]
+    project.scenes = [{"scene_id": f"s{i}", "name": f"Scene {i}", "objects": [i]} for i in range(scene_count)]
+    project.scripts = [{"script_id": "main", "name": "main.lua", "code": "print('hi')"}]
+    return project
+
+
+def state(project: GameProject):
+    return project.name, project.description, project.assets.to_list(), project.scenes, project.scripts
+
+
+def test_restore_round_trip():
+    project = make_project()
+    before = state(project)
+    snapshot = capture(project)
+
+    project.name = "Renamed"
+    project.scenes = project.scenes[:10]
+    project.assets = []
+    restore(project, snapshot)
+    assert state(project) == before
+
+
+def test_unchanged_capture_shares_everything():
+    project = make_project()
+    first = capture(project)
+    second = capture(project, previous=first)
+    assert second.new_bytes == 0
+    for kind, chunks in first.collections.items():
+        assert all(a is b for a, b in zip(chunks, second.collections[kind]))
+    assert not diff(first, second)
+
+
+def test_diff_reports_upserts_deletes_and_fields():
+    project = make_project(scene_count=3000)
+    old = capture(project)
+    project.description = "Changed"
+    scenes = list(project.scenes)
+    scenes[5] = dict(scenes[5], name="Edited")
+    del scenes[100]
+    scenes.append({"scene_id": "new", "name": "New"})
+    project.scenes = scenes
+    new = capture(project, previous=old)
+
+    changes = diff(old, new)
+    assert changes.project == {"description": "Changed"}
+    assert sorted(s["scene_id"] for s in changes.upserts["scenes"]) == ["new", "s5"]
+    assert changes.deletes["scenes"] == ["s100"]
+    assert not changes.upserts["assets"] and not changes.deletes["assets"]
+    # An edit only changes the chunks around it
+    assert 0 < new.new_bytes < old.new_bytes / 5
+
+
+def test_capture_with_changed_keys_reuses_untouched_data():
+    project = make_project()
+    old = capture(project)
+    scripts = [dict(project.scripts[0], code="print('bye')")]
+    project.scripts = scripts
+    new = capture(project, previous=old, changed={"scripts": {"main"}})
+
+    assert new.collections["scenes"] is old.collections["scenes"]
+    assert new.collections["assets"] is old.collections["assets"]
+    assert diff(old, new).upserts["scripts"] == scripts
+
+
+def test_capture_with_changed_kind_and_empty_key_set():
+    project = make_project()
+    old = capture(project)
+    project.scenes = project.scenes[1:]
+    # A removal touches no remaining record: frozen forms are reused, the deletion is still seen
+    new = capture(project, previous=old, changed={"scenes": set()})
+    assert diff(old, new).deletes["scenes"] == ["s0"]
+    assert diff(old, capture(project, previous=old, changed=changed_kinds(["scenes"]))).deletes["scenes"] == ["s0"]
+
+
+def test_changed_helpers():
+    changes = ProjectChanges()
+    changes.upserts["scenes"] = [{"scene_id": "s1"}]
+    changes.deletes["assets"] = ["a1"]
+    assert changed_keys(changes) == {"scenes": {"s1"}, "assets": set()}
+    assert changed_kinds(["assets"]) == {"assets": None}
+
+
+def test_undo_redo():
+    project = make_project()
+    history = ProjectHistory()
+    history.reset(project)
+    original = state(project)
+
+    project.name = "Step 1"
+    assert history.checkpoint(project, "Rename")
+    project.scenes = project.scenes + [{"scene_id": "extra"}]
+    assert history.checkpoint(project, "Add Scene", {"scenes": {"extra"}})
+    after = state(project)
+    assert not history.checkpoint(project, "No-op")
+
+    assert history.undo_label() == "Add Scene"
+    changes = history.undo(project)
+    assert changes.deletes["scenes"] == ["extra"]
+    assert history.undo(project).project == {"name": "Demo"}
+    assert state(project) == original
+    assert history.undo(project) is None
+
+    assert history.redo_label() == "Rename"
+    history.redo(project)
+    history.redo(project)
+    assert state(project) == after
+    assert history.redo(project) is None
+
+
+def test_new_checkpoint_clears_redo():
+    project = make_project()
+    history = ProjectHistory()
+    history.reset(project)
+    project.name = "A"
+    history.checkpoint(project, "A")
+    history.undo(project)
+    assert history.can_redo()
+    project.name = "B"
+    history.checkpoint(project, "B")
+    assert not history.can_redo()
+
+
+def test_history_limits():
+    project = make_project(scene_count=20)
+    history = ProjectHistory(max_entries=5)
+    history.reset(project)
+    for i in range(10):
+        project.name = f"Name {i}"
+        history.checkpoint(project, f"Step {i}")
+    undos = 0
+    while history.undo(project) is not None:
+        undos += 1
+    assert undos == 4
+    assert project.name == "Name 5"
+
+    history = ProjectHistory(max_bytes=1)
+    history.reset(project)
+    project.scenes = [{"scene_id": "only"}]
+    history.checkpoint(project, "Replace Scenes")
+    assert not history.can_undo()
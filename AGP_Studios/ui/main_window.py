@@ -1,4 +1,5 @@
 from PyQt6.QtWidgets import QMainWindow, QTabWidget, QApplication, QMessageBox, QInputDialog
+from PyQt6.QtCore import QTimer
 from panels.dashboard_panel import DashboardPanel
 from panels.logs_panel import LogsPanel
 from panels.game_dev_panel import GameDevPanel
@@ -13,7 +14,12 @@ from services.speech_pipeline_service import SpeechPipelineService
 from services.auth_service import AuthService
 from services.game_project_manager import GameProjectManager
 from services.game_launcher import GameLauncher
+from services.download_scheduler import DownloadScheduler
+from services.game_store import GameStore
+from services.game_prefetcher import GamePrefetcher
+from services.event_journal import PlayerEventJournal
 from services.content_manager import ContentManager
+from services.content_cache import ContentCache
 from core.module_manager import ModuleManager
 
 def start_ui(rcore_client):
@@ -26,10 +32,15 @@ def start_ui(rcore_client):
     module_manager = ModuleManager(speech_pipeline)
     auth_service = AuthService(rcore_client)
     
-    # Initialize RaOS integration services
+    # Initialize RaOS integration services (sharing one local cache/memory budget, per account)
+    cache = ContentCache(scope=auth_service.account_key)
     game_project_manager = GameProjectManager(rcore_client, auth_service)
-    game_launcher = GameLauncher(rcore_client, auth_service)
-    content_manager = ContentManager(rcore_client, auth_service)
+    game_launcher = GameLauncher(rcore_client, auth_service, cache, GameStore())
+    # Held until a player logs in (startup dialog or web browser panel)
+    download_scheduler = DownloadScheduler(game_launcher, held=True)
+    game_prefetcher = GamePrefetcher(game_launcher)
+    event_journal = PlayerEventJournal(rcore_client, auth_service, cache)
+    content_manager = ContentManager(rcore_client, auth_service, cache)
 
     # Dashboard tab (existing)
     dashboard_vm = DashboardPanelViewModel(speech_pipeline)
@@ -42,7 +53,8 @@ def start_ui(rcore_client):
     tab_widget.addTab(game_dev_panel, "Game Dev (IDE)")
 
     # Game Player tab
-    game_player_panel = GamePlayerPanel(game_launcher)
+    game_player_panel = GamePlayerPanel(game_launcher, download_scheduler, game_prefetcher,
+                                        event_journal=event_journal)
     tab_widget.addTab(game_player_panel, "Game Player")
 
     # Web Browser tab
@@ -66,10 +78,23 @@ def start_ui(rcore_client):
     window.resize(1280, 800)
     window.show()
     
+    # Dispatch server-pushed events (project_modified, ...) that arrive between requests
+    event_timer = QTimer(window)
+    event_timer.timeout.connect(rcore_client.poll_events)
+    event_timer.start(250)
+    
     # Show authentication dialog on startup
     _show_auth_dialog(window, auth_service)
+    # Deliver player events recorded while offline
+    event_journal.flush_now()
     
     app.exec()
+    download_scheduler.stop()
+    game_prefetcher.stop()
+    game_player_panel.session_warmer.close()
+    event_journal.close()
+    # Save edits still inside the autosave debounce window
+    content_editor_panel.autosave.stop(flush=True)
 
 def _show_auth_dialog(parent, auth_service):
     """Show authentication dialog on startup."""